@@ -0,0 +1,30 @@
+"""
+Track progress and Celery task id on extraction jobs
+
+Revision ID: 2025_12_10_extraction_job_progress
+Revises: 2025_12_09_add_color_token_fields
+Create Date: 2025-12-10 10:00:00
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "2025_12_10_extraction_job_progress"
+down_revision = "2025_12_09_add_color_token_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "extraction_jobs",
+        sa.Column("progress", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.add_column("extraction_jobs", sa.Column("task_id", sa.String(length=155), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("extraction_jobs", "task_id")
+    op.drop_column("extraction_jobs", "progress")
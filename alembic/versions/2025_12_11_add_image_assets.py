@@ -0,0 +1,266 @@
+"""
+Add content-addressed image assets and move embedded project images out of description
+
+Revision ID: 2025_12_11_image_assets
+Revises: 2025_12_10_extraction_job_progress
+Create Date: 2025-12-11 10:00:00
+
+Project images used to be stored as base64 inside the JSON ``description``
+column. The upgrade writes each one (plus its thumbnail/preview variants) to
+the configured blob store, records an ``image_assets`` row and rewrites the
+description without the image; the downgrade reads the originals back and
+re-embeds them. The blob store is configured from the same storage
+environment (``STORAGE_BACKEND`` etc.) as the application.
+
+The blob layout, variant settings and description format are inlined as they
+were at this revision, so the migration does not depend on application code
+that may change after it.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "2025_12_11_image_assets"
+down_revision = "2025_12_10_extraction_job_progress"
+branch_labels = None
+depends_on = None
+
+# Longest edge in pixels per generated variant, and their encoding
+VARIANTS = {"thumbnail": 256, "preview": 1024}
+VARIANT_MEDIA_TYPE = "image/webp"
+VARIANT_QUALITY = 80
+
+projects = sa.table(
+    "projects",
+    sa.column("id", sa.Integer),
+    sa.column("description", sa.Text),
+    sa.column("image_asset_hash", sa.String),
+)
+assets = sa.table(
+    "image_assets",
+    sa.column("sha256", sa.String),
+    sa.column("media_type", sa.String),
+    sa.column("size_bytes", sa.Integer),
+    sa.column("width", sa.Integer),
+    sa.column("height", sa.Integer),
+    sa.column("variants", sa.Text),
+)
+
+
+class _BlobStore:
+    """Blob reads and writes in the application's storage layout.
+
+    Local: ``$LOCAL_STORAGE_PATH/blobs/<key[:2]>/<key>``; GCS: ``blobs/<key>``
+    in ``$GCS_BUCKET``. Blobs are immutable, so existing keys are left as is.
+    """
+
+    def __init__(self) -> None:
+        backend = os.getenv("STORAGE_BACKEND", "local").lower()
+        self.bucket: Any = None
+        self.root = Path(os.getenv("LOCAL_STORAGE_PATH", "./storage")) / "blobs"
+        if backend == "gcs":
+            bucket = os.getenv("GCS_BUCKET")
+            if not bucket:
+                raise RuntimeError("GCS_BUCKET must be set for the gcs storage backend")
+            from google.cloud import storage
+
+            client = storage.Client(project=os.getenv("GCS_PROJECT_ID") or None)
+            self.bucket = client.bucket(bucket)
+        elif backend != "local":
+            raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        if self.bucket is not None:
+            from google.api_core.exceptions import PreconditionFailed
+
+            try:
+                self.bucket.blob(f"blobs/{key}").upload_from_string(
+                    data, content_type=content_type, if_generation_match=0
+                )
+            except PreconditionFailed:
+                pass
+            return
+        path = self.root / key[:2] / key
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def read(self, key: str) -> bytes | None:
+        if self.bucket is not None:
+            from google.api_core.exceptions import NotFound
+
+            try:
+                data: bytes = self.bucket.blob(f"blobs/{key}").download_as_bytes()
+                return data
+            except NotFound:
+                return None
+        path = self.root / key[:2] / key
+        return path.read_bytes() if path.exists() else None
+
+
+def _render_variants(data: bytes) -> tuple[int | None, int | None, dict[str, bytes]]:
+    """(width, height, WebP variants); images Pillow cannot open get neither."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            source = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA")
+            variants = {}
+            for name, edge in VARIANTS.items():
+                variant = source.copy()
+                variant.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                variant.save(buffer, format="WEBP", quality=VARIANT_QUALITY)
+                variants[name] = buffer.getvalue()
+            return img.width, img.height, variants
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None, None, {}
+
+
+def _decode_image_base64(image_base64: str) -> bytes:
+    payload = image_base64.split(",", 1)[1] if image_base64.startswith("data:") else image_base64
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid base64 image payload") from e
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_assets",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("media_type", sa.String(length=100), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("variants", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.add_column(sa.Column("image_asset_hash", sa.String(length=64), nullable=True))
+        batch_op.create_index("ix_projects_image_asset_hash", ["image_asset_hash"])
+        batch_op.create_foreign_key(
+            "fk_projects_image_asset_hash", "image_assets", ["image_asset_hash"], ["sha256"]
+        )
+
+    _move_embedded_images()
+
+
+def _move_embedded_images() -> None:
+    conn = op.get_bind()
+    store = None
+    stored: set[str] = set()
+    rows = conn.execute(
+        sa.select(projects.c.id, projects.c.description).where(
+            projects.c.description.like('%"image_base64"%')
+        )
+    ).all()
+    for project_id, description in rows:
+        try:
+            payload = json.loads(description)
+            image_base64 = payload.pop("image_base64")
+            data = _decode_image_base64(image_base64)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+        media_type = payload.pop("image_media_type", None) or "image/png"
+
+        sha256 = hashlib.sha256(data).hexdigest()
+        if sha256 not in stored:
+            store = store or _BlobStore()
+            width, height, variants = _render_variants(data)
+            store.put(sha256, data, media_type)
+            for name, variant in variants.items():
+                store.put(f"{sha256}.{name}", variant, VARIANT_MEDIA_TYPE)
+            conn.execute(
+                sa.insert(assets).values(
+                    sha256=sha256,
+                    media_type=media_type,
+                    size_bytes=len(data),
+                    width=width,
+                    height=height,
+                    variants=json.dumps(sorted(variants)),
+                )
+            )
+            stored.add(sha256)
+
+        if set(payload) <= {"text"}:
+            new_description = payload.get("text")
+        else:
+            new_description = json.dumps(payload)
+        conn.execute(
+            sa.update(projects)
+            .where(projects.c.id == project_id)
+            .values(description=new_description, image_asset_hash=sha256)
+        )
+
+
+def _embed_images() -> None:
+    """Put each project's image back into its description as base64."""
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(
+            projects.c.id, projects.c.description, assets.c.sha256, assets.c.media_type
+        ).select_from(projects.join(assets, projects.c.image_asset_hash == assets.c.sha256))
+    ).all()
+    store = _BlobStore() if rows else None
+    images: dict[str, str] = {}
+    for project_id, description, sha256, media_type in rows:
+        if sha256 not in images:
+            data = store.read(sha256) if store else None
+            if data is None:
+                raise RuntimeError(
+                    f"Image {sha256} of project {project_id} is missing from the blob store; "
+                    "restore it before downgrading"
+                )
+            images[sha256] = base64.b64encode(data).decode("ascii")
+
+        # Same JSON shape the description had before this revision
+        payload: dict[str, Any] = {}
+        if description:
+            try:
+                decoded = json.loads(description)
+            except json.JSONDecodeError:
+                decoded = None
+            if isinstance(decoded, dict):
+                payload.update(decoded)
+            else:
+                payload["text"] = description
+        payload["image_base64"] = images[sha256]
+        payload["image_media_type"] = media_type
+        conn.execute(
+            sa.update(projects)
+            .where(projects.c.id == project_id)
+            .values(description=json.dumps(payload))
+        )
+
+
+def downgrade() -> None:
+    # Images stay in the blob store; projects get an embedded copy back
+    _embed_images()
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.drop_constraint("fk_projects_image_asset_hash", type_="foreignkey")
+        batch_op.drop_index("ix_projects_image_asset_hash")
+        batch_op.drop_column("image_asset_hash")
+    op.drop_table("image_assets")
@@ -0,0 +1,169 @@
+"""Benchmark the pre-send image optimization for AI vision calls.
+
+Usage:
+    python scripts/benchmark_ai_image_payloads.py [--images test_images/*.jpeg]
+    python scripts/benchmark_ai_image_payloads.py --live --purposes color
+
+Offline, each image is optimized for each purpose and the table reports bytes
+before/after, encode time and color fidelity: the mean CIE76 Delta-E between
+the original and the optimized image on a common 128x128 area-averaged grid
+(below 2.0 is not noticeable). --cv-palette also compares CV palettes (slow).
+
+--live calls the real AI extractors once with optimization off and once on and
+reports end-to-end latency, provider tokens and the palette Delta-E between the
+two runs (needs ANTHROPIC_API_KEY / OPENAI_API_KEY and costs API credits).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from copy_that.application.color_utils import calculate_delta_e
+from copy_that.infrastructure.ai import (
+    VISION_PROFILES,
+    VisionImageOptimizer,
+    get_ai_client_pool,
+    optimize_vision_image,
+    set_vision_image_optimizer,
+)
+
+GRID = (128, 128)
+
+
+def _lab_grid(data: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    small = cv2.resize(image, GRID, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small.astype(np.float32) / 255.0, cv2.COLOR_BGR2Lab)
+
+
+def color_error(original: bytes, optimized: bytes) -> float:
+    """Mean per-cell Delta-E (CIE76) between two encodings of one image."""
+    return float(np.linalg.norm(_lab_grid(original) - _lab_grid(optimized), axis=2).mean())
+
+
+def palette_error(original: list[str], other: list[str]) -> float:
+    """Mean Delta-E from each original palette color to its closest counterpart."""
+    if not original or not other:
+        return float("nan")
+    return sum(min(calculate_delta_e(a, b) for b in other) for a in original) / len(original)
+
+
+def run_offline(paths: list[str], purposes: list[str], cv_palette: bool) -> None:
+    print(
+        f"{'image':<16} {'purpose':<11} {'orig KB':>8} {'sent KB':>8} {'saved':>6} "
+        f"{'size':>10} {'type':<10} {'enc ms':>7} {'dE':>5}"
+        + (f" {'pal dE':>7}" if cv_palette else "")
+    )
+    totals = {"original": 0, "sent": 0}
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        for purpose in purposes:
+            profile = VISION_PROFILES[purpose]
+            start = time.perf_counter()
+            payload = optimize_vision_image(
+                data, "image/jpeg", profile.max_edge, profile.max_pixels
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            sent = base64.b64decode(payload["data"])
+            totals["original"] += len(data)
+            totals["sent"] += len(sent)
+            line = (
+                f"{path.rsplit('/', 1)[-1]:<16} {purpose:<11} {len(data) / 1024:>8.0f} "
+                f"{len(sent) / 1024:>8.0f} {1 - len(sent) / len(data):>6.0%} "
+                f"{payload['width']}x{payload['height']:<5} {payload['media_type']:<10} "
+                f"{elapsed:>7.0f} {color_error(data, sent):>5.2f}"
+            )
+            if cv_palette:
+                from copy_that.application.cv.color_cv_extractor import CVColorExtractor
+
+                before = [c.hex for c in CVColorExtractor().extract_from_bytes(data).colors]
+                after = [c.hex for c in CVColorExtractor().extract_from_bytes(sent).colors]
+                line += f" {palette_error(before, after):>7.2f}"
+            print(line)
+    saved = 1 - totals["sent"] / totals["original"] if totals["original"] else 0.0
+    print(
+        f"\ntotal: {totals['original'] / 1024:.0f} KB -> {totals['sent'] / 1024:.0f} KB "
+        f"({saved:.0%} saved)"
+    )
+
+
+async def _extract(purpose: str, image_base64: str):
+    if purpose == "color":
+        from copy_that.application.color_extractor import AIColorExtractor
+
+        return await AIColorExtractor().extract_colors_from_base64(image_base64, "image/jpeg")
+    if purpose == "spacing":
+        from copy_that.application.spacing_extractor import AISpacingExtractor
+
+        return await AISpacingExtractor().extract_spacing_from_base64(image_base64, "image/jpeg")
+    if purpose == "shadow":
+        from copy_that.application.ai_shadow_extractor import AIShadowExtractor
+
+        return await AIShadowExtractor().extract_shadows(
+            base64_image=image_base64, media_type="image/jpeg"
+        )
+    from copy_that.application.ai_typography_extractor import AITypographyExtractor
+
+    return await AITypographyExtractor().extract_typography_from_base64(image_base64, "image/jpeg")
+
+
+def _tokens() -> int:
+    providers = get_ai_client_pool().stats()["providers"].values()
+    return sum(p["input_tokens"] for p in providers)
+
+
+async def run_live(paths: list[str], purposes: list[str]) -> None:
+    print(
+        f"{'image':<16} {'purpose':<11} {'off s':>7} {'on s':>7} {'change':>7} "
+        f"{'off tok':>8} {'on tok':>8} {'pal dE':>7}"
+    )
+    for path in paths:
+        with open(path, "rb") as f:
+            image_base64 = base64.b64encode(f.read()).decode("ascii")
+        for purpose in purposes:
+            runs = {}
+            for enabled in (False, True):
+                set_vision_image_optimizer(VisionImageOptimizer(enabled=enabled))
+                tokens_before = _tokens()
+                start = time.perf_counter()
+                result = await _extract(purpose, image_base64)
+                runs[enabled] = (time.perf_counter() - start, _tokens() - tokens_before, result)
+            (off_s, off_tok, off_result), (on_s, on_tok, on_result) = runs[False], runs[True]
+            parity = float("nan")
+            if purpose == "color":
+                parity = palette_error(
+                    [c.hex for c in off_result.colors], [c.hex for c in on_result.colors]
+                )
+            print(
+                f"{path.rsplit('/', 1)[-1]:<16} {purpose:<11} {off_s:>7.2f} {on_s:>7.2f} "
+                f"{on_s / off_s - 1:>+7.0%} {off_tok:>8} {on_tok:>8} {parity:>7.2f}"
+            )
+    set_vision_image_optimizer(None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark AI image payload optimization.")
+    parser.add_argument("--images", nargs="+", default=sorted(glob.glob("test_images/*.jpeg")))
+    parser.add_argument(
+        "--purposes", nargs="+", choices=sorted(VISION_PROFILES), default=sorted(VISION_PROFILES)
+    )
+    parser.add_argument("--cv-palette", action="store_true", help="Also compare CV palettes")
+    parser.add_argument("--live", action="store_true", help="Call the AI extractors (costs API)")
+    args = parser.parse_args()
+
+    if args.live:
+        asyncio.run(run_live(args.images, args.purposes))
+    else:
+        run_offline(args.images, args.purposes, args.cv_palette)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark ColorAggregator.aggregate_batch: indexed ΔE matching vs the linear scan.
+
+Usage:
+    python scripts/benchmark_color_aggregator.py --sizes 1000 10000 100000
+
+The linear baseline (one ColorAide ΔE call per existing token) is only run up to
+--linear-max tokens; beyond that it takes hours.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from copy_that.application.color_extractor import ExtractedColorToken
+from copy_that.application.color_utils import calculate_delta_e
+from copy_that.constants import DEFAULT_DELTA_E_THRESHOLD
+from copy_that.tokens.color.aggregator import AggregatedColorToken, ColorAggregator
+
+
+def make_batch(total: int, per_image: int, seed: int) -> list[list[ExtractedColorToken]]:
+    """Random session: images share a palette of base colors plus per-image jitter."""
+    rng = random.Random(seed)
+    bases = [[rng.randint(0, 255) for _ in range(3)] for _ in range(max(1, total // 10))]
+    batch: list[list[ExtractedColorToken]] = []
+    for start in range(0, total, per_image):
+        colors = []
+        for _ in range(min(per_image, total - start)):
+            rgb = [max(0, min(255, c + rng.randint(-6, 6))) for c in rng.choice(bases)]
+            hx = "#{:02X}{:02X}{:02X}".format(*rgb)
+            colors.append(
+                ExtractedColorToken(
+                    hex=hx,
+                    rgb=f"rgb({rgb[0]}, {rgb[1]}, {rgb[2]})",
+                    name=hx,
+                    confidence=round(rng.uniform(0.3, 1.0), 3),
+                )
+            )
+        batch.append(colors)
+    return batch
+
+
+def linear_aggregate(
+    colors_batch: list[list[ExtractedColorToken]], threshold: float
+) -> list[AggregatedColorToken]:
+    """The pre-index greedy scan, kept here as the reference implementation."""
+    tokens: list[AggregatedColorToken] = []
+    for image_index, image_colors in enumerate(colors_batch):
+        image_id = f"image_{image_index}"
+        for source in image_colors:
+            match = next(
+                (t for t in tokens if calculate_delta_e(source.hex, t.hex) < threshold), None
+            )
+            if match:
+                match.update_from_source(source, image_id)
+            else:
+                token = AggregatedColorToken(
+                    hex=source.hex, rgb=source.rgb, name=source.name, confidence=source.confidence
+                )
+                token.add_provenance(image_id, source.confidence)
+                tokens.append(token)
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark color aggregation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--per-image", type=int, default=20, help="Colors per image")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_DELTA_E_THRESHOLD)
+    parser.add_argument("--linear-max", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>8} {'unique':>8} {'indexed (s)':>12} {'linear (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        batch = make_batch(size, args.per_image, args.seed)
+
+        start = time.perf_counter()
+        library = ColorAggregator.aggregate_batch(batch, args.threshold)
+        indexed = time.perf_counter() - start
+
+        linear_text, speedup_text = "skipped", "-"
+        if size <= args.linear_max:
+            start = time.perf_counter()
+            reference = linear_aggregate(batch, args.threshold)
+            linear = time.perf_counter() - start
+            assert [t.hex for t in reference] == [t.hex for t in library.tokens]
+            linear_text, speedup_text = f"{linear:.2f}", f"{linear / indexed:.1f}x"
+
+        print(
+            f"{size:>8} {len(library.tokens):>8} {indexed:>12.2f} {linear_text:>12} "
+            f"{speedup_text:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Compare per-type and combined AI extraction on latency, uploads and cost.
+
+Usage:
+    python scripts/benchmark_multi_extract_modes.py [--time-scale 0.1]
+    python scripts/benchmark_multi_extract_modes.py --record --image test_images/IMG_8405.jpeg
+
+By default the AI providers are replaced by a stub that replays recorded
+responses (tests/fixtures/ai_responses/multi_extract.json) with their recorded
+latency, so the real extractors and parsers run without network access or API
+cost. Per-type mode runs the color, spacing, shadow and typography extractors
+concurrently, as ``/extract/stream`` does; combined mode makes one streamed call
+and reports when each section became available.
+
+--record calls the real APIs once per mode and overwrites the recording with
+the responses, token usage and latencies observed (needs OPENAI_API_KEY and
+ANTHROPIC_API_KEY and costs API credits).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from anthropic.types import Message
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from copy_that.application.ai_shadow_extractor import AIShadowExtractor
+from copy_that.application.ai_typography_extractor import AITypographyExtractor
+from copy_that.application.combined_ai_extractor import CombinedAIExtractor
+from copy_that.application.openai_color_extractor import OpenAIColorExtractor
+from copy_that.application.spacing_extractor import AISpacingExtractor
+from copy_that.infrastructure.ai import (
+    VISION_PROFILES,
+    AIClientPool,
+    prepare_vision_image,
+    set_ai_client_pool,
+)
+
+RECORDING = Path(__file__).parents[1] / "tests" / "fixtures" / "ai_responses" / "multi_extract.json"
+DEFAULT_IMAGE = Path(__file__).parents[1] / "tests" / "fixtures" / "test_image.png"
+
+# USD per million (input, output) tokens at list price; adjust to your contract
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-opus-4-1-20250805": (15.00, 75.00),
+    "claude-sonnet-4-5-20250929": (3.00, 15.00),
+}
+STREAM_CHUNKS = 200
+
+
+@dataclass
+class CallLog:
+    name: str
+    model: str
+    upload_bytes: int
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        price_in, price_out = PRICES.get(self.model, (0.0, 0.0))
+        return (self.input_tokens * price_in + self.output_tokens * price_out) / 1_000_000
+
+
+def call_name(provider: str, kwargs: dict[str, Any]) -> str:
+    """Which extractor made a call, from its request."""
+    if provider == "anthropic":
+        return "shadow" if kwargs.get("tools") else "typography"
+    if kwargs.get("stream"):
+        return "combined"
+    prompt = json.dumps(kwargs["messages"])
+    return "spacing" if "spacing system" in prompt else "color"
+
+
+def upload_bytes(kwargs: dict[str, Any]) -> int:
+    """Size of the base64 image data in a request."""
+    total = 0
+    for message in kwargs["messages"]:
+        for part in message["content"]:
+            if part.get("type") == "image_url":
+                total += len(part["image_url"]["url"])
+            elif part.get("type") == "image":
+                total += len(part["source"].get("data", ""))
+    return total
+
+
+def _usage(usage: Any) -> tuple[int, int]:
+    if usage is None:
+        return 0, 0
+    if hasattr(usage, "prompt_tokens"):
+        return usage.prompt_tokens, usage.completion_tokens
+    return usage.input_tokens, usage.output_tokens
+
+
+class _StubPool:
+    """Stand-in for the AI client pool; subclasses implement ``_create``."""
+
+    def __init__(self) -> None:
+        self.log: list[CallLog] = []
+
+    def openai(self, api_key: str | None = None) -> Any:
+        create = partial(self._create, "openai", api_key)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    def anthropic(self, api_key: str | None = None) -> Any:
+        return SimpleNamespace(
+            messages=SimpleNamespace(create=partial(self._create, "anthropic", api_key))
+        )
+
+    async def _create(self, provider: str, api_key: str | None, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+
+class ReplayPool(_StubPool):
+    """Answers every call with its recorded response after its recorded latency."""
+
+    def __init__(self, calls: dict[str, Any], time_scale: float):
+        super().__init__()
+        self.calls = calls
+        self.time_scale = time_scale
+
+    async def _create(self, provider: str, api_key: str | None, **kwargs: Any) -> Any:
+        name = call_name(provider, kwargs)
+        call = self.calls[name]
+        entry = CallLog(name, kwargs["model"], upload_bytes(kwargs))
+        self.log.append(entry)
+        if kwargs.get("stream"):
+            entry.input_tokens, entry.output_tokens = _usage(SimpleNamespace(**call["usage"]))
+            return self._replay_stream(call)
+        response_type = ChatCompletion if provider == "openai" else Message
+        response = response_type.model_validate(call["response"])
+        entry.input_tokens, entry.output_tokens = _usage(response.usage)
+        await asyncio.sleep(call["latency_s"] * self.time_scale)
+        return response
+
+    async def _replay_stream(self, call: dict[str, Any]):
+        """Recorded content in even chunks between first token and completion."""
+        content = call["content"]
+        size = max(1, math.ceil(len(content) / STREAM_CHUNKS))
+        pieces = [content[i : i + size] for i in range(0, len(content), size)]
+        await asyncio.sleep(call["first_token_s"] * self.time_scale)
+        step = (call["latency_s"] - call["first_token_s"]) / len(pieces) * self.time_scale
+        for piece in pieces:
+            yield ChatCompletionChunk.model_validate(
+                {
+                    "id": "chatcmpl-replay",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": call["model"],
+                    "choices": [{"index": 0, "delta": {"content": piece}}],
+                }
+            )
+            await asyncio.sleep(step)
+
+
+class RecordingPool(_StubPool):
+    """Forwards calls to the real pool and keeps their responses and timing."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pool = AIClientPool.from_env()
+        self.calls: dict[str, Any] = {}
+
+    async def _create(self, provider: str, api_key: str | None, **kwargs: Any) -> Any:
+        name = call_name(provider, kwargs)
+        entry = CallLog(name, kwargs["model"], upload_bytes(kwargs))
+        self.log.append(entry)
+        client = getattr(self.pool, provider)(api_key)
+        create = client.chat.completions.create if provider == "openai" else client.messages.create
+        started = time.perf_counter()
+        response = await create(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(name, entry, response, started)
+        entry.input_tokens, entry.output_tokens = _usage(response.usage)
+        self.calls[name] = {
+            "provider": provider,
+            "latency_s": round(time.perf_counter() - started, 2),
+            "response": response.model_dump(mode="json"),
+        }
+        return response
+
+    async def _record_stream(self, name: str, entry: CallLog, stream: Any, started: float):
+        content, first_token, usage = "", None, None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                first_token = first_token or time.perf_counter() - started
+                content += chunk.choices[0].delta.content
+            usage = chunk.usage or usage
+            yield chunk
+        entry.input_tokens, entry.output_tokens = _usage(usage)
+        self.calls[name] = {
+            "provider": "openai",
+            "stream": True,
+            "model": entry.model,
+            "first_token_s": round(first_token or 0.0, 2),
+            "latency_s": round(time.perf_counter() - started, 2),
+            "content": content,
+            "usage": usage.model_dump(mode="json") if usage else {},
+        }
+
+
+async def run_per_type(image_b64: str, media_type: str) -> dict[str, float]:
+    """Section name -> seconds until its result was ready."""
+    started = time.perf_counter()
+    ready: dict[str, float] = {}
+
+    async def timed(name: str, call: Any) -> None:
+        await call
+        ready[name] = time.perf_counter() - started
+
+    await asyncio.gather(
+        timed(
+            "color", OpenAIColorExtractor().extract_colors_from_base64(image_b64, media_type, 12)
+        ),
+        timed(
+            "spacing", AISpacingExtractor().extract_spacing_from_base64(image_b64, media_type, 20)
+        ),
+        timed(
+            "shadow",
+            AIShadowExtractor().extract_shadows(base64_image=image_b64, media_type=media_type),
+        ),
+        timed(
+            "typography",
+            AITypographyExtractor().extract_typography_from_base64(image_b64, media_type, 15),
+        ),
+    )
+    return ready
+
+
+async def run_combined(image_b64: str, media_type: str) -> dict[str, float]:
+    started = time.perf_counter()
+    ready: dict[str, float] = {}
+    async for section, _ in CombinedAIExtractor().stream_sections(image_b64, media_type):
+        ready[section] = time.perf_counter() - started
+    return ready
+
+
+def report(mode: str, ready: dict[str, float], log: list[CallLog], time_scale: float) -> None:
+    scale = 1 / time_scale if time_scale else 1.0
+    sections = ", ".join(f"{name} {seconds * scale:.1f}s" for name, seconds in ready.items())
+    print(f"\n{mode}")
+    print(
+        f"  first section: {min(ready.values()) * scale:.1f}s   all sections: {max(ready.values()) * scale:.1f}s"
+    )
+    print(f"  sections ready: {sections}")
+    print(
+        f"  calls: {len(log)}   image upload: {sum(c.upload_bytes for c in log) / 1024:.0f} KB   "
+        f"tokens in/out: {sum(c.input_tokens for c in log)}/{sum(c.output_tokens for c in log)}   "
+        f"cost: ${sum(c.cost for c in log):.4f}"
+    )
+    for call in log:
+        print(
+            f"    {call.name:<11} {call.model:<28} {call.upload_bytes / 1024:>6.0f} KB "
+            f"{call.input_tokens:>7} in {call.output_tokens:>6} out  ${call.cost:.4f}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    image = args.image.read_bytes()
+    media_type = "image/png" if args.image.suffix.lower() == ".png" else "image/jpeg"
+    image_b64 = base64.b64encode(image).decode("ascii")
+    recording = json.loads(args.recording.read_text())
+    time_scale = 1.0 if args.record else args.time_scale
+
+    # Optimize the image for every purpose up front so only the AI calls are timed
+    for purpose in VISION_PROFILES:
+        await prepare_vision_image(image_b64, media_type, purpose)
+
+    recorded: dict[str, Any] = {}
+    for mode, run in (("per-type", run_per_type), ("combined", run_combined)):
+        pool = RecordingPool() if args.record else ReplayPool(recording["calls"], time_scale)
+        set_ai_client_pool(pool)  # type: ignore[arg-type]
+        try:
+            ready = await run(image_b64, media_type)
+        finally:
+            set_ai_client_pool(None)
+        report(mode, ready, pool.log, time_scale)
+        if isinstance(pool, RecordingPool):
+            recorded.update(pool.calls)
+            await pool.pool.aclose()
+
+    if args.record:
+        recording = {"source": f"Recorded from {args.image.name}", "calls": recorded}
+        args.recording.write_text(json.dumps(recording, indent=2) + "\n")
+        print(f"\nrecording written to {args.recording}")
+    else:
+        print(f"\nreplayed: {recording['source']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-type and combined AI extraction.")
+    parser.add_argument("--image", type=Path, default=DEFAULT_IMAGE)
+    parser.add_argument("--recording", type=Path, default=RECORDING)
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.1,
+        help="Replay recorded latencies at this fraction of real time (reported unscaled)",
+    )
+    parser.add_argument("--record", action="store_true", help="Call the real APIs and re-record")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
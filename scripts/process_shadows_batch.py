@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Batch Shadow Processing
+
+Runs the 5-stage shadow pipeline over a directory or manifest of images with
+shared warm models, cross-image batched inference and resumable JSONL output.
+
+Usage:
+    python scripts/process_shadows_batch.py screenshots/ --output out/shadows
+    python scripts/process_shadows_batch.py manifest.jsonl --output out/shadows --artifacts
+
+Re-run with the same --output to resume after an interruption.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from copy_that.shadowlab.batch import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
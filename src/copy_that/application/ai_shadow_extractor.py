@@ -1,10 +1,15 @@
 """AI-powered shadow extraction service using Claude Sonnet 4.5"""
 
+import contextlib
+import json
 import logging
+from collections.abc import AsyncIterator, Callable
 
-import anthropic
 from pydantic import BaseModel, Field
 
+from copy_that.application.json_stream import JSONObjectStream
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image, stream_tool_input
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,14 +51,15 @@ class AIShadowExtractor:
     """Extract shadows from UI images using Claude Sonnet 4.5 with vision"""
 
     def __init__(self, api_key: str | None = None):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_ai_client_pool().anthropic(api_key)
         self.model = "claude-opus-4-1-20250805"
 
-    def extract_shadows(
+    async def extract_shadows(
         self,
         image_url: str | None = None,
         base64_image: str | None = None,
         media_type: str = "image/png",
+        on_token: Callable[[ExtractedShadowToken], None] | None = None,
     ) -> ShadowExtractionResult:
         """
         Extract shadows from an image using Claude vision.
@@ -62,6 +68,8 @@ class AIShadowExtractor:
             image_url: HTTP URL to image
             base64_image: Base64-encoded image data
             media_type: Media type (image/png, image/jpeg, etc.)
+            on_token: If given, the tool call is streamed and each shadow is
+                passed to it as soon as its JSON object closes
 
         Returns:
             ShadowExtractionResult with detected shadows
@@ -79,21 +87,23 @@ class AIShadowExtractor:
                     "source": {"type": "url", "url": image_url},
                 }
             elif base64_image:
+                image_data, image_type = await prepare_vision_image(
+                    base64_image, media_type, "shadow"
+                )
                 image_content = {
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": media_type,
-                        "data": base64_image,
+                        "media_type": image_type,
+                        "data": image_data,
                     },
                 }
 
             # Call Claude with tool_use for structured outputs
-
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                tools=[
+            request = {
+                "model": self.model,
+                "max_tokens": 4096,
+                "tools": [
                     {
                         "name": "extract_shadows",
                         "description": "Extract shadow tokens from UI image",
@@ -164,7 +174,7 @@ class AIShadowExtractor:
                         },
                     }
                 ],
-                messages=[
+                "messages": [
                     {
                         "role": "user",
                         "content": [
@@ -198,7 +208,14 @@ If no shadows detected, return an empty shadows array.""",
                         ],
                     }
                 ],
-            )
+            }
+
+            if on_token is not None:
+                result = self._parse_shadow_payload(await self._stream_shadows(request, on_token))
+                logger.info(f"Streamed {result.shadow_count} shadows")
+                return result
+
+            response = await self.client.messages.create(**request)
 
             # Parse tool use response
             if not response.content:
@@ -227,30 +244,10 @@ If no shadows detected, return an empty shadows array.""",
             data = tool_use.input
             logger.info(f"Tool use input type: {type(data)}, data: {str(data)[:200]}")
 
-            # Validate and convert
-            shadows = []
-            total_confidence = 0.0
-
-            for shadow_data in data.get("shadows", []):
-                try:
-                    shadow = ExtractedShadowToken(**shadow_data)
-                    shadows.append(shadow)
-                    total_confidence += shadow.confidence
-                except Exception as e:
-                    logger.warning(f"Failed to parse shadow: {e}")
-                    continue
-
-            avg_confidence = total_confidence / len(shadows) if shadows else 0.0
-
-            result = ShadowExtractionResult(
-                shadows=shadows,
-                shadow_count=len(shadows),
-                extraction_confidence=avg_confidence,
-                extractor_used="ai_claude_sonnet",
-            )
-
+            result = self._parse_shadow_payload(data)
             logger.info(
-                f"Extracted {len(shadows)} shadows with avg confidence {avg_confidence:.2f}"
+                f"Extracted {result.shadow_count} shadows with avg confidence "
+                f"{result.extraction_confidence:.2f}"
             )
             return result
 
@@ -258,13 +255,69 @@ If no shadows detected, return an empty shadows array.""",
             logger.exception(f"Shadow extraction failed: {e}")
             return ShadowExtractionResult(shadow_count=0, extraction_confidence=0.0)
 
-    def extract_shadows_streaming(
+    async def _stream_shadows(
+        self, request: dict, on_token: Callable[[ExtractedShadowToken], None]
+    ) -> dict:
+        """Stream the tool call, handing each completed shadow to ``on_token``; return its input"""
+        parser = JSONObjectStream(items=[("shadows",)])
+        parts = []
+        stream = await self.client.messages.create(**request, stream=True)
+        async with contextlib.aclosing(stream_tool_input(stream)) as chunks:
+            async for text in chunks:
+                parts.append(text)
+                for path, shadow_data in parser.feed(text):
+                    shadow = self._parse_shadow(shadow_data) if len(path) == 2 else None
+                    if shadow is not None:
+                        on_token(shadow)
+        if not parts:
+            logger.warning("No tool input streamed by Claude shadow extractor")
+            return {}
+        return json.loads("".join(parts))
+
+    @staticmethod
+    def is_fallback(result: ShadowExtractionResult) -> bool:
+        """True for empty results: a failed call and a shadowless answer look alike"""
+        return result.shadow_count == 0
+
+    @staticmethod
+    def _parse_shadow(shadow_data: dict) -> ExtractedShadowToken | None:
+        """Validate one shadow from the model, or None if it is unusable"""
+        try:
+            return ExtractedShadowToken(**shadow_data)
+        except Exception as e:
+            logger.warning(f"Failed to parse shadow: {e}")
+            return None
+
+    @staticmethod
+    def _parse_shadow_payload(
+        data: dict, extractor_used: str = "ai_claude_sonnet"
+    ) -> ShadowExtractionResult:
+        """Validate the model's ``{"shadows": [...]}`` payload into a result"""
+        shadows = []
+        total_confidence = 0.0
+
+        for shadow_data in data.get("shadows") or []:
+            shadow = AIShadowExtractor._parse_shadow(shadow_data)
+            if shadow is not None:
+                shadows.append(shadow)
+                total_confidence += shadow.confidence
+
+        avg_confidence = total_confidence / len(shadows) if shadows else 0.0
+
+        return ShadowExtractionResult(
+            shadows=shadows,
+            shadow_count=len(shadows),
+            extraction_confidence=avg_confidence,
+            extractor_used=extractor_used,
+        )
+
+    async def extract_shadows_streaming(
         self,
         image_url: str | None = None,
         base64_image: str | None = None,
         media_type: str = "image/png",
-    ):
+    ) -> AsyncIterator[ShadowExtractionResult]:
         """Streaming version of shadow extraction (yields partial results)"""
         # For now, just call the batch version
         # TODO: Implement actual streaming
-        yield self.extract_shadows(image_url, base64_image, media_type)
+        yield await self.extract_shadows(image_url, base64_image, media_type)
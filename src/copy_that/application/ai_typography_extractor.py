@@ -1,13 +1,16 @@
 """AI-powered typography extraction service using Claude Sonnet 4.5"""
 
+import asyncio
 import base64
 import logging
 from pathlib import Path
 
 import anthropic
-import requests
 from pydantic import BaseModel, Field
 
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -100,10 +103,10 @@ class AITypographyExtractor:
         Args:
             api_key: Anthropic API key. If not provided, uses ANTHROPIC_API_KEY env var
         """
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_ai_client_pool().anthropic(api_key)
         self.model = "claude-sonnet-4-5-20250929"
 
-    def extract_typography_from_image_url(
+    async def extract_typography_from_image_url(
         self, image_url: str, max_tokens: int = 15
     ) -> TypographyExtractionResult:
         """Extract typography from an image URL
@@ -116,21 +119,20 @@ class AITypographyExtractor:
             TypographyExtractionResult with extracted typography
 
         Raises:
-            requests.RequestException: If image URL is invalid
+            ImageFetchError: If the image URL is unsafe or cannot be downloaded
             anthropic.APIError: If Claude API call fails
         """
-        # Download image and convert to base64
+        # Download through the shared fetcher (URL checks, size cap, cache)
         try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-        except requests.RequestException as e:
+            image = await get_image_fetcher().fetch(image_url)
+        except ImageFetchError as e:
             logger.error("Failed to download image: %s", str(e))
             raise
 
-        image_data = base64.standard_b64encode(response.content).decode("utf-8")
+        image_data = image.base64
 
         # Determine media type from response headers
-        content_type = response.headers.get("content-type", "image/jpeg").lower()
+        content_type = image.content_type.lower()
         if "png" in content_type:
             media_type = "image/png"
         elif "webp" in content_type:
@@ -140,9 +142,9 @@ class AITypographyExtractor:
         else:
             media_type = "image/jpeg"
 
-        return self.extract_typography_from_base64(image_data, media_type, max_tokens)
+        return await self.extract_typography_from_base64(image_data, media_type, max_tokens)
 
-    def extract_typography_from_file(
+    async def extract_typography_from_file(
         self, file_path: str, max_tokens: int = 15
     ) -> TypographyExtractionResult:
         """Extract typography from a local image file
@@ -174,12 +176,12 @@ class AITypographyExtractor:
         media_type = media_types.get(suffix, "image/jpeg")
 
         # Read and encode image
-        with open(file_path, "rb") as f:
-            image_data = base64.standard_b64encode(f.read()).decode("utf-8")
+        image_bytes = await asyncio.to_thread(file_path.read_bytes)
+        image_data = base64.standard_b64encode(image_bytes).decode("utf-8")
 
-        return self.extract_typography_from_base64(image_data, media_type, max_tokens)
+        return await self.extract_typography_from_base64(image_data, media_type, max_tokens)
 
-    def extract_typography_from_base64(
+    async def extract_typography_from_base64(
         self, image_data: str, media_type: str, max_tokens: int = 15
     ) -> TypographyExtractionResult:
         """Extract typography from base64-encoded image data
@@ -228,8 +230,10 @@ Also provide:
 
 Important: Be specific about font family names. Analyze the design intent of each typography style."""
 
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "typography")
+
         try:
-            message = self.client.messages.create(
+            message = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2000,
                 messages=[
@@ -385,32 +389,7 @@ Important: Be specific about font family names. Analyze the design intent of eac
         # If we didn't extract any tokens, create reasonable defaults
         if not tokens:
             logger.warning("No typography parsed from response, using fallback tokens")
-            tokens = [
-                ExtractedTypographyToken(
-                    font_family="System",
-                    font_weight=700,
-                    font_size=32,
-                    line_height=1.2,
-                    semantic_role="heading",
-                    confidence=0.5,
-                    extraction_metadata={
-                        "model": self.model,
-                        "extraction_source": "fallback",
-                    },
-                ),
-                ExtractedTypographyToken(
-                    font_family="System",
-                    font_weight=400,
-                    font_size=16,
-                    line_height=1.6,
-                    semantic_role="body",
-                    confidence=0.5,
-                    extraction_metadata={
-                        "model": self.model,
-                        "extraction_source": "fallback",
-                    },
-                ),
-            ]
+            tokens = self._fallback_tokens()
 
         return TypographyExtractionResult(
             tokens=tokens[:max_tokens],
@@ -421,9 +400,101 @@ Important: Be specific about font family names. Analyze the design intent of eac
             extractor_used=self.model,
         )
 
+    def _parse_typography_payload(
+        self, payload: dict, max_tokens: int
+    ) -> TypographyExtractionResult:
+        """Parse a JSON typography payload (``{"tokens": [...], ...}``)
+
+        Used where the model answers in JSON mode rather than prose.
+
+        Args:
+            payload: Decoded JSON with ``tokens`` and optional palette fields
+            max_tokens: Maximum number of typography tokens to keep
+
+        Returns:
+            TypographyExtractionResult with validated tokens
+        """
+        tokens = []
+        for item in (payload.get("tokens") or [])[:max_tokens]:
+            token = self._parse_typography_token(item)
+            if token is not None:
+                tokens.append(token)
+
+        if not tokens:
+            logger.warning("No typography parsed from response, using fallback tokens")
+            tokens = self._fallback_tokens()
+
+        confidence = payload.get("extraction_confidence")
+        if not isinstance(confidence, int | float) or not 0 <= confidence <= 1:
+            confidence = sum(t.confidence for t in tokens) / len(tokens)
+
+        return TypographyExtractionResult(
+            tokens=tokens,
+            typography_palette=payload.get("typography_palette")
+            or "Extracted typography system from image",
+            extraction_confidence=confidence,
+            extractor_used=self.model,
+            color_associations=payload.get("color_associations")
+            if isinstance(payload.get("color_associations"), dict)
+            else None,
+        )
+
+    def _parse_typography_token(self, item: dict) -> ExtractedTypographyToken | None:
+        """Validate one JSON typography style, or return None if it is unusable"""
+        try:
+            return ExtractedTypographyToken(
+                **{
+                    **item,
+                    "extraction_metadata": {
+                        "model": self.model,
+                        "extraction_source": "ai_json",
+                    },
+                }
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning("Failed to create typography token: %s", str(e))
+            return None
+
+    @staticmethod
+    def is_fallback(result: TypographyExtractionResult) -> bool:
+        """True when no style could be parsed and only the generic defaults remain"""
+        return all(
+            (token.extraction_metadata or {}).get("extraction_source") == "fallback"
+            for token in result.tokens
+        )
+
+    def _fallback_tokens(self) -> list[ExtractedTypographyToken]:
+        """Generic heading + body styles used when nothing could be parsed"""
+        return [
+            ExtractedTypographyToken(
+                font_family="System",
+                font_weight=700,
+                font_size=32,
+                line_height=1.2,
+                semantic_role="heading",
+                confidence=0.5,
+                extraction_metadata={
+                    "model": self.model,
+                    "extraction_source": "fallback",
+                },
+            ),
+            ExtractedTypographyToken(
+                font_family="System",
+                font_weight=400,
+                font_size=16,
+                line_height=1.6,
+                semantic_role="body",
+                confidence=0.5,
+                extraction_metadata={
+                    "model": self.model,
+                    "extraction_source": "fallback",
+                },
+            ),
+        ]
+
 
 # Convenience functions for common use cases
-def extract_typography(image_url: str, max_tokens: int = 15) -> TypographyExtractionResult:
+async def extract_typography(image_url: str, max_tokens: int = 15) -> TypographyExtractionResult:
     """Quick function to extract typography from an image URL
 
     Args:
@@ -434,10 +505,10 @@ def extract_typography(image_url: str, max_tokens: int = 15) -> TypographyExtrac
         TypographyExtractionResult with extracted typography
     """
     extractor = AITypographyExtractor()
-    return extractor.extract_typography_from_image_url(image_url, max_tokens)
+    return await extractor.extract_typography_from_image_url(image_url, max_tokens)
 
 
-def extract_typography_from_file(
+async def extract_typography_from_file(
     file_path: str, max_tokens: int = 15
 ) -> TypographyExtractionResult:
     """Quick function to extract typography from a local image file
@@ -450,4 +521,4 @@ def extract_typography_from_file(
         TypographyExtractionResult with extracted typography
     """
     extractor = AITypographyExtractor()
-    return extractor.extract_typography_from_file(file_path, max_tokens)
+    return await extractor.extract_typography_from_file(file_path, max_tokens)
@@ -0,0 +1,66 @@
+"""
+Shared executor for multi-image batch endpoints
+
+Handles:
+- Bounded concurrency for per-image fetch + AI work (CPU passes inside the
+  item function go to the CV pool as usual)
+- Per-item error capture, so one bad image is reported instead of failing
+  or silently shrinking the batch
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Items of one batch in flight at once; high enough that a typical batch
+# finishes in roughly the time of its slowest image
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "20"))
+
+
+@dataclass
+class BatchItem:
+    """Outcome of one batch input: a result or the error that replaced it."""
+
+    index: int
+    source: Any
+    result: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_batch(
+    sources: Sequence[Any],
+    fn: Callable[[Any], Awaitable[Any]],
+    max_concurrent: int = DEFAULT_BATCH_CONCURRENCY,
+) -> list[BatchItem]:
+    """
+    Run ``fn(source)`` for every source with at most ``max_concurrent`` in flight
+
+    Args:
+        sources: Batch inputs (usually image URLs)
+        fn: Async per-item work
+        max_concurrent: Concurrency bound (API rate limits, CV pool capacity)
+
+    Returns:
+        One BatchItem per source, in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrent))
+
+    async def run_one(index: int, source: Any) -> BatchItem:
+        async with semaphore:
+            try:
+                return BatchItem(index, source, result=await fn(source))
+            except Exception as e:
+                logger.warning("Batch item %d (%s) failed: %s", index, source, e)
+                detail = getattr(e, "detail", None)
+                return BatchItem(index, source, error=str(detail or e) or type(e).__name__)
+
+    return list(await asyncio.gather(*(run_one(i, s) for i, s in enumerate(sources))))
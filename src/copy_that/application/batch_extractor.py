@@ -7,16 +7,16 @@ Handles:
 - Database persistence of aggregated tokens
 """
 
-import asyncio
 import logging
 
-from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from copy_that.application.batch_executor import run_batch
 from copy_that.application.color_extractor import AIColorExtractor
 from copy_that.constants import DEFAULT_DELTA_E_THRESHOLD, DEFAULT_MAX_CONCURRENT_EXTRACTIONS
 from copy_that.domain.models import ColorToken
 from copy_that.interfaces.api.token_mappers import colors_to_repo
+from copy_that.services.token_persistence_service import bulk_insert
 from core.tokens.adapters.w3c import tokens_to_w3c
 from core.tokens.aggregate import simple_color_merge
 from core.tokens.repository import InMemoryTokenRepository
@@ -96,25 +96,13 @@ class BatchColorExtractor:
         Returns:
             List of color lists (one per image)
         """
-        # Create semaphore for concurrency control
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-
-        async def extract_with_limit(url: str, index: int) -> tuple[int, list[ColorToken]]:
-            async with semaphore:
-                try:
-                    colors = await self._extract_single_image(url, max_colors, index)
-                    return index, colors
-                except Exception as e:
-                    logger.error(f"Failed to extract {url}: {e}")
-                    return index, []
-
-        # Extract all images concurrently
-        tasks = [extract_with_limit(url, i) for i, url in enumerate(image_urls)]
-        results = await asyncio.gather(*tasks)
-
-        # Sort by original index to maintain order
-        results.sort(key=lambda x: x[0])
-        colors_batch = [colors for _, colors in results]
+        items = await run_batch(
+            list(enumerate(image_urls)),
+            lambda item: self._extract_single_image(item[1], max_colors, item[0]),
+            max_concurrent=self.max_concurrent,
+        )
+        # Failed images contribute no colors
+        colors_batch = [item.result if item.ok else [] for item in items]
 
         return colors_batch
 
@@ -137,12 +125,7 @@ class BatchColorExtractor:
         """
         logger.info(f"Extracting colors from image {image_index + 1}: {image_url}")
 
-        # Run sync method in thread pool to avoid blocking
-        colors_result = await asyncio.to_thread(
-            self.extractor.extract_colors_from_image_url,
-            image_url,
-            max_colors,
-        )
+        colors_result = await self.extractor.extract_colors_from_image_url(image_url, max_colors)
         colors = colors_result.colors if hasattr(colors_result, "colors") else colors_result
 
         logger.info(f"Extracted {len(colors)} colors from image {image_index + 1}")
@@ -193,11 +176,8 @@ class BatchColorExtractor:
             }
             token_records.append(record)
 
-        # Insert in batches (avoid DB limit issues)
-        batch_size = 100
-        for i in range(0, len(token_records), batch_size):
-            batch = token_records[i : i + batch_size]
-            await db.execute(insert(ColorToken).values(batch))
+        # One multi-row insert (COPY for large libraries on PostgreSQL)
+        await bulk_insert(db, ColorToken, token_records)
 
         await db.commit()
         logger.info(f"Persisted {len(token_records)} tokens to database")
@@ -0,0 +1,490 @@
+"""
+Precomputed nearest-color indexes for named palettes.
+
+Named palettes (CSS named colors, the 216 web-safe colors, Material Design) are
+converted to RGB, CIE Lab and OKLab once and queried with a vectorized argmin
+(or a KD-tree for large palettes when SciPy is installed), instead of walking a
+dict and re-parsing every entry per lookup.
+
+``greedy_radius_groups`` reuses the same precomputed coordinates for ΔOKLCH
+clustering: points are bucketed into a cell grid sized to the merge threshold,
+so each representative only compares against neighbors in adjacent cells.
+``DeltaEIndex`` does the same incrementally for ColorAide ΔE matching (ΔE76 or
+CIEDE2000), with vectorized ΔE kernels for the candidate sets.
+
+Supported distance metrics:
+- "rgb": Euclidean distance on 0-255 sRGB (legacy ``get_closest_css_named``)
+- "lab": CIE76 ΔE in Lab D65 (ColorAide's default ``delta_e``)
+- "oklab": Euclidean OKLab distance scaled ×100 (same magnitude as ``delta_oklch``)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Mapping, Sequence
+from functools import lru_cache
+from typing import Any, Literal
+
+import numpy as np
+
+from copy_that.application.color_properties import hex_array_to_rgb, rgb_to_lab, rgb_to_oklab
+
+Metric = Literal["rgb", "lab", "oklab"]
+
+METRICS: tuple[str, ...] = ("rgb", "lab", "oklab")
+
+# Palettes at least this large are queried through a KD-tree when SciPy is available
+KDTREE_MIN_SIZE = 512
+
+# Bound the (queries × palette) distance matrix built per chunk
+QUERY_CHUNK_SIZE = 4096
+
+
+def parse_colors(colors: Iterable[str]) -> np.ndarray:
+    """Parse color strings into an (N, 3) float64 sRGB array (0-255).
+
+    Hex strings take a fast path; anything else (CSS names, ``rgb()``) is parsed
+    with ColorAide.
+    """
+    values = list(colors)
+    try:
+        return hex_array_to_rgb(values).astype(np.float64)
+    except (ValueError, TypeError):
+        pass
+
+    from coloraide import Color
+
+    rgb = np.empty((len(values), 3), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            rgb[i] = hex_array_to_rgb([value])[0]
+        except (ValueError, TypeError):
+            rgb[i] = np.asarray(Color(value).convert("srgb").coords(nans=False)) * 255.0
+    return rgb
+
+
+def parse_colors_lenient(colors: Iterable[str | None]) -> np.ndarray:
+    """Like :func:`parse_colors`, but unparseable entries become NaN rows."""
+    values = list(colors)
+    try:
+        return parse_colors(values)
+    except Exception:
+        pass
+    rgb = np.full((len(values), 3), np.nan, dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            rgb[i] = parse_colors([value])[0]
+        except Exception:
+            continue
+    return rgb
+
+
+def _metric_space(rgb: np.ndarray, metric: str) -> np.ndarray:
+    if metric == "rgb":
+        return rgb
+    if metric == "lab":
+        return rgb_to_lab(rgb)
+    if metric == "oklab":
+        return rgb_to_oklab(rgb) * 100.0
+    raise ValueError(f"Unknown color distance metric: {metric!r} (expected one of {METRICS})")
+
+
+class NamedColorIndex:
+    """Nearest-neighbor index over a fixed palette of keyed colors.
+
+    Coordinates for every supported metric are computed once at construction;
+    queries accept a single color or a batch and return palette keys plus
+    distances. Ties resolve to the earliest palette entry, matching the
+    ``<`` comparisons used by the scalar loops this replaces.
+    """
+
+    def __init__(
+        self,
+        entries: Mapping[Hashable, str] | Sequence[tuple[Hashable, str]],
+        default_metric: Metric = "oklab",
+    ):
+        pairs = list(entries.items()) if isinstance(entries, Mapping) else list(entries)
+        if not pairs:
+            raise ValueError("NamedColorIndex requires at least one color")
+        if default_metric not in METRICS:
+            raise ValueError(f"Unknown color distance metric: {default_metric!r}")
+        self.keys: list[Hashable] = [key for key, _ in pairs]
+        self.colors: list[str] = [color for _, color in pairs]
+        self.default_metric = default_metric
+        rgb = parse_colors(self.colors)
+        self._coords: dict[str, np.ndarray] = {m: _metric_space(rgb, m) for m in METRICS}
+        self._trees: dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _tree(self, metric: str) -> Any | None:
+        if len(self) < KDTREE_MIN_SIZE:
+            return None
+        if metric not in self._trees:
+            try:
+                from scipy.spatial import cKDTree
+            except ImportError:
+                self._trees[metric] = None
+            else:
+                self._trees[metric] = cKDTree(self._coords[metric])
+        return self._trees[metric]
+
+    def query(
+        self, colors: Sequence[str] | np.ndarray, metric: Metric | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the nearest palette entry for each query color.
+
+        Args:
+            colors: Color strings, or an (N, 3) array of 0-255 sRGB values
+            metric: Distance metric (defaults to the index's ``default_metric``)
+
+        Returns:
+            Tuple of (palette indices, distances), each of length N
+        """
+        metric = metric or self.default_metric
+        rgb = (
+            np.asarray(colors, dtype=np.float64)
+            if isinstance(colors, np.ndarray)
+            else parse_colors(colors)
+        )
+        points = _metric_space(rgb.reshape(-1, 3), metric)
+        if len(points) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+        tree = self._tree(metric)
+        if tree is not None:
+            distances, indices = tree.query(points, k=1)
+            return np.asarray(indices, dtype=np.intp), np.asarray(distances)
+
+        palette = self._coords[metric]
+        indices = np.empty(len(points), dtype=np.intp)
+        distances = np.empty(len(points), dtype=np.float64)
+        for start in range(0, len(points), QUERY_CHUNK_SIZE):
+            chunk = points[start : start + QUERY_CHUNK_SIZE]
+            diff = chunk[:, None, :] - palette[None, :, :]
+            sq = np.einsum("ijk,ijk->ij", diff, diff)
+            best = np.argmin(sq, axis=1)
+            indices[start : start + len(chunk)] = best
+            distances[start : start + len(chunk)] = np.sqrt(sq[np.arange(len(chunk)), best])
+        return indices, distances
+
+    def nearest(self, color: str, metric: Metric | None = None) -> tuple[Hashable, float]:
+        """Return (key, distance) of the palette entry closest to ``color``."""
+        indices, distances = self.query([color], metric)
+        return self.keys[int(indices[0])], float(distances[0])
+
+    def nearest_many(
+        self, colors: Sequence[str], metric: Metric | None = None
+    ) -> list[tuple[Hashable, float]]:
+        """Batch variant of :meth:`nearest`."""
+        indices, distances = self.query(colors, metric)
+        return [
+            (self.keys[i], d) for i, d in zip(indices.tolist(), distances.tolist(), strict=True)
+        ]
+
+
+@lru_cache(maxsize=1)
+def css_named_index() -> NamedColorIndex:
+    """Index over the CSS named colors (keys are CSS names)."""
+    from copy_that.application.color_utils import CSS_NAMED_COLORS
+
+    return NamedColorIndex(CSS_NAMED_COLORS, default_metric="rgb")
+
+
+@lru_cache(maxsize=1)
+def web_safe_index() -> NamedColorIndex:
+    """Index over the 216 web-safe colors (keys are ``#RRGGBB`` strings)."""
+    levels = range(0, 256, 51)
+    hexes = [f"#{r:02X}{g:02X}{b:02X}" for r in levels for g in levels for b in levels]
+    return NamedColorIndex([(hx, hx) for hx in hexes], default_metric="rgb")
+
+
+@lru_cache(maxsize=1)
+def material_index() -> NamedColorIndex:
+    """Index over Material Design colors (keys are ``(family, level)`` tuples)."""
+    from copy_that.application.semantic_color_naming import MaterialColorNamer
+
+    entries = [
+        ((family, level), hex_color)
+        for family, levels in MaterialColorNamer.MATERIAL_COLORS.items()
+        for level, hex_color in levels.items()
+    ]
+    return NamedColorIndex(entries, default_metric="lab")
+
+
+@lru_cache(maxsize=128)
+def palette_index(palette: tuple[str, ...]) -> NamedColorIndex:
+    """Cached index for an ad-hoc palette (keys are palette positions)."""
+    return NamedColorIndex(list(enumerate(palette)), default_metric="lab")
+
+
+def greedy_radius_groups(
+    colors: Sequence[str | None], threshold: float, metric: Metric = "oklab"
+) -> list[list[int]]:
+    """Group colors with the greedy "first representative wins" scan in sub-quadratic time.
+
+    Walking colors in order, each color not yet claimed becomes a representative
+    and claims every later unclaimed color whose distance to it is below
+    ``threshold``. This is exactly the pairwise loop used by
+    ``cluster_color_tokens``/``merge_similar_colors``, but candidates come from a
+    cell grid (cell size = threshold), so only nearby colors are compared.
+    Colors that cannot be parsed are never merged.
+
+    Returns:
+        Groups of input indices; each group starts with its representative and
+        groups are ordered by representative position.
+    """
+    n = len(colors)
+    if n == 0:
+        return []
+    points = _metric_space(parse_colors_lenient(colors), metric)
+    valid = ~np.isnan(points).any(axis=1)
+    if threshold <= 0:
+        return [[i] for i in range(n)]
+
+    cells = np.zeros((n, 3), dtype=np.int64)
+    cells[valid] = np.floor(points[valid] / threshold).astype(np.int64)
+    grid: dict[tuple[int, int, int], list[int]] = {}
+    for i in np.flatnonzero(valid).tolist():
+        grid.setdefault(tuple(cells[i].tolist()), []).append(i)
+    offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+    used = np.zeros(n, dtype=bool)
+    groups: list[list[int]] = []
+    for i in range(n):
+        if used[i]:
+            continue
+        used[i] = True
+        if not valid[i]:
+            groups.append([i])
+            continue
+        cx, cy, cz = cells[i].tolist()
+        candidates = [
+            j
+            for dx, dy, dz in offsets
+            for j in grid.get((cx + dx, cy + dy, cz + dz), ())
+            if j > i and not used[j]
+        ]
+        members: list[int] = []
+        if candidates:
+            cand = np.asarray(sorted(candidates), dtype=np.intp)
+            dist = np.sqrt(((points[cand] - points[i]) ** 2).sum(axis=1))
+            members = cand[dist < threshold].tolist()
+            used[members] = True
+        groups.append([i, *members])
+    return groups
+
+
+def delta_e_76(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """Vectorized CIE76 ΔE (Euclidean Lab distance); inputs broadcast."""
+    diff = np.asarray(lab1, dtype=np.float64) - np.asarray(lab2, dtype=np.float64)
+    return np.sqrt((diff * diff).sum(axis=-1))
+
+
+def delta_e_2000(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """Vectorized CIEDE2000 ΔE (kL = kC = kH = 1), mirroring ColorAide's implementation."""
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    l1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    l2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    cm = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    c7 = cm**7
+    g = 0.5 * (1 - np.sqrt(c7 / (c7 + 25.0**7)))
+    ap1 = (1 + g) * a1
+    ap2 = (1 + g) * a2
+    cp1 = np.hypot(ap1, b1)
+    cp2 = np.hypot(ap2, b2)
+    hp1 = np.degrees(np.arctan2(b1, ap1)) % 360.0
+    hp2 = np.degrees(np.arctan2(b2, ap2)) % 360.0
+
+    dl = l1 - l2
+    dc = cp1 - cp2
+    chroma_zero = cp1 * cp2 == 0.0
+    hdiff = hp1 - hp2
+    dh = np.where(np.abs(hdiff) <= 180.0, hdiff, hdiff - 360.0 * np.sign(hdiff))
+    dh = np.where(chroma_zero, 0.0, dh)
+    dh = 2 * np.sqrt(cp1 * cp2) * np.sin(np.radians(dh / 2))
+
+    lpm = (l1 + l2) / 2
+    cpm = (cp1 + cp2) / 2
+    hsum = hp1 + hp2
+    hpm = np.where(
+        np.abs(hp1 - hp2) > 180.0,
+        (hsum + np.where(hsum < 360.0, 360.0, -360.0)) / 2,
+        hsum / 2,
+    )
+    hpm = np.where(chroma_zero, hsum, hpm)
+
+    t = (
+        1
+        - 0.17 * np.cos(np.radians(hpm - 30))
+        + 0.24 * np.cos(np.radians(2 * hpm))
+        + 0.32 * np.cos(np.radians(3 * hpm + 6))
+        - 0.20 * np.cos(np.radians(4 * hpm - 63))
+    )
+    dt = 30 * np.exp(-(((hpm - 275) / 25) ** 2))
+    cpm7 = cpm**7
+    rc = 2 * np.sqrt(cpm7 / (cpm7 + 25.0**7))
+    l_temp = (lpm - 50) ** 2
+    sl = 1 + (0.015 * l_temp) / np.sqrt(20 + l_temp)
+    sc = 1 + 0.045 * cpm
+    sh = 1 + 0.015 * cpm * t
+    rt = -np.sin(np.radians(2 * dt)) * rc
+
+    return np.sqrt((dl / sl) ** 2 + (dc / sc) ** 2 + (dh / sh) ** 2 + rt * (dc / sc) * (dh / sh))
+
+
+DELTA_E_KERNELS = {"76": delta_e_76, "2000": delta_e_2000}
+
+# Largest Lab (D65) chroma reachable from sRGB is ~133.8; colors beyond this bound
+# (wide-gamut CSS inputs) are always checked exhaustively.
+DELTA_E_CHROMA_LIMIT = 135.0
+
+# Search radii, as multiples of the threshold, such that ΔE < threshold implies the
+# pair lies within (radius_L, radius_ab, radius_ab) in Lab. For CIEDE2000:
+#   S_L <= 1.75 on L in [0, 100], and S_H <= S_C <= 1 + 0.045 * C' with
+#   C' <= ~1.0002 * DELTA_E_CHROMA_LIMIT; |R_T| <= 2 sin(60°), so the chroma/hue
+#   form is >= (1 - sin(60°)) * (ΔC'^2 + ΔH'^2) >= (1 - sin(60°)) * Δab^2.
+_DE2000_AB_RADIUS = (1 + 0.045 * DELTA_E_CHROMA_LIMIT * 1.001) / np.sqrt(1 - np.sin(np.pi / 3))
+DELTA_E_SEARCH_RADII: dict[str, tuple[float, float]] = {
+    "76": (1.0, 1.0),
+    "2000": (1.75, float(_DE2000_AB_RADIUS)),
+}
+
+
+class DeltaEIndex:
+    """Incremental "first entry within ΔE" index for greedy deduplication.
+
+    Entries are kept in Lab (D65) in an anisotropic cell grid sized so that any
+    entry with ``ΔE < threshold`` to a query lies in the query's 27 neighboring
+    cells; only those candidates are scored with the vectorized kernel. Answers
+    are the same as scanning entries in insertion order and returning the first
+    with ``calculate_delta_e(query, entry) < threshold``.
+
+    Entries that cannot be handled by the grid (out-of-gamut or unparseable
+    strings, chroma beyond ``DELTA_E_CHROMA_LIMIT``, or a ColorAide ΔE method
+    without a kernel here) fall back to exhaustive checks, so results never
+    depend on the index.
+    """
+
+    def __init__(self, threshold: float, method: str | None = None):
+        if method is None:
+            from coloraide import Color
+
+            method = Color.DELTA_E
+        self.threshold = float(threshold)
+        self.method = method
+        self._kernel = DELTA_E_KERNELS.get(method)
+        radius_l, radius_ab = DELTA_E_SEARCH_RADII.get(method, (0.0, 0.0))
+        self._cell_size = np.array([radius_l, radius_ab, radius_ab]) * self.threshold
+        self._gridded = self._kernel is not None and self.threshold > 0
+
+        self._colors: list[str] = []
+        self._lab = np.empty((0, 3), dtype=np.float64)
+        self._cell_of: list[tuple[int, int, int] | None] = []
+        self._cells: dict[tuple[int, int, int], list[int]] = {}
+        self._unbounded: set[int] = set()  # parsed, but outside the grid's guarantees
+        self._unparsed: set[int] = set()  # compared one pair at a time with ColorAide
+
+    def __len__(self) -> int:
+        return len(self._colors)
+
+    def _parse(self, color: str) -> np.ndarray | None:
+        # Out-of-gamut inputs (wide-gamut CSS colors) take the scalar ColorAide path
+        rgb = parse_colors_lenient([color])
+        if np.isnan(rgb).any() or rgb.min() < 0.0 or rgb.max() > 255.0:
+            return None
+        return rgb_to_lab(rgb)[0]
+
+    def _scalar_delta_e(self, color1: str, color2: str) -> float:
+        from coloraide import Color
+
+        from copy_that.application.color_utils import calculate_delta_e
+
+        try:
+            return Color(color1).delta_e(color2, method=self.method)
+        except Exception:
+            return calculate_delta_e(color1, color2)
+
+    def _cell(self, lab: np.ndarray) -> tuple[int, int, int] | None:
+        if not self._gridded or np.hypot(lab[1], lab[2]) > DELTA_E_CHROMA_LIMIT:
+            return None
+        return tuple(np.floor(lab / self._cell_size).astype(np.int64).tolist())
+
+    def _place(self, position: int, color: str) -> None:
+        lab = self._parse(color)
+        cell = None
+        if lab is None:
+            self._unparsed.add(position)
+        else:
+            self._lab[position] = lab
+            cell = self._cell(lab)
+            if cell is None:
+                self._unbounded.add(position)
+            else:
+                self._cells.setdefault(cell, []).append(position)
+        self._cell_of[position] = cell
+
+    def add(self, color: str) -> int:
+        """Append an entry and return its position."""
+        position = len(self._colors)
+        if position == len(self._lab):
+            grown = np.empty((max(16, 2 * position), 3), dtype=np.float64)
+            grown[:position] = self._lab
+            self._lab = grown
+        self._colors.append(color)
+        self._cell_of.append(None)
+        self._place(position, color)
+        return position
+
+    def update(self, position: int, color: str) -> None:
+        """Replace the color of an existing entry (e.g. after a higher-confidence merge)."""
+        if self._colors[position] == color:
+            return
+        cell = self._cell_of[position]
+        if cell is not None:
+            self._cells[cell].remove(position)
+        self._unbounded.discard(position)
+        self._unparsed.discard(position)
+        self._colors[position] = color
+        self._place(position, color)
+
+    def first_match(self, color: str) -> int | None:
+        """Return the lowest entry position with ``ΔE(color, entry) < threshold``."""
+        if not self._colors:
+            return None
+        lab = self._parse(color)
+        if lab is None or self._kernel is None:
+            for position, entry in enumerate(self._colors):
+                if self._scalar_delta_e(color, entry) < self.threshold:
+                    return position
+            return None
+
+        cell = self._cell(lab)
+        if cell is None:
+            candidates = [p for p in range(len(self._colors)) if p not in self._unparsed]
+        else:
+            cl, ca, cb = cell
+            candidates = [
+                p
+                for dl in (-1, 0, 1)
+                for da in (-1, 0, 1)
+                for db in (-1, 0, 1)
+                for p in self._cells.get((cl + dl, ca + da, cb + db), ())
+            ]
+            candidates.extend(self._unbounded)
+
+        best: int | None = None
+        if candidates:
+            cand = np.asarray(candidates, dtype=np.intp)
+            hits = cand[self._kernel(self._lab[cand], lab) < self.threshold]
+            if len(hits):
+                best = int(hits.min())
+        for position in sorted(self._unparsed):
+            if best is not None and position > best:
+                break
+            if self._scalar_delta_e(color, self._colors[position]) < self.threshold:
+                best = position
+                break
+        return best
@@ -0,0 +1,372 @@
+"""
+Vectorized color property engine.
+
+Computes every property produced by ``color_utils.compute_all_properties`` for
+a whole palette in one NumPy pass instead of re-parsing each hex string through
+a dozen scalar helpers:
+- HSL/HSV strings, temperature, saturation and lightness levels
+- Linear sRGB luminance, WCAG contrast and compliance flags
+- CIE Lab (D65) and OKLab/OKLCH coordinates
+- Tint/shade/tone variants, closest web-safe and CSS named colors
+- ΔE to the nearest dominant color
+
+Results are returned as a columnar ``ColorPropertyTable`` whose rows match the
+``compute_all_properties`` dict so existing consumers can switch over without
+changing field names.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
+
+import numpy as np
+
+from copy_that.application.color_utils import PROPERTY_SOURCES
+
+HEX_COLOR_RE = re.compile(r"^#?(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+
+# Linear sRGB -> CIE XYZ (D65); matches ColorAide's srgb-linear/xyz-d65 transform
+SRGB_LINEAR_TO_XYZ_D65 = np.array(
+    [
+        [0.4123907992659593, 0.357584339383878, 0.1804807884018343],
+        [0.21263900587151024, 0.715168678767756, 0.07219231536073371],
+        [0.01933081871559182, 0.11919477979462598, 0.9505321522496607],
+    ]
+)
+
+# Linear sRGB -> LMS and LMS^(1/3) -> OKLab (Björn Ottosson, ColorAide constants)
+SRGB_LINEAR_TO_LMS = np.array(
+    [
+        [0.4122214694707628, 0.5363325372617349, 0.05144599326750219],
+        [0.2119034958178251, 0.6806995506452344, 0.10739695353694051],
+        [0.08830245919005637, 0.2817188391361215, 0.6299787016738222],
+    ]
+)
+LMS3_TO_OKLAB = np.array(
+    [
+        [0.21045426830931396, 0.7936177747023053, -0.00407204301161926],
+        [1.9779985324311686, -2.42859224204858, 0.450593709617411],
+        [0.02590404246554773, 0.7827717124575297, -0.8086757549230774],
+    ]
+)
+
+D65_WHITE_XYZ = np.array([0.3127 / 0.329, 1.0, (1.0 - 0.3127 - 0.329) / 0.329])
+
+LAB_EPSILON = 216 / 24389
+LAB_KAPPA = 24389 / 27
+
+
+def is_hex_color(value: object) -> bool:
+    """True for ``#RGB``/``#RRGGBB`` strings accepted by :func:`hex_array_to_rgb`."""
+    return isinstance(value, str) and HEX_COLOR_RE.match(value.strip()) is not None
+
+
+def hex_array_to_rgb(hex_colors: Iterable[str]) -> np.ndarray:
+    """Parse hex strings (``#RGB`` or ``#RRGGBB``) into an (N, 3) uint8 array."""
+    values: list[int] = []
+    for hex_code in hex_colors:
+        hx = hex_code.strip().lstrip("#")
+        if len(hx) == 3:
+            hx = "".join(c * 2 for c in hx)
+        values.append(int(hx[:6], 16))
+    packed = np.asarray(values, dtype=np.uint32)
+    rgb = np.empty((len(values), 3), dtype=np.uint8)
+    rgb[:, 0] = (packed >> 16) & 0xFF
+    rgb[:, 1] = (packed >> 8) & 0xFF
+    rgb[:, 2] = packed & 0xFF
+    return rgb
+
+
+def rgb_array_to_hex(rgb: np.ndarray) -> list[str]:
+    """Format an (N, 3) integer array as uppercase ``#RRGGBB`` strings."""
+    ints = np.clip(np.asarray(rgb, dtype=np.int64), 0, 255)
+    packed = (ints[:, 0] << 16) | (ints[:, 1] << 8) | ints[:, 2]
+    return [f"#{value:06X}" for value in packed.tolist()]
+
+
+def srgb_to_linear(rgb: np.ndarray) -> np.ndarray:
+    """Convert 0-255 sRGB values to linear-light floats (0-1)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert 0-255 sRGB values to CIE Lab (D65), the space ColorAide's ΔE76 measures in."""
+    xyz = srgb_to_linear(rgb) @ SRGB_LINEAR_TO_XYZ_D65.T
+    scaled = xyz / D65_WHITE_XYZ
+    f = np.where(scaled > LAB_EPSILON, np.cbrt(scaled), (LAB_KAPPA * scaled + 16) / 116)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116.0 * f[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200.0 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def rgb_to_oklab(rgb: np.ndarray) -> np.ndarray:
+    """Convert 0-255 sRGB values to OKLab."""
+    lms = srgb_to_linear(rgb) @ SRGB_LINEAR_TO_LMS.T
+    return np.cbrt(lms) @ LMS3_TO_OKLAB.T
+
+
+def oklab_to_oklch(oklab: np.ndarray) -> np.ndarray:
+    """Convert OKLab coordinates to OKLCH (hue in degrees, 0-360)."""
+    oklch = np.empty_like(oklab)
+    oklch[..., 0] = oklab[..., 0]
+    oklch[..., 1] = np.hypot(oklab[..., 1], oklab[..., 2])
+    oklch[..., 2] = np.degrees(np.arctan2(oklab[..., 2], oklab[..., 1])) % 360.0
+    return oklch
+
+
+def _hue_from_rgb(r: np.ndarray, g: np.ndarray, b: np.ndarray, maxc, minc) -> np.ndarray:
+    """Hue fraction (0-1) using the same arithmetic as ``colorsys``."""
+    rangec = maxc - minc
+    safe = np.where(rangec == 0, 1.0, rangec)
+    rc = (maxc - r) / safe
+    gc = (maxc - g) / safe
+    bc = (maxc - b) / safe
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+    return np.where(rangec == 0, 0.0, h)
+
+
+def _format_triplets(prefix: str, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> list[str]:
+    return [
+        f"{prefix}({x}, {y}%, {z}%)"
+        for x, y, z in zip(a.tolist(), b.tolist(), c.tolist(), strict=True)
+    ]
+
+
+def _level(values: np.ndarray, thresholds: Sequence[float], labels: Sequence[str]) -> list[str]:
+    """Bucket values with ``value < threshold`` semantics (last label is the overflow)."""
+    idx = np.searchsorted(np.asarray(thresholds), values, side="right")
+    return [labels[i] for i in idx.tolist()]
+
+
+def _variants(rgb: np.ndarray, amount: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tint/shade/tone arrays with ``int()`` truncation identical to ``get_color_variant``."""
+    c = rgb.astype(np.float64)
+    tint = np.trunc(c + (255 - c) * amount)
+    shade = np.trunc(c * (1 - amount))
+    gray = np.trunc(0.299 * c[:, 0] + 0.587 * c[:, 1] + 0.114 * c[:, 2])[:, None]
+    tone = np.trunc(c + (gray - c) * amount)
+    return tint, shade, tone
+
+
+def _nearest_css_named(rgb: np.ndarray, metric: str) -> list[str]:
+    """Closest CSS named color per row via the precomputed named-color index."""
+    from copy_that.application.color_index import css_named_index
+
+    index = css_named_index()
+    positions, _ = index.query(rgb, metric=metric)
+    return [str(index.keys[i]) for i in positions.tolist()]
+
+
+@dataclass
+class ColorPropertyTable:
+    """Columnar color properties for N colors (one array/list entry per color)."""
+
+    hex: list[str]
+    rgb: np.ndarray
+    hsl: list[str]
+    hsv: list[str]
+    lab: np.ndarray
+    oklab: np.ndarray
+    oklch: np.ndarray
+    luminance: np.ndarray
+    temperature: list[str]
+    saturation_level: list[str]
+    lightness_level: list[str]
+    is_neutral: np.ndarray
+    wcag_contrast_on_white: np.ndarray
+    wcag_contrast_on_black: np.ndarray
+    wcag_aa_compliant_text: np.ndarray
+    wcag_aaa_compliant_text: np.ndarray
+    wcag_aa_compliant_normal: np.ndarray
+    wcag_aaa_compliant_normal: np.ndarray
+    colorblind_safe: np.ndarray
+    tint_color: list[str]
+    shade_color: list[str]
+    tone_color: list[str]
+    closest_web_safe: list[str]
+    closest_css_named: list[str]
+    delta_e_to_dominant: np.ndarray | None = None
+    _index: dict[str, int] = field(default_factory=dict, repr=False)
+
+    # Columns emitted by row(); order mirrors compute_all_properties
+    PROPERTY_FIELDS: ClassVar[tuple[str, ...]] = (
+        "hsl",
+        "hsv",
+        "temperature",
+        "saturation_level",
+        "lightness_level",
+        "is_neutral",
+        "wcag_contrast_on_white",
+        "wcag_contrast_on_black",
+        "wcag_aa_compliant_text",
+        "wcag_aaa_compliant_text",
+        "wcag_aa_compliant_normal",
+        "wcag_aaa_compliant_normal",
+        "colorblind_safe",
+        "tint_color",
+        "shade_color",
+        "tone_color",
+        "closest_web_safe",
+        "closest_css_named",
+    )
+
+    def __len__(self) -> int:
+        return len(self.hex)
+
+    def row(self, i: int) -> dict[str, Any]:
+        """Return the properties for color ``i`` as a ``compute_all_properties`` dict."""
+        props: dict[str, Any] = {}
+        for name in self.PROPERTY_FIELDS:
+            value = getattr(self, name)[i]
+            props[name] = value.item() if isinstance(value, np.generic) else value
+        if self.delta_e_to_dominant is not None:
+            props["delta_e_to_dominant"] = float(self.delta_e_to_dominant[i])
+        return props
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Return one properties dict per color."""
+        return [self.row(i) for i in range(len(self))]
+
+    def row_with_metadata(self, i: int) -> tuple[dict[str, Any], dict[str, str]]:
+        """Return (properties, sources) like ``compute_all_properties_with_metadata``."""
+        props = self.row(i)
+        metadata = dict(PROPERTY_SOURCES)
+        if "delta_e_to_dominant" in props:
+            metadata["delta_e_to_dominant"] = "color_utils.calculate_delta_e"
+        return props, metadata
+
+    def index_of(self, hex_color: str) -> int | None:
+        """Row index of the first occurrence of a hex value (case-insensitive)."""
+        if not self._index:
+            self._index = {hx.lower(): i for i, hx in reversed(list(enumerate(self.hex)))}
+        return self._index.get(hex_color.lower())
+
+
+def compute_properties_batch(
+    hex_colors: Sequence[str],
+    dominant_colors: Sequence[str] | None = None,
+    naming_metric: str = "rgb",
+) -> ColorPropertyTable:
+    """Compute all color properties for many colors in one vectorized pass.
+
+    Args:
+        hex_colors: Hex color codes to analyze
+        dominant_colors: Optional dominant colors; adds ΔE (ColorAide default,
+            CIE76 in Lab D65) to the nearest one
+        naming_metric: Distance used for ``closest_css_named`` ("rgb" matches
+            ``get_closest_css_named``; "oklab" is perceptual)
+
+    Returns:
+        ColorPropertyTable with one entry per input color
+    """
+    hexes = list(hex_colors)
+    rgb = hex_array_to_rgb(hexes)
+    unit = rgb.astype(np.float64) / 255.0
+    r, g, b = unit[:, 0], unit[:, 1], unit[:, 2]
+    maxc = unit.max(axis=1)
+    minc = unit.min(axis=1)
+
+    # HSL/HSV use colorsys arithmetic so truncated integers match the scalar helpers
+    hue = _hue_from_rgb(r, g, b, maxc, minc)
+    light = (minc + maxc) / 2.0
+    sumc = maxc + minc
+    # colorsys divides by (2.0 - maxc - minc), not (2.0 - sumc); keep it bit-identical
+    upper = 2.0 - maxc - minc
+    hls_s = np.where(
+        maxc == minc,
+        0.0,
+        np.where(
+            light <= 0.5,
+            (maxc - minc) / np.where(sumc == 0, 1.0, sumc),
+            (maxc - minc) / np.where(upper == 0, 1.0, upper),
+        ),
+    )
+    hsv_s = np.where(maxc == minc, 0.0, (maxc - minc) / np.where(maxc == 0, 1.0, maxc))
+    h_deg = (hue * 360).astype(np.int64)
+    hsl = _format_triplets(
+        "hsl", h_deg, (hls_s * 100).astype(np.int64), (light * 100).astype(np.int64)
+    )
+    hsv = _format_triplets(
+        "hsv", h_deg, (hsv_s * 100).astype(np.int64), (maxc * 100).astype(np.int64)
+    )
+
+    ints = rgb.astype(np.int64)
+    warm_score = ints[:, 0] - ints[:, 2]
+    temperature = np.select(
+        [warm_score > 30, warm_score < -30], ["warm", "cool"], default="neutral"
+    ).tolist()
+    saturation_level = _level(
+        hsv_s, [0.1, 0.3, 0.6], ["grayscale", "desaturated", "muted", "vibrant"]
+    )
+    perceived = (0.299 * ints[:, 0] + 0.587 * ints[:, 1] + 0.114 * ints[:, 2]) / 255.0
+    lightness_level = _level(perceived, [0.33, 0.66], ["dark", "medium", "light"])
+    spread = np.max(np.abs(ints[:, [0, 1, 0]] - ints[:, [1, 2, 2]]), axis=1)
+    is_neutral = spread < 20
+
+    luminance = srgb_to_linear(rgb) @ SRGB_LINEAR_TO_XYZ_D65[1]
+    white = SRGB_LINEAR_TO_XYZ_D65[1].sum()
+    on_white = (np.maximum(luminance, white) + 0.05) / (np.minimum(luminance, white) + 0.05)
+    on_black = (luminance + 0.05) / 0.05
+
+    oklab = rgb_to_oklab(rgb)
+    tint, shade, tone = _variants(rgb, 0.5)
+    web_safe = np.rint(rgb.astype(np.float64) / 51) * 51
+
+    table = ColorPropertyTable(
+        hex=hexes,
+        rgb=rgb,
+        hsl=hsl,
+        hsv=hsv,
+        lab=rgb_to_lab(rgb),
+        oklab=oklab,
+        oklch=oklab_to_oklch(oklab),
+        luminance=luminance,
+        temperature=temperature,
+        saturation_level=saturation_level,
+        lightness_level=lightness_level,
+        is_neutral=is_neutral,
+        wcag_contrast_on_white=np.round(on_white, 2),
+        wcag_contrast_on_black=np.round(on_black, 2),
+        wcag_aa_compliant_text=on_white >= 4.5,
+        wcag_aaa_compliant_text=on_white >= 7.0,
+        wcag_aa_compliant_normal=on_white >= 3.0,
+        wcag_aaa_compliant_normal=on_white >= 4.5,
+        colorblind_safe=np.asarray([level != "grayscale" for level in saturation_level]),
+        tint_color=rgb_array_to_hex(tint),
+        shade_color=rgb_array_to_hex(shade),
+        tone_color=rgb_array_to_hex(tone),
+        closest_web_safe=rgb_array_to_hex(web_safe),
+        closest_css_named=_nearest_css_named(rgb, naming_metric) if len(hexes) else [],
+    )
+
+    if dominant_colors and len(hexes):
+        dominant_lab = rgb_to_lab(hex_array_to_rgb(dominant_colors))
+        diff = table.lab[:, None, :] - dominant_lab[None, :, :]
+        table.delta_e_to_dominant = np.round(np.sqrt((diff**2).sum(axis=2)).min(axis=1), 2)
+
+    return table
+
+
+def apply_properties(tokens: Sequence[object], table: ColorPropertyTable) -> None:
+    """Fill missing (None) property fields on tokens from a batch table.
+
+    Tokens are matched to rows by hex; fields that already hold a value are kept,
+    so AI-provided values are never overwritten.
+    """
+    for token in tokens:
+        hex_val = getattr(token, "hex", None)
+        if not hex_val:
+            continue
+        i = table.index_of(hex_val)
+        if i is None:
+            continue
+        for name, value in table.row(i).items():
+            if hasattr(token, name) and getattr(token, name, None) is None:
+                setattr(token, name, value)
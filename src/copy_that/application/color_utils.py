@@ -485,23 +485,17 @@ def get_closest_web_safe(hex_code: str) -> str:
     return rgb_to_hex(r, g, b)
 
 
-def get_closest_css_named(hex_code: str) -> str | None:
-    """Find closest CSS named color"""
-    r, g, b = hex_to_rgb(hex_code)
-
-    min_distance = float("inf")
-    closest_name = None
-
-    for name, css_hex in CSS_NAMED_COLORS.items():
-        cr, cg, cb = hex_to_rgb(css_hex)
-        # Calculate Euclidean distance in RGB space
-        distance = math.sqrt((r - cr) ** 2 + (g - cg) ** 2 + (b - cb) ** 2)
+def get_closest_css_named(hex_code: str, metric: str = "rgb") -> str | None:
+    """Find closest CSS named color
 
-        if distance < min_distance:
-            min_distance = distance
-            closest_name = name
+    Args:
+        hex_code: Color to name
+        metric: "rgb" (Euclidean sRGB, legacy default), "lab" (ΔE76) or "oklab" (perceptual)
+    """
+    from copy_that.application.color_index import css_named_index
 
-    return closest_name
+    name, _ = css_named_index().nearest(hex_code, metric=metric)
+    return str(name)
 
 
 def calculate_delta_e(hex1: str, hex2: str) -> float:
@@ -735,6 +729,7 @@ def cluster_color_tokens(tokens: Sequence[object], threshold: float = 2.0) -> li
     Cluster perceptually similar color tokens (OKLCH ΔE) and return representatives.
 
     - Merges tokens whose ΔOKLCH distance is below `threshold`
+      (greedy, first representative wins; candidates found via an OKLab cell grid)
     - Accumulates counts, averages prominence/confidence
     - Notes merged hex values in extraction_metadata["merged_hex"]
 
@@ -748,25 +743,14 @@ def cluster_color_tokens(tokens: Sequence[object], threshold: float = 2.0) -> li
     if not tokens:
         return []
 
+    from copy_that.application.color_index import greedy_radius_groups
+
     clustered: list[object] = []
-    used: set[int] = set()
+    hexes = [getattr(tok, "hex", None) for tok in tokens]
 
-    for i, base in enumerate(tokens):
-        if i in used:
-            continue
-
-        group = [base]
-        for j in range(i + 1, len(tokens)):
-            if j in used:
-                continue
-            candidate = tokens[j]
-            try:
-                if delta_oklch(base.hex, candidate.hex) < threshold:
-                    group.append(candidate)
-                    used.add(j)
-            except Exception:
-                # If comparison fails for any reason, skip clustering this pair
-                continue
+    for group_indices in greedy_radius_groups(hexes, threshold, metric="oklab"):
+        base = tokens[group_indices[0]]
+        group = [tokens[j] for j in group_indices]
 
         # Build representative
         rep = getattr(base, "model_copy", None)
@@ -799,7 +783,6 @@ def cluster_color_tokens(tokens: Sequence[object], threshold: float = 2.0) -> li
                 rep.confidence = float(np.mean(conf_values))
 
         clustered.append(rep)
-        used.add(i)
 
     return clustered
 
@@ -1137,16 +1120,39 @@ def find_nearest_color(
         primary: ΔE=0.15
     """
     best_match = ("NONE", threshold + 1)
+    if not color_palette:
+        return best_match
+
+    colors = list(color_palette.values())
+    if all(_is_srgb_hex(color) for color in [target_hex, *colors]):
+        from copy_that.application.color_index import palette_index
+
+        # ΔE (CIE76, ColorAide's default) against a cached precomputed palette index
+        index, de = palette_index(tuple(colors)).nearest(target_hex, metric="lab")
+        if de < best_match[1]:
+            best_match = (list(color_palette)[int(index)], de)
+        return best_match
 
+    # Anything else (RGB tuples, CSS syntax, wide-gamut colors) keeps the ColorAide
+    # ΔE of calculate_delta_e, including its RGB fallback for unparseable values
     for name, palette_color in color_palette.items():
         de = calculate_delta_e(target_hex, palette_color)
-
         if de < best_match[1]:
             best_match = (name, de)
 
     return best_match
 
 
+def _is_srgb_hex(color: object) -> bool:
+    """True for ``#RGB`` / ``#RRGGBB`` strings, which the palette index parses exactly."""
+    return (
+        isinstance(color, str)
+        and len(color) in (4, 7)
+        and color[0] == "#"
+        and all(c in "0123456789abcdefABCDEF" for c in color[1:])
+    )
+
+
 def merge_similar_colors(colors: list[str], threshold: float = 2.0) -> list[str]:
     """
     Merge perceptually similar colors from a list using ColorAide's delta_e().
@@ -1171,26 +1177,13 @@ def merge_similar_colors(colors: list[str], threshold: float = 2.0) -> list[str]
     if not colors:
         return []
 
-    merged = []
-    used = set()
+    from copy_that.application.color_index import greedy_radius_groups
 
-    for i, color1 in enumerate(colors):
-        if i in used:
-            continue
-
-        # Find all similar colors
-        similar_group = [color1]
-
-        for j in range(i + 1, len(colors)):
-            if j in used:
-                continue
-
-            color2 = colors[j]
+    merged = []
 
-            # Check if perceptually similar to base color
-            if delta_oklch(color1, color2) < threshold:
-                similar_group.append(color2)
-                used.add(j)
+    for group_indices in greedy_radius_groups(colors, threshold, metric="oklab"):
+        color1 = colors[group_indices[0]]
+        similar_group = [colors[j] for j in group_indices]
 
         # Use average color of group (in LAB space for better results)
         if len(similar_group) > 1:
@@ -1207,8 +1200,6 @@ def merge_similar_colors(colors: list[str], threshold: float = 2.0) -> list[str]
         else:
             merged.append(color1)
 
-        used.add(i)
-
     return merged
 
 
@@ -1284,7 +1275,8 @@ def match_color_to_palette(
     """
     Find the perceptually closest color in a palette using ColorAide.
 
-    Uses Delta-E iteration to find the nearest color in the palette.
+    Uses a precomputed Lab index (see ``color_index.palette_index``) to find the
+    nearest color by Delta-E.
 
     Args:
         target_hex: Color to match (hex string)
@@ -1309,20 +1301,11 @@ def match_color_to_palette(
         return target_hex if not return_distance else (target_hex, float("inf"))
 
     try:
-        target_color = coloraide.Color(target_hex)
-        palette_colors = [coloraide.Color(c) for c in palette]
+        from copy_that.application.color_index import palette_index
 
-        # Manual Delta-E iteration - reliable for all palette sizes
-        best_match = palette_colors[0]
-        best_distance = target_color.delta_e(best_match)
-
-        for candidate in palette_colors[1:]:
-            distance = target_color.delta_e(candidate)
-            if distance < best_distance:
-                best_distance = distance
-                best_match = candidate
-
-        matched_hex = best_match.to_string(hex=True)
+        # ΔE (CIE76, ColorAide's default) against a cached precomputed palette index
+        index, best_distance = palette_index(tuple(palette)).nearest(target_hex, metric="lab")
+        matched_hex = coloraide.Color(palette[int(index)]).to_string(hex=True)
 
         if return_distance:
             return matched_hex, best_distance
@@ -1377,9 +1360,35 @@ def get_perceptual_distance_summary(
     }
 
 
+# Which tool extracted each property computed by compute_all_properties
+PROPERTY_SOURCES = {
+    "hsl": "color_utils.hex_to_hsl",
+    "hsv": "color_utils.hex_to_hsv",
+    "temperature": "color_utils.get_color_temperature",
+    "saturation_level": "color_utils.get_saturation_level",
+    "lightness_level": "color_utils.get_lightness_level",
+    "is_neutral": "color_utils.is_neutral_color",
+    "wcag_contrast_on_white": "color_utils.calculate_wcag_contrast",
+    "wcag_contrast_on_black": "color_utils.calculate_wcag_contrast",
+    "wcag_aa_compliant_text": "color_utils.is_wcag_compliant",
+    "wcag_aaa_compliant_text": "color_utils.is_wcag_compliant",
+    "wcag_aa_compliant_normal": "color_utils.is_wcag_compliant",
+    "wcag_aaa_compliant_normal": "color_utils.is_wcag_compliant",
+    "colorblind_safe": "color_utils.get_saturation_level",
+    "tint_color": "color_utils.get_color_variant",
+    "shade_color": "color_utils.get_color_variant",
+    "tone_color": "color_utils.get_color_variant",
+    "closest_web_safe": "color_utils.get_closest_web_safe",
+    "closest_css_named": "color_utils.get_closest_css_named",
+}
+
+
 def compute_all_properties(hex_color: str, dominant_colors: list[str] | None = None) -> dict:
     """Compute all color properties at once
 
+    For whole palettes prefer ``color_properties.compute_properties_batch``, which
+    returns identical values for N colors in one vectorized pass.
+
     Args:
         hex_color: Hex color code
         dominant_colors: List of dominant colors for Delta E calculation
@@ -1429,28 +1438,7 @@ def compute_all_properties_with_metadata(
         Tuple of (properties dict, metadata dict mapping field names to tool sources)
     """
     properties = compute_all_properties(hex_color, dominant_colors)
-
-    # Track which tool extracted each property
-    metadata = {
-        "hsl": "color_utils.hex_to_hsl",
-        "hsv": "color_utils.hex_to_hsv",
-        "temperature": "color_utils.get_color_temperature",
-        "saturation_level": "color_utils.get_saturation_level",
-        "lightness_level": "color_utils.get_lightness_level",
-        "is_neutral": "color_utils.is_neutral_color",
-        "wcag_contrast_on_white": "color_utils.calculate_wcag_contrast",
-        "wcag_contrast_on_black": "color_utils.calculate_wcag_contrast",
-        "wcag_aa_compliant_text": "color_utils.is_wcag_compliant",
-        "wcag_aaa_compliant_text": "color_utils.is_wcag_compliant",
-        "wcag_aa_compliant_normal": "color_utils.is_wcag_compliant",
-        "wcag_aaa_compliant_normal": "color_utils.is_wcag_compliant",
-        "colorblind_safe": "color_utils.get_saturation_level",
-        "tint_color": "color_utils.get_color_variant",
-        "shade_color": "color_utils.get_color_variant",
-        "tone_color": "color_utils.get_color_variant",
-        "closest_web_safe": "color_utils.get_closest_web_safe",
-        "closest_css_named": "color_utils.get_closest_css_named",
-    }
+    metadata = dict(PROPERTY_SOURCES)
 
     if dominant_colors and "delta_e_to_dominant" in properties:
         metadata["delta_e_to_dominant"] = "color_utils.calculate_delta_e"
@@ -0,0 +1,282 @@
+"""Single-call AI extraction of color, spacing, shadow and typography tokens.
+
+The per-type AI extractors each upload the image and pay the prompt overhead
+again. This extractor asks one OpenAI vision call for every section in a
+single JSON object and streams the answer; each section is handed out as soon
+as its closing brace arrives, parsed into the same result models the per-type
+extractors return:
+
+    async for section, result in CombinedAIExtractor().stream_sections(image_b64, "image/png"):
+        ...  # ("color", ColorExtractionResult), ("spacing", SpacingExtractionResult), ...
+
+Pass ``on_token`` to also receive every color, spacing, shadow and typography
+token as soon as its own object closes, well before its section is complete.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Any
+
+from pydantic import BaseModel
+
+from copy_that.application.ai_shadow_extractor import AIShadowExtractor, ShadowExtractionResult
+from copy_that.application.ai_typography_extractor import (
+    AITypographyExtractor,
+    TypographyExtractionResult,
+)
+from copy_that.application.json_stream import JSONObjectStream
+from copy_that.application.openai_color_extractor import (
+    ColorExtractionResult,
+    OpenAIColorExtractor,
+)
+from copy_that.application.spacing_extractor import AISpacingExtractor
+from copy_that.application.spacing_models import SpacingExtractionResult
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image, stream_text
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("color", "spacing", "shadow", "typography")
+EXTRACTOR_NAME = "openai_combined"
+
+# Token list of each section, e.g. {"color": {"colors": [...]}}
+_TOKEN_LISTS = {"color": "colors", "spacing": "tokens", "shadow": "shadows", "typography": "tokens"}
+
+_SECTION_PROMPTS = {
+    "color": """"color": {{
+    "colors": [{{"hex": "#XXXXXX", "name": "Color Name", "design_intent": "primary brand color",
+                "confidence": 0.95, "usage": ["buttons"], "prominence_percentage": 25.0}}],
+    "dominant_colors": ["#XXXXXX", "#YYYYYY", "#ZZZZZZ"],
+    "color_palette": "Description of the palette"
+  }}""",
+    "spacing": """"spacing": {{
+    "tokens": [{{"value_px": 8, "name": "spacing-sm", "semantic_role": "padding",
+                "spacing_type": "padding", "usage": ["card padding"], "confidence": 0.9}}],
+    "scale_system": "8pt", "base_unit": 8, "grid_compliance": 0.92, "extraction_confidence": 0.9
+  }}""",
+    "shadow": """"shadow": {{
+    "shadows": [{{"x_offset": 0, "y_offset": 4, "blur_radius": 12, "spread_radius": 0,
+                 "color_hex": "#000000", "opacity": 0.15, "shadow_type": "drop",
+                 "semantic_name": "card-shadow", "confidence": 0.8, "is_inset": false,
+                 "affects_text": false}}]
+  }}""",
+    "typography": """"typography": {{
+    "tokens": [{{"font_family": "Inter", "font_weight": 400, "font_size": 16, "line_height": 1.5,
+                "letter_spacing": 0.0, "text_transform": "none", "semantic_role": "body",
+                "category": "text", "name": "Body Text", "confidence": 0.9, "prominence": 40.0,
+                "is_readable": true}}],
+    "typography_palette": "Description of the type system", "extraction_confidence": 0.85
+  }}""",
+}
+
+_SECTION_RULES = {
+    "color": "- color: the {max_colors} most important colors; dominant_colors is the top 3.",
+    "spacing": "- spacing: up to {max_spacing_tokens} distinct spacing values; prefer 4pt/8pt "
+    "grids.",
+    "shadow": "- shadow: every drop, inner (inset) or text shadow; shadow_type is drop, inner or "
+    "text; use an empty list when there are none.",
+    "typography": "- typography: the {max_typography_tokens} most important text styles with "
+    "specific font family names; font_weight 100-900, font_size 8-120 px, line_height "
+    "0.8-3.0, letter_spacing in em.",
+}
+
+
+class CombinedExtractionResult(BaseModel):
+    """Results of one combined extraction, one per requested section"""
+
+    color: ColorExtractionResult | None = None
+    spacing: SpacingExtractionResult | None = None
+    shadow: ShadowExtractionResult | None = None
+    typography: TypographyExtractionResult | None = None
+    extractor_used: str = EXTRACTOR_NAME
+
+
+class CombinedAIExtractor:
+    """Extract all AI token types from one streamed OpenAI vision call"""
+
+    def __init__(self, api_key: str | None = None, model: str | None = None):
+        """Initialize the combined extractor
+
+        Args:
+            api_key: OpenAI API key. If not provided, uses OPENAI_API_KEY env var
+            model: OpenAI vision model. Defaults to OPENAI_COMBINED_MODEL or gpt-4o
+        """
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = get_ai_client_pool().openai(api_key)
+        self.model = model or os.getenv("OPENAI_COMBINED_MODEL", "gpt-4o")
+
+        # Section parsers of the per-type extractors, so both modes return the same tokens
+        self._color = OpenAIColorExtractor(api_key)
+        self._color.model = self.model
+        self._spacing = AISpacingExtractor(api_key, model=self.model)
+        self._typography = AITypographyExtractor()
+        self._typography.model = self.model
+
+    async def extract_from_base64(
+        self,
+        image_data: str,
+        media_type: str = "image/png",
+        max_colors: int = 12,
+        max_spacing_tokens: int = 20,
+        max_typography_tokens: int = 15,
+        sections: Sequence[str] = SECTIONS,
+        on_token: Callable[[str, BaseModel], None] | None = None,
+    ) -> CombinedExtractionResult:
+        """Extract every requested section and return them together"""
+        result = CombinedExtractionResult()
+        async for section, section_result in self.stream_sections(
+            image_data,
+            media_type,
+            max_colors=max_colors,
+            max_spacing_tokens=max_spacing_tokens,
+            max_typography_tokens=max_typography_tokens,
+            sections=sections,
+            on_token=on_token,
+        ):
+            setattr(result, section, section_result)
+        return result
+
+    async def stream_sections(
+        self,
+        image_data: str,
+        media_type: str = "image/png",
+        max_colors: int = 12,
+        max_spacing_tokens: int = 20,
+        max_typography_tokens: int = 15,
+        sections: Sequence[str] = SECTIONS,
+        on_token: Callable[[str, BaseModel], None] | None = None,
+    ) -> AsyncIterator[tuple[str, BaseModel]]:
+        """Yield ``(section, result)`` as each section of the answer completes
+
+        Sections the model leaves out are yielded last, parsed from an empty
+        payload so they fall back exactly like the per-type extractors.
+        ``on_token(section, token)`` is called for each valid token as soon as
+        it closes; those early tokens lack section-wide context (palette,
+        spacing scale) that the section result adds.
+
+        Raises:
+            ValueError: If a section name is unknown
+            openai.APIError: If the OpenAI call fails
+        """
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown token sections: {sorted(unknown)}")
+        limits = {
+            "max_colors": max_colors,
+            "max_spacing_tokens": max_spacing_tokens,
+            "max_typography_tokens": max_typography_tokens,
+        }
+        pending = [section for section in SECTIONS if section in sections]
+
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "combined")
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": self._build_prompt(pending, limits)},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:{media_type};base64,{image_data}"},
+                        },
+                    ],
+                }
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=4096,
+            temperature=0.2,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        parser = JSONObjectStream(
+            items=[(section, _TOKEN_LISTS[section]) for section in pending] if on_token else ()
+        )
+        spacing_seen: set[int] = set()
+        async with contextlib.aclosing(stream_text(stream)) as chunks:
+            async for text in chunks:
+                for path, value in parser.feed(text):
+                    section = path[0]
+                    if section not in pending:
+                        continue
+                    if len(path) == 1:
+                        if isinstance(value, dict):
+                            pending.remove(section)
+                            yield section, await self._parse_section(section, value, limits)
+                    elif on_token is not None:
+                        token = await self._parse_token(
+                            section, path[2], value, limits, spacing_seen
+                        )
+                        if token is not None:
+                            on_token(section, token)
+
+        for section in pending:
+            logger.warning("Combined extraction returned no %s section", section)
+            yield section, await self._parse_section(section, {}, limits)
+
+    def _build_prompt(self, sections: Sequence[str], limits: dict[str, int]) -> str:
+        """Instruction asking for the sections in streaming order"""
+        schema = ",\n  ".join(_SECTION_PROMPTS[section] for section in sections).format()
+        rules = "\n".join(_SECTION_RULES[section].format(**limits) for section in sections)
+        return f"""Analyze this UI/design image and extract design tokens for a design system.
+
+Return JSON ONLY, with the top-level keys in exactly this order:
+{{
+  {schema}
+}}
+
+Rules:
+{rules}
+- confidence values must be 0-1.0.
+- If unsure, still produce a conservative guess for every section."""
+
+    async def _parse_token(
+        self,
+        section: str,
+        index: int,
+        item: Any,
+        limits: dict[str, int],
+        spacing_seen: set[int],
+    ) -> BaseModel | None:
+        """Parse one streamed token like its section parser would, or None to skip it"""
+        if not isinstance(item, dict):
+            return None
+        if section == "color":
+            if index >= limits["max_colors"]:
+                return None
+            return await asyncio.to_thread(self._color._build_token, item)
+        if section == "spacing":
+            if index >= limits["max_spacing_tokens"]:
+                return None
+            token = self._spacing._parse_spacing_token(item, index)
+            if token is None or token.value_px in spacing_seen:
+                return None
+            spacing_seen.add(token.value_px)
+            return token
+        if section == "shadow":
+            return AIShadowExtractor._parse_shadow(item)
+        if index >= limits["max_typography_tokens"]:
+            return None
+        return self._typography._parse_typography_token(item)
+
+    async def _parse_section(
+        self, section: str, payload: dict[str, Any], limits: dict[str, int]
+    ) -> BaseModel:
+        """Parse one section's JSON with the matching per-type extractor's parser"""
+        if section == "color":
+            colors = payload.get("colors") or []
+            # Property enrichment is CPU work; keep it off the event loop
+            result = await asyncio.to_thread(
+                self._color._build_result,
+                {**payload, "colors": colors[: limits["max_colors"]]},
+            )
+            result.extractor_used = EXTRACTOR_NAME
+            return result
+        if section == "spacing":
+            return self._spacing._parse_spacing_response(payload, limits["max_spacing_tokens"])
+        if section == "shadow":
+            return AIShadowExtractor._parse_shadow_payload(payload, extractor_used=EXTRACTOR_NAME)
+        return self._typography._parse_typography_payload(payload, limits["max_typography_tokens"])
@@ -16,11 +16,18 @@ from PIL import Image
 
 from copy_that.application import color_utils
 from copy_that.application.color_extractor import ColorExtractionResult, ExtractedColorToken
+from copy_that.application.color_properties import (
+    apply_properties,
+    compute_properties_batch,
+    is_hex_color,
+)
 from copy_that.application.cv.debug_color import generate_debug_overlay
 from core.tokens.color import make_color_token
 from core.tokens.graph import TokenGraph
 from core.tokens.model import TokenType
 from core.tokens.repository import TokenRepository
+from cv_pipeline import superpixels
+from cv_pipeline.context import ImageContext
 from cv_pipeline.preprocess import preprocess_image
 
 if TYPE_CHECKING:
@@ -30,9 +37,27 @@ if TYPE_CHECKING:
 class CVColorExtractor:
     """Quick palette extraction without remote AI."""
 
-    def __init__(self, max_colors: int = 8, use_superpixels: bool = True):
+    def __init__(
+        self,
+        max_colors: int = 8,
+        use_superpixels: bool = True,
+        superpixel_backend: str | None = None,
+    ):
         self.max_colors = max_colors
         self.use_superpixels = use_superpixels
+        # None defers to CV_SUPERPIXEL_BACKEND (see cv_pipeline.superpixels)
+        self.superpixel_backend = superpixel_backend
+
+    @property
+    def superpixel_key(self) -> str | None:
+        """Superpixel backend that shapes the palette, for result-cache keys."""
+        if not self.use_superpixels:
+            return None
+        try:
+            return superpixels.resolve_backend(self.superpixel_backend)
+        except ValueError:
+            # _superpixel_palette yields nothing for an unknown backend
+            return self.superpixel_backend or superpixels.default_backend()
 
     def extract_from_bytes(
         self,
@@ -41,13 +66,33 @@ class CVColorExtractor:
         token_repo: TokenRepository | None = None,
         token_namespace: str = "token/color/cv",
     ) -> ColorExtractionResult:
-        views = preprocess_image(data)
+        return self.extract_from_context(
+            ImageContext.from_bytes(data),
+            token_repo=token_repo,
+            token_namespace=token_namespace,
+        )
+
+    def extract_from_context(
+        self,
+        context: ImageContext,
+        *,
+        token_repo: TokenRepository | None = None,
+        token_namespace: str = "token/color/cv",
+    ) -> ColorExtractionResult:
+        """Extract a palette from a shared, already-decoded ImageContext."""
+        views = context.preprocessed(preprocess_image)
         image = views["pil_image"]
         # Superpixel palette (preferred) -> fallback to palette quantization
         image_module = cast(Any, Image)
         rgb_counts: CounterType[tuple[int, int, int]] = Counter()
 
-        super_pixels = self._superpixel_palette(views["cv_bgr"]) if self.use_superpixels else []
+        super_pixels = (
+            self._superpixel_palette(
+                views["cv_bgr"], context=context, backend=self.superpixel_backend
+            )
+            if self.use_superpixels
+            else []
+        )
         if super_pixels:
             for rgb, cnt in super_pixels:
                 key: tuple[int, int, int] = (int(rgb[0]), int(rgb[1]), int(rgb[2]))
@@ -182,6 +227,15 @@ class CVColorExtractor:
             )
 
         dominant = [t.hex for t in tokens[:3]]
+        # Fill WCAG/variant/naming properties for the whole palette in one pass
+        # (state variants can carry non-hex CSS strings; those are left untouched)
+        apply_properties(
+            tokens,
+            compute_properties_batch(
+                [t.hex for t in tokens if is_hex_color(t.hex)],
+                [hx for hx in dominant if is_hex_color(hx)],
+            ),
+        )
         segmented_palette = self._segment_palette(views.get("cv_bgr"))
         debug_overlay = generate_debug_overlay(
             views["cv_bgr"],
@@ -215,11 +269,8 @@ class CVColorExtractor:
         token_repo: TokenRepository | None = None,
         token_namespace: str = "token/color/cv",
     ) -> ColorExtractionResult:
-        import base64
-
-        data = base64.b64decode(image_base64.split(",")[1] if "," in image_base64 else image_base64)
-        return self.extract_from_bytes(
-            data,
+        return self.extract_from_context(
+            ImageContext.from_base64(image_base64),
             token_repo=token_repo,
             token_namespace=token_namespace,
         )
@@ -311,10 +362,11 @@ class CVColorExtractor:
     def _detect_background_hex(image: Image.Image, tokens: list[ExtractedColorToken]) -> str | None:
         """Detect dominant background via corner/edge sampling and map to nearest token."""
         try:
-            rgb = image.convert("RGB")
-            w, h = rgb.size
+            rgb = np.asarray(image.convert("RGB"))
+            h, w = rgb.shape[:2]
+            if not h or not w:
+                return None
             patch = max(4, min(w, h) // 12)
-            samples = []
             coords = [
                 (0, 0),
                 (w - patch, 0),
@@ -323,19 +375,23 @@ class CVColorExtractor:
                 (w // 2 - patch // 2, 0),
                 (w // 2 - patch // 2, h - patch),
             ]
-            for x, y in coords:
-                for i in range(patch):
-                    for j in range(patch):
-                        samples.append(rgb.getpixel((min(w - 1, x + i), min(h - 1, y + j))))
-            if not samples:
-                return None
-            hex_counts = Counter(
-                f"#{r:02x}{g:02x}{b:02x}"
-                for sample in samples
-                if isinstance(sample, tuple) and len(sample) == 3
-                for r, g, b in [sample]
-            )
-            bg_hex, _ = hex_counts.most_common(1)[0]
+            offsets = np.arange(patch)
+            # Clamp to the far edge; negative offsets (images narrower than a
+            # patch) wrap like PIL's getpixel. Column-major within each patch.
+            samples = np.concatenate(
+                [
+                    rgb[np.minimum(y + offsets, h - 1) % h][:, np.minimum(x + offsets, w - 1) % w]
+                    .transpose(1, 0, 2)
+                    .reshape(-1, 3)
+                    for x, y in coords
+                ]
+            ).astype(np.int64)
+            packed = (samples[:, 0] << 16) | (samples[:, 1] << 8) | samples[:, 2]
+            values, first_index, counts = np.unique(packed, return_index=True, return_counts=True)
+            # Ties go to the color sampled first
+            winners = np.flatnonzero(counts == counts.max())
+            bg = int(values[winners[np.argmin(first_index[winners])]])
+            bg_hex = f"#{bg >> 16:02x}{(bg >> 8) & 0xFF:02x}{bg & 0xFF:02x}"
             # Map to nearest token by OKLCH
             best = None
             best_delta = 1e9
@@ -401,35 +457,26 @@ class CVColorExtractor:
             return []
 
     @staticmethod
-    def _superpixel_palette(cv_bgr: Any) -> list[tuple[tuple[int, int, int], int]]:
-        """Return list of (rgb, count) from superpixels; fallback empty if unavailable."""
-        try:
-            from skimage import segmentation  # type: ignore[import-not-found]
-        except Exception:
-            return []
+    def _superpixel_palette(
+        cv_bgr: Any, context: ImageContext | None = None, backend: str | None = None
+    ) -> list[tuple[tuple[int, int, int], int]]:
+        """Return list of (rgb, count) from superpixels; fallback empty if unavailable.
+
+        When a context is given its cached superpixel labels are reused.
+        """
         try:
             rgb = cv_bgr[:, :, ::-1]  # BGR->RGB
-            labels = segmentation.slic(
-                rgb,
-                n_segments=120,
-                compactness=20,
-                start_label=0,
-            )
-            unique, counts = np.unique(labels, return_counts=True)
-            colors: list[tuple[tuple[int, int, int], int]] = []
-            for lbl, cnt in zip(unique, counts, strict=False):
-                mask = labels == lbl
-                mean_rgb = rgb[mask].mean(axis=0)
-                colors.append(
-                    (
-                        (
-                            int(round(mean_rgb[0])),
-                            int(round(mean_rgb[1])),
-                            int(round(mean_rgb[2])),
-                        ),
-                        int(cnt),
-                    )
+            if context is not None:
+                labels = context.superpixel_labels(n_segments=120, compactness=20, backend=backend)
+            else:
+                labels = superpixels.superpixel_labels(
+                    rgb, n_segments=120, compactness=20, backend=backend
                 )
-            return colors
+            means, counts = superpixels.segment_mean_colors(rgb, labels)
+            rounded = np.rint(means).astype(int)
+            return [
+                ((int(r), int(g), int(b)), int(cnt))
+                for (r, g, b), cnt in zip(rounded, counts, strict=False)
+            ]
         except Exception:
             return []
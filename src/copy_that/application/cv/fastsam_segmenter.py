@@ -21,6 +21,8 @@ import numpy as np
 from numpy.typing import NDArray
 from PIL import Image
 
+from cv_pipeline.model_registry import get_model_registry
+
 logger = logging.getLogger(__name__)
 
 
@@ -155,3 +157,20 @@ def _suppress_overlaps(regions: list[FastSAMRegion], iou_thresh: float) -> list[
             continue
         kept.append(r)
     return kept
+
+
+def _load_fastsam_segmenter(model_path: str, device: str) -> FastSAMSegmenter:
+    segmenter = FastSAMSegmenter(model_path, device=device)
+    segmenter._load()
+    return segmenter
+
+
+def get_fastsam_segmenter(model_path: str, device: str = "cpu") -> FastSAMSegmenter:
+    """Process-wide FastSAM segmenter for ``model_path``/``device`` (loaded once).
+
+    Raises ``ModelUnavailableError`` while a failed load is in its retry backoff.
+    """
+    return get_model_registry().get(
+        f"fastsam:{model_path}@{device}",
+        lambda: _load_fastsam_segmenter(model_path, device),
+    )
@@ -20,6 +20,8 @@ import numpy as np
 from numpy.typing import NDArray
 from PIL import Image
 
+from cv_pipeline.model_registry import get_model_registry, register_model
+
 logger = logging.getLogger(__name__)
 
 ImageMode = Literal["ui_screenshot", "photo", "ai_panel"]
@@ -36,6 +38,20 @@ def _try_import_layoutparser() -> Any:
     return lp
 
 
+LAYOUTPARSER_MODEL_NAME = "layoutparser"
+
+
+def _load_layoutparser() -> tuple[Any, Any]:
+    """Layout model and OCR agent, built once per process via the model registry."""
+    lp = _try_import_layoutparser()
+    model = lp.AutoLayoutModel("lp://PubLayNet/efficientdet")
+    ocr_agent = lp.TesseractAgent(languages="eng")
+    return model, ocr_agent
+
+
+register_model(LAYOUTPARSER_MODEL_NAME, _load_layoutparser)
+
+
 NumericArray = NDArray[np.integer[Any] | np.floating[Any]]
 
 
@@ -103,17 +119,17 @@ def run_layoutparser_text(
     )
     if not allow:
         return []
-    try:
-        lp = _try_import_layoutparser()
-    except Exception as exc:  # pragma: no cover - optional dep
-        logger.warning("LayoutParser disabled: %s", exc)
+    registry = get_model_registry()
+    loaded = registry.get_optional(LAYOUTPARSER_MODEL_NAME)
+    if loaded is None:
+        # Load failure already logged by the registry; retried after backoff
         return []
+    model, ocr_agent = loaded
     try:
-        model = lp.AutoLayoutModel("lp://PubLayNet/efficientdet")
-        layout = model.detect(image)
-        ocr_agent = lp.TesseractAgent(languages="eng")
+        with registry.track(LAYOUTPARSER_MODEL_NAME):
+            layout = model.detect(image)
     except Exception as exc:  # pragma: no cover - heavy dep issues
-        logger.warning("LayoutParser/Tesseract unavailable: %s", exc)
+        logger.warning("LayoutParser detection failed: %s", exc)
         return []
 
     tokens: list[TextToken] = []
@@ -6,7 +6,6 @@ Adds prominence metadata and base unit/scale info for UI display.
 
 from __future__ import annotations
 
-import base64
 import logging
 import os
 from typing import Any, cast
@@ -22,7 +21,7 @@ import numpy as np
 from copy_that.application import color_utils
 from copy_that.application import spacing_utils as su
 from copy_that.application.cv.debug_spacing import generate_spacing_overlay
-from copy_that.application.cv.fastsam_segmenter import FastSAMRegion, FastSAMSegmenter
+from copy_that.application.cv.fastsam_segmenter import FastSAMRegion, get_fastsam_segmenter
 from copy_that.application.cv.grid_cv_extractor import infer_grid_from_bboxes
 from copy_that.application.cv.layout_text_detector import (
     ImageMode,
@@ -38,6 +37,8 @@ from copy_that.application.spacing_models import (
     SpacingToken,
     SpacingType,
 )
+from cv_pipeline.context import ImageContext
+from cv_pipeline.model_registry import get_model_registry
 from cv_pipeline.preprocess import preprocess_image
 from cv_pipeline.primitives import components_to_bboxes, gaps_from_bboxes
 
@@ -71,7 +72,6 @@ class CVSpacingExtractor:
             or ("FastSAM-s.pt" if self._fastsam_enabled else None)
         )
         self._fastsam_device = os.getenv("FASTSAM_DEVICE", fastsam_device)
-        self._fastsam: FastSAMSegmenter | None = None
         self.image_mode = image_mode
         lp_env = os.getenv("ENABLE_LAYOUTPARSER_TEXT")
         self._lp_enabled = lp_env not in {"0", "false", "False"} if lp_env is not None else True
@@ -171,15 +171,19 @@ class CVSpacingExtractor:
         return component_metrics, remaining
 
     def extract_from_bytes(self, data: bytes) -> SpacingExtractionResult:
+        return self.extract_from_context(ImageContext.from_bytes(data))
+
+    def extract_from_context(self, context: ImageContext) -> SpacingExtractionResult:
+        """Infer spacing from a shared, already-decoded ImageContext."""
         if cv2 is None:
             return self._fallback()
         try:
-            views = preprocess_image(data)
+            views = context.preprocessed(preprocess_image)
             gray = views["cv_gray"]
         except Exception:
             return self._fallback()
 
-        bboxes = components_to_bboxes(gray)
+        bboxes = context.component_bboxes(components_to_bboxes, preprocess_image)
         if len(bboxes) < 2:
             return self._fallback()
 
@@ -261,13 +265,13 @@ class CVSpacingExtractor:
         fastsam_tokens: list[dict[str, Any]] = []
         if self._fastsam_enabled and self._fastsam_model_path:
             try:
-                if self._fastsam is None:
-                    self._fastsam = FastSAMSegmenter(
-                        self._fastsam_model_path, device=self._fastsam_device
-                    )
                 fastsam_input = pil_img or views.get("cv_bgr")
                 if fastsam_input is not None:
-                    fastsam_regions = self._fastsam.segment(fastsam_input)
+                    fastsam = get_fastsam_segmenter(
+                        self._fastsam_model_path, device=self._fastsam_device
+                    )
+                    with get_model_registry().track("fastsam"):
+                        fastsam_regions = fastsam.segment(fastsam_input)
                 if pil_img is not None and fastsam_regions:
                     w, h = pil_img.size
                     min_area = max(int(w * h * 0.001), 150)
@@ -464,8 +468,7 @@ class CVSpacingExtractor:
         )
 
     def extract_from_base64(self, image_base64: str) -> SpacingExtractionResult:
-        data = base64.b64decode(image_base64.split(",")[1] if "," in image_base64 else image_base64)
-        return self.extract_from_bytes(data)
+        return self.extract_from_context(ImageContext.from_base64(image_base64))
 
     @staticmethod
     def _quantize(val: int) -> int:
@@ -0,0 +1,124 @@
+"""Incremental parsing of a JSON object whose text arrives in chunks.
+
+Vision models stream their JSON answer a few characters at a time. Instead of
+waiting for the whole document, feed each chunk in and act on every top-level
+member as soon as its value is complete, and on every element of the arrays
+named in ``items`` as soon as that element closes:
+
+    parser = JSONObjectStream(items=[("colors",)])
+    async for text in chunks:
+        for path, value in parser.feed(text):
+            ...  # ("colors", 0) -> first color, ...; ("colors",) -> the whole list
+
+Paths are the keys (and array positions) leading to the value in the document.
+Values are decoded with ``json.loads`` once their closing delimiter arrives, so
+they are exactly what a full parse would produce. Values that do not decode (a
+truncated or malformed answer) are skipped and logged.
+"""
+
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+Path = tuple[str | int, ...]
+
+
+@dataclass
+class _Container:
+    """An object or array that has been opened but not closed yet."""
+
+    path: Path
+    is_array: bool
+    start: int
+    key: str | None = None  # objects: key of the member being read
+    index: int = 0  # arrays: position of the element being read
+
+
+class JSONObjectStream:
+    """Yields ``(path, value)`` for each completed member or watched array element."""
+
+    def __init__(self, items: Iterable[Path] = ()) -> None:
+        """
+        Args:
+            items: Paths of arrays whose object and array elements are
+                reported one by one, e.g. ``[("colors",), ("spacing", "tokens")]``
+        """
+        self._items = set(items)
+        self._text = ""
+        self._pos = 0  # next character to scan
+        self._stack: list[_Container] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._member_start: int | None = None
+        self.closed = False  # the top-level object has ended
+
+    def feed(self, text: str) -> list[tuple[Path, Any]]:
+        """Add the next chunk of text; return the values it completed."""
+        self._text += text
+        completed: list[tuple[Path, Any]] = []
+        text, pos, stack = self._text, self._pos, self._stack
+        while pos < len(text) and not self.closed:
+            char = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start : pos + 1]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ":":
+                if stack and not stack[-1].is_array and self._last_string is not None:
+                    stack[-1].key = self._decode(self._last_string)
+            elif char in "{[":
+                path: Path = ()
+                if stack:
+                    parent = stack[-1]
+                    path = (*parent.path, parent.index if parent.is_array else parent.key)
+                stack.append(_Container(path, char == "[", pos))
+                if len(stack) == 1:
+                    self._member_start = pos + 1
+            elif char in "}]":
+                child = stack.pop()
+                if not stack:
+                    self._complete_member(text[self._member_start : pos], completed)
+                    self.closed = True
+                elif stack[-1].is_array and stack[-1].path in self._items:
+                    value = self._decode(text[child.start : pos + 1])
+                    if value is not None:
+                        completed.append((child.path, value))
+            elif char == "," and stack:
+                if len(stack) == 1:
+                    self._complete_member(text[self._member_start : pos], completed)
+                    self._member_start = pos + 1
+                elif stack[-1].is_array:
+                    stack[-1].index += 1
+                else:
+                    stack[-1].key = None
+            pos += 1
+        self._pos = pos
+        return completed
+
+    @staticmethod
+    def _decode(value: str) -> Any:
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError as e:
+            logger.debug("Skipping undecodable streamed value: %s", e)
+            return None
+
+    def _complete_member(self, member: str, completed: list[tuple[Path, Any]]) -> None:
+        if not member.strip():
+            return
+        decoded = self._decode("{" + member + "}")
+        if decoded is not None:
+            completed.extend(((key,), value) for key, value in decoded.items())
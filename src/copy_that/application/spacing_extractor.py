@@ -8,21 +8,27 @@ spacing scale so the API never returns a 500 due to model quotas.
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextlib
 import json
 import logging
 import os
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
-import requests
-from openai import OpenAI
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image, stream_text
+from copy_that.infrastructure.http import get_image_fetcher
 
 from . import spacing_utils as su
+from .json_stream import JSONObjectStream
 from .spacing_models import SpacingExtractionResult, SpacingScale, SpacingToken
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_WARNING = "AI spacing extraction failed; showing the default 4pt scale"
+
 
 class AISpacingExtractor:
     """
@@ -38,21 +44,18 @@ class AISpacingExtractor:
             model: OpenAI model name. Defaults to gpt-4o-mini for latency.
         """
 
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.client = get_ai_client_pool().openai(api_key or os.getenv("OPENAI_API_KEY"))
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
     # Public extraction helpers -------------------------------------------------
-    def extract_spacing_from_image_url(
+    async def extract_spacing_from_image_url(
         self, image_url: str, max_tokens: int = 15
     ) -> SpacingExtractionResult:
         """Extract spacing tokens from a remote image URL."""
-        response = requests.get(image_url, timeout=30)
-        response.raise_for_status()
-        media_type = response.headers.get("content-type", "image/png")
-        image_data = base64.standard_b64encode(response.content).decode("utf-8")
-        return self.extract_spacing_from_base64(image_data, media_type, max_tokens)
+        image = await get_image_fetcher().fetch(image_url)
+        return await self.extract_spacing_from_base64(image.base64, image.content_type, max_tokens)
 
-    def extract_spacing_from_file(
+    async def extract_spacing_from_file(
         self, file_path: str, max_tokens: int = 15
     ) -> SpacingExtractionResult:
         """Extract spacing tokens from a local file path."""
@@ -69,44 +72,79 @@ class AISpacingExtractor:
         }
         media_type = media_types.get(file_path.suffix.lower(), "image/png")
 
-        with open(file_path, "rb") as f:
-            image_data = base64.standard_b64encode(f.read()).decode("utf-8")
+        image_bytes = await asyncio.to_thread(file_path.read_bytes)
+        image_data = base64.standard_b64encode(image_bytes).decode("utf-8")
 
-        return self.extract_spacing_from_base64(image_data, media_type, max_tokens)
+        return await self.extract_spacing_from_base64(image_data, media_type, max_tokens)
 
-    def extract_spacing_from_base64(
-        self, image_data: str, media_type: str, max_tokens: int = 15
+    async def extract_spacing_from_base64(
+        self,
+        image_data: str,
+        media_type: str,
+        max_tokens: int = 15,
+        on_token: Callable[[SpacingToken], None] | None = None,
     ) -> SpacingExtractionResult:
-        """Extract spacing tokens from base64-encoded image data."""
+        """Extract spacing tokens from base64-encoded image data.
+
+        With ``on_token`` the answer is streamed and each new spacing value is
+        passed to it as soon as its JSON object closes; those early tokens lack
+        the scale context (base unit, grid alignment) of the returned result.
+        """
         prompt = self._build_extraction_prompt(max_tokens)
-        data_url = (
-            image_data
-            if image_data.startswith("data:")
-            else f"data:{media_type};base64,{image_data}"
-        )
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "spacing")
+        data_url = f"data:{media_type};base64,{image_data}"
+        request: dict[str, Any] = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image_url", "image_url": {"url": data_url}},
+                        {"type": "text", "text": prompt},
+                    ],
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.1,
+        }
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "image_url", "image_url": {"url": data_url}},
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1,
-            )
-            content = response.choices[0].message.content
+            if on_token is None:
+                response = await self.client.chat.completions.create(**request)
+                content = response.choices[0].message.content
+            else:
+                content = await self._stream_spacing(request, max_tokens, on_token)
             payload: dict[str, Any] = json.loads(content) if content else {}
             return self._parse_spacing_response(payload, max_tokens)
         except Exception as exc:  # noqa: BLE001
             logger.error("OpenAI spacing extraction error: %s", exc)
             return self._fallback_spacing(max_tokens)
 
+    async def _stream_spacing(
+        self,
+        request: dict[str, Any],
+        max_tokens: int,
+        on_token: Callable[[SpacingToken], None],
+    ) -> str:
+        """Stream the answer, handing each new spacing value to ``on_token``; return the text."""
+        parser = JSONObjectStream(items=[("tokens",)])
+        seen: set[int] = set()
+        parts = []
+        stream = await self.client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        async with contextlib.aclosing(stream_text(stream)) as chunks:
+            async for text in chunks:
+                parts.append(text)
+                for path, item in parser.feed(text):
+                    if len(path) != 2 or path[1] >= max_tokens:
+                        continue
+                    token = self._parse_spacing_token(item, path[1])
+                    if token is not None and token.value_px not in seen:
+                        seen.add(token.value_px)
+                        on_token(token)
+        return "".join(parts)
+
     # Internals -----------------------------------------------------------------
     def _build_extraction_prompt(self, max_tokens: int) -> str:
         """Instruction for OpenAI vision in JSON mode."""
@@ -152,26 +190,11 @@ Rules:
 
         raw_tokens = payload.get("tokens") or []
         for idx, item in enumerate(raw_tokens[:max_tokens]):
-            try:
-                value_px = int(round(float(item.get("value_px", item.get("value", 0)))))
-            except Exception as e:
-                logger.debug(f"Failed to parse spacing value at index {idx}: {e}")
+            entry = self._parse_spacing_entry(item, idx)
+            if entry is None or entry["value_px"] in unique_values:
                 continue
-            if value_px <= 0 or value_px in unique_values:
-                continue
-            unique_values.add(value_px)
-            entries.append(
-                {
-                    "value_px": value_px,
-                    "name": item.get("name") or f"spacing-{idx}",
-                    "semantic_role": item.get("semantic_role"),
-                    "spacing_type": item.get("spacing_type"),
-                    "category": item.get("category"),
-                    "confidence": float(item.get("confidence", 0.82)),
-                    "usage": item.get("usage", []),
-                    "scale_position": idx,
-                }
-            )
+            unique_values.add(entry["value_px"])
+            entries.append(entry)
 
         if not entries:
             return self._fallback_spacing(max_tokens)
@@ -228,6 +251,39 @@ Rules:
             unique_values=unique_sorted,
         )
 
+    @staticmethod
+    def _parse_spacing_entry(item: Any, idx: int) -> dict[str, Any] | None:
+        """One spacing value from the model's ``tokens`` list, or None if unusable."""
+        try:
+            value_px = int(round(float(item.get("value_px", item.get("value", 0)))))
+        except Exception as e:
+            logger.debug(f"Failed to parse spacing value at index {idx}: {e}")
+            return None
+        if value_px <= 0:
+            return None
+        return {
+            "value_px": value_px,
+            "name": item.get("name") or f"spacing-{idx}",
+            "semantic_role": item.get("semantic_role"),
+            "spacing_type": item.get("spacing_type"),
+            "category": item.get("category"),
+            "confidence": float(item.get("confidence", 0.82)),
+            "usage": item.get("usage", []),
+            "scale_position": idx,
+        }
+
+    @classmethod
+    def _parse_spacing_token(cls, item: Any, idx: int) -> SpacingToken | None:
+        """A streamed spacing value as a token, before the scale is known."""
+        entry = cls._parse_spacing_entry(item, idx)
+        if entry is None:
+            return None
+        try:
+            return SpacingToken(**entry)
+        except ValueError as e:
+            logger.debug("Skipping invalid streamed spacing token: %s", e)
+            return None
+
     def _fallback_spacing(self, max_tokens: int) -> SpacingExtractionResult:
         """Deterministic fallback (never 500)."""
         default_values = [4, 8, 16, 24, 32, 48][:max_tokens]
@@ -260,8 +316,14 @@ Rules:
             min_spacing=min(default_values),
             max_spacing=max(default_values),
             unique_values=default_values,
+            warnings=[FALLBACK_WARNING],
         )
 
+    @staticmethod
+    def is_fallback(result: SpacingExtractionResult) -> bool:
+        """True for the default scale returned when the AI call failed."""
+        return FALLBACK_WARNING in (result.warnings or [])
+
     @staticmethod
     def _parse_scale_system(raw: Any) -> SpacingScale:
         """Map raw scale string to enum."""
@@ -86,6 +86,9 @@ class Project(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    image_asset_hash: Mapped[str | None] = mapped_column(
+        String(64), ForeignKey("image_assets.sha256"), nullable=True, index=True
+    )
     owner_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("users.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
@@ -99,6 +102,24 @@ class Project(Base):
         return f"<Project(id={self.id}, name='{self.name}')>"
 
 
+class ImageAsset(Base):
+    """An uploaded image, stored in the blob store under its SHA-256 hash"""
+
+    __tablename__ = "image_assets"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    media_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # JSON list of generated variants, e.g. ["thumbnail", "preview"]
+    variants: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ImageAsset(sha256='{self.sha256[:12]}', media_type='{self.media_type}')>"
+
+
 class SpacingToken(Base):
     """Spacing token persistence."""
 
@@ -283,7 +304,9 @@ class ExtractionJob(Base):
     )  # 'color', 'spacing', 'typography', 'all'
     status: Mapped[str] = mapped_column(
         String(50), default="pending", nullable=False
-    )  # 'pending', 'processing', 'completed', 'failed'
+    )  # 'pending'/'queued', 'running', 'completed', 'failed'
+    progress: Mapped[float] = mapped_column(nullable=False, default=0.0)  # 0.0 - 1.0
+    task_id: Mapped[str | None] = mapped_column(String(155), nullable=True)  # Celery task id
     result_data: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
@@ -10,6 +10,7 @@ Each adapter implements the ColorExtractorProtocol for parallel execution.
 
 import base64
 import logging
+import time
 
 import cv2
 import numpy as np
@@ -53,6 +54,7 @@ class AIColorExtractorAdapter:
         Returns:
             ExtractionResult with colors and metadata
         """
+        start_time = time.perf_counter()
         try:
             # Convert bytes to base64
             base64_data = base64.standard_b64encode(image_data).decode("utf-8")
@@ -61,7 +63,7 @@ class AIColorExtractorAdapter:
             media_type = self._detect_media_type(image_data)
 
             # Extract colors using Claude
-            result = self.extractor.extract_colors_from_base64(
+            result = await self.extractor.extract_colors_from_base64(
                 base64_data, media_type, self.max_colors
             )
 
@@ -72,7 +74,7 @@ class AIColorExtractorAdapter:
             return ExtractionResult(
                 colors=result.colors,
                 extractor_name=self.name,
-                execution_time_ms=0.0,  # Not tracked in sync version
+                execution_time_ms=(time.perf_counter() - start_time) * 1000,
                 confidence_range=confidence_range,
             )
         except Exception as e:
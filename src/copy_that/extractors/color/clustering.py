@@ -62,6 +62,22 @@ class ColorKMeansClustering:
         Returns:
             List of ColorClusterResult sorted by prominence
         """
+        pixel_data = self._prepare_pixels(image, min_pixels=self.k * 10)
+
+        # K-means clustering
+        criteria = (
+            cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
+            self.max_iterations,
+            self.epsilon,
+        )
+        _, labels, centers = cv2.kmeans(
+            pixel_data, self.k, None, criteria, 10, cv2.KMEANS_PP_CENTERS
+        )
+
+        return self._build_clusters(centers, labels.flatten(), len(pixel_data))[: self.k]
+
+    def _prepare_pixels(self, image: np.ndarray, min_pixels: int) -> np.ndarray:
+        """Flatten an image to float32 RGB rows, resized and background-filtered"""
         # Ensure RGB format
         if len(image.shape) == 2:
             image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
@@ -82,30 +98,25 @@ class ColorKMeansClustering:
             pixel_data = self._filter_background_pixels(pixel_data)
 
         # If too few pixels after filtering, skip filtering
-        if len(pixel_data) < self.k * 10:
+        if len(pixel_data) < min_pixels:
             pixel_data = image.reshape(-1, 3).astype(np.float32)
 
-        # K-means clustering
-        criteria = (
-            cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
-            self.max_iterations,
-            self.epsilon,
-        )
-        _, labels, centers = cv2.kmeans(
-            pixel_data, self.k, None, criteria, 10, cv2.KMEANS_PP_CENTERS
-        )
+        return pixel_data
 
-        # Calculate cluster statistics
+    def _build_clusters(
+        self, centers_rgb: np.ndarray, labels: np.ndarray, total_pixels: int
+    ) -> list[ColorClusterResult]:
+        """Turn RGB centers and per-pixel labels into results sorted by prominence"""
         clusters = []
-        total_pixels = len(pixel_data)
+        counts = np.bincount(labels, minlength=len(centers_rgb))
 
-        for cluster_id in range(self.k):
-            cluster_pixels = pixel_data[labels.flatten() == cluster_id]
-            if len(cluster_pixels) == 0:
+        for cluster_id in range(len(centers_rgb)):
+            pixel_count = int(counts[cluster_id])
+            if pixel_count == 0:
                 continue
 
             # Center color in RGB
-            center_rgb = centers[cluster_id].astype(np.uint8)
+            center_rgb = np.clip(centers_rgb[cluster_id], 0, 255).astype(np.uint8)
             hex_color = self._rgb_to_hex(tuple(center_rgb))
 
             # Convert to LAB for perceptual analysis
@@ -113,7 +124,6 @@ class ColorKMeansClustering:
             center_lab = cv2.cvtColor(center_bgr, cv2.COLOR_BGR2LAB)[0, 0]
 
             # Calculate prominence
-            pixel_count = len(cluster_pixels)
             prominence_pct = (pixel_count / total_pixels) * 100
 
             result = ColorClusterResult(
@@ -130,7 +140,7 @@ class ColorKMeansClustering:
         # Sort by prominence (pixel count)
         clusters.sort(key=lambda c: c.prominence_percentage, reverse=True)
 
-        return clusters[: self.k]
+        return clusters
 
     def _filter_background_pixels(self, pixels: np.ndarray) -> np.ndarray:
         """Remove very dark and light pixels (likely backgrounds)"""
@@ -159,19 +169,46 @@ class ColorKMeansClustering:
 
 
 class AdaptiveColorKMeans(ColorKMeansClustering):
-    """K-means with adaptive k selection based on image content"""
+    """K-means with adaptive k selection based on image content
+
+    The elbow search runs mini-batch k-means on a pixel subsample. Each k is
+    warm-started from the k-1 solution by splitting its highest-variance
+    cluster along its principal axis, and inertia comes from the labels of
+    that same pass. The chosen model then labels the full pixel set once, so
+    the whole search costs about as much as a single fixed-k ``cv2.kmeans``.
+    """
 
-    def __init__(self, min_k: int = 5, max_k: int = 20, **kwargs):
+    def __init__(
+        self,
+        min_k: int = 5,
+        max_k: int = 20,
+        sample_size: int = 4096,
+        batch_size: int = 1024,
+        color_space: str = "rgb",
+        random_state: int | None = 0,
+        **kwargs,
+    ):
         """Initialize adaptive K-means
 
         Args:
             min_k: Minimum number of clusters
             max_k: Maximum number of clusters
+            sample_size: Pixels subsampled for the elbow search
+            batch_size: Mini-batch size for center updates
+            color_space: "rgb" or "lab" (cluster in perceptual CIELAB)
+            random_state: Seed for subsampling and initialization
             **kwargs: Additional arguments for ColorKMeansClustering
         """
         super().__init__(**kwargs)
+        if color_space not in ("rgb", "lab"):
+            raise ValueError(f"Unknown color space: {color_space}")
         self.min_k = min_k
         self.max_k = max_k
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self.color_space = color_space
+        self.random_state = random_state
+        self.inertias: dict[int, float] = {}
 
     def extract_palette_adaptive(self, image: np.ndarray) -> list[ColorClusterResult]:
         """Extract palette with automatically determined k
@@ -181,40 +218,130 @@ class AdaptiveColorKMeans(ColorKMeansClustering):
         - Higher k: More distinct colors, more detail
         - Optimal k: Where adding more clusters provides diminishing returns
         """
-        # Resize for analysis
-        if self.resize_for_speed:
-            analysis_image = cv2.resize(image, (128, 128), interpolation=cv2.INTER_AREA)
-        else:
-            analysis_image = image
+        rng = np.random.default_rng(self.random_state)
+        pixel_data = self._prepare_pixels(image, min_pixels=self.max_k * 10)
+        points = self._to_working_space(pixel_data)
 
-        pixel_data = analysis_image.reshape(-1, 3).astype(np.float32)
+        if len(points) > self.sample_size:
+            sample = points[rng.choice(len(points), self.sample_size, replace=False)]
+        else:
+            sample = points
 
         # Elbow method: find where additional clusters provide diminishing returns
+        min_k = max(1, min(self.min_k, len(sample)))
+        max_k = max(min_k, min(self.max_k, len(sample)))
+        centers = _kmeans_plus_plus(sample, min_k, rng)
+        models: dict[int, np.ndarray] = {}
         inertias = []
-        k_values = range(self.min_k, self.max_k + 1)
-
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 50, 0.1)
-
-        for k in k_values:
-            _, _, centers = cv2.kmeans(pixel_data, k, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
-            # Calculate inertia (sum of squared distances from each point to its center)
-            distances = np.min(
-                cv2.norm(pixel_data[:, np.newaxis] - centers, axis=2, norm=cv2.NORM_L2), axis=1
-            )
-            inertia = np.sum(distances**2)
-            inertias.append(inertia)
+        for k in range(min_k, max_k + 1):
+            centers = self._minibatch_refine(sample, centers, rng)
+            # One assignment pass gives both the inertia and the labels for the next split
+            distances = _squared_distances(sample, centers)
+            labels = distances.argmin(axis=1)
+            sq_dist = distances[np.arange(len(sample)), labels]
+            models[k] = centers
+            inertias.append(float(sq_dist.sum()))
+            if k < max_k:
+                centers = _split_highest_variance(sample, centers, labels, sq_dist)
+        self.inertias = dict(zip(range(min_k, max_k + 1), inertias, strict=True))
 
         # Find elbow point (where second derivative is highest)
         second_derivative = np.diff(np.diff(inertias))
         if len(second_derivative) > 0:
-            elbow_idx = np.argmax(second_derivative) + self.min_k + 1
-            optimal_k = min(elbow_idx, self.max_k)
+            elbow_idx = int(np.argmax(second_derivative)) + min_k + 1
+            optimal_k = min(elbow_idx, max_k)
         else:
-            optimal_k = self.min_k
+            optimal_k = min_k
 
-        # Set k and extract palette
+        # Label every pixel against the chosen model instead of re-clustering
         self.k = optimal_k
-        return self.extract_palette(image)
+        centers = models[optimal_k]
+        labels = _squared_distances(points, centers).argmin(axis=1)
+        return self._build_clusters(self._from_working_space(centers), labels, len(points))
+
+    def _to_working_space(self, pixels_rgb: np.ndarray) -> np.ndarray:
+        if self.color_space == "rgb":
+            return pixels_rgb
+        rgb = (pixels_rgb / 255.0).astype(np.float32).reshape(-1, 1, 3)
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2Lab).reshape(-1, 3)
+
+    def _from_working_space(self, centers: np.ndarray) -> np.ndarray:
+        if self.color_space == "rgb":
+            return centers
+        lab = centers.astype(np.float32).reshape(-1, 1, 3)
+        return cv2.cvtColor(lab, cv2.COLOR_Lab2RGB).reshape(-1, 3) * 255.0
+
+    def _minibatch_refine(
+        self, sample: np.ndarray, centers: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Mini-batch k-means updates (per-center learning rate 1/count)"""
+        centers = centers.astype(np.float32, copy=True)
+        k = len(centers)
+        counts = np.zeros(k, dtype=np.float64)
+        batch_size = min(self.batch_size, len(sample))
+
+        for _ in range(self.max_iterations):
+            batch = sample[rng.integers(0, len(sample), batch_size)]
+            labels = _squared_distances(batch, centers).argmin(axis=1)
+            batch_counts = np.bincount(labels, minlength=k)
+            sums = np.stack(
+                [np.bincount(labels, weights=batch[:, c], minlength=k) for c in range(3)], axis=1
+            )
+
+            hit = batch_counts > 0
+            new_counts = counts + batch_counts
+            updated = (centers[hit] * counts[hit, None] + sums[hit]) / new_counts[hit, None]
+            shift = float(np.abs(updated - centers[hit]).max()) if hit.any() else 0.0
+            centers[hit] = updated
+            counts = new_counts
+            if shift < self.epsilon:
+                break
+
+        return centers
+
+
+def _squared_distances(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """(n, k) squared Euclidean distances without an (n, k, 3) intermediate"""
+    distances = (
+        np.einsum("ij,ij->i", points, points)[:, None]
+        - 2.0 * points @ centers.T
+        + np.einsum("ij,ij->i", centers, centers)[None, :]
+    )
+    return np.maximum(distances, 0.0, out=distances)
+
+
+def _kmeans_plus_plus(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding"""
+    centers = np.empty((k, points.shape[1]), dtype=np.float32)
+    centers[0] = points[rng.integers(len(points))]
+    closest = _squared_distances(points, centers[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        index = (
+            rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        )
+        centers[i] = points[index]
+        closest = np.minimum(closest, _squared_distances(points, centers[i : i + 1])[:, 0])
+    return centers
+
+
+def _split_highest_variance(
+    points: np.ndarray, centers: np.ndarray, labels: np.ndarray, sq_dist: np.ndarray
+) -> np.ndarray:
+    """Add one center by splitting the cluster with the largest squared error"""
+    sse = np.bincount(labels, weights=sq_dist, minlength=len(centers))
+    target = int(np.argmax(sse))
+    members = points[labels == target]
+
+    if len(members) < 2:
+        # Degenerate cluster: seed the new center at the worst-fit point instead
+        return np.vstack([centers, points[int(np.argmax(sq_dist))]])
+
+    eigenvalues, eigenvectors = np.linalg.eigh(np.cov(members, rowvar=False))
+    offset = eigenvectors[:, -1] * np.sqrt(max(float(eigenvalues[-1]), 0.0))
+    split = centers.copy()
+    split[target] = centers[target] - offset
+    return np.vstack([split, centers[target] + offset]).astype(np.float32)
 
 
 def calculate_kmeans_histogram(
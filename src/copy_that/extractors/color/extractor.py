@@ -1,17 +1,22 @@
 """AI-powered color extraction service using Claude Sonnet 4.5"""
 
+import asyncio
 import base64
+import contextlib
 import logging
 import re
+from collections.abc import Callable
 from pathlib import Path
 
 import anthropic
 import coloraide
-import requests
 from pydantic import BaseModel, Field
 
 from copy_that.application import color_utils
+from copy_that.application.color_properties import compute_properties_batch
 from copy_that.application.semantic_color_naming import analyze_color
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image, stream_text
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
 
 logger = logging.getLogger(__name__)
 
@@ -168,37 +173,40 @@ class AIColorExtractor:
         Args:
             api_key: Anthropic API key. If not provided, uses ANTHROPIC_API_KEY env var
         """
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_ai_client_pool().anthropic(api_key)
         self.model = "claude-sonnet-4-5-20250929"
 
-    def extract_colors_from_image_url(
-        self, image_url: str, max_colors: int = 10
+    async def extract_colors_from_image_url(
+        self,
+        image_url: str,
+        max_colors: int = 10,
+        on_token: Callable[[ExtractedColorToken], None] | None = None,
     ) -> ColorExtractionResult:
         """Extract colors from an image URL
 
         Args:
             image_url: URL of the image to analyze
             max_colors: Maximum number of colors to extract
+            on_token: Receives each color as it is streamed (see extract_colors_from_base64)
 
         Returns:
             ColorExtractionResult with extracted colors
 
         Raises:
-            requests.RequestException: If image URL is invalid
+            ImageFetchError: If the image URL is unsafe or cannot be downloaded
             anthropic.APIError: If Claude API call fails
         """
-        # Download image and convert to base64
+        # Download through the shared fetcher (URL checks, size cap, cache)
         try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-        except requests.RequestException as e:
+            image = await get_image_fetcher().fetch(image_url)
+        except ImageFetchError as e:
             logger.error("Failed to download image: %s", str(e))
             raise
 
-        image_data = base64.standard_b64encode(response.content).decode("utf-8")
+        image_data = image.base64
 
         # Determine media type from response headers
-        content_type = response.headers.get("content-type", "image/jpeg").lower()
+        content_type = image.content_type.lower()
         if "png" in content_type:
             media_type = "image/png"
         elif "webp" in content_type:
@@ -208,9 +216,11 @@ class AIColorExtractor:
         else:
             media_type = "image/jpeg"
 
-        return self.extract_colors_from_base64(image_data, media_type, max_colors)
+        return await self.extract_colors_from_base64(
+            image_data, media_type, max_colors, on_token=on_token
+        )
 
-    def extract_colors_from_file(
+    async def extract_colors_from_file(
         self, file_path: str, max_colors: int = 10
     ) -> ColorExtractionResult:
         """Extract colors from a local image file
@@ -242,20 +252,29 @@ class AIColorExtractor:
         media_type = media_types.get(suffix, "image/jpeg")
 
         # Read and encode image
-        with open(file_path, "rb") as f:
-            image_data = base64.standard_b64encode(f.read()).decode("utf-8")
+        image_bytes = await asyncio.to_thread(file_path.read_bytes)
+        image_data = base64.standard_b64encode(image_bytes).decode("utf-8")
 
-        return self.extract_colors_from_base64(image_data, media_type, max_colors)
+        return await self.extract_colors_from_base64(image_data, media_type, max_colors)
 
-    def extract_colors_from_base64(
-        self, image_data: str, media_type: str, max_colors: int = 10
+    async def extract_colors_from_base64(
+        self,
+        image_data: str,
+        media_type: str,
+        max_colors: int = 10,
+        on_token: Callable[[ExtractedColorToken], None] | None = None,
     ) -> ColorExtractionResult:
         """Extract colors from base64-encoded image data
 
+        With ``on_token`` the answer is streamed and each new color is passed to
+        it as soon as the line naming it is complete; those early colors lack
+        the palette context (harmony, duplicate counts) of the returned result.
+
         Args:
             image_data: Base64-encoded image data
             media_type: MIME type of the image (e.g., image/jpeg)
             max_colors: Maximum number of colors to extract
+            on_token: Optional callback for each color as it is streamed
 
         Returns:
             ColorExtractionResult with extracted colors
@@ -294,31 +313,39 @@ Also include:
 
 Important: Every color MUST have a semantic token name. Be specific and consistent with naming."""
 
-        try:
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": image_data,
-                                },
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "color")
+
+        request = {
+            "model": self.model,
+            "max_tokens": 2000,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": media_type,
+                                "data": image_data,
                             },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ],
-            )
+                        },
+                        {"type": "text", "text": prompt},
+                    ],
+                }
+            ],
+        }
+
+        try:
+            if on_token is None:
+                message = await self.client.messages.create(**request)
+                response_text = message.content[0].text
+            else:
+                response_text = await self._stream_colors(request, max_colors, on_token)
 
             # Parse the response
-            response_text = message.content[0].text
-            result = self._parse_color_response(response_text, max_colors)
+            # Property enrichment is CPU work; keep it off the event loop
+            result = await asyncio.to_thread(self._parse_color_response, response_text, max_colors)
 
             logger.info("Successfully extracted %d colors from image", len(result.colors))
             return result
@@ -327,6 +354,41 @@ Important: Every color MUST have a semantic token name. Be specific and consiste
             logger.error("Claude API error: %s", str(e))
             raise
 
+    async def _stream_colors(
+        self,
+        request: dict,
+        max_colors: int,
+        on_token: Callable[[ExtractedColorToken], None],
+    ) -> str:
+        """Stream the answer, handing each new color to ``on_token``; return the text
+
+        The answer is prose rather than JSON, so colors are picked up per
+        completed line, the unit ``_parse_color_response`` reads them in.
+        """
+        parts = []
+        pending = ""
+        seen: set[str] = set()
+
+        async def emit(line: str) -> None:
+            hexes = re.findall(r"#[0-9A-Fa-f]{6}", line)[:max_colors]
+            if len(seen) >= max_colors or seen.issuperset(hexes):
+                return
+            parsed = await asyncio.to_thread(self._parse_color_response, line, max_colors)
+            for color in parsed.colors:
+                if color.hex not in seen and len(seen) < max_colors:
+                    seen.add(color.hex)
+                    on_token(color)
+
+        stream = await self.client.messages.create(**request, stream=True)
+        async with contextlib.aclosing(stream_text(stream)) as chunks:
+            async for text in chunks:
+                parts.append(text)
+                *lines, pending = (pending + text).split("\n")
+                for line in lines:
+                    await emit(line)
+        await emit(pending)
+        return "".join(parts)
+
     def _parse_color_response(self, response_text: str, max_colors: int) -> ColorExtractionResult:
         """Parse Claude's response into structured color data
 
@@ -344,10 +406,17 @@ Important: Every color MUST have a semantic token name. Be specific and consiste
         dominant_colors = []
 
         lines = response_text.split("\n")
-        for line in lines:
-            # Look for hex color codes
-            hex_matches = re.findall(r"#[0-9A-Fa-f]{6}", line)
-            for hex_code in hex_matches[:max_colors]:
+        line_matches = [re.findall(r"#[0-9A-Fa-f]{6}", line)[:max_colors] for line in lines]
+
+        # Compute properties for every parsed hex in one vectorized pass. Each color's
+        # dominant set is the first three distinct hexes, which always contains the
+        # color itself when it is one of them, so ΔE matches the incremental scan.
+        parsed_hexes = list(dict.fromkeys(hx for matches in line_matches for hx in matches))
+        properties_table = compute_properties_batch(parsed_hexes, parsed_hexes[:3])
+        property_rows = {hx: i for i, hx in enumerate(parsed_hexes)}
+
+        for line, hex_matches in zip(lines, line_matches, strict=True):
+            for hex_code in hex_matches:
                 if hex_code not in dominant_colors:
                     dominant_colors.append(hex_code)
 
@@ -367,11 +436,9 @@ Important: Every color MUST have a semantic token name. Be specific and consiste
                     except ValueError:
                         pass
 
-                # Compute all color properties with extraction metadata
-                all_properties, extraction_metadata = (
-                    color_utils.compute_all_properties_with_metadata(
-                        hex_code, dominant_colors[:3] if dominant_colors else []
-                    )
+                # Look up precomputed color properties with extraction metadata
+                all_properties, extraction_metadata = properties_table.row_with_metadata(
+                    property_rows[hex_code]
                 )
 
                 # Analyze semantic naming
@@ -479,14 +546,13 @@ Important: Every color MUST have a semantic token name. Be specific and consiste
                 {"hex": "#4ECDC4", "name": "Teal"},
                 {"hex": "#45B7D1", "name": "Blue"},
             ]
-            for color_def in fallback_colors:
+            fallback_table = compute_properties_batch(
+                [c["hex"] for c in fallback_colors], [fallback_colors[0]["hex"]]
+            )
+            for i, color_def in enumerate(fallback_colors):
                 hex_code = color_def["hex"]
                 rgb = self._hex_to_rgb(hex_code)
-                all_properties, extraction_metadata = (
-                    color_utils.compute_all_properties_with_metadata(
-                        hex_code, [fallback_colors[0]["hex"]]
-                    )
-                )
+                all_properties, extraction_metadata = fallback_table.row_with_metadata(i)
                 colors.append(
                     ExtractedColorToken(
                         hex=hex_code,
@@ -608,7 +674,7 @@ Important: Every color MUST have a semantic token name. Be specific and consiste
 
 
 # Convenience functions for common use cases
-def extract_colors(image_url: str, max_colors: int = 10) -> ColorExtractionResult:
+async def extract_colors(image_url: str, max_colors: int = 10) -> ColorExtractionResult:
     """Quick function to extract colors from an image URL
 
     Args:
@@ -619,10 +685,10 @@ def extract_colors(image_url: str, max_colors: int = 10) -> ColorExtractionResul
         ColorExtractionResult with extracted colors
     """
     extractor = AIColorExtractor()
-    return extractor.extract_colors_from_image_url(image_url, max_colors)
+    return await extractor.extract_colors_from_image_url(image_url, max_colors)
 
 
-def extract_colors_from_file(file_path: str, max_colors: int = 10) -> ColorExtractionResult:
+async def extract_colors_from_file(file_path: str, max_colors: int = 10) -> ColorExtractionResult:
     """Quick function to extract colors from a local image file
 
     Args:
@@ -633,4 +699,4 @@ def extract_colors_from_file(file_path: str, max_colors: int = 10) -> ColorExtra
         ColorExtractionResult with extracted colors
     """
     extractor = AIColorExtractor()
-    return extractor.extract_colors_from_file(file_path, max_colors)
+    return await extractor.extract_colors_from_file(file_path, max_colors)
@@ -1,15 +1,20 @@
 """OpenAI GPT-4 Vision color extraction service - alternative to Claude"""
 
+import asyncio
+import contextlib
 import json
 import logging
 import os
+from collections.abc import Callable
 
 import coloraide
-from openai import OpenAI
 from pydantic import BaseModel, Field
 
 from copy_that.application import color_utils
+from copy_that.application.color_properties import compute_properties_batch
+from copy_that.application.json_stream import JSONObjectStream
 from copy_that.application.semantic_color_naming import analyze_color
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image, stream_text
 
 logger = logging.getLogger(__name__)
 
@@ -85,36 +90,50 @@ class OpenAIColorExtractor:
         Args:
             api_key: OpenAI API key. If not provided, uses OPENAI_API_KEY env var
         """
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.client = get_ai_client_pool().openai(api_key or os.getenv("OPENAI_API_KEY"))
         self.model = "gpt-4o"  # GPT-4 with vision
 
-    def extract_colors_from_image_url(
-        self, image_url: str, max_colors: int = 10
+    async def extract_colors_from_image_url(
+        self,
+        image_url: str,
+        max_colors: int = 10,
+        on_token: Callable[[ExtractedColorToken], None] | None = None,
     ) -> ColorExtractionResult:
         """Extract colors from an image URL"""
-        return self._extract_colors(
+        return await self._extract_colors(
             image_content={"type": "image_url", "image_url": {"url": image_url}},
             max_colors=max_colors,
+            on_token=on_token,
         )
 
-    def extract_colors_from_base64(
-        self, image_data: str, media_type: str = "image/png", max_colors: int = 10
+    async def extract_colors_from_base64(
+        self,
+        image_data: str,
+        media_type: str = "image/png",
+        max_colors: int = 10,
+        on_token: Callable[[ExtractedColorToken], None] | None = None,
     ) -> ColorExtractionResult:
         """Extract colors from base64 encoded image"""
-        # Handle both raw base64 and data URL formats
-        if image_data.startswith("data:"):
-            # Already a data URL, use as-is
-            data_url = image_data
-        else:
-            # Raw base64, construct data URL
-            data_url = f"data:{media_type};base64,{image_data}"
-        return self._extract_colors(
+        # Raw base64 and data URLs are both accepted; a downscaled copy is sent
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "color")
+        data_url = f"data:{media_type};base64,{image_data}"
+        return await self._extract_colors(
             image_content={"type": "image_url", "image_url": {"url": data_url}},
             max_colors=max_colors,
+            on_token=on_token,
         )
 
-    def _extract_colors(self, image_content: dict, max_colors: int) -> ColorExtractionResult:
-        """Internal method to extract colors using GPT-4 Vision"""
+    async def _extract_colors(
+        self,
+        image_content: dict,
+        max_colors: int,
+        on_token: Callable[[ExtractedColorToken], None] | None = None,
+    ) -> ColorExtractionResult:
+        """Internal method to extract colors using GPT-4 Vision
+
+        With ``on_token`` the answer is streamed and each color is passed to it
+        as soon as its JSON object closes; the returned result is unchanged.
+        """
 
         prompt = f"""Analyze this image and extract the {max_colors} most important colors.
 
@@ -153,158 +172,183 @@ Return ONLY valid JSON in this exact format:
   "color_palette": "Description of the palette"
 }}"""
 
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": [{"type": "text", "text": prompt}, image_content]}
+            ],
+            "response_format": {"type": "json_object"},  # Use OpenAI's native JSON mode
+            "max_tokens": 3000,  # Increased for richer palette analysis
+            "temperature": 0.7,  # Increased for more creative, evocative descriptions
+        }
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": [{"type": "text", "text": prompt}, image_content]}
-                ],
-                response_format={"type": "json_object"},  # Use OpenAI's native JSON mode
-                max_tokens=3000,  # Increased for richer palette analysis
-                temperature=0.7,  # Increased for more creative, evocative descriptions
-            )
+            if on_token is None:
+                response = await self.client.chat.completions.create(**request)
+                content = response.choices[0].message.content
+            else:
+                content = await self._stream_colors(request, on_token)
 
             # Parse response - JSON mode guarantees valid JSON
-            content = response.choices[0].message.content
             data = json.loads(content)
 
-            # Enrich colors with calculated properties
-            enriched_colors = []
-            dominant_colors = data.get("dominant_colors", [])
-
-            for color_data in data.get("colors", []):
-                hex_color = color_data.get("hex", "#000000")
-
-                # Calculate RGB
-                rgb = color_utils.hex_to_rgb(hex_color)
-                rgb_str = f"rgb({rgb[0]}, {rgb[1]}, {rgb[2]})"
-
-                # Compute all color properties using the same helper as Claude extractor
-                all_properties, extraction_metadata = (
-                    color_utils.compute_all_properties_with_metadata(
-                        hex_color, dominant_colors[:3] if dominant_colors else []
-                    )
-                )
-
-                # Get semantic names
-                semantic_names = analyze_color(hex_color)
-
-                # Calculate color harmony with advanced metadata based on palette
-                harmony_data = color_utils.get_color_harmony_advanced(
-                    hex_color,
-                    dominant_colors[:3] if dominant_colors else None,
-                    return_metadata=True,
-                )
-                harmony = (
-                    harmony_data.get("harmony") if isinstance(harmony_data, dict) else harmony_data
-                )
-                harmony_confidence = (
-                    harmony_data.get("confidence") if isinstance(harmony_data, dict) else None
-                )
-                hue_angles = (
-                    harmony_data.get("hue_angles") if isinstance(harmony_data, dict) else None
-                )
-
-                # Generate state variants (hover/active colors using OKLCH lightness adjustments)
-                try:
-                    # Extract OKLCH components
-                    color_okl = coloraide.Color(hex_color).convert("oklch")
-                    l, c_val, h = color_okl["lightness"], color_okl["chroma"], color_okl["hue"]
-
-                    # Create hover (lighter) and active (darker) variants
-                    hover_okl = coloraide.Color("oklch", [min(1.0, l + 0.06), c_val, h])
-                    active_okl = coloraide.Color("oklch", [max(0.0, l - 0.06), c_val, h])
-
-                    state_variants = {
-                        "default": hex_color,
-                        "hover": hover_okl.convert("srgb").to_string(hex=True),
-                        "active": active_okl.convert("srgb").to_string(hex=True),
-                    }
-                except Exception as e:
-                    logger.warning(
-                        "Failed to generate state variants for %s: %s", hex_color, str(e)
-                    )
-                    state_variants = None
-
-                # Add OpenAI extraction metadata
-                extraction_metadata["extractor"] = "openai_gpt4v"
-                extraction_metadata["model"] = self.model
-                extraction_metadata["design_intent"] = "openai_gpt4v"
-                extraction_metadata["name"] = "openai_gpt4v"
-                extraction_metadata["confidence"] = "openai_gpt4v"
-
-                enriched_color = ExtractedColorToken(
-                    hex=hex_color,
-                    rgb=rgb_str,
-                    hsl=all_properties.get("hsl"),
-                    hsv=all_properties.get("hsv"),
-                    name=color_data.get("name", "Unknown"),
-                    design_intent=color_data.get("design_intent"),
-                    semantic_names=semantic_names,
-                    confidence=color_data.get("confidence", 0.8),
-                    harmony=harmony,
-                    harmony_confidence=harmony_confidence,
-                    hue_angles=hue_angles,
-                    temperature=all_properties.get("temperature"),
-                    saturation_level=all_properties.get("saturation_level"),
-                    lightness_level=all_properties.get("lightness_level"),
-                    usage=color_data.get("usage", []),
-                    prominence_percentage=color_data.get("prominence_percentage"),
-                    wcag_contrast_on_white=all_properties.get("wcag_contrast_on_white"),
-                    wcag_contrast_on_black=all_properties.get("wcag_contrast_on_black"),
-                    wcag_aa_compliant_text=all_properties.get("wcag_aa_compliant_text"),
-                    wcag_aaa_compliant_text=all_properties.get("wcag_aaa_compliant_text"),
-                    wcag_aa_compliant_normal=all_properties.get("wcag_aa_compliant_normal"),
-                    wcag_aaa_compliant_normal=all_properties.get("wcag_aaa_compliant_normal"),
-                    colorblind_safe=all_properties.get("colorblind_safe"),
-                    tint_color=all_properties.get("tint_color"),
-                    shade_color=all_properties.get("shade_color"),
-                    tone_color=all_properties.get("tone_color"),
-                    closest_web_safe=all_properties.get("closest_web_safe"),
-                    closest_css_named=all_properties.get("closest_css_named"),
-                    delta_e_to_dominant=all_properties.get("delta_e_to_dominant"),
-                    is_neutral=all_properties.get("is_neutral"),
-                    state_variants=state_variants,
-                    extraction_metadata=extraction_metadata,
-                )
-                enriched_colors.append(enriched_color)
-
-            # Mark accent colors (requires background color for contrast calculation)
-            # For OpenAI extractor, attempt to identify primary background
-            primary_bg = None
-            if enriched_colors:
-                # Use darkest color as potential background
-                darkest = min(
-                    enriched_colors,
-                    key=lambda c: color_utils.relative_luminance(c.hex),
-                    default=None,
-                )
-                primary_bg = darkest.hex if darkest else None
-
-            accent_token = color_utils.select_accent_token(enriched_colors, primary_bg)
-            if accent_token:
-                accent_hex = getattr(accent_token, "hex", None)
-                if accent_hex:
-                    for color in enriched_colors:
-                        if color.hex == accent_hex:
-                            color.is_accent = True
-
-            # Calculate palette diversity
-            hex_colors = [c.hex for c in enriched_colors]
-            palette_diversity = (
-                color_utils.get_perceptual_distance_summary(hex_colors)
-                if len(hex_colors) > 1
-                else None
-            )
-
-            return ColorExtractionResult(
-                colors=enriched_colors,
-                dominant_colors=data.get("dominant_colors", []),
-                color_palette=data.get("color_palette", ""),
-                extraction_confidence=0.85,
-                palette_diversity=palette_diversity,
-            )
+            # Property enrichment is CPU work; keep it off the event loop
+            return await asyncio.to_thread(self._build_result, data)
 
         except Exception as e:
             logger.error(f"OpenAI color extraction failed: {e}")
             raise
+
+    async def _stream_colors(
+        self, request: dict, on_token: Callable[[ExtractedColorToken], None]
+    ) -> str:
+        """Stream the answer, handing each completed color to ``on_token``; return the text"""
+        parser = JSONObjectStream(items=[("colors",)])
+        parts = []
+        stream = await self.client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        async with contextlib.aclosing(stream_text(stream)) as chunks:
+            async for text in chunks:
+                parts.append(text)
+                for path, color_data in parser.feed(text):
+                    if len(path) == 2 and isinstance(color_data, dict):
+                        on_token(await asyncio.to_thread(self._build_token, color_data))
+        return "".join(parts)
+
+    def _build_token(self, color_data: dict) -> ExtractedColorToken:
+        """Enrich one streamed color on its own, before the palette is known"""
+        return self._build_result({"colors": [color_data]}).colors[0]
+
+    def _build_result(self, data: dict) -> ColorExtractionResult:
+        """Enrich the model's colors with calculated properties"""
+        enriched_colors = []
+        dominant_colors = data.get("dominant_colors", [])
+        color_entries = data.get("colors", [])
+        properties_table = compute_properties_batch(
+            [c.get("hex", "#000000") for c in color_entries],
+            dominant_colors[:3] if dominant_colors else None,
+        )
+
+        for index, color_data in enumerate(color_entries):
+            hex_color = color_data.get("hex", "#000000")
+
+            # Calculate RGB
+            rgb = color_utils.hex_to_rgb(hex_color)
+            rgb_str = f"rgb({rgb[0]}, {rgb[1]}, {rgb[2]})"
+
+            # Precomputed color properties (same batch engine as Claude extractor)
+            all_properties, extraction_metadata = properties_table.row_with_metadata(index)
+
+            # Get semantic names
+            semantic_names = analyze_color(hex_color)
+
+            # Calculate color harmony with advanced metadata based on palette
+            harmony_data = color_utils.get_color_harmony_advanced(
+                hex_color,
+                dominant_colors[:3] if dominant_colors else None,
+                return_metadata=True,
+            )
+            harmony = (
+                harmony_data.get("harmony") if isinstance(harmony_data, dict) else harmony_data
+            )
+            harmony_confidence = (
+                harmony_data.get("confidence") if isinstance(harmony_data, dict) else None
+            )
+            hue_angles = harmony_data.get("hue_angles") if isinstance(harmony_data, dict) else None
+
+            # Generate state variants (hover/active colors using OKLCH lightness adjustments)
+            try:
+                # Extract OKLCH components
+                color_okl = coloraide.Color(hex_color).convert("oklch")
+                l, c_val, h = color_okl["lightness"], color_okl["chroma"], color_okl["hue"]
+
+                # Create hover (lighter) and active (darker) variants
+                hover_okl = coloraide.Color("oklch", [min(1.0, l + 0.06), c_val, h])
+                active_okl = coloraide.Color("oklch", [max(0.0, l - 0.06), c_val, h])
+
+                state_variants = {
+                    "default": hex_color,
+                    "hover": hover_okl.convert("srgb").to_string(hex=True),
+                    "active": active_okl.convert("srgb").to_string(hex=True),
+                }
+            except Exception as e:
+                logger.warning("Failed to generate state variants for %s: %s", hex_color, str(e))
+                state_variants = None
+
+            # Add OpenAI extraction metadata
+            extraction_metadata["extractor"] = "openai_gpt4v"
+            extraction_metadata["model"] = self.model
+            extraction_metadata["design_intent"] = "openai_gpt4v"
+            extraction_metadata["name"] = "openai_gpt4v"
+            extraction_metadata["confidence"] = "openai_gpt4v"
+
+            enriched_color = ExtractedColorToken(
+                hex=hex_color,
+                rgb=rgb_str,
+                hsl=all_properties.get("hsl"),
+                hsv=all_properties.get("hsv"),
+                name=color_data.get("name", "Unknown"),
+                design_intent=color_data.get("design_intent"),
+                semantic_names=semantic_names,
+                confidence=color_data.get("confidence", 0.8),
+                harmony=harmony,
+                harmony_confidence=harmony_confidence,
+                hue_angles=hue_angles,
+                temperature=all_properties.get("temperature"),
+                saturation_level=all_properties.get("saturation_level"),
+                lightness_level=all_properties.get("lightness_level"),
+                usage=color_data.get("usage", []),
+                prominence_percentage=color_data.get("prominence_percentage"),
+                wcag_contrast_on_white=all_properties.get("wcag_contrast_on_white"),
+                wcag_contrast_on_black=all_properties.get("wcag_contrast_on_black"),
+                wcag_aa_compliant_text=all_properties.get("wcag_aa_compliant_text"),
+                wcag_aaa_compliant_text=all_properties.get("wcag_aaa_compliant_text"),
+                wcag_aa_compliant_normal=all_properties.get("wcag_aa_compliant_normal"),
+                wcag_aaa_compliant_normal=all_properties.get("wcag_aaa_compliant_normal"),
+                colorblind_safe=all_properties.get("colorblind_safe"),
+                tint_color=all_properties.get("tint_color"),
+                shade_color=all_properties.get("shade_color"),
+                tone_color=all_properties.get("tone_color"),
+                closest_web_safe=all_properties.get("closest_web_safe"),
+                closest_css_named=all_properties.get("closest_css_named"),
+                delta_e_to_dominant=all_properties.get("delta_e_to_dominant"),
+                is_neutral=all_properties.get("is_neutral"),
+                state_variants=state_variants,
+                extraction_metadata=extraction_metadata,
+            )
+            enriched_colors.append(enriched_color)
+
+        # Mark accent colors (requires background color for contrast calculation)
+        # For OpenAI extractor, attempt to identify primary background
+        primary_bg = None
+        if enriched_colors:
+            # Use darkest color as potential background
+            darkest = min(
+                enriched_colors,
+                key=lambda c: color_utils.relative_luminance(c.hex),
+                default=None,
+            )
+            primary_bg = darkest.hex if darkest else None
+
+        accent_token = color_utils.select_accent_token(enriched_colors, primary_bg)
+        if accent_token:
+            accent_hex = getattr(accent_token, "hex", None)
+            if accent_hex:
+                for color in enriched_colors:
+                    if color.hex == accent_hex:
+                        color.is_accent = True
+
+        # Calculate palette diversity
+        hex_colors = [c.hex for c in enriched_colors]
+        palette_diversity = (
+            color_utils.get_perceptual_distance_summary(hex_colors) if len(hex_colors) > 1 else None
+        )
+
+        return ColorExtractionResult(
+            colors=enriched_colors,
+            dominant_colors=data.get("dominant_colors", []),
+            color_palette=data.get("color_palette", ""),
+            extraction_confidence=0.85,
+            palette_diversity=palette_diversity,
+        )
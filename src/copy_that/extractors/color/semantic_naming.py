@@ -26,6 +26,8 @@ Author: Copy This Research
 Date: 2025-11-16
 """
 
+from typing import cast
+
 try:
     from coloraide import Color
 except ImportError:
@@ -509,25 +511,16 @@ class MaterialColorNamer:
             >>> print(f"{family}-{level}: ΔE={de:.2f}")
             'orange-500: ΔE=3.45'
         """
-        from copy_that.application.color_utils import calculate_delta_e
-
-        best_family = None
-        best_level = None
-        best_distance = tolerance + 1
+        from copy_that.application.color_index import material_index
 
-        for family, levels in MaterialColorNamer.MATERIAL_COLORS.items():
-            for level, material_color in levels.items():
-                de = calculate_delta_e(hex_color, material_color)
+        # ΔE (CIE76) against the precomputed Material palette index
+        key, distance = material_index().nearest(hex_color, metric="lab")
+        family, level = cast(tuple[str, str], key)
 
-                if de < best_distance:
-                    best_distance = de
-                    best_family = family
-                    best_level = level
-
-        if best_distance <= tolerance:
-            return best_family, best_level, best_distance
-        else:
-            return None, None, best_distance
+        if distance <= tolerance:
+            return family, level, distance
+        # Matches the legacy scan, which only tracked distances below tolerance + 1
+        return None, None, min(distance, tolerance + 1)
 
 
 def name_color(hex_color: str, style: str = "descriptive") -> str:
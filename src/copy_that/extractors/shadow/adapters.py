@@ -44,14 +44,8 @@ class AIShadowExtractorAdapter:
             # Convert to base64
             base64_image = base64.b64encode(image_data).decode("utf-8")
 
-            # Run extraction in thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self.extractor.extract_shadows,
-                None,  # image_url
-                base64_image,
-                "image/png",  # media_type
+            result = await self.extractor.extract_shadows(
+                base64_image=base64_image, media_type="image/png"
             )
 
             # Extract shadow styles from result
@@ -1,10 +1,12 @@
 """AI-powered shadow extraction service using Claude Sonnet 4.5"""
 
 import logging
+from collections.abc import AsyncIterator
 
-import anthropic
 from pydantic import BaseModel, Field
 
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,10 +48,10 @@ class AIShadowExtractor:
     """Extract shadows from UI images using Claude Sonnet 4.5 with vision"""
 
     def __init__(self, api_key: str | None = None):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_ai_client_pool().anthropic(api_key)
         self.model = "claude-opus-4-1-20250805"
 
-    def extract_shadows(
+    async def extract_shadows(
         self,
         image_url: str | None = None,
         base64_image: str | None = None,
@@ -79,18 +81,21 @@ class AIShadowExtractor:
                     "source": {"type": "url", "url": image_url},
                 }
             elif base64_image:
+                image_data, image_type = await prepare_vision_image(
+                    base64_image, media_type, "shadow"
+                )
                 image_content = {
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": media_type,
-                        "data": base64_image,
+                        "media_type": image_type,
+                        "data": image_data,
                     },
                 }
 
             # Call Claude with tool_use for structured outputs
 
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=4096,
                 tools=[
@@ -258,13 +263,13 @@ If no shadows detected, return an empty shadows array.""",
             logger.exception(f"Shadow extraction failed: {e}")
             return ShadowExtractionResult(shadow_count=0, extraction_confidence=0.0)
 
-    def extract_shadows_streaming(
+    async def extract_shadows_streaming(
         self,
         image_url: str | None = None,
         base64_image: str | None = None,
         media_type: str = "image/png",
-    ):
+    ) -> AsyncIterator[ShadowExtractionResult]:
         """Streaming version of shadow extraction (yields partial results)"""
         # For now, just call the batch version
         # TODO: Implement actual streaming
-        yield self.extract_shadows(image_url, base64_image, media_type)
+        yield await self.extract_shadows(image_url, base64_image, media_type)
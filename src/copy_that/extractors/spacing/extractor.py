@@ -8,6 +8,7 @@ spacing scale so the API never returns a 500 due to model quotas.
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import logging
@@ -15,8 +16,8 @@ import os
 from pathlib import Path
 from typing import Any
 
-import requests
-from openai import OpenAI
+from copy_that.infrastructure.ai import get_ai_client_pool, prepare_vision_image
+from copy_that.infrastructure.http import get_image_fetcher
 
 from . import spacing_utils as su
 from .spacing_models import SpacingExtractionResult, SpacingScale, SpacingToken
@@ -38,21 +39,18 @@ class AISpacingExtractor:
             model: OpenAI model name. Defaults to gpt-4o-mini for latency.
         """
 
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.client = get_ai_client_pool().openai(api_key or os.getenv("OPENAI_API_KEY"))
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
     # Public extraction helpers -------------------------------------------------
-    def extract_spacing_from_image_url(
+    async def extract_spacing_from_image_url(
         self, image_url: str, max_tokens: int = 15
     ) -> SpacingExtractionResult:
         """Extract spacing tokens from a remote image URL."""
-        response = requests.get(image_url, timeout=30)
-        response.raise_for_status()
-        media_type = response.headers.get("content-type", "image/png")
-        image_data = base64.standard_b64encode(response.content).decode("utf-8")
-        return self.extract_spacing_from_base64(image_data, media_type, max_tokens)
+        image = await get_image_fetcher().fetch(image_url)
+        return await self.extract_spacing_from_base64(image.base64, image.content_type, max_tokens)
 
-    def extract_spacing_from_file(
+    async def extract_spacing_from_file(
         self, file_path: str, max_tokens: int = 15
     ) -> SpacingExtractionResult:
         """Extract spacing tokens from a local file path."""
@@ -69,24 +67,21 @@ class AISpacingExtractor:
         }
         media_type = media_types.get(file_path.suffix.lower(), "image/png")
 
-        with open(file_path, "rb") as f:
-            image_data = base64.standard_b64encode(f.read()).decode("utf-8")
+        image_bytes = await asyncio.to_thread(file_path.read_bytes)
+        image_data = base64.standard_b64encode(image_bytes).decode("utf-8")
 
-        return self.extract_spacing_from_base64(image_data, media_type, max_tokens)
+        return await self.extract_spacing_from_base64(image_data, media_type, max_tokens)
 
-    def extract_spacing_from_base64(
+    async def extract_spacing_from_base64(
         self, image_data: str, media_type: str, max_tokens: int = 15
     ) -> SpacingExtractionResult:
         """Extract spacing tokens from base64-encoded image data."""
         prompt = self._build_extraction_prompt(max_tokens)
-        data_url = (
-            image_data
-            if image_data.startswith("data:")
-            else f"data:{media_type};base64,{image_data}"
-        )
+        image_data, media_type = await prepare_vision_image(image_data, media_type, "spacing")
+        data_url = f"data:{media_type};base64,{image_data}"
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
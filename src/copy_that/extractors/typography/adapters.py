@@ -4,7 +4,7 @@ Adapter implementations for typography extraction.
 Wraps existing typography extractors to conform to TypographyExtractorProtocol.
 """
 
-import asyncio
+import base64
 import logging
 import time
 
@@ -39,14 +39,10 @@ class AITypographyExtractorAdapter:
         start_time = time.time()
 
         try:
-            # Run extraction in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            tokens = await loop.run_in_executor(
-                None, self.extractor.extract_typography_from_bytes, image_data
+            result = await self.extractor.extract_typography_from_base64(
+                base64.b64encode(image_data).decode("utf-8"), "image/png"
             )
-
-            if not isinstance(tokens, list):
-                tokens = []
+            tokens = list(result.tokens)
 
             execution_time_ms = (time.time() - start_time) * 1000
 
@@ -0,0 +1,40 @@
+"""AI provider client infrastructure package"""
+
+from .client_pool import (
+    AIClientPool,
+    PooledAnthropic,
+    PooledOpenAI,
+    RetryPolicy,
+    close_ai_client_pool,
+    get_ai_client_pool,
+    set_ai_client_pool,
+)
+from .image_payload import (
+    VISION_PROFILES,
+    VisionImageOptimizer,
+    VisionProfile,
+    get_vision_image_optimizer,
+    optimize_vision_image,
+    prepare_vision_image,
+    set_vision_image_optimizer,
+)
+from .streaming import stream_text, stream_tool_input
+
+__all__ = [
+    "VISION_PROFILES",
+    "AIClientPool",
+    "PooledAnthropic",
+    "PooledOpenAI",
+    "RetryPolicy",
+    "VisionImageOptimizer",
+    "VisionProfile",
+    "close_ai_client_pool",
+    "get_ai_client_pool",
+    "get_vision_image_optimizer",
+    "optimize_vision_image",
+    "prepare_vision_image",
+    "set_ai_client_pool",
+    "set_vision_image_optimizer",
+    "stream_text",
+    "stream_tool_input",
+]
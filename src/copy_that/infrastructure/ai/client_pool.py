@@ -0,0 +1,513 @@
+"""Shared async clients for the Anthropic and OpenAI APIs.
+
+AI extractors used to build a synchronous SDK client per instance, so every
+request opened fresh connections and blocked the event loop for the whole
+model call. They now take a pooled client instead:
+
+    self.client = get_ai_client_pool().anthropic(api_key)
+    message = await self.client.messages.create(model=..., messages=...)
+
+The pooled clients mirror the SDK call surface (``messages.create``,
+``chat.completions.create`` and ``images.generate``) on top of the SDKs' async
+clients; as with the SDKs, ``create(stream=True)`` returns an async iterator of
+response events. All clients of a provider share one keep-alive connection
+pool per event loop, closed when that loop shuts down. Every call:
+
+- waits for a slot in the global and the per-provider concurrency limits,
+  which hold across all event loops of the process,
+- is bounded by the configured timeout,
+- is retried on connection errors, timeouts, 408/409/429 and 5xx responses
+  with exponential backoff and full jitter (``Retry-After`` is honoured),
+- records latency, retries and token usage (Prometheus and ``stats()``).
+
+Configuration (environment):
+    AI_MAX_CONCURRENCY: concurrent AI calls across providers (default 16)
+    AI_MAX_CONCURRENCY_ANTHROPIC / AI_MAX_CONCURRENCY_OPENAI: per-provider
+        limit (default 8)
+    AI_TIMEOUT_SECONDS: per-attempt timeout (default 120)
+    AI_MAX_RETRIES: retries after the first attempt (default 3)
+    AI_RETRY_BASE_SECONDS / AI_RETRY_MAX_SECONDS: backoff base and cap
+        (default 0.5 / 20)
+    AI_MAX_CONNECTIONS: pooled connections per provider and event loop
+        (default 50)
+    ANTHROPIC_BASE_URL / OPENAI_BASE_URL: API endpoints (read by the SDKs;
+        point them at a stand-in server in tests)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+
+from copy_that.infrastructure.event_loops import LoopLocal, ProcessSemaphore
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC = "anthropic"
+OPENAI = "openai"
+PROVIDERS = (ANTHROPIC, OPENAI)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PROVIDER_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 120.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_SECONDS = 0.5
+DEFAULT_RETRY_MAX_SECONDS = 20.0
+DEFAULT_MAX_CONNECTIONS = 50
+RETRYABLE_STATUSES = {408, 409, 429}
+
+AI_REQUEST_SECONDS = Histogram(
+    "copythat_ai_request_seconds",
+    "AI API call latency including retries",
+    ["provider", "model", "outcome"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+AI_RETRIES = Counter(
+    "copythat_ai_retries_total",
+    "Retried AI API attempts",
+    ["provider", "reason"],
+)
+AI_TOKENS = Counter(
+    "copythat_ai_tokens_total",
+    "Tokens consumed by AI API calls",
+    ["provider", "model", "direction"],
+)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_RETRY_BASE_SECONDS
+    max_delay: float = DEFAULT_RETRY_MAX_SECONDS
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Sleep before retry number ``attempt`` (0-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    failed: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_seconds: float = 0.0
+    by_model: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "avg_latency_ms": (
+                round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0.0
+            ),
+            "by_model": {model: dict(counts) for model, counts in self.by_model.items()},
+        }
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    # Both SDKs wrap transport failures in these (APITimeoutError subclasses the other)
+    return type(exc).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _usage(response: Any) -> tuple[int, int]:
+    """(input, output) token counts of an Anthropic or OpenAI response."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    input_tokens = getattr(usage, "input_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if output_tokens is None:
+        output_tokens = getattr(usage, "completion_tokens", 0)
+    return (
+        input_tokens if isinstance(input_tokens, int) else 0,
+        output_tokens if isinstance(output_tokens, int) else 0,
+    )
+
+
+def _stream_usage(event: Any) -> tuple[int, int]:
+    """(input, output) token counts carried by one streamed event, if any."""
+    message = getattr(event, "message", None)
+    if message is not None and getattr(message, "usage", None) is not None:
+        return _usage(message)
+    return _usage(event)
+
+
+def _sdk_module(provider: str) -> Any:
+    if provider == ANTHROPIC:
+        import anthropic
+
+        return anthropic
+    import openai
+
+    return openai
+
+
+class _LoopResources:
+    """Connection pools and SDK clients bound to one event loop."""
+
+    def __init__(self) -> None:
+        self.http: dict[str, Any] = {}
+        self.sdk_clients: dict[tuple[str, str | None], Any] = {}
+
+    async def aclose(self) -> None:
+        for http in self.http.values():
+            await http.aclose()
+
+
+class AIClientPool:
+    """Process-wide async AI clients with shared connections and limits."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        provider_limits: dict[str, int] | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        retry: RetryPolicy | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        base_urls: dict[str, str] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.provider_limits = {
+            provider: (provider_limits or {}).get(provider, DEFAULT_PROVIDER_CONCURRENCY)
+            for provider in PROVIDERS
+        }
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.max_connections = max_connections
+        self.base_urls = base_urls or {}
+        # Limits are process-wide; connections belong to each event loop
+        self._global_slots = ProcessSemaphore(max_concurrency)
+        self._provider_slots = {
+            provider: ProcessSemaphore(limit) for provider, limit in self.provider_limits.items()
+        }
+        self._resources: LoopLocal[_LoopResources] = LoopLocal(close=_LoopResources.aclose)
+        self._stats = {provider: ProviderStats() for provider in PROVIDERS}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AIClientPool":
+        return cls(
+            max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            provider_limits={
+                provider: int(
+                    os.getenv(
+                        f"AI_MAX_CONCURRENCY_{provider.upper()}", DEFAULT_PROVIDER_CONCURRENCY
+                    )
+                )
+                for provider in PROVIDERS
+            },
+            timeout=float(os.getenv("AI_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)),
+            retry=RetryPolicy(
+                max_retries=int(os.getenv("AI_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                base_delay=float(os.getenv("AI_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS)),
+                max_delay=float(os.getenv("AI_RETRY_MAX_SECONDS", DEFAULT_RETRY_MAX_SECONDS)),
+            ),
+            max_connections=int(os.getenv("AI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        )
+
+    # Client handles --------------------------------------------------------------
+    def anthropic(self, api_key: str | None = None) -> "PooledAnthropic":
+        """Anthropic client handle (``await client.messages.create(...)``)."""
+        return PooledAnthropic(self, api_key)
+
+    def openai(self, api_key: str | None = None) -> "PooledOpenAI":
+        """OpenAI client handle (``await client.chat.completions.create(...)``)."""
+        return PooledOpenAI(self, api_key)
+
+    # Internals --------------------------------------------------------------------
+    def _loop_resources(self) -> _LoopResources:
+        # Celery tasks run on their own loop beside the API's (see event_loops)
+        return self._resources.get_or_create(_LoopResources)
+
+    def _http_client(self, resources: _LoopResources, provider: str) -> Any:
+        http = resources.http.get(provider)
+        if http is None:
+            # Built from the SDK's own defaults: depending on the SDK version its
+            # transport is httpx or httpx2, and it rejects objects of the other
+            sdk = _sdk_module(provider)
+            http = sdk.DefaultAsyncHttpxClient(
+                timeout=type(sdk.DEFAULT_TIMEOUT)(
+                    self.timeout, connect=DEFAULT_CONNECT_TIMEOUT_SECONDS
+                ),
+                limits=type(sdk.DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            resources.http[provider] = http
+        return http
+
+    def _sdk_client(self, resources: _LoopResources, provider: str, api_key: str | None) -> Any:
+        client = resources.sdk_clients.get((provider, api_key))
+        if client is None:
+            # Retries are ours (with jitter and shared limits), not the SDK's
+            options: dict[str, Any] = {
+                "api_key": api_key,
+                "http_client": self._http_client(resources, provider),
+                "max_retries": 0,
+                "timeout": self.timeout,
+            }
+            if provider in self.base_urls:
+                options["base_url"] = self.base_urls[provider]
+            sdk = _sdk_module(provider)
+            client = (
+                sdk.AsyncAnthropic(**options)
+                if provider == ANTHROPIC
+                else sdk.AsyncOpenAI(**options)
+            )
+            resources.sdk_clients[(provider, api_key)] = client
+        return client
+
+    async def _open(self, provider: str, open_call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``open_call()``, retrying transient failures per the retry policy."""
+        attempt = 0
+        while True:
+            try:
+                return await open_call()
+            except Exception as exc:
+                if attempt >= self.retry.max_retries or not _is_retryable(exc):
+                    raise
+                delay = self.retry.delay(attempt, _retry_after(exc))
+                reason = str(_status_code(exc) or type(exc).__name__)
+                logger.warning(
+                    "%s call failed (%s), retry %d in %.2fs",
+                    provider,
+                    reason,
+                    attempt + 1,
+                    delay,
+                )
+                AI_RETRIES.labels(provider, reason).inc()
+                with self._lock:
+                    self._stats[provider].retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def _record_call(self, provider: str, model: str, outcome: str, elapsed: float) -> None:
+        AI_REQUEST_SECONDS.labels(provider, model, outcome).observe(elapsed)
+        stats = self._stats[provider]
+        with self._lock:
+            stats.in_flight -= 1
+            stats.requests += 1
+            stats.total_seconds += elapsed
+            if outcome != "ok":
+                stats.failed += 1
+
+    def _record_usage(
+        self, provider: str, model: str, input_tokens: int, output_tokens: int
+    ) -> None:
+        AI_TOKENS.labels(provider, model, "input").inc(input_tokens)
+        AI_TOKENS.labels(provider, model, "output").inc(output_tokens)
+        stats = self._stats[provider]
+        with self._lock:
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            per_model = stats.by_model.setdefault(
+                model, {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+            )
+            per_model["requests"] += 1
+            per_model["input_tokens"] += input_tokens
+            per_model["output_tokens"] += output_tokens
+
+    async def call(
+        self,
+        provider: str,
+        api_key: str | None,
+        method: Callable[[Any], Callable[..., Awaitable[Any]]],
+        **kwargs: Any,
+    ) -> Any:
+        """Call ``method(sdk_client)(**kwargs)`` under the pool's limits and retry policy."""
+        resources = self._loop_resources()
+        client = self._sdk_client(resources, provider, api_key)
+        model = str(kwargs.get("model", "unknown"))
+        started = time.perf_counter()
+        outcome = "error"
+
+        async with self._global_slots, self._provider_slots[provider]:
+            with self._lock:
+                self._stats[provider].in_flight += 1
+            try:
+                response = await self._open(provider, lambda: method(client)(**kwargs))
+                outcome = "ok"
+            finally:
+                self._record_call(provider, model, outcome, time.perf_counter() - started)
+
+        self._record_usage(provider, model, *_usage(response))
+        return response
+
+    async def stream(
+        self,
+        provider: str,
+        api_key: str | None,
+        method: Callable[[Any], Callable[..., Awaitable[Any]]],
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """Yield the events of ``method(sdk_client)(stream=True, **kwargs)`` as they arrive.
+
+        Opening the stream is retried like ``call``; a stream that breaks midway
+        is not, since its events were already handed out. The concurrency slot
+        is held until the stream is exhausted or closed.
+        """
+        resources = self._loop_resources()
+        client = self._sdk_client(resources, provider, api_key)
+        model = str(kwargs.get("model", "unknown"))
+        started = time.perf_counter()
+        outcome = "error"
+        input_tokens = output_tokens = 0
+
+        async with self._global_slots, self._provider_slots[provider]:
+            with self._lock:
+                self._stats[provider].in_flight += 1
+            response = None
+            try:
+                response = await self._open(provider, lambda: method(client)(stream=True, **kwargs))
+                async for event in response:
+                    # Usage arrives cumulatively (Anthropic) or in the final chunk (OpenAI)
+                    event_input, event_output = _stream_usage(event)
+                    input_tokens = max(input_tokens, event_input)
+                    output_tokens = max(output_tokens, event_output)
+                    yield event
+                outcome = "ok"
+            finally:
+                if response is not None and hasattr(response, "close"):
+                    await response.close()
+                self._record_call(provider, model, outcome, time.perf_counter() - started)
+                self._record_usage(provider, model, input_tokens, output_tokens)
+
+    def stats(self) -> dict[str, Any]:
+        """Latency, retry and token counters per provider for monitoring."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "provider_limits": dict(self.provider_limits),
+                "providers": {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+    async def aclose(self) -> None:
+        """Close the running loop's connections (other loops close theirs on shutdown)."""
+        resources = self._resources.pop()
+        if resources is not None:
+            await resources.aclose()
+
+
+class _PooledMethod:
+    """Awaitable stand-in for one SDK method, routed through the pool."""
+
+    def __init__(
+        self,
+        pool: AIClientPool,
+        provider: str,
+        api_key: str | None,
+        method: Callable[[Any], Callable[..., Awaitable[Any]]],
+    ):
+        self._pool = pool
+        self._provider = provider
+        self._api_key = api_key
+        self._method = method
+
+    async def create(self, **kwargs: Any) -> Any:
+        if kwargs.pop("stream", False):
+            # Like the SDKs, ``stream=True`` returns an async iterator of events
+            return self._pool.stream(self._provider, self._api_key, self._method, **kwargs)
+        return await self._pool.call(self._provider, self._api_key, self._method, **kwargs)
+
+
+class _PooledChat:
+    def __init__(self, completions: _PooledMethod):
+        self.completions = completions
+
+
+class _PooledImages:
+    def __init__(self, method: _PooledMethod):
+        self._method = method
+
+    async def generate(self, **kwargs: Any) -> Any:
+        return await self._method.create(**kwargs)
+
+
+class PooledAnthropic:
+    """Pooled stand-in for ``anthropic.AsyncAnthropic`` (``messages.create``)."""
+
+    def __init__(self, pool: AIClientPool, api_key: str | None = None):
+        self.messages = _PooledMethod(pool, ANTHROPIC, api_key, lambda c: c.messages.create)
+
+
+class PooledOpenAI:
+    """Pooled stand-in for ``openai.AsyncOpenAI`` (``chat.completions.create``
+    and ``images.generate``)."""
+
+    def __init__(self, pool: AIClientPool, api_key: str | None = None):
+        self.chat = _PooledChat(
+            _PooledMethod(pool, OPENAI, api_key, lambda c: c.chat.completions.create)
+        )
+        self.images = _PooledImages(
+            _PooledMethod(pool, OPENAI, api_key, lambda c: c.images.generate)
+        )
+
+
+# Global pool shared by all AI extractors
+_ai_client_pool: AIClientPool | None = None
+
+
+def get_ai_client_pool() -> AIClientPool:
+    """Get or create the process-wide AI client pool."""
+    global _ai_client_pool
+    if _ai_client_pool is None:
+        _ai_client_pool = AIClientPool.from_env()
+    return _ai_client_pool
+
+
+def set_ai_client_pool(pool: AIClientPool | None) -> None:
+    """Replace the global pool (None re-reads the environment on next use)."""
+    global _ai_client_pool
+    _ai_client_pool = pool
+
+
+async def close_ai_client_pool() -> None:
+    """Close the global pool's connections (called on application shutdown)."""
+    global _ai_client_pool
+    if _ai_client_pool is not None:
+        await _ai_client_pool.aclose()
+        _ai_client_pool = None
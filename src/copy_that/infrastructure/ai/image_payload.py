@@ -0,0 +1,299 @@
+"""Shrink images before they are sent to a vision model.
+
+Uploads are often full-resolution PNG screenshots of several MB, while the
+providers downscale anything beyond roughly 1.15 megapixels on their side
+anyway. AI extractors therefore pass their image through this stage right
+before the API call:
+
+    image_data, media_type = await prepare_vision_image(image_data, media_type, "color")
+
+Each purpose has a target resolution (colors need far fewer pixels than text
+legibility). The image is rotated per its EXIF orientation, converted to sRGB,
+downscaled to the target and re-encoded without metadata: PNG when it is
+palette-like (flat UI graphics with at most 256 colors), WebP when it has
+transparency, high-quality 4:4:4 JPEG otherwise. The original is sent when it
+cannot be decoded or when re-encoding would not make it smaller.
+
+Encoding runs on the shared CV executor. Results are memoised by content hash
+and target, so every AI extractor working on the same upload shares one
+optimized payload (concurrent requests for it share one encode). Bytes in and
+out, and encode time, are counted in Prometheus and in ``stats()``.
+
+Configuration (environment):
+    AI_IMAGE_OPTIMIZE: set to "0" to send images unchanged (default enabled)
+    AI_IMAGE_CACHE_ENTRIES: optimized payloads kept in memory (default 32)
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+
+from copy_that.infrastructure.cache import ResultCache
+from copy_that.infrastructure.compute import CVExecutorBusyError, get_cv_executor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ENTRIES = 32
+JPEG_QUALITY = 90
+WEBP_QUALITY = 90
+PALETTE_MAX_COLORS = 256
+
+_DATA_URL_PATTERN = re.compile(r"data:([^;,]+);base64,(.*)", re.DOTALL)
+
+AI_IMAGE_BYTES = Counter(
+    "copythat_ai_image_bytes_total",
+    "Image bytes received by AI extractors and sent to providers",
+    ["purpose", "stage"],
+)
+AI_IMAGE_OPTIMIZE_SECONDS = Histogram(
+    "copythat_ai_image_optimize_seconds",
+    "Time spent downscaling and re-encoding images for vision calls",
+    ["purpose"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+@dataclass(frozen=True)
+class VisionProfile:
+    """Largest image worth sending for one kind of extraction."""
+
+    max_edge: int
+    max_pixels: int
+
+
+# Claude's recommended ceiling; larger images are resized by the provider anyway
+FULL_DETAIL = VisionProfile(max_edge=1568, max_pixels=1_150_000)
+
+VISION_PROFILES: dict[str, VisionProfile] = {
+    "color": VisionProfile(max_edge=1024, max_pixels=786_432),
+    "combined": FULL_DETAIL,
+    "shadow": FULL_DETAIL,
+    "spacing": FULL_DETAIL,
+    "typography": FULL_DETAIL,
+}
+
+
+def _split_payload(image: bytes | str, media_type: str) -> tuple[bytes | None, str, str]:
+    """(decoded bytes or None if undecodable, media type, base64 text) of an input."""
+    if isinstance(image, bytes):
+        return image, media_type, base64.b64encode(image).decode("ascii")
+    match = _DATA_URL_PATTERN.match(image)
+    if match:
+        media_type, image = match.group(1), match.group(2)
+    try:
+        return base64.b64decode(image, validate=True), media_type, image
+    except (binascii.Error, ValueError):
+        return None, media_type, image
+
+
+def _to_srgb(img: Any) -> Any:
+    """Convert pixels to sRGB when the image embeds another ICC profile."""
+    icc = img.info.get("icc_profile")
+    if not icc:
+        return img
+    try:
+        from PIL import ImageCms
+
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+        return ImageCms.profileToProfile(
+            img, source, ImageCms.createProfile("sRGB"), outputMode=img.mode
+        )
+    except Exception as e:  # missing littlecms support or a broken profile
+        logger.debug("Keeping embedded color profile unconverted: %s", e)
+        return img
+
+
+def optimize_vision_image(
+    data: bytes, media_type: str, max_edge: int, max_pixels: int
+) -> dict[str, Any]:
+    """Downscale and re-encode one image (CPU-bound; runs on the CV executor).
+
+    Returns the payload as a JSON-serializable dict: ``data`` (base64),
+    ``media_type``, ``width``/``height`` (None when undecodable),
+    ``original_bytes``, ``sent_bytes`` and ``optimized``.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    passthrough = {
+        "data": base64.b64encode(data).decode("ascii"),
+        "media_type": media_type,
+        "width": None,
+        "height": None,
+        "original_bytes": len(data),
+        "sent_bytes": len(data),
+        "optimized": False,
+    }
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            has_metadata = bool(source.info.get("exif") or source.info.get("icc_profile"))
+            img = ImageOps.exif_transpose(source)
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or (
+                img.mode == "P" and "transparency" in img.info
+            )
+            img = _to_srgb(img.convert("RGBA" if has_alpha else "RGB"))
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.debug("Sending undecodable image unchanged: %s", e)
+        return passthrough
+
+    # Judge palette-likeness before resampling blends flat colors together
+    palette_like = img.getcolors(PALETTE_MAX_COLORS) is not None
+    width, height = img.size
+    scale = min(1.0, max_edge / max(width, height), math.sqrt(max_pixels / (width * height)))
+    resized = scale < 1.0
+    if resized:
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        img = img.resize(size, Image.Resampling.LANCZOS)
+
+    # A fresh info dict so no EXIF, ICC or text chunks are written back out
+    img.info = {}
+    buffer = io.BytesIO()
+    try:
+        if palette_like:
+            out_type = "image/png"
+            if not has_alpha:
+                img = img.convert("P", palette=Image.Palette.ADAPTIVE, colors=PALETTE_MAX_COLORS)
+            img.save(buffer, format="PNG", optimize=True)
+        elif has_alpha:
+            out_type = "image/webp"
+            img.save(buffer, format="WEBP", quality=WEBP_QUALITY)
+        else:
+            out_type = "image/jpeg"
+            img.save(buffer, format="JPEG", quality=JPEG_QUALITY, subsampling=0)
+    except (OSError, ValueError) as e:
+        logger.warning("Sending image unchanged; re-encoding failed: %s", e)
+        return passthrough
+    encoded = buffer.getvalue()
+
+    passthrough.update(width=width, height=height)
+    if len(encoded) >= len(data) and not resized and not has_metadata:
+        return passthrough
+    return {
+        "data": base64.b64encode(encoded).decode("ascii"),
+        "media_type": out_type,
+        "width": img.width,
+        "height": img.height,
+        "original_bytes": len(data),
+        "sent_bytes": len(encoded),
+        "optimized": True,
+    }
+
+
+class VisionImageOptimizer:
+    """Memoised pre-send image optimization with byte and timing counters."""
+
+    def __init__(self, *, enabled: bool = True, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.enabled = enabled
+        self._cache = ResultCache(max_entries=cache_entries, use_redis=False)
+        self._lock = threading.Lock()
+        self._counts = {
+            "images": 0,
+            "optimized": 0,
+            "original_bytes": 0,
+            "sent_bytes": 0,
+            "encodes": 0,
+            "encode_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "VisionImageOptimizer":
+        return cls(
+            enabled=os.getenv("AI_IMAGE_OPTIMIZE", "1") != "0",
+            cache_entries=int(os.getenv("AI_IMAGE_CACHE_ENTRIES", DEFAULT_CACHE_ENTRIES)),
+        )
+
+    async def prepare(self, image: bytes | str, media_type: str, purpose: str) -> tuple[str, str]:
+        """Return ``(base64 data, media type)`` to send for ``purpose``.
+
+        ``image`` is raw bytes, base64 text or a ``data:`` URL.
+        """
+        data, media_type, image_base64 = _split_payload(image, media_type)
+        if not self.enabled or data is None:
+            return image_base64, media_type
+
+        profile = VISION_PROFILES.get(purpose, FULL_DETAIL)
+        key = f"{hashlib.sha256(data).hexdigest()}:{profile.max_edge}:{profile.max_pixels}"
+
+        async def encode() -> dict[str, Any]:
+            started = time.perf_counter()
+            payload = await get_cv_executor().run(
+                optimize_vision_image, data, media_type, profile.max_edge, profile.max_pixels
+            )
+            elapsed = time.perf_counter() - started
+            AI_IMAGE_OPTIMIZE_SECONDS.labels(purpose).observe(elapsed)
+            with self._lock:
+                self._counts["encodes"] += 1
+                self._counts["encode_seconds"] += elapsed
+            return payload
+
+        try:
+            payload = await self._cache.get_or_compute(key, encode, extractor=f"ai-image:{purpose}")
+        except CVExecutorBusyError:
+            # Never fail the AI call over an optional optimization
+            logger.warning("CV pool busy; sending %s image unoptimized", purpose)
+            return image_base64, media_type
+
+        AI_IMAGE_BYTES.labels(purpose, "original").inc(payload["original_bytes"])
+        AI_IMAGE_BYTES.labels(purpose, "sent").inc(payload["sent_bytes"])
+        with self._lock:
+            self._counts["images"] += 1
+            self._counts["optimized"] += int(payload["optimized"])
+            self._counts["original_bytes"] += payload["original_bytes"]
+            self._counts["sent_bytes"] += payload["sent_bytes"]
+        return payload["data"], payload["media_type"]
+
+    def stats(self) -> dict[str, Any]:
+        """Bytes saved and encode cost for the status endpoint."""
+        with self._lock:
+            counts = dict(self._counts)
+        original, sent, encodes = counts["original_bytes"], counts["sent_bytes"], counts["encodes"]
+        return {
+            "enabled": self.enabled,
+            "images": counts["images"],
+            "optimized": counts["optimized"],
+            "original_bytes": original,
+            "sent_bytes": sent,
+            "saved_bytes": original - sent,
+            "saved_ratio": round(1 - sent / original, 3) if original else 0.0,
+            "encodes": encodes,
+            "avg_encode_ms": (
+                round(counts["encode_seconds"] / encodes * 1000, 1) if encodes else 0.0
+            ),
+            "cache": self._cache.stats(),
+        }
+
+
+# Global optimizer shared by all AI extractors
+_vision_image_optimizer: VisionImageOptimizer | None = None
+
+
+def get_vision_image_optimizer() -> VisionImageOptimizer:
+    """Get or create the process-wide vision image optimizer."""
+    global _vision_image_optimizer
+    if _vision_image_optimizer is None:
+        _vision_image_optimizer = VisionImageOptimizer.from_env()
+    return _vision_image_optimizer
+
+
+def set_vision_image_optimizer(optimizer: VisionImageOptimizer | None) -> None:
+    """Replace the global optimizer (None re-reads the environment on next use)."""
+    global _vision_image_optimizer
+    _vision_image_optimizer = optimizer
+
+
+async def prepare_vision_image(
+    image: bytes | str, media_type: str, purpose: str
+) -> tuple[str, str]:
+    """``(base64 data, media type)`` to send to a vision model for ``purpose``."""
+    return await get_vision_image_optimizer().prepare(image, media_type, purpose)
@@ -0,0 +1,48 @@
+"""Text deltas of streamed Anthropic and OpenAI responses.
+
+``create(stream=True)`` returns provider-specific events. Extractors that parse
+the answer incrementally only need its text, chunk by chunk:
+
+    stream = await client.chat.completions.create(..., stream=True)
+    async for text in stream_text(stream):
+        parser.feed(text)
+
+``stream`` is what the pooled clients return for ``stream=True`` (an async
+generator). Both helpers close it when iteration ends, including when the
+consumer stops early, so the pooled concurrency slot is released promptly.
+"""
+
+import contextlib
+from collections.abc import AsyncGenerator
+from typing import Any
+
+
+async def stream_text(stream: AsyncGenerator[Any, None]) -> AsyncGenerator[str, None]:
+    """Yield the generated text: OpenAI ``delta.content`` or Anthropic text deltas."""
+    async with contextlib.aclosing(stream):
+        async for event in stream:
+            choices = getattr(event, "choices", None)
+            if choices is not None:
+                text = choices[0].delta.content if choices else None
+            else:
+                text = _content_delta(event, "text_delta", "text")
+            if text:
+                yield text
+
+
+async def stream_tool_input(
+    stream: AsyncGenerator[Any, None],
+) -> AsyncGenerator[str, None]:
+    """Yield the partial JSON of the tool input in a streamed Anthropic message."""
+    async with contextlib.aclosing(stream):
+        async for event in stream:
+            text = _content_delta(event, "input_json_delta", "partial_json")
+            if text:
+                yield text
+
+
+def _content_delta(event: Any, delta_type: str, field: str) -> str | None:
+    if getattr(event, "type", None) != "content_block_delta":
+        return None
+    delta = event.delta
+    return getattr(delta, field, None) if getattr(delta, "type", None) == delta_type else None
@@ -6,10 +6,22 @@ from .redis_cache import (
     get_redis,
     is_redis_available,
 )
+from .result_cache import (
+    ResultCache,
+    content_hash,
+    get_result_cache,
+    reset_result_cache,
+    result_key,
+)
 
 __all__ = [
     "RedisCache",
+    "ResultCache",
     "check_redis_health",
+    "content_hash",
     "get_redis",
+    "get_result_cache",
     "is_redis_available",
+    "reset_result_cache",
+    "result_key",
 ]
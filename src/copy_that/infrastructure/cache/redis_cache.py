@@ -10,18 +10,27 @@ from typing import Any
 from redis.asyncio import Redis
 from redis.exceptions import ConnectionError, TimeoutError
 
+from copy_that.infrastructure.event_loops import LoopLocal
+
 logger = logging.getLogger(__name__)
 
-# Global Redis client
-_redis_client: Redis | None = None  # type: ignore[type-arg]
+
+async def _close_redis(client: Redis) -> None:  # type: ignore[type-arg]
+    await client.aclose()  # type: ignore[attr-defined]
+
+
+# One client per event loop: its connections belong to the loop that opened them
+# (Celery tasks run outside the API's loop)
+_redis_clients: LoopLocal[Redis] = LoopLocal(close=_close_redis)  # type: ignore[type-arg]
 _redis_available: bool = True
 
 
 async def get_redis() -> Redis | None:  # type: ignore[type-arg]
-    """Get or create Redis client with connectivity check"""
-    global _redis_client, _redis_available
+    """Get or create the running loop's Redis client with connectivity check"""
+    global _redis_available
 
-    if _redis_client is None:
+    redis_client = _redis_clients.get()
+    if redis_client is None:
         redis_url = os.getenv("REDIS_URL")
 
         if not redis_url:
@@ -33,7 +42,7 @@ async def get_redis() -> Redis | None:  # type: ignore[type-arg]
             return None
 
         try:
-            _redis_client = Redis.from_url(
+            redis_client = Redis.from_url(
                 redis_url,
                 decode_responses=True,
                 socket_timeout=5,
@@ -41,7 +50,7 @@ async def get_redis() -> Redis | None:  # type: ignore[type-arg]
                 retry_on_timeout=True,
             )
             # Test connection
-            await _redis_client.ping()
+            await redis_client.ping()
             logger.info("Redis connection established successfully")
             _redis_available = True
         except (ConnectionError, TimeoutError, OSError) as e:
@@ -49,10 +58,10 @@ async def get_redis() -> Redis | None:  # type: ignore[type-arg]
                 f"Failed to connect to Redis: {e}. Caching and rate limiting will be disabled."
             )
             _redis_available = False
-            _redis_client = None
             return None
+        _redis_clients.set(redis_client)
 
-    return _redis_client
+    return redis_client
 
 
 async def check_redis_health() -> dict[str, Any]:
@@ -104,7 +113,8 @@ class RedisCache:
             if value:
                 return json.loads(value)
             return None
-        except (ConnectionError, TimeoutError) as e:
+        except (ConnectionError, TimeoutError, RuntimeError) as e:
+            # RuntimeError: the client's loop is gone (e.g. "Event loop is closed")
             logger.warning(f"Redis get failed for {namespace}:{identifier}: {e}")
             return None
         except json.JSONDecodeError as e:
@@ -119,7 +129,7 @@ class RedisCache:
             key = self._make_key(namespace, identifier)
             ttl = ttl or self.default_ttl
             await self.redis.setex(key, int(ttl.total_seconds()), json.dumps(value, default=str))
-        except (ConnectionError, TimeoutError) as e:
+        except (ConnectionError, TimeoutError, RuntimeError) as e:
             logger.warning(f"Redis set failed for {namespace}:{identifier}: {e}")
         except (TypeError, ValueError) as e:
             logger.error(f"Failed to serialize value for cache: {e}")
@@ -0,0 +1,287 @@
+"""Content-addressed cache for extraction results.
+
+Re-uploading the same screenshot should not repeat the CV pass or pay for
+another Claude/OpenAI call. Results are keyed on the image content hash, the
+extractor name and version, and the extraction parameters:
+
+    result = await get_result_cache().get_or_compute_model(
+        "cv-color", ColorExtractionResult, image_base64, factory, max_colors=8
+    )
+
+The version defaults to the package version; AI results pass the model id
+instead, so switching models never serves another model's answer. Results that
+are only a stand-in for the real answer (an extractor's fallback after a failed
+AI call) are returned but not stored: pass ``cache_if`` to tell them apart.
+
+Lookups go through an in-process LRU tier first, then Redis (via
+``RedisCache``) when ``REDIS_URL`` is configured; without Redis the memory
+tier is the whole cache. Concurrent identical requests on the same event loop
+share one computation (single-flight). Outcomes are counted in the
+``copythat_result_cache_requests_total`` Prometheus counter served on
+``/metrics``.
+
+Configuration (environment):
+    RESULT_CACHE_ENABLED: set to "0" to bypass the cache (default enabled)
+    RESULT_CACHE_TTL_SECONDS: Redis entry lifetime (default 86400)
+    RESULT_CACHE_MAX_ENTRIES: in-process LRU size (default 256)
+"""
+
+import asyncio
+import base64
+import binascii
+import copy
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any, TypeVar
+
+from prometheus_client import Counter
+from pydantic import BaseModel
+
+from copy_that import __version__
+from copy_that.infrastructure.event_loops import LoopLocal
+
+from .redis_cache import RedisCache, get_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+RESULT_CACHE_NAMESPACE = "results"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 256
+
+RESULT_CACHE_REQUESTS = Counter(
+    "copythat_result_cache_requests_total",
+    "Extraction result cache lookups by extractor and outcome",
+    ["extractor", "outcome"],
+)
+
+
+def content_hash(content: bytes | str) -> str:
+    """SHA-256 of the image bytes; base64 payloads (and data URLs) are decoded first.
+
+    Hashing decoded bytes means an upload and a fetched URL of the same image
+    share cache entries.
+    """
+    if isinstance(content, str):
+        payload = content.split(",", 1)[1] if content.startswith("data:") else content
+        try:
+            content = base64.b64decode(payload)
+        except (binascii.Error, ValueError):
+            content = payload.encode("utf-8", errors="ignore")
+    return hashlib.sha256(content).hexdigest()
+
+
+def result_key(
+    content: bytes | str, extractor: str, version: str = __version__, **params: Any
+) -> str:
+    """Cache key for one extractor run over one image with the given parameters."""
+    params_json = json.dumps(params, sort_keys=True, default=str)
+    params_hash = hashlib.sha256(params_json.encode()).hexdigest()[:16]
+    return f"{extractor}:{version}:{content_hash(content)}:{params_hash}"
+
+
+class ResultCache:
+    """Two-tier (process LRU -> Redis) result cache with single-flight."""
+
+    def __init__(
+        self,
+        redis_cache: RedisCache | None = None,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: timedelta = timedelta(seconds=DEFAULT_TTL_SECONDS),
+        enabled: bool = True,
+        use_redis: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._redis_cache = redis_cache
+        self._use_redis = use_redis and redis_cache is None
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._redis_connected = False
+        # Tasks belong to their event loop; Celery tasks run outside the API's loop
+        self._inflight: LoopLocal[dict[str, asyncio.Task[Any]]] = LoopLocal()
+        self.counts: dict[str, int] = {"memory_hit": 0, "redis_hit": 0, "shared": 0, "miss": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            ttl=timedelta(seconds=int(os.getenv("RESULT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))),
+            enabled=os.getenv("RESULT_CACHE_ENABLED", "1") != "0",
+        )
+
+    async def _get_redis_cache(self) -> RedisCache | None:
+        if self._redis_cache is not None or not self._use_redis:
+            return self._redis_cache
+        # The running loop's client (see get_redis), so no wrapper is kept
+        redis = await get_redis()
+        if redis is None:
+            # REDIS_URL unset or unreachable: stay in process memory
+            self._use_redis = False
+            return None
+        self._redis_connected = True
+        return RedisCache(redis)
+
+    def _count(self, extractor: str, outcome: str) -> None:
+        self.counts[outcome] += 1
+        RESULT_CACHE_REQUESTS.labels(extractor=extractor, outcome=outcome).inc()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        *,
+        extractor: str = "unknown",
+        cache_if: Callable[[Any], bool] | None = None,
+        single_flight: bool = True,
+    ) -> Any:
+        """Return the JSON-serializable value for ``key``, computing it at most once.
+
+        Callers receive a private copy, so mutating the result never alters the
+        cached entry. Computed values for which ``cache_if`` returns False are
+        returned (also to concurrent waiters) but not stored. Pass
+        ``single_flight=False`` when the factory is bound to this caller (progress
+        callbacks, a client's cancellation): it then neither joins nor is joined by
+        concurrent computations, but still reads and fills the cache.
+        """
+        if not self.enabled:
+            return await factory()
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self._count(extractor, "memory_hit")
+            return copy.deepcopy(self._memory[key])
+
+        if not single_flight:
+            value = await self._lookup_or_compute(key, factory, extractor, cache_if)
+            return copy.deepcopy(value) if key in self._memory else value
+
+        inflight = self._inflight.get_or_create(dict)
+        task = inflight.get(key)
+        if task is not None:
+            self._count(extractor, "shared")
+        else:
+            task = asyncio.ensure_future(self._lookup_or_compute(key, factory, extractor, cache_if))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        value = await asyncio.shield(task)
+        # Uncacheable values were never stored, so they need no defensive copy
+        return copy.deepcopy(value) if key in self._memory else value
+
+    async def _lookup_or_compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        extractor: str,
+        cache_if: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        redis_cache = await self._get_redis_cache()
+        if redis_cache is not None:
+            cached = await redis_cache.get(RESULT_CACHE_NAMESPACE, key)
+            if cached is not None:
+                self._count(extractor, "redis_hit")
+                self._remember(key, cached)
+                return cached
+
+        self._count(extractor, "miss")
+        value = await factory()
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            logger.debug("Result for %s is not JSON-serializable; not caching", extractor)
+            return value
+        if cache_if is not None and not cache_if(value):
+            logger.debug("Result for %s is a fallback; not caching", extractor)
+            return value
+
+        self._remember(key, value)
+        if redis_cache is not None:
+            await redis_cache.set(RESULT_CACHE_NAMESPACE, key, value, self.ttl)
+        return value
+
+    async def get_or_compute_model(
+        self,
+        extractor: str,
+        model: type[M],
+        content: bytes | str,
+        factory: Callable[[], Awaitable[M]],
+        *,
+        version: str = __version__,
+        cache_if: Callable[[M], bool] | None = None,
+        single_flight: bool = True,
+        **params: Any,
+    ) -> M:
+        """Cache a pydantic extraction result keyed on image content and parameters.
+
+        ``version`` identifies what produced the result (the model id for AI
+        extractors); results for which ``cache_if`` returns False are not stored.
+        ``single_flight`` is passed through to ``get_or_compute``.
+        """
+        if not self.enabled:
+            return await factory()
+
+        async def compute() -> Any:
+            result = await factory()
+            # Results that are not the declared model (e.g. test doubles) bypass the cache
+            return result.model_dump(mode="json") if isinstance(result, model) else result
+
+        def cacheable(value: Any) -> bool:
+            if cache_if is None or not isinstance(value, dict):
+                return True
+            return cache_if(model.model_validate(value))
+
+        value = await self.get_or_compute(
+            result_key(content, extractor, version, **params),
+            compute,
+            extractor=extractor,
+            cache_if=cacheable,
+            single_flight=single_flight,
+        )
+        return model.model_validate(value) if isinstance(value, dict) else value
+
+    def stats(self) -> dict[str, Any]:
+        lookups = sum(self.counts.values())
+        hits = self.counts["memory_hit"] + self.counts["redis_hit"] + self.counts["shared"]
+        return {
+            **self.counts,
+            "entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "redis": self._redis_cache is not None or self._redis_connected,
+        }
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._inflight.clear()
+        self.counts = dict.fromkeys(self.counts, 0)
+
+
+# Global result cache shared by all routers
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the process-wide result cache."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache.from_env()
+    return _result_cache
+
+
+def reset_result_cache() -> None:
+    """Drop the global cache (used by tests between cases)."""
+    global _result_cache
+    _result_cache = None
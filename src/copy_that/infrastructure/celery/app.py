@@ -36,8 +36,22 @@ redis_config = {
     "max_connections": 10,
 }
 
+# Queues: CPU-bound CV passes and IO-bound AI calls scale independently
+CV_QUEUE = "cv"
+AI_QUEUE = "ai"
+
+# Without a broker (local development, tests) tasks run inline in the caller
+task_always_eager = os.getenv(
+    "CELERY_TASK_ALWAYS_EAGER", "false" if redis_url else "true"
+).lower() in ("1", "true", "yes")
+
 # Create Celery app
-app = Celery("copy_that", broker=redis_url, backend=result_backend_url)
+app = Celery(
+    "copy_that",
+    broker=redis_url,
+    backend=result_backend_url,
+    include=["copy_that.infrastructure.celery.tasks"],
+)
 
 # Celery configuration
 app.conf.update(
@@ -56,6 +70,15 @@ app.conf.update(
     task_retry_max_retries=3,
     # Disable prefetching to prevent long-running tasks blocking others
     worker_prefetch_multiplier=1,
+    # Extraction routing (see copy_that.infrastructure.celery.tasks)
+    task_routes={
+        "copy_that.extract.cv_pass": {"queue": CV_QUEUE},
+        "copy_that.extract.ai_pass": {"queue": AI_QUEUE},
+        "copy_that.extract.session": {"queue": AI_QUEUE},
+    },
+    task_always_eager=task_always_eager,
+    # Acknowledge after completion so a crashed worker's job is redelivered
+    task_acks_late=True,
     # Redis connection settings
     redis_backend_health_check_interval=4,
     redis_socket_timeout=10,
@@ -0,0 +1,215 @@
+"""
+Extraction tasks.
+
+Every single-image extraction job is a chain of two tasks on separate queues:
+``cv_pass`` (CPU-bound OpenCV work, queue "cv") hands its result as JSON to
+``ai_pass`` (IO-bound model calls plus persistence, queue "ai"). Batch session
+extraction is AI-bound end to end and runs as one ``session_extract`` task.
+
+Run one worker pool per queue, e.g.:
+
+    celery -A copy_that.infrastructure.celery worker -Q cv --concurrency=4
+    celery -A copy_that.infrastructure.celery worker -Q ai --pool=threads --concurrency=16
+
+Tasks report through the ``ExtractionJob`` row (status, progress, result or
+error), which the jobs API polls; the Celery result backend is not needed.
+
+Task bodies are coroutines. Every task of a worker process runs them on one
+long-lived event loop (``_get_worker_loop``), so the process-wide async clients
+(Redis, the AI client pool, the image fetcher) keep their connections from one
+job to the next instead of being rebuilt on a fresh loop per task.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from celery import chain
+from celery.canvas import Signature
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from copy_that.domain.models import ExtractionJob
+from copy_that.infrastructure import database
+from copy_that.infrastructure.celery.app import app
+from copy_that.services.extraction_jobs_service import (
+    JOB_COMPLETED,
+    complete_job,
+    fail_job,
+    get_job,
+    mark_running,
+)
+
+logger = logging.getLogger(__name__)
+
+# Progress recorded on the job as its tasks advance
+PROGRESS_STARTED = 0.1
+PROGRESS_CV_DONE = 0.5
+
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+_worker_loop: asyncio.AbstractEventLoop | None = None
+_worker_loop_pid: int | None = None
+_worker_loop_lock = threading.Lock()
+
+
+def get_task_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Database sessions for task code.
+
+    Task code runs on the worker loop, which in eager mode lives beside the API's
+    own loop, so it cannot use the API engine's pooled connections: this engine
+    uses NullPool and holds no connection between jobs.
+    """
+    global _session_factory
+    if _session_factory is None:
+        engine = create_async_engine(
+            database.DATABASE_URL,
+            poolclass=NullPool,
+            echo=database.engine_kwargs.get("echo", False),
+            connect_args=database.engine_kwargs.get("connect_args", {}),
+        )
+        _session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return _session_factory
+
+
+def set_task_session_factory(factory: async_sessionmaker[AsyncSession] | None) -> None:
+    """Replace the task session factory (None restores the default)."""
+    global _session_factory
+    _session_factory = factory
+
+
+def extraction_signature(kind: str, job_id: int, params: dict[str, Any]) -> Signature:
+    """CV pass then AI pass for one image of an extractor family."""
+    return chain(cv_pass.s(kind, job_id, params), ai_pass.s(kind, job_id, params))
+
+
+def session_extraction_signature(job_id: int, session_id: int, params: dict[str, Any]) -> Signature:
+    """Batch color extraction into a session library."""
+    return session_extract.si(job_id, session_id, params)
+
+
+def _task(name: str) -> Callable[[Callable[..., Any]], Any]:
+    """``app.task(name=...)`` with a typed signature (celery ships no type hints)."""
+    decorator: Callable[[Callable[..., Any]], Any] = app.task(name=name)
+    return decorator
+
+
+@_task("copy_that.extract.cv_pass")
+def cv_pass(kind: str, job_id: int, params: dict[str, Any]) -> Any:
+    return _run_step(job_id, _cv_pass(kind, job_id, params))
+
+
+@_task("copy_that.extract.ai_pass")
+def ai_pass(cv_payload: Any, kind: str, job_id: int, params: dict[str, Any]) -> Any:
+    return _run_step(job_id, _ai_pass(cv_payload, kind, job_id, params))
+
+
+@_task("copy_that.extract.session")
+def session_extract(job_id: int, session_id: int, params: dict[str, Any]) -> Any:
+    return _run_step(job_id, _session_extract(job_id, session_id, params))
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """The process's task event loop, running in a daemon thread from first use.
+
+    Prefork children start their own after the fork; thread pools (and eager
+    tasks started from the API) share it.
+    """
+    global _worker_loop, _worker_loop_pid
+    with _worker_loop_lock:
+        if _worker_loop is None or _worker_loop_pid != os.getpid() or _worker_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="task-loop", daemon=True).start()
+            _worker_loop, _worker_loop_pid = loop, os.getpid()
+        return _worker_loop
+
+
+def _run_step(job_id: int, step: Coroutine[Any, Any, Any]) -> Any:
+    """Run one async task body on the worker loop; on error, record it on the job and re-raise."""
+    loop = _get_worker_loop()
+    future = asyncio.run_coroutine_threadsafe(step, loop)
+    try:
+        return future.result()
+    except Exception as exc:
+        # Stop the body too if only the wait was interrupted (e.g. a soft time limit)
+        future.cancel()
+        logger.exception("Extraction job %d failed", job_id)
+        asyncio.run_coroutine_threadsafe(_fail(job_id, _error_message(exc)), loop).result()
+        raise
+
+
+def _error_message(exc: Exception) -> str:
+    # HTTPException raised by shared router helpers carries its message in ``detail``
+    detail = getattr(exc, "detail", None)
+    return str(detail or exc) or type(exc).__name__
+
+
+async def _fail(job_id: int, error: str) -> None:
+    async with get_task_session_factory()() as db:
+        await fail_job(db, job_id, error)
+
+
+async def _require_job(db: AsyncSession, job_id: int) -> ExtractionJob:
+    job = await get_job(db, job_id)
+    if job is None:
+        raise LookupError(f"Extraction job {job_id} not found")
+    return job
+
+
+async def _set_progress(job_id: int, progress: float) -> None:
+    async with get_task_session_factory()() as db:
+        await mark_running(db, await _require_job(db, job_id), progress)
+
+
+async def _cv_pass(kind: str, job_id: int, params: dict[str, Any]) -> Any:
+    from copy_that.interfaces.api.jobs import get_job_family
+
+    family = get_job_family(kind)
+    request = family.request_model.model_validate(params)
+    await _set_progress(job_id, PROGRESS_STARTED)
+    payload = await family.cv_pass(request)
+    await _set_progress(job_id, PROGRESS_CV_DONE)
+    return payload
+
+
+async def _ai_pass(cv_payload: Any, kind: str, job_id: int, params: dict[str, Any]) -> Any:
+    from copy_that.interfaces.api.jobs import get_job_family
+
+    family = get_job_family(kind)
+    request = family.request_model.model_validate(params)
+    async with get_task_session_factory()() as db:
+        if (await _require_job(db, job_id)).status == JOB_COMPLETED:
+            # Redelivered after the tokens were already committed
+            return None
+
+    result = await family.ai_pass(request, cv_payload)
+
+    async with get_task_session_factory()() as db:
+        job = await _require_job(db, job_id)
+        summary = await family.persist(db, request, job, result)
+        await complete_job(db, job, summary)
+    return summary
+
+
+async def _session_extract(job_id: int, session_id: int, params: dict[str, Any]) -> Any:
+    from copy_that.interfaces.api.schemas import BatchExtractRequest
+    from copy_that.interfaces.api.sessions import _run_session_extraction
+    from copy_that.services.sessions_service import get_session
+
+    async with get_task_session_factory()() as db:
+        job = await _require_job(db, job_id)
+        await mark_running(db, job, PROGRESS_STARTED)
+        session = await get_session(db, session_id)
+        if session is None:
+            raise LookupError(f"Session {session_id} not found")
+        # End the read transaction so no connection is held during the AI calls
+        await db.commit()
+
+        result = await _run_session_extraction(
+            db, session, BatchExtractRequest.model_validate(params)
+        )
+        await complete_job(db, job, result)
+    return result
@@ -0,0 +1,17 @@
+"""Compute infrastructure package"""
+
+from .cv_executor import (
+    CVExecutor,
+    CVExecutorBusyError,
+    CVTaskTimeoutError,
+    get_cv_executor,
+    shutdown_cv_executor,
+)
+
+__all__ = [
+    "CVExecutor",
+    "CVExecutorBusyError",
+    "CVTaskTimeoutError",
+    "get_cv_executor",
+    "shutdown_cv_executor",
+]
@@ -0,0 +1,255 @@
+"""Bounded worker pool for CPU-bound computer-vision work.
+
+SLIC superpixels, k-means palettes and debug overlays hold the GIL (or simply
+burn CPU) for hundreds of milliseconds per image. Running them inside an
+``async def`` handler stalls every other request on the worker, so routers hand
+them to a shared ``CVExecutor`` instead:
+
+    result = await get_cv_executor().run(extractor.extract_from_bytes, data)
+
+The executor is a ``ProcessPoolExecutor`` sized to the machine's cores whose
+workers import OpenCV / scikit-image once at start-up. It rejects new work once
+``max_pending`` tasks are in flight (``CVExecutorBusyError``), bounds every task
+by a timeout (``CVTaskTimeoutError``) and keeps counters for the status
+endpoint.
+
+Configuration (environment):
+    CV_POOL_MODE: "process" (default) or "thread"; thread mode keeps work in
+        this process, which is what tests use so that ``unittest.mock`` patches
+        still apply
+    CV_POOL_WORKERS: worker count (default: CPU count)
+    CV_POOL_MAX_PENDING: in-flight task limit (default: 4 x workers)
+    CV_TASK_TIMEOUT_SECONDS: per-task timeout (default: 120)
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_TASK_TIMEOUT_SECONDS = 120.0
+PENDING_PER_WORKER = 4
+
+
+class CVExecutorBusyError(RuntimeError):
+    """Raised when the pool already holds ``max_pending`` tasks."""
+
+
+class CVTaskTimeoutError(TimeoutError):
+    """Raised when a CV task does not finish within its timeout."""
+
+
+def _warm_worker() -> None:
+    """Pool initializer: import the heavy CV stack once per worker process."""
+    try:
+        import cv2
+
+        # One OpenCV thread per worker; the pool itself provides the parallelism
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+    try:
+        from skimage import segmentation  # noqa: F401
+    except ImportError:
+        pass
+    try:
+        import copy_that.application.cv.color_cv_extractor  # noqa: F401
+        import copy_that.application.cv.spacing_cv_extractor  # noqa: F401
+    except ImportError as e:
+        logger.debug("CV worker warm-up skipped extractor imports: %s", e)
+    # Load MODEL_WARMUP models (e.g. layoutparser) before the first task arrives
+    from cv_pipeline.model_registry import warm_models_from_env
+
+    warm_models_from_env()
+
+
+def _noop() -> None:
+    return None
+
+
+class CVExecutor:
+    """Process (or thread) pool with backpressure, timeouts and counters."""
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        task_timeout: float | None = DEFAULT_TASK_TIMEOUT_SECONDS,
+        mode: str = "process",
+    ):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown CV pool mode: {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending or self.max_workers * PENDING_PER_WORKER)
+        self.task_timeout = task_timeout
+
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "CVExecutor":
+        """Build an executor from the ``CV_POOL_*`` environment variables."""
+        timeout = float(os.getenv("CV_TASK_TIMEOUT_SECONDS", DEFAULT_TASK_TIMEOUT_SECONDS))
+        return cls(
+            max_workers=int(os.getenv("CV_POOL_WORKERS", "0")) or None,
+            max_pending=int(os.getenv("CV_POOL_MAX_PENDING", "0")) or None,
+            task_timeout=timeout if timeout > 0 else None,
+            mode=os.getenv("CV_POOL_MODE", "process").lower(),
+        )
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_warm_worker,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="cv-worker"
+                    )
+            return self._pool
+
+    async def warm_up(self) -> None:
+        """Start every worker now so the first request does not pay for imports."""
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(self.max_workers)))
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> T:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        In process mode ``fn`` and its arguments must be picklable (module-level
+        functions, or bound methods of picklable objects).
+
+        Raises:
+            CVExecutorBusyError: if ``max_pending`` tasks are already in flight
+            CVTaskTimeoutError: if the task exceeds its timeout; the worker
+                finishes the abandoned task in the background, and it keeps its
+                in-flight slot until it does
+        """
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self._rejected += 1
+                raise CVExecutorBusyError(
+                    f"CV pool is saturated ({self._in_flight} tasks in flight)"
+                )
+            self._in_flight += 1
+            self._submitted += 1
+
+        limit = self.task_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        job: Future[T] | None = None
+        try:
+            job = self._get_pool().submit(functools.partial(fn, *args, **kwargs))
+            # The slot is freed when the job ends, not when this caller stops waiting
+            job.add_done_callback(self._release_slot)
+            result = await asyncio.wait_for(asyncio.wrap_future(job), timeout=limit)
+        except TimeoutError as e:
+            with self._lock:
+                self._timed_out += 1
+            raise CVTaskTimeoutError(f"CV task exceeded {limit:.0f}s timeout") from e
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool for later tasks
+            logger.error("CV process pool broke; recreating it")
+            with self._lock:
+                self._failed += 1
+                self._pool = None
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                if job is None:
+                    self._in_flight -= 1
+                self._total_seconds += time.perf_counter() - started
+
+    def _release_slot(self, job: "Future[Any]") -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """Queue-depth and outcome counters for monitoring."""
+        with self._lock:
+            finished = self._completed + self._failed + self._timed_out
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "rejected": self._rejected,
+                "avg_task_ms": round(self._total_seconds / finished * 1000, 1) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global executor shared by all routers
+_cv_executor: CVExecutor | None = None
+_cv_executor_lock = threading.Lock()
+
+
+def get_cv_executor() -> CVExecutor:
+    """Get or create the process-wide CV executor."""
+    global _cv_executor
+    with _cv_executor_lock:
+        if _cv_executor is None:
+            _cv_executor = CVExecutor.from_env()
+            logger.info(
+                "CV executor ready (%s mode, %d workers, %d max pending)",
+                _cv_executor.mode,
+                _cv_executor.max_workers,
+                _cv_executor.max_pending,
+            )
+        return _cv_executor
+
+
+def shutdown_cv_executor(wait: bool = True) -> None:
+    """Stop the global CV executor (called on application shutdown)."""
+    global _cv_executor
+    with _cv_executor_lock:
+        executor, _cv_executor = _cv_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
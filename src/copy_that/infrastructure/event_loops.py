@@ -0,0 +1,167 @@
+"""Per-event-loop state for process-wide singletons.
+
+Futures, tasks, ``redis.asyncio`` connections and httpx connection pools belong
+to the event loop that created them. The API serves from a single loop, but
+Celery tasks (and eager jobs, which the API starts with ``asyncio.to_thread``)
+run on loops of their own, so process-wide singletons keep such state per loop:
+
+    _clients: LoopLocal[httpx.AsyncClient] = LoopLocal(close=_close_client)
+    client = _clients.get_or_create(make_client)
+
+Values are weakly keyed by their loop. When ``close`` is given, a value is also
+closed on its own loop when that loop shuts down: ``asyncio.run`` and other
+runners finalize the loop's async generators before closing it, and every value
+registers one whose cleanup awaits ``close(value)``. (A loop that is closed
+without that step keeps its values until the process exits.)
+
+Limits that must hold across loops use ``ProcessSemaphore`` instead of
+``asyncio.Semaphore``, which binds to a single loop.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from types import TracebackType
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LoopLocal(Generic[T]):  # noqa: UP046
+    """One value per running event loop."""
+
+    def __init__(self, close: Callable[[T], Awaitable[None]] | None = None):
+        self._close = close
+        self._values: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Loops only hold weak references to their async generators
+        self._closers: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, AsyncGenerator[None, None]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> T | None:
+        """The running loop's value, if it has one."""
+        with self._lock:
+            return self._values.get(asyncio.get_running_loop())
+
+    def set(self, value: T) -> T:
+        """Store ``value`` for the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._values[loop] = value
+            if self._close is not None and loop not in self._closers:
+                self._closers[loop] = self._close_on_shutdown(loop)
+        return value
+
+    def get_or_create(self, factory: Callable[[], T]) -> T:
+        """The running loop's value, created with ``factory()`` on first use."""
+        value = self.get()
+        return self.set(factory()) if value is None else value
+
+    def pop(self) -> T | None:
+        """Detach and return the running loop's value; the caller closes it."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._values.pop(loop, None)
+
+    def clear(self) -> None:
+        """Forget every loop's value without closing it."""
+        with self._lock:
+            self._values.clear()
+
+    def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop) -> AsyncGenerator[None, None]:
+        close = self._close
+        assert close is not None
+        values, closers, lock = self._values, self._closers, self._lock
+
+        async def closer() -> AsyncGenerator[None, None]:
+            try:
+                yield
+            finally:
+                with lock:
+                    value = values.pop(loop, None)
+                    closers.pop(loop, None)
+                if value is not None:
+                    try:
+                        await close(value)
+                    except Exception:
+                        logger.warning("Failed to close %r on loop shutdown", value, exc_info=True)
+
+        agen = closer()
+        # Start it so the running loop tracks it (and finalizes it on shutdown)
+        try:
+            agen.asend(None).send(None)
+        except StopIteration:
+            pass
+        return agen
+
+
+class ProcessSemaphore:
+    """Counting semaphore shared by every event loop (and thread) of the process.
+
+    Used like ``asyncio.Semaphore`` (``async with``); waiters are served in order
+    and a released slot is handed straight to the next one, on its own loop.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter: asyncio.Future[None] = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+                elif waiter.done() and not waiter.cancelled():
+                    # Cancelled just after the slot was handed over: pass it on
+                    self._release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._release()
+
+    def _release(self) -> None:
+        while self._waiters:
+            loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self._wake, waiter)
+                return
+            except RuntimeError:
+                continue  # the waiter's loop is closed
+        self._value += 1
+
+    def _wake(self, waiter: asyncio.Future[None]) -> None:
+        if waiter.cancelled():
+            # Its task gave up before the slot arrived
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
@@ -0,0 +1,23 @@
+"""HTTP infrastructure package"""
+
+from .image_fetcher import (
+    MAX_IMAGE_BYTES,
+    FetchedImage,
+    ImageFetcher,
+    ImageFetchError,
+    ImageTooLargeError,
+    UnsafeImageURLError,
+    close_image_fetcher,
+    get_image_fetcher,
+)
+
+__all__ = [
+    "MAX_IMAGE_BYTES",
+    "FetchedImage",
+    "ImageFetcher",
+    "ImageFetchError",
+    "ImageTooLargeError",
+    "UnsafeImageURLError",
+    "close_image_fetcher",
+    "get_image_fetcher",
+]
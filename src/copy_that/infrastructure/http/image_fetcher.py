@@ -0,0 +1,374 @@
+"""Shared async image fetcher with SSRF checks and a content-addressed cache.
+
+Routers that accept ``image_url`` download through one pooled ``httpx``
+client (HTTP/2 when ``h2`` is installed) instead of ad-hoc blocking
+``requests.get`` calls:
+
+    image = await get_image_fetcher().fetch(url)
+    image.data, image.content_type, image.sha256
+
+Every hop (including redirects) is checked against private, loopback and
+link-local addresses using an async resolver with a short TTL cache. Bodies are
+streamed and cut off at ``MAX_IMAGE_BYTES``. Downloads are stored by SHA-256 in
+an LRU memory cache (optionally backed by a directory), and the URL -> digest
+mapping is kept for ``url_ttl`` seconds, so a URL is fetched once per TTL even
+when the CV pre-pass and the AI refinement both need it. Concurrent fetches of
+the same URL share a single download.
+
+Configuration (environment):
+    MAX_IMAGE_BYTES: download size limit (default 8 MiB)
+    IMAGE_FETCH_TTL_SECONDS: URL cache lifetime (default 300)
+    IMAGE_FETCH_CACHE_BYTES: in-memory cache budget (default 64 MiB)
+    IMAGE_FETCH_CACHE_DIR: optional directory for the on-disk cache
+"""
+
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from copy_that.infrastructure.event_loops import LoopLocal, ProcessSemaphore
+
+logger = logging.getLogger(__name__)
+
+try:  # HTTP/2 support is optional (pip install httpx[http2])
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+ALLOWED_IMAGE_SCHEMES = {"http", "https"}
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(8 * 1024 * 1024)))
+DEFAULT_URL_TTL_SECONDS = 300.0
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_DNS_TTL_SECONDS = 60.0
+MAX_URL_ENTRIES = 4096
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class ImageFetchError(Exception):
+    """Image could not be fetched; ``status_code`` is the HTTP status to surface."""
+
+    status_code = 400
+
+
+class UnsafeImageURLError(ImageFetchError):
+    """URL scheme or resolved host is not allowed (SSRF protection)."""
+
+
+class ImageTooLargeError(ImageFetchError):
+    """Response body exceeds the configured size limit."""
+
+    status_code = 413
+
+
+@dataclass(frozen=True)
+class FetchedImage:
+    """Downloaded image payload."""
+
+    url: str
+    data: bytes
+    content_type: str
+    sha256: str
+
+    @property
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+
+def is_blocked_ip(ip_str: str) -> bool:
+    """True for addresses an image URL must never resolve to."""
+    ip = ipaddress.ip_address(ip_str)
+    return bool(
+        ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_multicast or ip.is_link_local
+    )
+
+
+class DNSCache:
+    """Async ``getaddrinfo`` with a small TTL cache."""
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL_SECONDS, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+
+    async def resolve(self, host: str) -> list[str]:
+        now = time.monotonic()
+        entry = self._entries.get(host)
+        if entry and entry[0] > now:
+            self._entries.move_to_end(host)
+            return entry[1]
+
+        loop = asyncio.get_running_loop()
+        records = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(str(sockaddr[0]) for *_, sockaddr in records))
+        self._entries[host] = (now + self.ttl, addresses)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return addresses
+
+
+class ContentCache:
+    """SHA-256 addressed byte store: LRU in memory, optionally mirrored to disk."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, directory: str | Path | None = None):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, digest: str) -> bytes | None:
+        with self._lock:
+            data = self._items.get(digest)
+            if data is not None:
+                self._items.move_to_end(digest)
+                return data
+        if self.directory:
+            path = self.directory / digest[:2] / digest
+            if path.exists():
+                data = path.read_bytes()
+                self._remember(digest, data)
+                return data
+        return None
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        self._remember(digest, data)
+        if self.directory:
+            path = self.directory / digest[:2] / digest
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                tmp.replace(path)
+        return digest
+
+    def _remember(self, digest: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if digest in self._items:
+                self._items.move_to_end(digest)
+                return
+            self._items[digest] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+async def _close_client(client: httpx.AsyncClient) -> None:
+    await client.aclose()
+
+
+class ImageFetcher:
+    """Pooled async downloader with SSRF checks, size limits and caching."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = MAX_IMAGE_BYTES,
+        url_ttl: float = DEFAULT_URL_TTL_SECONDS,
+        cache: ContentCache | None = None,
+        dns: DNSCache | None = None,
+        timeout: float = 15.0,
+        max_connections: int = 20,
+        max_redirects: int = 3,
+        allow_private_hosts: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl
+        self.cache = cache or ContentCache()
+        self.dns = dns or DNSCache()
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_redirects = max_redirects
+        self.allow_private_hosts = allow_private_hosts
+        self._transport = transport
+        # One connection pool per event loop, closed with it; the download limit
+        # is process-wide
+        self._clients: LoopLocal[httpx.AsyncClient] = LoopLocal(close=_close_client)
+        self._download_slots = ProcessSemaphore(max_connections)
+        # url -> (expires_at, sha256, content_type)
+        self._urls: dict[str, tuple[float, str, str]] = {}
+        # Download tasks belong to their event loop (Celery tasks run on their own)
+        self._inflight: LoopLocal[dict[str, asyncio.Task[FetchedImage]]] = LoopLocal()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ImageFetcher":
+        return cls(
+            url_ttl=float(os.getenv("IMAGE_FETCH_TTL_SECONDS", DEFAULT_URL_TTL_SECONDS)),
+            cache=ContentCache(
+                max_bytes=int(os.getenv("IMAGE_FETCH_CACHE_BYTES", DEFAULT_CACHE_BYTES)),
+                directory=os.getenv("IMAGE_FETCH_CACHE_DIR") or None,
+            ),
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self._clients.get_or_create(
+            lambda: httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                follow_redirects=False,
+                transport=self._transport,
+            )
+        )
+
+    async def validate_url(self, url: str) -> str:
+        """Check scheme and resolved addresses; return the normalized URL."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ALLOWED_IMAGE_SCHEMES:
+            raise UnsafeImageURLError("Only http/https image URLs are allowed")
+        if not parsed.netloc or not parsed.hostname:
+            raise ImageFetchError("Invalid image_url")
+
+        try:
+            addresses = await self.dns.resolve(parsed.hostname)
+        except socket.gaierror as exc:
+            raise ImageFetchError("Invalid image host") from exc
+
+        if not self.allow_private_hosts and any(is_blocked_ip(ip) for ip in addresses):
+            raise UnsafeImageURLError("Refusing private or internal image host")
+        return parsed.geturl()
+
+    async def fetch(self, url: str) -> FetchedImage:
+        """Return the image at ``url``, downloading it at most once per TTL."""
+        cached = self._lookup(url)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        inflight = self._inflight.get_or_create(dict)
+        task = inflight.get(url)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._download(url))
+            inflight[url] = task
+            task.add_done_callback(lambda _: inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    def _lookup(self, url: str) -> FetchedImage | None:
+        entry = self._urls.get(url)
+        if entry is None:
+            return None
+        expires_at, digest, content_type = entry
+        if expires_at <= time.monotonic():
+            self._urls.pop(url, None)
+            return None
+        data = self.cache.get(digest)
+        if data is None:
+            return None
+        return FetchedImage(url=url, data=data, content_type=content_type, sha256=digest)
+
+    async def _download(self, url: str) -> FetchedImage:
+        async with self._download_slots:
+            return await self._download_unlimited(url)
+
+    async def _download_unlimited(self, url: str) -> FetchedImage:
+        client = self._get_client()
+        current = url
+        for _ in range(self.max_redirects + 1):
+            current = await self.validate_url(current)
+            try:
+                async with client.stream("GET", current) as resp:
+                    if resp.status_code in REDIRECT_STATUSES and "location" in resp.headers:
+                        current = urljoin(current, resp.headers["location"])
+                        continue
+                    resp.raise_for_status()
+                    data = await self._read_limited(resp)
+                    content_type = resp.headers.get("content-type", "image/png").split(";")[0]
+            except httpx.HTTPError as exc:
+                logger.warning("Failed to download image %s: %s", url, exc)
+                raise ImageFetchError("Failed to fetch image_url") from exc
+
+            if not (
+                content_type.startswith("image/") or content_type == "application/octet-stream"
+            ):
+                raise ImageFetchError(f"URL did not return an image ({content_type})")
+            digest = self.cache.put(data)
+            self._remember_url(url, digest, content_type)
+            return FetchedImage(url=url, data=data, content_type=content_type, sha256=digest)
+
+        raise ImageFetchError("Too many redirects fetching image_url")
+
+    def _remember_url(self, url: str, digest: str, content_type: str) -> None:
+        now = time.monotonic()
+        if len(self._urls) >= MAX_URL_ENTRIES:
+            self._urls = {u: e for u, e in self._urls.items() if e[0] > now}
+            if len(self._urls) >= MAX_URL_ENTRIES:
+                self._urls.pop(next(iter(self._urls)))
+        self._urls[url] = (now + self.url_ttl, digest, content_type)
+
+    async def _read_limited(self, resp: httpx.Response) -> bytes:
+        content_length = resp.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ImageTooLargeError("Image too large")
+        buf = bytearray()
+        async for chunk in resp.aiter_bytes():
+            buf.extend(chunk)
+            if len(buf) > self.max_bytes:
+                raise ImageTooLargeError("Image too large")
+        return bytes(buf)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_urls": len(self._urls),
+            "cache_bytes": self.cache.size,
+            "http2": HTTP2_AVAILABLE,
+        }
+
+    async def aclose(self) -> None:
+        """Close the running loop's client (other loops close theirs on shutdown)."""
+        client = self._clients.pop()
+        if client is not None:
+            await client.aclose()
+
+
+# Global fetcher shared by all routers
+_image_fetcher: ImageFetcher | None = None
+
+
+def get_image_fetcher() -> ImageFetcher:
+    """Get or create the process-wide image fetcher."""
+    global _image_fetcher
+    if _image_fetcher is None:
+        _image_fetcher = ImageFetcher.from_env()
+    return _image_fetcher
+
+
+async def close_image_fetcher() -> None:
+    """Close the global fetcher's connection pool (called on application shutdown)."""
+    global _image_fetcher
+    if _image_fetcher is not None:
+        await _image_fetcher.aclose()
+        _image_fetcher = None
@@ -0,0 +1,21 @@
+"""Blob storage infrastructure package"""
+
+from .blob_store import (
+    BlobNotFoundError,
+    BlobStore,
+    GCSBlobStore,
+    LocalBlobStore,
+    blob_store_from_env,
+    get_blob_store,
+    set_blob_store,
+)
+
+__all__ = [
+    "BlobNotFoundError",
+    "BlobStore",
+    "GCSBlobStore",
+    "LocalBlobStore",
+    "blob_store_from_env",
+    "get_blob_store",
+    "set_blob_store",
+]
@@ -0,0 +1,191 @@
+"""Blob storage for uploaded images and their derived previews.
+
+Blobs are immutable and addressed by content hash, so a key never changes
+meaning and can be cached forever by clients. The API is synchronous (file
+and GCS client calls block); async callers wrap it in ``asyncio.to_thread``,
+and migrations can call it directly.
+
+Backends:
+    LocalBlobStore: files under a directory (development, tests, single host)
+    GCSBlobStore: a Google Cloud Storage bucket (Cloud Run, where local disk
+        is ephemeral)
+
+Configuration (environment, shared with the rest of the storage settings):
+    STORAGE_BACKEND: "local" (default) or "gcs"
+    LOCAL_STORAGE_PATH: local storage root; blobs live in its ``blobs``
+        subdirectory (default ./storage)
+    GCS_BUCKET: bucket of the GCS backend; blobs live under ``blobs/``
+"""
+
+import logging
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORAGE_PATH = "./storage"
+DEFAULT_GCS_PREFIX = "blobs/"
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class BlobNotFoundError(KeyError):
+    """No blob is stored under the requested key."""
+
+
+def _check_key(key: str) -> str:
+    # Keys become file names: no separators, no leading dots
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return key
+
+
+class BlobStore(ABC):
+    """Immutable, content-addressed blob storage."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        """Store ``data`` under ``key`` (a no-op when the key already exists)."""
+
+    @abstractmethod
+    def size(self, key: str) -> int | None:
+        """Size in bytes, or None when the blob does not exist."""
+
+    @abstractmethod
+    def read(self, key: str, start: int = 0, end: int | None = None) -> bytes:
+        """Bytes ``[start, end)`` of the blob; raises BlobNotFoundError."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the blob if present."""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files, fanned out into two-character subdirectories."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        _check_key(key)
+        return self.root / key[:2] / key
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def size(self, key: str) -> int | None:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> bytes:
+        try:
+            with self._path(key).open("rb") as f:
+                f.seek(start)
+                return f.read() if end is None else f.read(max(0, end - start))
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class GCSBlobStore(BlobStore):
+    """Blobs as objects in a Google Cloud Storage bucket."""
+
+    def __init__(self, bucket: str, prefix: str = DEFAULT_GCS_PREFIX, client: Any = None):
+        if client is None:
+            from google.cloud import storage
+
+            client = storage.Client(project=os.getenv("GCS_PROJECT_ID") or None)
+        self.bucket = client.bucket(bucket)
+        self.prefix = prefix
+
+    def _blob(self, key: str) -> Any:
+        return self.bucket.blob(f"{self.prefix}{_check_key(key)}")
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        from google.api_core.exceptions import PreconditionFailed
+
+        try:
+            # if_generation_match=0: only create, never overwrite
+            self._blob(key).upload_from_string(
+                data, content_type=content_type, if_generation_match=0
+            )
+        except PreconditionFailed:
+            pass
+
+    def size(self, key: str) -> int | None:
+        blob = self.bucket.get_blob(f"{self.prefix}{_check_key(key)}")
+        return blob.size if blob is not None else None
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> bytes:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            # GCS ranges are inclusive of ``end``
+            data: bytes = self._blob(key).download_as_bytes(
+                start=start, end=end - 1 if end is not None else None
+            )
+            return data
+        except NotFound:
+            raise BlobNotFoundError(key) from None
+
+    def delete(self, key: str) -> None:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self._blob(key).delete()
+        except NotFound:
+            pass
+
+
+def blob_store_from_env() -> BlobStore:
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "gcs":
+        bucket = os.getenv("GCS_BUCKET")
+        if not bucket:
+            raise RuntimeError("GCS_BUCKET must be set for the gcs storage backend")
+        return GCSBlobStore(bucket)
+    if backend != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
+    return LocalBlobStore(Path(os.getenv("LOCAL_STORAGE_PATH", DEFAULT_STORAGE_PATH)) / "blobs")
+
+
+# Global blob store shared by routers and services
+_blob_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get or create the process-wide blob store."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = blob_store_from_env()
+        logger.info("Blob store: %s", type(_blob_store).__name__)
+    return _blob_store
+
+
+def set_blob_store(store: BlobStore | None) -> None:
+    """Replace the global blob store (None re-reads the environment on next use)."""
+    global _blob_store
+    _blob_store = store
@@ -0,0 +1,144 @@
+"""
+Image assets: serve stored images and their previews.
+
+Assets are immutable and addressed by SHA-256, so the hash doubles as a strong
+ETag and responses may be cached indefinitely. Single byte ranges are
+supported for partial downloads.
+"""
+
+import asyncio
+import json
+import re
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from copy_that.domain.models import ImageAsset
+from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.storage import BlobNotFoundError, get_blob_store
+from copy_that.services.image_assets_service import (
+    VARIANT_MEDIA_TYPE,
+    VARIANTS,
+    get_asset,
+    variant_key,
+)
+
+router = APIRouter(prefix="/api/v1/assets", tags=["assets"])
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Resolve a single ``bytes=`` range to ``[start, end)``; None when unsatisfiable.
+
+    Raises:
+        ValueError: for malformed or multi-range headers (served as a full response)
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise ValueError(f"Unsupported range: {header}")
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        return (max(0, size - length), size) if length > 0 and size > 0 else None
+    start = int(first)
+    end = size if last == "" else min(int(last) + 1, size)
+    return (start, end) if start < size and start < end else None
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def _asset_or_404(db: AsyncSession, sha256: str) -> ImageAsset:
+    asset = await get_asset(db, sha256) if _SHA256_PATTERN.match(sha256) else None
+    if asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Asset {sha256} not found"
+        )
+    return asset
+
+
+async def _serve_blob(
+    key: str, media_type: str, range_header: str | None, if_none_match: str | None
+) -> Response:
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    store = get_blob_store()
+    size = await asyncio.to_thread(store.size, key)
+    if size is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Asset data missing")
+
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            range_header = None
+        if range_header and byte_range is None:
+            return Response(
+                status_code=416,  # Range Not Satisfiable
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    try:
+        if byte_range is None:
+            body = await asyncio.to_thread(store.read, key)
+            return Response(content=body, media_type=media_type, headers=headers)
+        start, end = byte_range
+        body = await asyncio.to_thread(store.read, key, start, end)
+    except BlobNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Asset data missing")
+    return Response(
+        content=body,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end - 1}/{size}"},
+    )
+
+
+@router.get("/{sha256}")
+async def get_image(
+    sha256: str,
+    db: AsyncSession = Depends(get_db),
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+) -> Response:
+    """Serve the original uploaded image."""
+    asset = await _asset_or_404(db, sha256)
+    return await _serve_blob(variant_key(sha256), asset.media_type, range_header, if_none_match)
+
+
+@router.get("/{sha256}/{variant}")
+async def get_image_variant(
+    sha256: str,
+    variant: str,
+    db: AsyncSession = Depends(get_db),
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+) -> Response:
+    """Serve a generated preview (``thumbnail`` or ``preview``).
+
+    Images that could not be decoded at upload have no variants; the original
+    is served in their place.
+    """
+    if variant not in VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown variant: {variant}"
+        )
+    asset = await _asset_or_404(db, sha256)
+    if variant in json.loads(asset.variants or "[]"):
+        return await _serve_blob(
+            variant_key(sha256, variant), VARIANT_MEDIA_TYPE, range_header, if_none_match
+        )
+    return await _serve_blob(variant_key(sha256), asset.media_type, range_header, if_none_match)
@@ -16,27 +16,41 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from copy_that.application.batch_executor import run_batch
 from copy_that.application.color_extractor import (
     ColorExtractionResult,
     ExtractedColorToken,
 )
 from copy_that.application.cv.color_cv_extractor import CVColorExtractor
+from copy_that.application.openai_color_extractor import (
+    ColorExtractionResult as OpenAIColorExtractionResult,
+)
+from copy_that.application.openai_color_extractor import OpenAIColorExtractor
 from copy_that.domain.models import ColorToken, ExtractionJob, Project
 from copy_that.extractors.color.adapters import (
     CVColorExtractorAdapter,
     KMeansColorExtractorAdapter,
 )
 from copy_that.extractors.color.orchestrator import MultiExtractorOrchestrator
+from copy_that.infrastructure.cache import get_result_cache
+from copy_that.infrastructure.compute import (
+    CVExecutorBusyError,
+    CVTaskTimeoutError,
+    get_cv_executor,
+)
 from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
 from copy_that.infrastructure.security.rate_limiter import rate_limit
 from copy_that.interfaces.api.schemas import (
+    BatchItemError,
+    ColorBatchResponse,
     ColorExtractionResponse,
     ColorTokenCreateRequest,
     ColorTokenDetailResponse,
     ColorTokenResponse,
     ExtractColorRequest,
 )
-from copy_that.interfaces.api.utils import sanitize_json_value
+from copy_that.interfaces.api.utils import EventEmitter, sanitize_json_value, stream_events
 from copy_that.interfaces.api.validators import validate_base64_image, validate_max_colors
 from copy_that.services.colors_service import (
     add_role_tokens,
@@ -48,6 +62,11 @@ from copy_that.services.colors_service import (
     post_process_colors,
     serialize_color_token,
 )
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    color_token_row,
+    persist_tokens,
+)
 from copy_that.tokens.color.aggregator import ColorAggregator
 from core.tokens.adapters.w3c import tokens_to_w3c
 from core.tokens.color import make_color_ramp, make_color_token, ramp_to_dict
@@ -113,31 +132,8 @@ def _result_to_response(
     )
 
 
-@router.post("/colors/extract", response_model=ColorExtractionResponse)
-async def extract_colors_from_image(
-    request: ExtractColorRequest,
-    db: AsyncSession = Depends(get_db),
-    _rate_limit: None = Depends(rate_limit(requests=10, seconds=60)),
-):
-    """Extract colors from an image URL or base64 data using AI
-
-    This endpoint:
-    1. Accepts either an image URL or base64 encoded image data
-    2. Uses Claude Sonnet 4.5 to analyze and extract colors
-    3. Stores extracted colors in the database
-    4. Returns the extracted color palette
-
-    Args:
-        request: ExtractColorRequest with image_url or image_base64 and project_id
-        db: Database session
-
-    Returns:
-        ColorExtractionResponse with extracted colors
-
-    Raises:
-        HTTPException: If project not found or extraction fails
-    """
-    # Verify project exists
+async def _validate_color_request(db: AsyncSession, request: ExtractColorRequest) -> None:
+    """Reject requests for unknown projects, without an image or with bad parameters."""
     result = await db.execute(select(Project).where(Project.id == request.project_id))
     project = result.scalar_one_or_none()
     if not project:
@@ -171,124 +167,171 @@ async def extract_colors_from_image(
                 detail=f"Invalid image: {str(e)}",
             )
 
-    try:
-        # CV-first fast pass
-        cv_result = None
-        if request.image_base64:
-            cv_result = CVColorExtractor(max_colors=request.max_colors).extract_from_base64(
-                request.image_base64
-            )
-        elif request.image_url:
-            try:
-                # Download and convert to base64 for CV extractor
-                resp = requests.get(request.image_url, timeout=10)
-                resp.raise_for_status()
-                import base64
-
-                cv_b64 = base64.b64encode(resp.content).decode("utf-8")
-                cv_result = CVColorExtractor(max_colors=request.max_colors).extract_from_base64(
-                    cv_b64
-                )
-            except requests.RequestException as e:
-                logger.debug("CV pre-pass skipped - failed to fetch image: %s", e)
-                cv_result = None
-
-        # AI refinement
-        extractor, extractor_name = get_extractor(request.extractor or "auto")
-        if request.image_base64:
-            ai_result = extractor.extract_colors_from_base64(
-                request.image_base64, media_type="image/png", max_colors=request.max_colors
-            )
-        else:
-            ai_result = extractor.extract_colors_from_image_url(
-                request.image_url, max_colors=request.max_colors
-            )
 
-        # Merge CV + AI
-        merged_colors = []
-        ai_by_hex = {c.hex.lower(): c for c in ai_result.colors}
-        cv_by_hex = {c.hex.lower(): c for c in cv_result.colors} if cv_result else {}
-        seen = set()
-        for hx, tok in ai_by_hex.items():
-            merged_colors.append(tok)
-            seen.add(hx)
-        for hx, tok in cv_by_hex.items():
-            if hx in seen:
-                continue
-            merged_colors.append(tok)
-
-        processed_colors, backgrounds = post_process_colors(
-            merged_colors, ai_result.dominant_colors if ai_result else None
-        )
+async def _load_color_image(request: ExtractColorRequest) -> tuple[str | bytes, str, str]:
+    """
+    Image payload shared by the CV and AI passes: (payload, base64 for AI, media type).
 
-        # Normalize possibly mocked fields into concrete types
-        palette_source = ai_result if ai_result else cv_result
-        color_palette = _safe_str(getattr(palette_source, "color_palette", ""))
-        extractor_used = _safe_str(
-            extractor_name or getattr(palette_source, "extractor_used", extractor_name)
-        )
-        dominant_colors = list(
-            getattr(palette_source, "dominant_colors", [])
-            or (cv_result.dominant_colors if cv_result else [])
+    URL images go through the shared, cached fetcher; a URL that is unsafe, too
+    large or cannot be downloaded is rejected with the fetcher's 4xx status.
+    """
+    if request.image_base64:
+        return request.image_base64, request.image_base64, "image/png"
+    if not request.image_url:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image_url or image_base64 must be provided",
         )
-        try:
-            extraction_confidence = float(
-                getattr(palette_source, "extraction_confidence", 0.0) or 0.0
-            )
-        except (ValueError, TypeError):
-            extraction_confidence = 0.0
+    try:
+        fetched = await get_image_fetcher().fetch(request.image_url)
+    except ImageFetchError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from e
+    return fetched.data, fetched.base64, fetched.content_type
+
+
+async def _cv_color_pass(image_payload: str | bytes, max_colors: int) -> ColorExtractionResult:
+    """CV-first fast pass (CPU-bound, runs on the CV worker pool)."""
+    cv_extractor = CVColorExtractor(max_colors=max_colors)
+    cv_fn = (
+        cv_extractor.extract_from_base64
+        if isinstance(image_payload, str)
+        else cv_extractor.extract_from_bytes
+    )
+    return await get_result_cache().get_or_compute_model(
+        "cv-color",
+        ColorExtractionResult,
+        image_payload,
+        lambda: get_cv_executor().run(cv_fn, image_payload),
+        max_colors=max_colors,
+        superpixel_backend=cv_extractor.superpixel_key,
+    )
 
-        extraction_result = ColorExtractionResult(
-            colors=processed_colors,
-            dominant_colors=dominant_colors,
-            color_palette=color_palette,
-            extraction_confidence=extraction_confidence,
-            extractor_used=extractor_used,
-            background_colors=backgrounds,
-        )
 
-        # Create extraction job record
-        source_identifier = request.image_url or "base64_upload"
-        extraction_job = ExtractionJob(
-            project_id=request.project_id,
-            source_url=source_identifier,
-            extraction_type="color",
-            status="completed",
-            result_data=json.dumps(
-                {
-                    "color_count": len(extraction_result.colors),
-                    "palette": extraction_result.color_palette,
-                },
-                default=str,
-            ),
+async def _ai_color_pass(
+    request: ExtractColorRequest,
+    image_payload: str | bytes,
+    ai_b64: str,
+    media_type: str,
+) -> tuple[Any, str]:
+    """AI refinement through the shared async AI clients; returns (result, extractor)."""
+    extractor, extractor_name = get_extractor(request.extractor or "auto")
+    ai_result = await get_result_cache().get_or_compute_model(
+        f"ai-color:{extractor_name}",
+        _color_result_model(extractor),
+        image_payload,
+        lambda: extractor.extract_colors_from_base64(
+            ai_b64, media_type=media_type, max_colors=request.max_colors
+        ),
+        version=extractor.model,
+        max_colors=request.max_colors,
+    )
+    return ai_result, extractor_name
+
+
+def _merge_color_passes(
+    ai_result: Any, cv_result: ColorExtractionResult | None, extractor_name: str
+) -> ColorExtractionResult:
+    """Merge CV + AI colors (AI first, CV-only hexes appended) and post-process them."""
+    merged_colors = []
+    ai_by_hex = {c.hex.lower(): c for c in ai_result.colors}
+    cv_by_hex = {c.hex.lower(): c for c in cv_result.colors} if cv_result else {}
+    seen = set()
+    for hx, tok in ai_by_hex.items():
+        merged_colors.append(tok)
+        seen.add(hx)
+    for hx, tok in cv_by_hex.items():
+        if hx in seen:
+            continue
+        merged_colors.append(tok)
+
+    processed_colors, backgrounds = post_process_colors(
+        merged_colors, ai_result.dominant_colors if ai_result else None
+    )
+
+    # Normalize possibly mocked fields into concrete types
+    palette_source = ai_result if ai_result else cv_result
+    color_palette = _safe_str(getattr(palette_source, "color_palette", ""))
+    extractor_used = _safe_str(
+        extractor_name or getattr(palette_source, "extractor_used", extractor_name)
+    )
+    dominant_colors = list(
+        getattr(palette_source, "dominant_colors", [])
+        or (cv_result.dominant_colors if cv_result else [])
+    )
+    try:
+        extraction_confidence = float(getattr(palette_source, "extraction_confidence", 0.0) or 0.0)
+    except (ValueError, TypeError):
+        extraction_confidence = 0.0
+
+    return ColorExtractionResult(
+        colors=processed_colors,
+        dominant_colors=dominant_colors,
+        color_palette=color_palette,
+        extraction_confidence=extraction_confidence,
+        extractor_used=extractor_used,
+        background_colors=backgrounds,
+    )
+
+
+@router.post("/colors/extract", response_model=ColorExtractionResponse)
+async def extract_colors_from_image(
+    request: ExtractColorRequest,
+    db: AsyncSession = Depends(get_db),
+    _rate_limit: None = Depends(rate_limit(requests=10, seconds=60)),
+):
+    """Extract colors from an image URL or base64 data using AI
+
+    This endpoint:
+    1. Accepts either an image URL or base64 encoded image data
+    2. Uses Claude Sonnet 4.5 to analyze and extract colors
+    3. Stores extracted colors in the database
+    4. Returns the extracted color palette
+
+    Args:
+        request: ExtractColorRequest with image_url or image_base64 and project_id
+        db: Database session
+
+    Returns:
+        ColorExtractionResponse with extracted colors
+
+    Raises:
+        HTTPException: If project not found or extraction fails
+    """
+    await _validate_color_request(db, request)
+
+    image_payload, ai_b64, media_type = await _load_color_image(request)
+    try:
+        cv_result = await _cv_color_pass(image_payload, request.max_colors)
+        ai_result, extractor_name = await _ai_color_pass(request, image_payload, ai_b64, media_type)
+        extraction_result = _merge_color_passes(ai_result, cv_result, extractor_name)
+
+        # Store the extraction job and its color tokens in one transaction
+        persisted = await persist_tokens(
+            db,
+            request.project_id,
+            [
+                TokenGroup(
+                    ColorToken,
+                    [color_token_row(color) for color in extraction_result.colors],
+                    job={
+                        "source_url": request.image_url or "base64_upload",
+                        "extraction_type": "color",
+                        "status": "completed",
+                        "result_data": json.dumps(
+                            {
+                                "color_count": len(extraction_result.colors),
+                                "palette": extraction_result.color_palette,
+                            },
+                            default=str,
+                        ),
+                    },
+                )
+            ],
         )
-        db.add(extraction_job)
-        await db.flush()
         response = _result_to_response(
             extraction_result,
-            namespace=f"token/color/project/{request.project_id}/job/{extraction_job.id}",
+            namespace=f"token/color/project/{request.project_id}/job/{persisted.job_ids[0]}",
         )
-
-        # Store color tokens in database
-        for color in extraction_result.colors:
-            color_token = ColorToken(
-                project_id=request.project_id,
-                extraction_job_id=extraction_job.id,
-                hex=color.hex,
-                rgb=color.rgb,
-                name=color.name,
-                design_intent=color.design_intent,
-                semantic_names=json.dumps(color.semantic_names) if color.semantic_names else None,
-                extraction_metadata=json.dumps(color.extraction_metadata)
-                if color.extraction_metadata
-                else None,
-                confidence=color.confidence,
-                harmony=color.harmony,
-                usage=json.dumps(color.usage) if color.usage else None,
-            )
-            db.add(color_token)
-
-        await db.commit()
         logger.info(
             "Extracted %d colors for project %d", len(extraction_result.colors), request.project_id
         )
@@ -307,6 +350,18 @@ async def extract_colors_from_image(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to fetch image from URL: {str(e)}",
         )
+    except CVExecutorBusyError as e:
+        logger.warning("CV pool saturated: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Extraction capacity exhausted, please retry shortly",
+        )
+    except CVTaskTimeoutError as e:
+        logger.error("CV extraction timed out: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Color extraction timed out",
+        )
     except anthropic.APIError as e:
         logger.error("Claude API error: %s", str(e))
         raise HTTPException(
@@ -332,6 +387,8 @@ async def extract_colors_streaming(
     Returns Server-Sent Events (SSE) stream with:
     1. Phase 1 (instant): Basic color extraction from image
     2. Phase 2 (async): Claude AI enhancements (semantic names, harmonies)
+    3. Phase 3: OpenAI enrichment; each color is sent (status ``ai_color``) as
+       soon as the model has written it, then ``ai_enhancement_complete``
 
     This allows progressive/streaming results instead of waiting for Claude.
 
@@ -365,16 +422,23 @@ async def extract_colors_streaming(
             logger.info(
                 "[Phase 1] Starting fast color extraction for project %d", request.project_id
             )
+            # URL images are downloaded once; Phase 1 and Phase 3 share the payload
+            try:
+                image_payload, image_b64, media_type = await _load_color_image(request)
+            except HTTPException as e:
+                yield f"data: {json.dumps({'error': e.detail, 'phase': -1, 'status': 'fetch_failed'})}\n\n"
+                return
             extractor, extractor_name = get_extractor(request.extractor or "auto")
-
-            if request.image_base64:
-                raw_result = extractor.extract_colors_from_base64(
-                    request.image_base64, media_type="image/png", max_colors=request.max_colors
-                )
-            else:
-                raw_result = extractor.extract_colors_from_image_url(
-                    request.image_url, max_colors=request.max_colors
-                )
+            raw_result = await get_result_cache().get_or_compute_model(
+                f"ai-color:{extractor_name}",
+                _color_result_model(extractor),
+                image_payload,
+                lambda: extractor.extract_colors_from_base64(
+                    image_b64, media_type=media_type, max_colors=request.max_colors
+                ),
+                version=extractor.model,
+                max_colors=request.max_colors,
+            )
 
             processed_colors, backgrounds = post_process_colors(
                 raw_result.colors, getattr(raw_result, "dominant_colors", None)
@@ -549,18 +613,48 @@ async def extract_colors_streaming(
 
                 ai_extractor = OpenAIColorExtractor()
 
-                # Extract enhanced colors using GPT-4 Vision
-                if request.image_base64:
-                    ai_result = ai_extractor.extract_colors_from_base64(
-                        request.image_base64,
-                        media_type="image/png",
+                def ai_color_payload(idx: int, ai_color: Any) -> dict[str, Any]:
+                    return {
+                        "id": stored_colors[idx].id,
+                        "hex": ai_color.hex,
+                        "name": ai_color.name,
+                        "design_intent": ai_color.design_intent,
+                        "semantic_names": ai_color.semantic_names,
+                        "confidence": ai_color.confidence,
+                        "usage": ai_color.usage,
+                        "prominence_percentage": ai_color.prominence_percentage,
+                    }
+
+                # Extract enhanced colors using GPT-4 Vision, streaming each color
+                async def enhance(emit: EventEmitter) -> Any:
+                    def on_token(ai_color: Any) -> None:
+                        emit("ai_color", ai_color)
+
+                    return await ai_extractor.extract_colors_from_base64(
+                        image_b64,
+                        media_type=media_type,
                         max_colors=request.max_colors,
-                    )
-                else:
-                    ai_result = ai_extractor.extract_colors_from_image_url(
-                        request.image_url, max_colors=request.max_colors
+                        on_token=on_token,
                     )
 
+                streamed = 0
+                async for event, value in stream_events(enhance):
+                    if event == "result":
+                        ai_result = value
+                        continue
+                    # Forward each AI color as soon as the model has finished writing it
+                    if streamed < len(stored_colors):
+                        streamed_payload = sanitize_json_value(
+                            {
+                                "phase": 3,
+                                "status": "ai_color",
+                                "index": streamed,
+                                "color": ai_color_payload(streamed, value),
+                            }
+                        )
+                        yield f"data: {json.dumps(streamed_payload, default=str)}\n\n"
+                    streamed += 1
+
                 # Merge Phase 3 AI enhancements with stored colors
                 enriched_colors = []
                 for idx, ai_color in enumerate(ai_result.colors):
@@ -575,18 +669,7 @@ async def extract_colors_streaming(
                             stored_color.design_intent = ai_color.design_intent
 
                         # Convert to dict for response
-                        enriched_colors.append(
-                            {
-                                "id": stored_color.id,
-                                "hex": ai_color.hex,
-                                "name": ai_color.name,
-                                "design_intent": ai_color.design_intent,
-                                "semantic_names": ai_color.semantic_names,
-                                "confidence": ai_color.confidence,
-                                "usage": ai_color.usage,
-                                "prominence_percentage": ai_color.prominence_percentage,
-                            }
-                        )
+                        enriched_colors.append(ai_color_payload(idx, ai_color))
 
                 # Yield Phase 3 completion event
                 phase3_payload = sanitize_json_value(
@@ -701,63 +784,77 @@ async def export_colors_w3c(project_id: int | None = None, db: AsyncSession = De
     return sanitize_json_value(tokens_to_w3c(repo))
 
 
-@router.post("/colors/batch", response_model=list[ColorExtractionResponse])
+@router.post("/colors/batch", response_model=ColorBatchResponse)
 async def batch_extract_colors(
     request: ColorBatchRequest,
     db: AsyncSession = Depends(get_db),
     _rate_limit: None = Depends(rate_limit(requests=5, seconds=60)),
-) -> list[ColorExtractionResponse]:
-    """Batch extract colors from multiple image URLs."""
-    extractor, extractor_name = get_extractor("auto")
-    responses: list[ColorExtractionResponse] = []
-    for url in request.image_urls:
-        try:
-            extraction_result = extractor.extract_colors_from_image_url(url, request.max_colors)
-            extraction_result.extractor_used = extractor_name
-            job_id: int | None = None
-            # Optional persistence
-            if request.project_id:
-                job = ExtractionJob(
-                    project_id=request.project_id,
-                    source_url=url,
-                    extraction_type="color",
-                    status="completed",
-                    result_data=json.dumps({"color_count": len(extraction_result.colors)}),
+) -> ColorBatchResponse:
+    """Batch extract colors from multiple image URLs.
+
+    Images run concurrently through the same CV + AI passes as
+    ``/colors/extract``; the tokens of the whole batch are inserted at once.
+    Failed images leave a null in ``results`` and are listed in ``errors``.
+    """
+
+    async def extract(url: str) -> ColorExtractionResult:
+        item_request = ExtractColorRequest(
+            image_url=url, project_id=request.project_id or 0, max_colors=request.max_colors
+        )
+        image_payload, ai_b64, media_type = await _load_color_image(item_request)
+        cv_result = await _cv_color_pass(image_payload, request.max_colors)
+        ai_result, extractor_name = await _ai_color_pass(
+            item_request, image_payload, ai_b64, media_type
+        )
+        return _merge_color_passes(ai_result, cv_result, extractor_name)
+
+    items = await run_batch(request.image_urls, extract)
+    succeeded = [item for item in items if item.ok]
+
+    # Optional persistence: one insert for the jobs, one for all their tokens
+    job_ids: dict[int, int] = {}
+    if request.project_id and succeeded:
+        persisted = await persist_tokens(
+            db,
+            request.project_id,
+            [
+                TokenGroup(
+                    ColorToken,
+                    [color_token_row(color) for color in item.result.colors],
+                    job={
+                        "source_url": item.source,
+                        "extraction_type": "color",
+                        "status": "completed",
+                        "result_data": json.dumps({"color_count": len(item.result.colors)}),
+                    },
                 )
-                db.add(job)
-                await db.flush()
-                for color in extraction_result.colors:
-                    db.add(
-                        ColorToken(
-                            project_id=request.project_id,
-                            extraction_job_id=job.id,
-                            hex=color.hex,
-                            rgb=color.rgb,
-                            name=color.name,
-                            design_intent=color.design_intent,
-                            semantic_names=json.dumps(color.semantic_names)
-                            if color.semantic_names
-                            else None,
-                            extraction_metadata=json.dumps(color.extraction_metadata)
-                            if color.extraction_metadata
-                            else None,
-                            confidence=color.confidence,
-                            harmony=color.harmony,
-                            usage=json.dumps(color.usage) if color.usage else None,
-                        )
-                    )
-                await db.commit()
-                job_id = job.id
-            namespace = (
-                f"token/color/project/{request.project_id}/job/{job_id}"
-                if job_id is not None and request.project_id
-                else f"token/color/batch/{len(responses) + 1:02d}"
+                for item in succeeded
+            ],
+        )
+        job_ids = {
+            item.index: job_id
+            for item, job_id in zip(succeeded, persisted.job_ids, strict=True)
+            if job_id is not None
+        }
+
+    return ColorBatchResponse(
+        results=[
+            _result_to_response(
+                item.result,
+                namespace=f"token/color/project/{request.project_id}/job/{job_ids[item.index]}"
+                if item.index in job_ids
+                else f"token/color/batch/{item.index + 1:02d}",
             )
-            responses.append(_result_to_response(extraction_result, namespace=namespace))
-        except Exception as e:
-            logger.error("Batch color extraction failed for %s: %s", url, str(e))
-            continue
-    return responses
+            if item.ok
+            else None
+            for item in items
+        ],
+        errors=[
+            BatchItemError(index=item.index, image_url=item.source, error=item.error)
+            for item in items
+            if not item.ok
+        ],
+    )
 
 
 @router.post("/colors", response_model=ColorTokenDetailResponse, status_code=201)
@@ -916,12 +1013,11 @@ async def extract_colors_multi(
             import base64
 
             try:
-                resp = requests.get(request.image_url, timeout=10)
-                resp.raise_for_status()
-                image_base64 = base64.b64encode(resp.content).decode("utf-8")
-            except requests.RequestException as e:
+                fetched = await get_image_fetcher().fetch(request.image_url)
+                image_base64 = fetched.base64
+            except ImageFetchError as e:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
+                    status_code=e.status_code,
                     detail=f"Failed to fetch image from URL: {str(e)}",
                 )
         else:
@@ -1002,6 +1098,13 @@ async def extract_colors_multi(
         )
 
 
+def _color_result_model(extractor: Any) -> type[BaseModel]:
+    """Result model returned by an extractor from ``get_extractor``."""
+    if isinstance(extractor, OpenAIColorExtractor):
+        return OpenAIColorExtractionResult
+    return ColorExtractionResult
+
+
 def _safe_str(value: Any) -> str:
     """Coerce arbitrary objects (including MagicMock) to string safely."""
     try:
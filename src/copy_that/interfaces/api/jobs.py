@@ -0,0 +1,415 @@
+"""
+Extraction Jobs Router
+
+Submit-and-poll variants of the extraction endpoints. A submission validates
+the request, records a queued ``ExtractionJob`` and hands the work to Celery
+(CV pass on the "cv" queue, AI pass and persistence on the "ai" queue); the
+job row then carries status, progress and finally the same payload the
+synchronous endpoint would have returned.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from celery.canvas import Signature
+from celery.utils import uuid
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from copy_that.application import cv_shadow_extractor
+from copy_that.application.ai_typography_extractor import TypographyExtractionResult
+from copy_that.application.color_extractor import ColorExtractionResult
+from copy_that.application.spacing_models import SpacingExtractionResult
+from copy_that.domain.models import (
+    ColorToken,
+    ExtractionJob,
+    Project,
+    ShadowToken,
+    SpacingToken,
+    TypographyToken,
+)
+from copy_that.infrastructure.celery.tasks import (
+    extraction_signature,
+    session_extraction_signature,
+)
+from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.security.rate_limiter import rate_limit
+from copy_that.interfaces.api import colors as colors_api
+from copy_that.interfaces.api import shadows as shadows_api
+from copy_that.interfaces.api import spacing as spacing_api
+from copy_that.interfaces.api import typography as typography_api
+from copy_that.interfaces.api.schemas import (
+    BatchExtractRequest,
+    ExtractColorRequest,
+    ExtractTypographyRequest,
+)
+from copy_that.interfaces.api.utils import format_sse_event
+from copy_that.services.extraction_jobs_service import (
+    TERMINAL_STATUSES,
+    create_job,
+    fail_job,
+    get_job,
+    job_to_dict,
+)
+from copy_that.services.sessions_service import get_session
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    color_token_row,
+    persist_tokens,
+    shadow_token_row,
+    spacing_token_row,
+    typography_token_row,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+# How often the status stream re-reads the job row
+EVENTS_POLL_INTERVAL_S = 0.5
+
+
+class ExtractionJobResponse(BaseModel):
+    """Status of an extraction job."""
+
+    job_id: int
+    project_id: int
+    extraction_type: str
+    source_url: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    progress: float = Field(..., ge=0, le=1)
+    task_id: str | None = None
+    result: Any = Field(None, description="Extraction payload once completed")
+    error: str | None = None
+    created_at: str | None = None
+    completed_at: str | None = None
+
+
+@dataclass(frozen=True)
+class JobFamily:
+    """How one extractor family runs as a CV task followed by an AI task."""
+
+    extraction_type: str
+    request_model: type[BaseModel]
+    validate: Callable[[AsyncSession, Any], Awaitable[None]]
+    # request -> JSON-serializable CV result handed to the AI task
+    cv_pass: Callable[[Any], Awaitable[Any]]
+    # (request, CV payload) -> merged extraction result
+    ai_pass: Callable[[Any, Any], Awaitable[Any]]
+    # Insert token rows for the job (uncommitted); returns the response payload stored on it
+    persist: Callable[[AsyncSession, Any, ExtractionJob, Any], Awaitable[dict[str, Any]]]
+
+
+async def _validate_image_request(db: AsyncSession, request: Any) -> None:
+    if request.project_id:
+        result = await db.execute(select(Project).where(Project.id == request.project_id))
+        if not result.scalar_one_or_none():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project {request.project_id} not found",
+            )
+    if not request.image_url and not request.image_base64:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image_url or image_base64 must be provided",
+        )
+
+
+# Colors
+
+
+async def _color_cv(request: ExtractColorRequest) -> Any:
+    image_payload, _, _ = await colors_api._load_color_image(request)
+    cv_result = await colors_api._cv_color_pass(image_payload, request.max_colors)
+    return cv_result.model_dump(mode="json") if cv_result else None
+
+
+async def _color_ai(request: ExtractColorRequest, cv_payload: Any) -> ColorExtractionResult:
+    # URL images come from the fetcher's cache when the CV task ran on this worker
+    image_payload, ai_b64, media_type = await colors_api._load_color_image(request)
+    cv_result = ColorExtractionResult.model_validate(cv_payload) if cv_payload else None
+    ai_result, extractor_name = await colors_api._ai_color_pass(
+        request, image_payload, ai_b64, media_type
+    )
+    return colors_api._merge_color_passes(ai_result, cv_result, extractor_name)
+
+
+async def _color_persist(
+    db: AsyncSession, request: ExtractColorRequest, job: ExtractionJob, result: Any
+) -> dict[str, Any]:
+    rows = [color_token_row(color) for color in result.colors]
+    await persist_tokens(
+        db, request.project_id, [TokenGroup(ColorToken, rows, job_id=job.id)], commit=False
+    )
+    namespace = f"token/color/project/{request.project_id}/job/{job.id}"
+    return colors_api._result_to_response(result, namespace=namespace).model_dump(mode="json")
+
+
+# Spacing
+
+
+async def _spacing_cv(request: spacing_api.SpacingExtractionRequest) -> Any:
+    cv_result, _, _ = await spacing_api._spacing_cv_pass(request)
+    return cv_result.model_dump(mode="json")
+
+
+async def _spacing_ai(
+    request: spacing_api.SpacingExtractionRequest, cv_payload: Any
+) -> SpacingExtractionResult:
+    if request.image_base64:
+        image_b64, media_type = request.image_base64, request.image_media_type or "image/png"
+    else:
+        data, media_type = await spacing_api._download_image_bytes(str(request.image_url))
+        image_b64 = base64.b64encode(data).decode("utf-8")
+    cv_result = SpacingExtractionResult.model_validate(cv_payload)
+    return await spacing_api._spacing_ai_pass(request, cv_result, image_b64, media_type)
+
+
+async def _spacing_persist(
+    db: AsyncSession,
+    request: spacing_api.SpacingExtractionRequest,
+    job: ExtractionJob,
+    result: Any,
+) -> dict[str, Any]:
+    rows = [spacing_token_row(token) for token in result.tokens]
+    await persist_tokens(
+        db, request.project_id or 0, [TokenGroup(SpacingToken, rows, job_id=job.id)], commit=False
+    )
+    namespace = f"token/spacing/project/{request.project_id or 0}/job/{job.id}"
+    return spacing_api._result_to_response(result, namespace=namespace).model_dump(mode="json")
+
+
+# Typography (CV result only used when the AI pass is unsure)
+
+
+async def _typography_cv(request: ExtractTypographyRequest) -> Any:
+    cv_result = await typography_api._typography_cv_pass(request)
+    return cv_result.model_dump(mode="json") if cv_result else None
+
+
+async def _typography_ai(
+    request: ExtractTypographyRequest, cv_payload: Any
+) -> TypographyExtractionResult:
+    ai_result = await typography_api._typography_ai_pass(request)
+    cv_result = TypographyExtractionResult.model_validate(cv_payload) if cv_payload else None
+    return typography_api._merge_typography_passes(ai_result, cv_result)
+
+
+async def _typography_persist(
+    db: AsyncSession, request: ExtractTypographyRequest, job: ExtractionJob, result: Any
+) -> dict[str, Any]:
+    rows = [typography_token_row(token) for token in result.tokens]
+    await persist_tokens(
+        db, request.project_id, [TokenGroup(TypographyToken, rows, job_id=job.id)], commit=False
+    )
+    namespace = f"token/typography/project/{request.project_id}/job/{job.id}"
+    return typography_api._result_to_response(result, namespace=namespace).model_dump(mode="json")
+
+
+# Shadows (tokens are only persisted for a project)
+
+
+async def _shadow_cv(request: shadows_api.ShadowExtractionRequest) -> Any:
+    image_b64, media_type = await shadows_api._fetch_image(request)
+    cv_result = await shadows_api._cv_shadows(image_b64, media_type)
+    return cv_result.model_dump(mode="json")
+
+
+async def _shadow_ai(request: shadows_api.ShadowExtractionRequest, cv_payload: Any) -> Any:
+    image_b64, media_type = await shadows_api._fetch_image(request)
+    cv_result = cv_shadow_extractor.ShadowExtractionResult.model_validate(cv_payload)
+    return await shadows_api._ai_or_cv_shadows(cv_result, image_b64, media_type)
+
+
+async def _shadow_persist(
+    db: AsyncSession,
+    request: shadows_api.ShadowExtractionRequest,
+    job: ExtractionJob,
+    result: Any,
+) -> dict[str, Any]:
+    shadows, extractor_source = result
+    if request.project_id:
+        rows = [shadow_token_row(shadow) for shadow in shadows.shadows]
+        await persist_tokens(
+            db, request.project_id, [TokenGroup(ShadowToken, rows, job_id=job.id)], commit=False
+        )
+    return shadows_api._build_extraction_response(shadows, extractor_source).model_dump(mode="json")
+
+
+JOB_FAMILIES: dict[str, JobFamily] = {
+    "color": JobFamily(
+        "color",
+        ExtractColorRequest,
+        colors_api._validate_color_request,
+        _color_cv,
+        _color_ai,
+        _color_persist,
+    ),
+    "spacing": JobFamily(
+        "spacing",
+        spacing_api.SpacingExtractionRequest,
+        _validate_image_request,
+        _spacing_cv,
+        _spacing_ai,
+        _spacing_persist,
+    ),
+    "typography": JobFamily(
+        "typography",
+        ExtractTypographyRequest,
+        typography_api._validate_typography_request,
+        _typography_cv,
+        _typography_ai,
+        _typography_persist,
+    ),
+    "shadow": JobFamily(
+        "shadow",
+        shadows_api.ShadowExtractionRequest,
+        _validate_image_request,
+        _shadow_cv,
+        _shadow_ai,
+        _shadow_persist,
+    ),
+}
+
+
+def get_job_family(kind: str) -> JobFamily:
+    try:
+        return JOB_FAMILIES[kind]
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown extraction type '{kind}' (expected one of {sorted(JOB_FAMILIES)})",
+        ) from None
+
+
+async def _dispatch(db: AsyncSession, job: ExtractionJob, signature: Signature) -> ExtractionJob:
+    """Send the job's tasks (under its pre-assigned task id) and return the refreshed row.
+
+    A job that cannot be published is marked failed before the error propagates,
+    so it never stays ``queued`` with nothing to run it.
+    """
+    # Publishing blocks on the broker, and in eager mode runs the tasks right
+    # here with their own event loops, so keep it off this loop either way
+    try:
+        await asyncio.to_thread(signature.apply_async, task_id=job.task_id)
+    except Exception as e:
+        logger.exception("Failed to queue extraction job %d", job.id)
+        await fail_job(db, job.id, f"Failed to queue job: {e}")
+        raise
+    await db.refresh(job)
+    return job
+
+
+@router.post("/{kind}", response_model=ExtractionJobResponse, status_code=202)
+async def submit_extraction_job(
+    kind: str,
+    payload: dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_db),
+    _rate_limit: None = Depends(rate_limit(requests=10, seconds=60)),
+):
+    """Queue an extraction (color, spacing, typography or shadow) and return its job
+
+    The body is the same as the family's synchronous ``/extract`` endpoint.
+    Poll ``GET /api/v1/jobs/{job_id}`` or stream ``/events`` for the result.
+
+    Without a broker (``CELERY_TASK_ALWAYS_EAGER``) the tasks run inline and the
+    202 only comes back once the job has finished; that mode is for local
+    development and tests only.
+    """
+    family = get_job_family(kind)
+    try:
+        request = family.request_model.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
+    await family.validate(db, request)
+
+    job = await create_job(
+        db,
+        project_id=request.project_id or 0,
+        source_url=str(request.image_url) if request.image_url else "base64_upload",
+        extraction_type=family.extraction_type,
+        task_id=uuid(),
+    )
+    params = request.model_dump(mode="json")
+    job = await _dispatch(db, job, extraction_signature(kind, job.id, params))
+    return job_to_dict(job)
+
+
+@router.post(
+    "/sessions/{session_id}/extract", response_model=ExtractionJobResponse, status_code=202
+)
+async def submit_session_extraction_job(
+    session_id: int, request: BatchExtractRequest, db: AsyncSession = Depends(get_db)
+):
+    """Queue batch color extraction into a session library and return its job
+
+    As with ``POST /{kind}``, eager mode (no broker, development only) runs the
+    whole batch before responding.
+    """
+    session = await get_session(db, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Session {session_id} not found"
+        )
+
+    job = await create_job(
+        db,
+        project_id=session.project_id,
+        source_url=f"session/{session_id}",
+        extraction_type="color",
+        task_id=uuid(),
+    )
+    params = request.model_dump(mode="json")
+    job = await _dispatch(db, job, session_extraction_signature(job.id, session_id, params))
+    return job_to_dict(job)
+
+
+async def _require_job(db: AsyncSession, job_id: int) -> ExtractionJob:
+    job = await get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Extraction job {job_id} not found"
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=ExtractionJobResponse)
+async def get_extraction_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Current status, progress and (once completed) result of a job"""
+    return job_to_dict(await _require_job(db, job_id))
+
+
+@router.get("/{job_id}/events")
+async def stream_extraction_job(job_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Stream job status as Server-Sent Events
+
+    Emits ``status`` whenever status or progress changes, then one final
+    ``completed`` or ``failed`` event with the full job and closes.
+    """
+    job = await _require_job(db, job_id)
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        last_seen = None
+        while True:
+            await db.refresh(job)
+            # End the read transaction so the next refresh sees worker commits
+            await db.commit()
+            if job.status in TERMINAL_STATUSES:
+                yield format_sse_event(job.status, job_to_dict(job))
+                return
+            if (job.status, job.progress) != last_seen:
+                last_seen = (job.status, job.progress)
+                yield format_sse_event("status", job_to_dict(job))
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(EVENTS_POLL_INTERVAL_S)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
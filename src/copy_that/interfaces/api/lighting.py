@@ -5,16 +5,23 @@ from __future__ import annotations
 import asyncio
 import base64
 import logging
+import threading
+from typing import Literal
 
 import numpy as np
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from copy_that.infrastructure.cache import get_result_cache
 from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
 from copy_that.infrastructure.security.rate_limiter import rate_limit
+from copy_that.interfaces.api.utils import format_sse_event, stream_events
 from copy_that.shadowlab import analyze_image_for_shadows
 from copy_that.shadowlab.integration import ShadowTokenIntegration
+from copy_that.shadowlab.progress import StageCallback
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +41,13 @@ class LightingAnalysisRequest(BaseModel):
         True, description="Estimate depth/normals for geometry-aware analysis"
     )
     device: str = Field("cpu", description="Device: 'cpu' or 'cuda'")
+    quality: Literal["full", "tiled", "preview"] = Field(
+        "full",
+        description=(
+            "full: native resolution; tiled: same result computed in parallel tiles; "
+            "preview: reduced-scale analysis for fast results on large images"
+        ),
+    )
 
 
 class LightingAnalysisResponse(BaseModel):
@@ -83,6 +97,136 @@ class LightingAnalysisResponse(BaseModel):
     analysis_source: str = Field("shadowlab", description="Analysis library used")
 
 
+async def _run_shadowlab(
+    image_b64: str,
+    use_geometry: bool,
+    device: str,
+    quality: str = "full",
+    on_stage: StageCallback | None = None,
+    cancel_event: threading.Event | None = None,
+) -> LightingAnalysisResponse:
+    """Decode the image and run shadowlab analysis (without request metadata)."""
+    # Decode image
+    try:
+        import cv2
+
+        image_data = base64.b64decode(image_b64)
+        image_bgr = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+
+        if image_bgr is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to decode image",
+            )
+    except Exception as e:
+        logger.error("Image decode failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Image processing failed: {str(e)}",
+        ) from e
+
+    # Run shadow analysis in executor (blocking operation)
+    analysis = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: analyze_image_for_shadows(
+            image_bgr,
+            use_geometry=use_geometry,
+            device=device,
+            quality=quality,
+            on_stage=on_stage,
+            cancel_event=cancel_event,
+        ),
+    )
+
+    # Extract results
+    tokens = analysis.get("tokens", {})
+    features = analysis.get("features", {})
+
+    # Get CSS suggestions
+    css_shadows = ShadowTokenIntegration.suggest_css_box_shadow(analysis)
+
+    return LightingAnalysisResponse(
+        # Tokens
+        style_key_direction=tokens.get("style_key_direction", "unknown"),
+        style_softness=tokens.get("style_softness", "unknown"),
+        style_contrast=tokens.get("style_contrast", "unknown"),
+        style_density=tokens.get("style_density", "unknown"),
+        intensity_shadow=tokens.get("intensity_shadow", "unknown"),
+        intensity_lit=tokens.get("intensity_lit", "unknown"),
+        lighting_style=tokens.get("lighting_style", "unknown"),
+        # Features
+        shadow_area_fraction=float(features.get("shadow_area_fraction", 0)),
+        mean_shadow_intensity=float(features.get("mean_shadow_intensity", 0)),
+        mean_lit_intensity=float(features.get("mean_lit_intensity", 0)),
+        shadow_contrast=float(features.get("shadow_contrast", 0)),
+        edge_softness_mean=float(features.get("edge_softness_mean", 0)),
+        # Light
+        light_direction=None,  # TODO: format properly if available
+        light_direction_confidence=float(features.get("light_direction_confidence", 0)),
+        # Overall
+        extraction_confidence=tokens.get("extraction_confidence", 0),
+        shadow_count_major=int(features.get("shadow_count_major", 0)),
+        # CSS
+        css_box_shadow=css_shadows,
+        # Metadata
+        analysis_source="shadowlab",
+    )
+
+
+async def _fetch_image_b64(request: LightingAnalysisRequest) -> str:
+    """Base64 payload of the request image, downloading it if only a URL was given."""
+    if request.image_base64 or not request.image_url:
+        return request.image_base64 or ""
+    try:
+        return (await get_image_fetcher().fetch(str(request.image_url))).base64
+    except ImageFetchError as e:
+        logger.error("Failed to download image: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Failed to fetch image: {str(e)}",
+        ) from e
+
+
+async def _cached_shadowlab(
+    request: LightingAnalysisRequest,
+    image_b64: str,
+    on_stage: StageCallback | None = None,
+    cancel_event: threading.Event | None = None,
+) -> LightingAnalysisResponse:
+    """Run (or reuse) the shadowlab analysis for a request.
+
+    A streamed run reports stages to, and is cancelled by, its own client only,
+    so it does not share an in-flight analysis with concurrent requests.
+    """
+    # Shadowlab runs take seconds; identical images reuse the stored analysis
+    response = await get_result_cache().get_or_compute_model(
+        "shadowlab",
+        LightingAnalysisResponse,
+        image_b64,
+        lambda: _run_shadowlab(
+            image_b64,
+            request.use_geometry,
+            request.device,
+            request.quality,
+            on_stage=on_stage,
+            cancel_event=cancel_event,
+        ),
+        single_flight=on_stage is None and cancel_event is None,
+        use_geometry=request.use_geometry,
+        device=request.device,
+        quality=request.quality,
+    )
+    return response.model_copy(update={"image_id": request.image_id})
+
+
+def _require_image(request: LightingAnalysisRequest) -> None:
+    if not request.image_url and not request.image_base64:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image_url or image_base64 must be provided",
+        )
+
+
 @router.post("/analyze", response_model=LightingAnalysisResponse)
 async def analyze_lighting(
     request: LightingAnalysisRequest,
@@ -105,96 +249,11 @@ async def analyze_lighting(
     Returns:
         LightingAnalysisResponse with detailed lighting analysis
     """
-    # Validate at least one image source
-    if not request.image_url and not request.image_base64:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Either image_url or image_base64 must be provided",
-        )
+    _require_image(request)
 
     try:
-        loop = asyncio.get_event_loop()
-
-        # Download/decode image
-        image_b64 = request.image_base64
-
-        if request.image_url and not request.image_base64:
-            try:
-                import requests
-
-                resp = requests.get(str(request.image_url), timeout=10)
-                resp.raise_for_status()
-                image_b64 = base64.b64encode(resp.content).decode("utf-8")
-            except Exception as e:
-                logger.error("Failed to download image: %s", e)
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch image: {str(e)}",
-                ) from e
-
-        # Decode image
-        try:
-            import cv2
-
-            image_data = base64.b64decode(image_b64)
-            image_bgr = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
-
-            if image_bgr is None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to decode image",
-                )
-        except Exception as e:
-            logger.error("Image decode failed: %s", e)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Image processing failed: {str(e)}",
-            ) from e
-
-        # Run shadow analysis in executor (blocking operation)
-        analysis = await loop.run_in_executor(
-            None,
-            lambda: analyze_image_for_shadows(
-                image_bgr,
-                use_geometry=request.use_geometry,
-                device=request.device,
-            ),
-        )
-
-        # Extract results
-        tokens = analysis.get("tokens", {})
-        features = analysis.get("features", {})
-
-        # Get CSS suggestions
-        css_shadows = ShadowTokenIntegration.suggest_css_box_shadow(analysis)
-
-        return LightingAnalysisResponse(
-            # Tokens
-            style_key_direction=tokens.get("style_key_direction", "unknown"),
-            style_softness=tokens.get("style_softness", "unknown"),
-            style_contrast=tokens.get("style_contrast", "unknown"),
-            style_density=tokens.get("style_density", "unknown"),
-            intensity_shadow=tokens.get("intensity_shadow", "unknown"),
-            intensity_lit=tokens.get("intensity_lit", "unknown"),
-            lighting_style=tokens.get("lighting_style", "unknown"),
-            # Features
-            shadow_area_fraction=float(features.get("shadow_area_fraction", 0)),
-            mean_shadow_intensity=float(features.get("mean_shadow_intensity", 0)),
-            mean_lit_intensity=float(features.get("mean_lit_intensity", 0)),
-            shadow_contrast=float(features.get("shadow_contrast", 0)),
-            edge_softness_mean=float(features.get("edge_softness_mean", 0)),
-            # Light
-            light_direction=None,  # TODO: format properly if available
-            light_direction_confidence=float(features.get("light_direction_confidence", 0)),
-            # Overall
-            extraction_confidence=tokens.get("extraction_confidence", 0),
-            shadow_count_major=int(features.get("shadow_count_major", 0)),
-            # CSS
-            css_box_shadow=css_shadows,
-            # Metadata
-            image_id=request.image_id,
-            analysis_source="shadowlab",
-        )
+        image_b64 = await _fetch_image_b64(request)
+        return await _cached_shadowlab(request, image_b64)
 
     except HTTPException:
         raise
@@ -204,3 +263,64 @@ async def analyze_lighting(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}",
         ) from e
+
+
+@router.post("/analyze-streaming")
+async def analyze_lighting_streaming(
+    request: LightingAnalysisRequest,
+    http_request: Request,
+    _rate_limit: None = Depends(rate_limit(requests=10, seconds=60)),
+) -> StreamingResponse:
+    """
+    Analyze lighting with Server-Sent Events, one event per finished step.
+
+    Same analysis (and result cache) as ``/analyze``. Disconnecting stops the
+    analysis before its next step.
+
+    Events:
+        - progress: Download/analysis started
+        - stage: Step finished (stage, name, duration_ms, metrics, base64 PNG
+          previews of its maps, and tokens once known)
+        - complete: Final LightingAnalysisResponse
+        - error: Error occurred
+
+    Example:
+        POST /api/v1/lighting/analyze-streaming
+        {
+            "image_url": "https://example.com/photo.jpg",
+            "quality": "preview"
+        }
+    """
+    _require_image(request)
+    cancel_event = threading.Event()
+
+    async def analyze(emit) -> LightingAnalysisResponse:
+        emit("progress", {"status": "started", "message": "Loading image..."})
+        image_b64 = await _fetch_image_b64(request)
+        emit("progress", {"status": "analyzing", "message": "Running shadowlab analysis..."})
+        return await _cached_shadowlab(
+            request,
+            image_b64,
+            on_stage=lambda event: emit("stage", event.to_dict()),
+            cancel_event=cancel_event,
+        )
+
+    async def event_generator():
+        try:
+            async for event, data in stream_events(analyze, http_request, cancel_event):
+                if event == "result":
+                    yield format_sse_event("complete", data.model_dump())
+                else:
+                    yield format_sse_event(event, data)
+        except Exception as e:
+            logger.exception("Streaming lighting analysis failed")
+            yield format_sse_event("error", {"message": str(e), "type": type(e).__name__})
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
@@ -2,6 +2,7 @@
 Copy That API - Minimal MVP for Cloud Run Deployment
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -15,10 +16,20 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from copy_that.domain.models import Project
+from copy_that.infrastructure.ai import (
+    close_ai_client_pool,
+    get_ai_client_pool,
+    get_vision_image_optimizer,
+)
+from copy_that.infrastructure.cache import get_result_cache
+from copy_that.infrastructure.compute import get_cv_executor, shutdown_cv_executor
 from copy_that.infrastructure.database import Base, engine, get_db
+from copy_that.infrastructure.http import close_image_fetcher
+from copy_that.interfaces.api.assets import router as assets_router
 from copy_that.interfaces.api.auth import router as auth_router
 from copy_that.interfaces.api.colors import router as colors_router
 from copy_that.interfaces.api.design_tokens import router as design_tokens_router
+from copy_that.interfaces.api.jobs import router as jobs_router
 from copy_that.interfaces.api.lighting import router as lighting_router
 from copy_that.interfaces.api.metrics import router as metrics_router
 from copy_that.interfaces.api.middleware.security_headers import SecurityHeadersMiddleware
@@ -32,6 +43,7 @@ from copy_that.interfaces.api.shadows import router as shadows_router
 from copy_that.interfaces.api.snapshots import router as snapshots_router
 from copy_that.interfaces.api.spacing import router as spacing_router
 from copy_that.interfaces.api.typography import router as typography_router
+from cv_pipeline.model_registry import get_model_registry, warm_models_from_env
 
 
 @asynccontextmanager
@@ -42,8 +54,15 @@ async def lifespan(app: FastAPI):
     if os.getenv("ENVIRONMENT") in ("local", "development", None):
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+    # Start CV workers up front so the first upload does not pay for imports
+    await get_cv_executor().warm_up()
+    # Eagerly load MODEL_WARMUP models used in-process (e.g. shadowlab.sam)
+    await asyncio.to_thread(warm_models_from_env)
     yield
-    # Shutdown: cleanup would go here if needed
+    # Shutdown: stop CV worker processes and close pooled HTTP connections
+    shutdown_cv_executor()
+    await close_image_fetcher()
+    await close_ai_client_pool()
 
 
 # Create FastAPI app
@@ -101,10 +120,12 @@ app.add_middleware(
 # Include routers
 app.include_router(auth_router)
 app.include_router(projects_router)
+app.include_router(assets_router)
 app.include_router(colors_router)
 app.include_router(spacing_router)
 app.include_router(typography_router)
 app.include_router(sessions_router)
+app.include_router(jobs_router)
 app.include_router(multi_extract_router)
 app.include_router(snapshots_router)
 app.include_router(shadows_router)
@@ -167,6 +188,11 @@ async def api_status():
         },
         "gcp_project": os.getenv("GCP_PROJECT_ID", "copy-that-platform"),
         "environment": os.getenv("ENVIRONMENT", "production"),
+        "cv_pool": get_cv_executor().stats(),
+        "result_cache": get_result_cache().stats(),
+        "models": get_model_registry().stats(),
+        "ai_clients": get_ai_client_pool().stats(),
+        "ai_images": get_vision_image_optimizer().stats(),
     }
 
 
@@ -5,8 +5,9 @@ Multi-token extraction with CV-first + AI refinement and SSE streaming.
 import asyncio
 import json
 import logging
-from collections.abc import AsyncGenerator, Sequence
-from typing import Any
+from collections.abc import AsyncGenerator, Awaitable, Sequence
+from functools import partial
+from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
@@ -14,22 +15,38 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from copy_that.application.ai_shadow_extractor import AIShadowExtractor
+from copy_that.application.ai_shadow_extractor import AIShadowExtractor, ShadowExtractionResult
+from copy_that.application.color_extractor import ColorExtractionResult
+from copy_that.application.combined_ai_extractor import CombinedAIExtractor
 from copy_that.application.cv.color_cv_extractor import CVColorExtractor
 from copy_that.application.cv.spacing_cv_extractor import CVSpacingExtractor
+from copy_that.application.openai_color_extractor import (
+    ColorExtractionResult as OpenAIColorExtractionResult,
+)
 from copy_that.application.openai_color_extractor import OpenAIColorExtractor
 from copy_that.application.spacing_extractor import AISpacingExtractor
+from copy_that.application.spacing_models import SpacingExtractionResult
 from copy_that.domain.models import (
     ColorToken,
-    ExtractionJob,
     Project,
-    ProjectSnapshot,
     ShadowToken,
     SpacingToken,
+    TypographyToken,
 )
+from copy_that.infrastructure.cache import get_result_cache
+from copy_that.infrastructure.compute import get_cv_executor
 from copy_that.infrastructure.database import get_db
 from copy_that.infrastructure.security.rate_limiter import rate_limit
-from copy_that.interfaces.api.utils import sanitize_numbers
+from copy_that.interfaces.api.utils import EventEmitter, sanitize_numbers, stream_events
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    color_token_row,
+    persist_tokens,
+    shadow_token_row,
+    spacing_token_row,
+    typography_token_row,
+)
+from cv_pipeline.context import ImageContext
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/extract", tags=["multi-extract"])
@@ -45,6 +62,12 @@ class MultiExtractRequest(BaseModel):
     )
     max_colors: int = 12
     max_spacing_tokens: int = 20
+    max_typography_tokens: int = 15
+    ai_mode: Literal["per_type", "combined"] = Field(
+        "per_type",
+        description="AI refinement with one vision call per token type, or a single "
+        "combined call that also returns typography",
+    )
 
 
 @router.post("/stream")
@@ -53,7 +76,11 @@ async def extract_stream(
     db: AsyncSession = Depends(get_db),
     _rate_limit: None = Depends(rate_limit(requests=5, seconds=60)),
 ) -> StreamingResponse:
-    """Stream CV-first then AI refinement for requested token types."""
+    """Stream CV-first then AI refinement for requested token types.
+
+    Each AI token is sent as an ``ai_token`` event as soon as the model has
+    written it; the ``token`` event for the type follows with the full result.
+    """
 
     async def sse() -> AsyncGenerator[str, None]:
         try:
@@ -74,9 +101,12 @@ async def extract_stream(
                 clean = sanitize_numbers(payload)
                 return f"event: {event}\ndata: {json.dumps(clean, allow_nan=False)}\n\n"
 
-            # CV color
-            cv_color_result = CVColorExtractor(max_colors=request.max_colors).extract_from_base64(
-                request.image_base64
+            # Decode + preprocess once; every extractor below reuses this context
+            image = ImageContext.from_base64(request.image_base64, request.image_media_type)
+
+            # CV color + spacing share one decode on the CV worker pool
+            cv_color_result, cv_spacing_result = await _cached_cv_tokens(
+                image, request.max_colors, request.max_spacing_tokens
             )
             yield send(
                 "token",
@@ -87,10 +117,6 @@ async def extract_stream(
                 },
             )
 
-            # CV spacing
-            cv_spacing_result = CVSpacingExtractor(
-                max_tokens=request.max_spacing_tokens
-            ).extract_from_base64(request.image_base64)
             yield send(
                 "token",
                 {
@@ -104,104 +130,61 @@ async def extract_stream(
                 },
             )
 
-            # AI refinement (parallel)
-            loop = asyncio.get_event_loop()
-            color_task = loop.run_in_executor(
-                None,
-                lambda: OpenAIColorExtractor().extract_colors_from_base64(
-                    request.image_base64,
-                    media_type=request.image_media_type or "image/png",
-                    max_colors=request.max_colors,
-                ),
-            )
-            spacing_task = loop.run_in_executor(
-                None,
-                lambda: AISpacingExtractor().extract_spacing_from_base64(
-                    request.image_base64.split(",")[1]
-                    if "," in request.image_base64
-                    else request.image_base64,
-                    request.image_media_type or "image/png",
-                    request.max_spacing_tokens,
-                ),
-            )
-            shadow_task = loop.run_in_executor(
-                None,
-                lambda: AIShadowExtractor().extract_shadows(
-                    base64_image=request.image_base64.split(",")[1]
-                    if "," in request.image_base64
-                    else request.image_base64,
-                    media_type=request.image_media_type or "image/png",
-                ),
-            )
-
-            ai_color_result, ai_spacing_result, ai_shadow_result = await asyncio.gather(
-                color_task, spacing_task, shadow_task
-            )
-
-            yield send(
-                "token",
-                {
-                    "type": "color",
-                    "source": "ai",
-                    "tokens": [c.model_dump() for c in ai_color_result.colors],
-                },
-            )
-            yield send(
-                "token",
-                {
-                    "type": "spacing",
-                    "source": "ai",
-                    "tokens": [t.model_dump() for t in ai_spacing_result.tokens],
-                },
-                {
-                    "base_unit": ai_spacing_result.base_unit,
-                    "base_unit_confidence": ai_spacing_result.base_unit_confidence,
-                },
+            extractor_label = (
+                "openai-combined+cv" if request.ai_mode == "combined" else "openai+cv+claude"
             )
+            ai_results: dict[str, Any] = {}
+            streamed: dict[str, int] = {}
+            async for event, data in stream_events(partial(_refine_with_ai, request, image)):
+                if event == "ai_token":
+                    # One AI token, forwarded as soon as its JSON object closed
+                    section, token = data
+                    index = streamed.get(section, 0)
+                    streamed[section] = index + 1
+                    yield send(
+                        "ai_token",
+                        {
+                            "type": section,
+                            "source": "ai",
+                            "index": index,
+                            "token": token.model_dump(),
+                        },
+                    )
+                elif event == "section":
+                    section, result = data
+                    ai_results[section] = result
+                    yield send("token", *_ai_token_event(section, result))
 
-            yield send(
-                "token",
-                {
-                    "type": "shadow",
-                    "source": "ai",
-                    "tokens": [s.model_dump() for s in ai_shadow_result.shadows],
-                },
-                {
-                    "extraction_confidence": ai_shadow_result.extraction_confidence,
-                    "extractor": ai_shadow_result.extractor_used,
-                },
-            )
+            colors = ai_results["color"].colors
+            spacings = ai_results["spacing"].tokens
+            shadows = ai_results["shadow"].shadows
+            typography = ai_results["typography"].tokens if "typography" in ai_results else []
+            counts = {"colors": len(colors), "spacing": len(spacings), "shadows": len(shadows)}
+            if "typography" in ai_results:
+                counts["typography"] = len(typography)
 
             # Persist if project_id provided
             if request.project_id:
-                await _persist_color_tokens(db, request.project_id, ai_color_result.colors)
-                await _persist_spacing_tokens(db, request.project_id, ai_spacing_result.tokens)
-                await _persist_shadow_tokens(db, request.project_id, ai_shadow_result.shadows)
-                await _persist_snapshot(
+                await _persist_tokens(
                     db,
                     request.project_id,
-                    ai_color_result.colors,
-                    ai_spacing_result.tokens,
-                    ai_shadow_result.shadows,
-                    {
-                        "extractor": "openai+cv+claude",
-                        "token_counts": {
-                            "colors": len(ai_color_result.colors),
-                            "spacing": len(ai_spacing_result.tokens),
-                            "shadows": len(ai_shadow_result.shadows),
-                        },
-                    },
+                    colors,
+                    spacings,
+                    shadows,
+                    {"extractor": extractor_label, "token_counts": counts},
+                    typography=typography,
                 )
 
-            yield send(
-                "complete",
-                {
-                    "status": "ok",
-                    "color_count": len(ai_color_result.colors),
-                    "spacing_count": len(ai_spacing_result.tokens),
-                    "shadow_count": len(ai_shadow_result.shadows),
-                },
-            )
+            complete = {
+                "status": "ok",
+                "ai_mode": request.ai_mode,
+                "color_count": len(colors),
+                "spacing_count": len(spacings),
+                "shadow_count": len(shadows),
+            }
+            if "typography" in ai_results:
+                complete["typography_count"] = len(typography)
+            yield send("complete", complete)
         except Exception as exc:  # noqa: BLE001
             logger.exception("Multi-extract failed")
             yield f"event: error\ndata: {json.dumps({'error': str(exc)})}\n\n"
@@ -216,127 +199,234 @@ async def extract_stream(
     )
 
 
-async def _persist_color_tokens(db: AsyncSession, project_id: int, tokens: list[Any]) -> None:
-    job: ExtractionJob
-    job = ExtractionJob(
-        project_id=project_id,
-        source_url="multi-extract",
-        extraction_type="color",
-        status="completed",
-        result_data=json.dumps({"color_count": len(tokens)}),
+async def _refine_with_ai(
+    request: MultiExtractRequest, image: ImageContext, emit: EventEmitter
+) -> None:
+    """Run the AI extractors, emitting ``ai_token`` per token and ``section`` per result."""
+
+    def on_token(section: str, token: BaseModel) -> None:
+        emit("ai_token", (section, token))
+
+    if request.ai_mode == "combined":
+        # One vision call; each section is forwarded as soon as it is parsed
+        async for section, result in CombinedAIExtractor().stream_sections(
+            image.base64_data,
+            image.media_type,
+            max_colors=request.max_colors,
+            max_spacing_tokens=request.max_spacing_tokens,
+            max_typography_tokens=request.max_typography_tokens,
+            on_token=on_token,
+        ):
+            emit("section", (section, result))
+        return
+
+    # AI refinement (parallel); repeat uploads are served from the result cache, in
+    # which case no tokens are streamed and only the section result is sent.
+    # Each call streams tokens to this request's client, so concurrent identical
+    # uploads do not join it (single_flight=False) and stream their own.
+    result_cache = get_result_cache()
+    color_extractor = OpenAIColorExtractor()
+    spacing_extractor = AISpacingExtractor()
+    shadow_extractor = AIShadowExtractor()
+    color_task = result_cache.get_or_compute_model(
+        "ai-color:gpt-4o",
+        OpenAIColorExtractionResult,
+        image.base64_data,
+        lambda: color_extractor.extract_colors_from_base64(
+            image.base64_data,
+            media_type=image.media_type,
+            max_colors=request.max_colors,
+            on_token=partial(on_token, "color"),
+        ),
+        version=color_extractor.model,
+        single_flight=False,
+        max_colors=request.max_colors,
+    )
+    spacing_task = result_cache.get_or_compute_model(
+        "ai-spacing",
+        SpacingExtractionResult,
+        image.base64_data,
+        lambda: spacing_extractor.extract_spacing_from_base64(
+            image.base64_data,
+            image.media_type,
+            request.max_spacing_tokens,
+            on_token=partial(on_token, "spacing"),
+        ),
+        version=spacing_extractor.model,
+        cache_if=lambda result: not AISpacingExtractor.is_fallback(result),
+        single_flight=False,
+        max_tokens=request.max_spacing_tokens,
+    )
+    shadow_task = result_cache.get_or_compute_model(
+        "ai-shadow",
+        ShadowExtractionResult,
+        image.base64_data,
+        lambda: shadow_extractor.extract_shadows(
+            base64_image=image.base64_data,
+            media_type=image.media_type,
+            on_token=partial(on_token, "shadow"),
+        ),
+        version=shadow_extractor.model,
+        cache_if=lambda result: not AIShadowExtractor.is_fallback(result),
+        single_flight=False,
     )
-    db.add(job)
-    await db.flush()
-    for c in tokens:
-        db.add(
-            ColorToken(
-                project_id=project_id,
-                extraction_job_id=job.id,
-                hex=c.hex,
-                rgb=c.rgb,
-                name=c.name,
-                design_intent=c.design_intent,
-                semantic_names=json.dumps(c.semantic_names) if c.semantic_names else None,
-                extraction_metadata=json.dumps(c.extraction_metadata)
-                if c.extraction_metadata
-                else None,
-                confidence=c.confidence,
-                harmony=c.harmony,
-                usage=json.dumps(c.usage) if c.usage else None,
-            )
-        )
-    await db.commit()
 
+    async def emit_section(name: str, task: Awaitable[BaseModel]) -> None:
+        emit("section", (name, await task))
 
-async def _persist_spacing_tokens(db: AsyncSession, project_id: int, tokens: list[Any]) -> None:
-    job = ExtractionJob(
-        project_id=project_id,
-        source_url="multi-extract",
-        extraction_type="spacing",
-        status="completed",
-        result_data=json.dumps({"spacing_count": len(tokens)}),
+    await asyncio.gather(
+        emit_section("color", color_task),
+        emit_section("spacing", spacing_task),
+        emit_section("shadow", shadow_task),
     )
-    db.add(job)
-    await db.flush()
-    for t in tokens:
-        db.add(
-            SpacingToken(
-                project_id=project_id,
-                extraction_job_id=job.id,
-                value_px=t.value_px,
-                name=t.name,
-                semantic_role=t.semantic_role,
-                spacing_type=t.spacing_type.value
-                if hasattr(t.spacing_type, "value")
-                else t.spacing_type,
-                category=t.category,
-                confidence=t.confidence,
-                usage=json.dumps(t.usage) if t.usage else None,
-            )
+
+
+def _ai_token_event(section: str, result: Any) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """SSE ``token`` payload and metadata for one AI section result."""
+    if section == "spacing":
+        return (
+            {
+                "type": "spacing",
+                "source": "ai",
+                "tokens": [t.model_dump() for t in result.tokens],
+            },
+            {
+                "base_unit": result.base_unit,
+                "base_unit_confidence": result.base_unit_confidence,
+            },
         )
-    await db.commit()
+    if section == "shadow":
+        return (
+            {"type": "shadow", "source": "ai", "tokens": [s.model_dump() for s in result.shadows]},
+            {
+                "extraction_confidence": result.extraction_confidence,
+                "extractor": result.extractor_used,
+            },
+        )
+    if section == "typography":
+        return (
+            {
+                "type": "typography",
+                "source": "ai",
+                "tokens": [t.model_dump() for t in result.tokens],
+            },
+            {
+                "extraction_confidence": result.extraction_confidence,
+                "typography_palette": result.typography_palette,
+            },
+        )
+    return {
+        "type": "color",
+        "source": "ai",
+        "tokens": [c.model_dump() for c in result.colors],
+    }, None
 
 
-async def _persist_shadow_tokens(db: AsyncSession, project_id: int, shadows: list[Any]) -> None:
-    """Persist shadow tokens to database."""
-    if not shadows:
-        return
+def _extract_cv_tokens(
+    image: ImageContext, max_colors: int, max_spacing_tokens: int
+) -> tuple[ColorExtractionResult, SpacingExtractionResult]:
+    """Run the CV color and spacing extractors on one decoded image (pool task)."""
+    colors = CVColorExtractor(max_colors=max_colors).extract_from_context(image)
+    spacing = CVSpacingExtractor(max_tokens=max_spacing_tokens).extract_from_context(image)
+    return colors, spacing
 
-    job = ExtractionJob(
-        project_id=project_id,
-        source_url="multi-extract",
-        extraction_type="shadow",
-        status="completed",
-        result_data=json.dumps({"shadow_count": len(shadows)}),
-    )
-    db.add(job)
-    await db.flush()
-
-    for shadow in shadows:
-        db.add(
-            ShadowToken(
-                project_id=project_id,
-                extraction_job_id=job.id,
-                x_offset=shadow.x_offset,
-                y_offset=shadow.y_offset,
-                blur_radius=shadow.blur_radius,
-                spread_radius=shadow.spread_radius,
-                color_hex=shadow.color_hex,
-                opacity=shadow.opacity,
-                name=shadow.semantic_name,
-                shadow_type=shadow.shadow_type,
-                semantic_role="inset" if shadow.is_inset else "drop",
-                confidence=shadow.confidence,
-                extraction_metadata=json.dumps(
-                    {
-                        "is_inset": shadow.is_inset,
-                        "affects_text": shadow.affects_text,
-                    }
-                ),
+
+async def _cached_cv_tokens(
+    image: ImageContext, max_colors: int, max_spacing_tokens: int
+) -> tuple[ColorExtractionResult, SpacingExtractionResult]:
+    """CV color + spacing results, served from the result cache when possible.
+
+    On a miss both extractors run in a single pool task so the image is decoded once.
+    """
+    job: asyncio.Future[tuple[ColorExtractionResult, SpacingExtractionResult]] | None = None
+
+    def run_job() -> asyncio.Future[tuple[ColorExtractionResult, SpacingExtractionResult]]:
+        nonlocal job
+        if job is None:
+            job = asyncio.ensure_future(
+                get_cv_executor().run(_extract_cv_tokens, image, max_colors, max_spacing_tokens)
             )
-        )
-    await db.commit()
+        return job
+
+    async def color() -> ColorExtractionResult:
+        return (await run_job())[0]
+
+    async def spacing() -> SpacingExtractionResult:
+        return (await run_job())[1]
+
+    result_cache = get_result_cache()
+    color_result = await result_cache.get_or_compute_model(
+        "cv-color",
+        ColorExtractionResult,
+        image.base64_data,
+        color,
+        max_colors=max_colors,
+        superpixel_backend=CVColorExtractor(max_colors=max_colors).superpixel_key,
+    )
+    spacing_result = await result_cache.get_or_compute_model(
+        "cv-spacing",
+        SpacingExtractionResult,
+        image.base64_data,
+        spacing,
+        max_tokens=max_spacing_tokens,
+        expected_base_px=None,
+    )
+    return color_result, spacing_result
 
 
-async def _persist_snapshot(
+def _multi_extract_job(extraction_type: str, count_key: str, count: int) -> dict[str, Any]:
+    return {
+        "source_url": "multi-extract",
+        "extraction_type": extraction_type,
+        "status": "completed",
+        "result_data": json.dumps({count_key: count}),
+    }
+
+
+async def _persist_tokens(
     db: AsyncSession,
     project_id: int,
     colors: list[Any],
     spacings: list[Any],
-    shadows: list[Any] | None = None,
+    shadows: list[Any],
     meta: dict[str, Any] | None = None,
+    typography: list[Any] | None = None,
 ) -> None:
-    """Persist an immutable snapshot blob for the project."""
-    payload: dict[str, Any] = {
+    """Persist one job per token type, the tokens and an immutable snapshot in one transaction."""
+    groups = [
+        TokenGroup(
+            ColorToken,
+            [color_token_row(c) for c in colors],
+            job=_multi_extract_job("color", "color_count", len(colors)),
+        ),
+        TokenGroup(
+            SpacingToken,
+            [spacing_token_row(t) for t in spacings],
+            job=_multi_extract_job("spacing", "spacing_count", len(spacings)),
+        ),
+    ]
+    if shadows:
+        groups.append(
+            TokenGroup(
+                ShadowToken,
+                [shadow_token_row(s) for s in shadows],
+                job=_multi_extract_job("shadow", "shadow_count", len(shadows)),
+            )
+        )
+    if typography:
+        groups.append(
+            TokenGroup(
+                TypographyToken,
+                [typography_token_row(t) for t in typography],
+                job=_multi_extract_job("typography", "typography_count", len(typography)),
+            )
+        )
+    snapshot: dict[str, Any] = {
         "colors": [c.model_dump() for c in colors],
         "spacing": [t.model_dump() for t in spacings],
-        "shadows": [s.model_dump() for s in (shadows or [])],
+        "shadows": [s.model_dump() for s in shadows],
         "meta": meta or {},
     }
-    snapshot = ProjectSnapshot(
-        project_id=project_id,
-        version=1,  # could be incremented per project in future
-        data=json.dumps(sanitize_numbers(payload)),
-    )
-    db.add(snapshot)
-    await db.commit()
+    if typography:
+        snapshot["typography"] = [t.model_dump() for t in typography]
+    await persist_tokens(db, project_id, groups, snapshot=sanitize_numbers(snapshot))
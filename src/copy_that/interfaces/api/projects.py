@@ -3,66 +3,96 @@ Project Management Router
 """
 
 import json
+import logging
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from copy_that.domain.models import Project, utc_now
+from copy_that.domain.models import ImageAsset, Project, utc_now
+from copy_that.infrastructure.compute import CVExecutorBusyError
 from copy_that.infrastructure.database import get_db
 from copy_that.interfaces.api.schemas import (
     ProjectCreateRequest,
     ProjectResponse,
     ProjectUpdateRequest,
 )
+from copy_that.services.image_assets_service import asset_urls, get_asset, store_base64_image
 from copy_that.services.projects_service import create_project as svc_create_project
 from copy_that.services.projects_service import get_project as svc_get_project
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/projects", tags=["projects"])
 
 
 def _encode_description(
     text: str | None,
-    image_base64: str | None,
-    image_media_type: str | None,
     spacing_tokens: list[dict[str, Any]] | None = None,
 ) -> str | None:
-    """Store text + image metadata as JSON in the description column."""
-    if not any([text, image_base64, image_media_type, spacing_tokens]):
+    """Store text + spacing tokens as JSON in the description column.
+
+    Images are not embedded; projects reference an ImageAsset by hash.
+    """
+    if not spacing_tokens:
         return text
-    payload: dict[str, Any] = {}
+    payload: dict[str, Any] = {"spacing_tokens": spacing_tokens}
     if text:
         payload["text"] = text
-    if image_base64:
-        payload["image_base64"] = image_base64
-    if image_media_type:
-        payload["image_media_type"] = image_media_type
-    if spacing_tokens:
-        payload["spacing_tokens"] = spacing_tokens
     return json.dumps(payload)
 
 
-def _decode_description(
-    raw: str | None,
-) -> tuple[str | None, str | None, str | None, list[dict[str, Any]] | None]:
+def _decode_description(raw: str | None) -> tuple[str | None, list[dict[str, Any]] | None]:
     """Decode description JSON if present."""
     if raw is None:
-        return None, None, None, None
+        return None, None
     if raw == "":
-        return "", None, None, None
+        return "", None
     try:
         data: dict[str, Any] | str = json.loads(raw)
         if isinstance(data, dict):
-            return (
-                data.get("text"),
-                data.get("image_base64"),
-                data.get("image_media_type"),
-                data.get("spacing_tokens"),
-            )
+            return data.get("text"), data.get("spacing_tokens")
     except json.JSONDecodeError:
-        return raw, None, None, None
-    return raw, None, None, None
+        return raw, None
+    return raw, None
+
+
+def _project_response(project: Project, image_media_type: str | None = None) -> ProjectResponse:
+    text, spacing_tokens = _decode_description(project.description)
+    return ProjectResponse(
+        id=project.id,
+        name=project.name,
+        description=text,
+        image_asset_hash=project.image_asset_hash,
+        image_media_type=image_media_type,
+        **asset_urls(project.image_asset_hash),
+        spacing_tokens=spacing_tokens,
+        created_at=project.created_at.isoformat(),
+        updated_at=project.updated_at.isoformat(),
+    )
+
+
+async def _image_media_type(db: AsyncSession, project: Project) -> str | None:
+    if project.image_asset_hash is None:
+        return None
+    asset = await get_asset(db, project.image_asset_hash)
+    return asset.media_type if asset else None
+
+
+async def _store_image(db: AsyncSession, image_base64: str, media_type: str | None) -> str:
+    """Store an uploaded image as an asset; returns its hash."""
+    try:
+        asset = await store_base64_image(db, image_base64, media_type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except CVExecutorBusyError as e:
+        logger.warning("CV pool saturated: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image processing capacity exhausted, please retry shortly",
+        )
+    return asset.sha256
 
 
 @router.post("", response_model=ProjectResponse, status_code=201)
@@ -76,22 +106,13 @@ async def create_project(request: ProjectCreateRequest, db: AsyncSession = Depen
     Returns:
         Created project with ID
     """
-    description = _encode_description(
-        request.description, request.image_base64, request.image_media_type, request.spacing_tokens
-    )
-    project = await svc_create_project(db, request.name, description)
+    image_asset_hash = None
+    if request.image_base64:
+        image_asset_hash = await _store_image(db, request.image_base64, request.image_media_type)
+    description = _encode_description(request.description, request.spacing_tokens)
+    project = await svc_create_project(db, request.name, description, image_asset_hash)
 
-    text, img_b64, img_type, spacing_tokens = _decode_description(project.description)
-    return ProjectResponse(
-        id=project.id,
-        name=project.name,
-        description=text,
-        image_base64=img_b64,
-        image_media_type=img_type,
-        spacing_tokens=spacing_tokens,
-        created_at=project.created_at.isoformat(),
-        updated_at=project.updated_at.isoformat(),
-    )
+    return _project_response(project, await _image_media_type(db, project))
 
 
 @router.get("", response_model=list[ProjectResponse])
@@ -110,29 +131,16 @@ async def list_projects(
         offset: Number of projects to skip
 
     Returns:
-        List of projects
+        List of projects (images as asset URLs, never inline)
     """
     result = await db.execute(
-        select(Project).order_by(Project.created_at.desc()).limit(limit).offset(offset)
+        select(Project, ImageAsset.media_type)
+        .outerjoin(ImageAsset, Project.image_asset_hash == ImageAsset.sha256)
+        .order_by(Project.created_at.desc())
+        .limit(limit)
+        .offset(offset)
     )
-    projects = result.scalars().all()
-
-    responses: list[ProjectResponse] = []
-    for p in projects:
-        text, img_b64, img_type, spacing_tokens = _decode_description(p.description)
-        responses.append(
-            ProjectResponse(
-                id=p.id,
-                name=p.name,
-                description=text,
-                image_base64=img_b64,
-                image_media_type=img_type,
-                spacing_tokens=spacing_tokens,
-                created_at=p.created_at.isoformat(),
-                updated_at=p.updated_at.isoformat(),
-            )
-        )
-    return responses
+    return [_project_response(project, media_type) for project, media_type in result.all()]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
@@ -155,17 +163,7 @@ async def get_project(project_id: int, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} not found"
         )
 
-    text, img_b64, img_type, spacing_tokens = _decode_description(project.description)
-    return ProjectResponse(
-        id=project.id,
-        name=project.name,
-        description=text,
-        image_base64=img_b64,
-        image_media_type=img_type,
-        spacing_tokens=spacing_tokens,
-        created_at=project.created_at.isoformat(),
-        updated_at=project.updated_at.isoformat(),
-    )
+    return _project_response(project, await _image_media_type(db, project))
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -195,17 +193,17 @@ async def update_project(
     # Update fields if provided
     if request.name is not None:
         project.name = request.name
-    # Merge description/image fields
-    current_text, current_img_b64, current_img_type, current_spacing = _decode_description(
-        project.description
-    )
+    # Merge description fields; a new image replaces the asset reference
+    current_text, current_spacing = _decode_description(project.description)
     new_text = request.description if request.description is not None else current_text
-    new_img_b64 = request.image_base64 if request.image_base64 is not None else current_img_b64
-    new_img_type = (
-        request.image_media_type if request.image_media_type is not None else current_img_type
-    )
     new_spacing = request.spacing_tokens if request.spacing_tokens is not None else current_spacing
-    project.description = _encode_description(new_text, new_img_b64, new_img_type, new_spacing)
+    project.description = _encode_description(new_text, new_spacing)
+    if request.image_base64 is not None:
+        project.image_asset_hash = (
+            await _store_image(db, request.image_base64, request.image_media_type)
+            if request.image_base64
+            else None
+        )
 
     project.updated_at = utc_now()
 
@@ -213,17 +211,7 @@ async def update_project(
     await db.commit()
     await db.refresh(project)
 
-    text, img_b64, img_type, spacing_tokens = _decode_description(project.description)
-    return ProjectResponse(
-        id=project.id,
-        name=project.name,
-        description=text,
-        image_base64=img_b64,
-        image_media_type=img_type,
-        spacing_tokens=spacing_tokens,
-        created_at=project.created_at.isoformat(),
-        updated_at=project.updated_at.isoformat(),
-    )
+    return _project_response(project, await _image_media_type(db, project))
 
 
 @router.delete("/{project_id}", status_code=204)
@@ -48,12 +48,12 @@ class ProjectResponse(BaseModel):
     id: int = Field(..., description="Project ID")
     name: str = Field(..., description="Project name")
     description: str | None = Field(None, description="Project description")
-    image_base64: str | None = Field(
-        None, description="Source image (base64 payload, no data URL prefix)"
-    )
+    image_asset_hash: str | None = Field(None, description="SHA-256 of the source image asset")
     image_media_type: str | None = Field(
         None, description="Media type for source image (e.g., image/png)"
     )
+    image_url: str | None = Field(None, description="URL of the full source image")
+    thumbnail_url: str | None = Field(None, description="URL of the source image thumbnail")
     spacing_tokens: list[dict] | None = Field(
         None, description="Saved spacing tokens (if provided)"
     )
@@ -159,6 +159,23 @@ class ColorExtractionResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BatchItemError(BaseModel):
+    """A batch input that could not be processed"""
+
+    index: int = Field(..., description="Position of the image in the request")
+    image_url: str = Field(..., description="Image URL that failed")
+    error: str = Field(..., description="Failure reason")
+
+
+class ColorBatchResponse(BaseModel):
+    """Response model for batch color extraction"""
+
+    results: list[ColorExtractionResponse | None] = Field(
+        ..., description="One entry per requested image, null where extraction failed"
+    )
+    errors: list[BatchItemError] = Field(default_factory=list, description="Failed images")
+
+
 class ExtractColorRequest(BaseModel):
     """Request model for color extraction from URL or base64"""
 
@@ -410,6 +427,15 @@ class TypographyExtractionResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TypographyBatchResponse(BaseModel):
+    """Response model for batch typography extraction"""
+
+    results: list[TypographyExtractionResponse | None] = Field(
+        ..., description="One entry per requested image, null where extraction failed"
+    )
+    errors: list[BatchItemError] = Field(default_factory=list, description="Failed images")
+
+
 class ExtractTypographyRequest(BaseModel):
     """Request model for extracting typography from an image"""
 
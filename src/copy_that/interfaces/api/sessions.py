@@ -239,6 +239,47 @@ async def curate_library(
     return {"status": "success", "message": f"Curated {len(request.role_assignments)} tokens"}
 
 
+async def _run_session_extraction(
+    db: AsyncSession, session: ExtractionSession, request: BatchExtractRequest
+) -> dict[str, Any]:
+    """Extract colors from the request images and aggregate them into the session library"""
+    from copy_that.application.batch_extractor import BatchColorExtractor
+
+    # Extract colors from all images
+    extractor = BatchColorExtractor()
+    tokens, statistics = await extractor.extract_batch(
+        image_urls=request.image_urls,
+        max_colors=request.max_colors,
+        delta_e_threshold=DEFAULT_DELTA_E_THRESHOLD,
+    )
+
+    # Get or create library for this session
+    library = await get_or_create_library(
+        db, session_id=session.id, token_type="color", statistics=statistics
+    )
+
+    # Persist aggregated tokens to database
+    token_count = await extractor.persist_aggregated_library(
+        db=db,
+        library_id=library.id,
+        project_id=session.project_id,
+        aggregated_tokens=tokens,
+        statistics=statistics,
+    )
+
+    # Update session image count
+    session.image_count = len(request.image_urls)
+    await db.commit()
+
+    return {
+        "status": "success",
+        "session_id": session.id,
+        "library_id": library.id,
+        "extracted_tokens": token_count,
+        "statistics": statistics,
+    }
+
+
 @router.post("/{session_id}/extract")
 async def batch_extract_colors(
     session_id: int, request: BatchExtractRequest, db: AsyncSession = Depends(get_db)
@@ -252,41 +293,7 @@ async def batch_extract_colors(
         )
 
     try:
-        from copy_that.application.batch_extractor import BatchColorExtractor
-
-        # Extract colors from all images
-        extractor = BatchColorExtractor()
-        tokens, statistics = await extractor.extract_batch(
-            image_urls=request.image_urls,
-            max_colors=request.max_colors,
-            delta_e_threshold=DEFAULT_DELTA_E_THRESHOLD,
-        )
-
-        # Get or create library for this session
-        library = await get_or_create_library(
-            db, session_id=session_id, token_type="color", statistics=statistics
-        )
-
-        # Persist aggregated tokens to database
-        token_count = await extractor.persist_aggregated_library(
-            db=db,
-            library_id=library.id,
-            project_id=session.project_id,
-            aggregated_tokens=tokens,
-            statistics=statistics,
-        )
-
-        # Update session image count
-        session.image_count = len(request.image_urls)
-        await db.commit()
-
-        return {
-            "status": "success",
-            "session_id": session_id,
-            "library_id": library.id,
-            "extracted_tokens": token_count,
-            "statistics": statistics,
-        }
+        return await _run_session_extraction(db, session, request)
 
     except Exception as e:
         logger.error(f"Batch extraction failed: {e}")
@@ -3,18 +3,30 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
+from collections.abc import Sequence
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from copy_that.application import ai_shadow_extractor, cv_shadow_extractor
 from copy_that.application.ai_shadow_extractor import AIShadowExtractor
 from copy_that.application.cv_shadow_extractor import CVShadowExtractor
-from copy_that.domain.models import ExtractionJob, Project, ShadowToken
+from copy_that.domain.models import Project, ShadowToken
+from copy_that.infrastructure.cache import get_result_cache
 from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
 from copy_that.infrastructure.security.rate_limiter import rate_limit
+from copy_that.interfaces.api.utils import format_sse_event, stream_events
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    persist_tokens,
+    shadow_token_row,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -107,144 +119,39 @@ async def extract_shadows(
         )
 
     try:
-        loop = asyncio.get_event_loop()
-
-        # Download image if URL provided
-        cv_b64 = request.image_base64
-        media_type = request.image_media_type or "image/png"
-
-        if request.image_url and not request.image_base64:
-            try:
-                import base64
-
-                import requests
-
-                resp = requests.get(str(request.image_url), timeout=10)
-                resp.raise_for_status()
-                cv_b64 = base64.b64encode(resp.content).decode("utf-8")
-            except Exception as e:
-                logger.error("Failed to download image from URL: %s", e)
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch image: {str(e)}",
-                )
-
-        # Use CV-based shadow extraction (designed for UI mockups)
-        cv_extractor = CVShadowExtractor()
-        cv_result = await loop.run_in_executor(
-            None,
-            lambda: cv_extractor.extract_shadows(
-                base64_image=cv_b64 or "",
-                media_type=media_type,
-            ),
-        )
-
-        logger.info(f"CV extraction found {cv_result.shadow_count} shadows")
-
-        # Try AI enhancement if available (but don't fail if API key missing)
-        ai_result = None
-        extractor_source = "cv_edge_detection"
-        try:
-            ai_extractor = AIShadowExtractor()
-            ai_result = await loop.run_in_executor(
-                None,
-                lambda: ai_extractor.extract_shadows(
-                    base64_image=cv_b64 or "",
-                    media_type=media_type,
-                ),
-            )
-            if ai_result.shadow_count > 0:
-                logger.info(f"AI extraction enhanced with {ai_result.shadow_count} shadows")
-                # Use AI results if available, otherwise fall back to CV
-                result = ai_result
-                extractor_source = "claude_sonnet_4.5_with_cv_fallback"
-            else:
-                # AI didn't find anything, use CV results
-                logger.info("AI found no shadows, using CV results")
-                result = cv_result
-        except Exception as e:
-            # AI API unavailable/failed - use CV results gracefully
-            logger.warning(f"AI extraction unavailable ({type(e).__name__}), using CV results: {e}")
-            result = cv_result
-            extractor_source = "cv_edge_detection_fallback"
-
-        # Convert to response format
-        token_responses = [
-            ShadowTokenResponse(
-                x_offset=shadow.x_offset,
-                y_offset=shadow.y_offset,
-                blur_radius=shadow.blur_radius,
-                spread_radius=shadow.spread_radius,
-                color_hex=shadow.color_hex,
-                opacity=shadow.opacity,
-                name=shadow.semantic_name,
-                shadow_type=shadow.shadow_type,
-                semantic_role="inset" if shadow.is_inset else "drop",
-                confidence=shadow.confidence,
-            )
-            for shadow in result.shadows
-        ]
-
-        # Calculate overall confidence
-        overall_confidence = (
-            sum(t.confidence for t in token_responses) / len(token_responses)
-            if token_responses
-            else 0.0
-        )
-
-        # Ensure it's a float for the response
-        overall_confidence = float(overall_confidence)
+        cv_b64, media_type = await _fetch_image(request)
+        cv_result = await _cv_shadows(cv_b64, media_type)
+        result, extractor_source = await _ai_or_cv_shadows(cv_result, cv_b64, media_type)
+        response = _build_extraction_response(result, extractor_source)
 
         # Persist to database if project_id provided
         if request.project_id:
-            job = ExtractionJob(
-                project_id=request.project_id,
-                source_url=str(request.image_url) if request.image_url else "base64_upload",
-                extraction_type="shadow",
-                status="completed",
-                result_data=json.dumps({"token_count": len(token_responses)}),
-            )
-            db.add(job)
-            await db.flush()
-
-            for shadow in result.shadows:
-                db.add(
-                    ShadowToken(
-                        project_id=request.project_id,
-                        extraction_job_id=job.id,
-                        x_offset=shadow.x_offset,
-                        y_offset=shadow.y_offset,
-                        blur_radius=shadow.blur_radius,
-                        spread_radius=shadow.spread_radius,
-                        color_hex=shadow.color_hex,
-                        opacity=shadow.opacity,
-                        name=shadow.semantic_name,
-                        shadow_type=shadow.shadow_type,
-                        semantic_role="inset" if shadow.is_inset else "drop",
-                        confidence=shadow.confidence,
+            persisted = await persist_tokens(
+                db,
+                request.project_id,
+                [
+                    TokenGroup(
+                        ShadowToken,
+                        [shadow_token_row(shadow) for shadow in result.shadows],
+                        job={
+                            "source_url": str(request.image_url)
+                            if request.image_url
+                            else "base64_upload",
+                            "extraction_type": "shadow",
+                            "status": "completed",
+                            "result_data": json.dumps({"token_count": len(response.tokens)}),
+                        },
                     )
-                )
-
-            await db.commit()
+                ],
+            )
             logger.info(
                 "Persisted %d shadow tokens for project %d (job %d)",
-                len(token_responses),
+                len(response.tokens),
                 request.project_id,
-                job.id,
+                persisted.job_ids[0],
             )
 
-        return ShadowExtractionResponse(
-            tokens=token_responses,
-            extraction_confidence=overall_confidence,
-            extraction_metadata={
-                "extraction_source": extractor_source,
-                "model": "claude-sonnet-4-5-20250929"
-                if "claude" in extractor_source
-                else "cv_edge_detection",
-                "token_count": len(token_responses),
-                "fallback_used": extractor_source != "claude_sonnet_4.5_with_cv_fallback",
-            },
-        )
+        return response
 
     except HTTPException:
         raise
@@ -262,6 +169,193 @@ async def extract_shadows(
         )
 
 
+@router.post("/extract-streaming")
+async def extract_shadows_streaming(
+    request: ShadowExtractionRequest,
+    http_request: Request,
+    _rate_limit: None = Depends(rate_limit(requests=10, seconds=60)),
+) -> StreamingResponse:
+    """
+    Extract shadow tokens with Server-Sent Events streaming.
+
+    The CV tokens are sent as soon as edge detection finishes, before the
+    (slower) AI enhancement runs. Disconnecting skips the remaining steps.
+    Nothing is persisted; use ``/extract`` with ``project_id`` for that.
+
+    Events:
+        - stage: Step finished (stage, name, duration_ms, tokens)
+        - complete: Final ShadowExtractionResponse
+        - error: Error occurred
+
+    Example:
+        POST /api/v1/shadows/extract-streaming
+        {
+            "image_url": "https://example.com/mockup.png"
+        }
+    """
+    if not request.image_url and not request.image_base64:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image_url or image_base64 must be provided",
+        )
+
+    async def extract(emit) -> ShadowExtractionResponse:
+        cv_b64, media_type = await _fetch_image(request)
+
+        start = time.perf_counter()
+        cv_result = await _cv_shadows(cv_b64, media_type)
+        emit(
+            "stage",
+            {
+                "stage": "cv",
+                "name": "CV edge detection",
+                "duration_ms": 1000.0 * (time.perf_counter() - start),
+                "tokens": [t.model_dump() for t in _token_responses(cv_result.shadows)],
+            },
+        )
+
+        start = time.perf_counter()
+        result, extractor_source = await _ai_or_cv_shadows(cv_result, cv_b64, media_type)
+        response = _build_extraction_response(result, extractor_source)
+        emit(
+            "stage",
+            {
+                "stage": "ai",
+                "name": "AI enhancement",
+                "duration_ms": 1000.0 * (time.perf_counter() - start),
+                "extraction_source": extractor_source,
+                "tokens": [t.model_dump() for t in response.tokens],
+            },
+        )
+        return response
+
+    async def event_generator():
+        try:
+            async for event, data in stream_events(extract, http_request):
+                if event == "result":
+                    yield format_sse_event("complete", data.model_dump())
+                else:
+                    yield format_sse_event(event, data)
+        except Exception as e:
+            logger.exception("Streaming shadow extraction failed")
+            yield format_sse_event("error", {"message": str(e), "type": type(e).__name__})
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+async def _fetch_image(request: ShadowExtractionRequest) -> tuple[str, str]:
+    """Base64 payload and media type of the request image (downloaded if needed)."""
+    if request.image_base64 or not request.image_url:
+        return request.image_base64 or "", request.image_media_type or "image/png"
+    try:
+        fetched = await get_image_fetcher().fetch(str(request.image_url))
+    except ImageFetchError as e:
+        logger.error("Failed to download image from URL: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Failed to fetch image: {str(e)}",
+        )
+    return fetched.base64, fetched.content_type
+
+
+async def _cv_shadows(
+    image_b64: str, media_type: str
+) -> cv_shadow_extractor.ShadowExtractionResult:
+    """CV-based shadow extraction (designed for UI mockups)."""
+    cv_extractor = CVShadowExtractor()
+    cv_result = await get_result_cache().get_or_compute_model(
+        "cv-shadow",
+        cv_shadow_extractor.ShadowExtractionResult,
+        image_b64,
+        lambda: asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: cv_extractor.extract_shadows(base64_image=image_b64, media_type=media_type),
+        ),
+    )
+    logger.info(f"CV extraction found {cv_result.shadow_count} shadows")
+    return cv_result
+
+
+async def _ai_or_cv_shadows(
+    cv_result: cv_shadow_extractor.ShadowExtractionResult, image_b64: str, media_type: str
+) -> tuple[Any, str]:
+    """Try AI enhancement (but don't fail if API key missing); returns (result, source)."""
+    try:
+        ai_extractor = AIShadowExtractor()
+        ai_result = await get_result_cache().get_or_compute_model(
+            "ai-shadow",
+            ai_shadow_extractor.ShadowExtractionResult,
+            image_b64,
+            lambda: ai_extractor.extract_shadows(base64_image=image_b64, media_type=media_type),
+            version=ai_extractor.model,
+            cache_if=lambda result: not AIShadowExtractor.is_fallback(result),
+        )
+        if ai_result.shadow_count > 0:
+            logger.info(f"AI extraction enhanced with {ai_result.shadow_count} shadows")
+            # Use AI results if available, otherwise fall back to CV
+            return ai_result, "claude_sonnet_4.5_with_cv_fallback"
+        # AI didn't find anything, use CV results
+        logger.info("AI found no shadows, using CV results")
+        return cv_result, "cv_edge_detection"
+    except Exception as e:
+        # AI API unavailable/failed - use CV results gracefully
+        logger.warning(f"AI extraction unavailable ({type(e).__name__}), using CV results: {e}")
+        return cv_result, "cv_edge_detection_fallback"
+
+
+def _token_responses(
+    shadows: Sequence[
+        ai_shadow_extractor.ExtractedShadowToken | cv_shadow_extractor.ExtractedShadowToken
+    ],
+) -> list[ShadowTokenResponse]:
+    return [
+        ShadowTokenResponse(
+            x_offset=shadow.x_offset,
+            y_offset=shadow.y_offset,
+            blur_radius=shadow.blur_radius,
+            spread_radius=shadow.spread_radius,
+            color_hex=shadow.color_hex,
+            opacity=shadow.opacity,
+            name=shadow.semantic_name,
+            shadow_type=shadow.shadow_type,
+            semantic_role="inset" if shadow.is_inset else "drop",
+            confidence=shadow.confidence,
+        )
+        for shadow in shadows
+    ]
+
+
+def _build_extraction_response(result: Any, extractor_source: str) -> ShadowExtractionResponse:
+    token_responses = _token_responses(result.shadows)
+
+    # Calculate overall confidence
+    overall_confidence = (
+        sum(t.confidence for t in token_responses) / len(token_responses)
+        if token_responses
+        else 0.0
+    )
+
+    return ShadowExtractionResponse(
+        tokens=token_responses,
+        extraction_confidence=float(overall_confidence),
+        extraction_metadata={
+            "extraction_source": extractor_source,
+            "model": "claude-sonnet-4-5-20250929"
+            if "claude" in extractor_source
+            else "cv_edge_detection",
+            "token_count": len(token_responses),
+            "fallback_used": extractor_source != "claude_sonnet_4.5_with_cv_fallback",
+        },
+    )
+
+
 @router.get("/projects/{project_id}", response_model=list[ShadowTokenResponse])
 async def list_project_shadows(
     project_id: int,
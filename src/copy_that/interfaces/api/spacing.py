@@ -5,17 +5,12 @@ Provides REST API endpoints for spacing token extraction with streaming support.
 Follows the pattern of colors.py for color extraction.
 """
 
-import asyncio
 import base64
-import ipaddress
 import json
 import logging
-import os
-import socket
-from collections.abc import AsyncGenerator, Sequence
+from collections.abc import AsyncGenerator, Callable, Sequence
 from dataclasses import asdict, is_dataclass
 from typing import Any
-from urllib.parse import urlparse
 
 import anthropic
 import requests
@@ -26,6 +21,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from copy_that.application import spacing_utils as su
+from copy_that.application.batch_executor import run_batch
 from copy_that.application.cv.spacing_cv_extractor import CVSpacingExtractor
 from copy_that.application.spacing_extractor import AISpacingExtractor
 from copy_that.application.spacing_models import (
@@ -35,11 +31,20 @@ from copy_that.application.spacing_models import (
 from copy_that.application.spacing_models import (
     SpacingToken as SpacingTokenModel,
 )
-from copy_that.domain.models import ExtractionJob, Project, SpacingToken
+from copy_that.domain.models import Project, SpacingToken
+from copy_that.infrastructure.cache import get_result_cache
+from copy_that.infrastructure.compute import CVExecutorBusyError, get_cv_executor
 from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.http import ImageFetchError, get_image_fetcher
 from copy_that.infrastructure.security.rate_limiter import rate_limit
-from copy_that.interfaces.api.utils import sanitize_json_value
+from copy_that.interfaces.api.schemas import BatchItemError
+from copy_that.interfaces.api.utils import EventEmitter, sanitize_json_value, stream_events
 from copy_that.services.spacing_service import build_spacing_repo_from_db
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    persist_tokens,
+    spacing_token_row,
+)
 from copy_that.tokens.spacing.aggregator import SpacingAggregator
 from core.tokens.adapters.w3c import tokens_to_w3c
 from core.tokens.model import RelationType, Token, TokenRelation, TokenType
@@ -55,61 +60,20 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-ALLOWED_IMAGE_SCHEMES = {"http", "https"}
-MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(8 * 1024 * 1024)))
-
-
-def _validate_image_url(url: str) -> str:
-    parsed = urlparse(url)
-    if parsed.scheme not in ALLOWED_IMAGE_SCHEMES:
-        raise HTTPException(status_code=400, detail="Only http/https image URLs are allowed")
-    if not parsed.netloc or not parsed.hostname:
-        raise HTTPException(status_code=400, detail="Invalid image_url")
 
+async def _validate_image_url(url: str) -> str:
     try:
-        records = socket.getaddrinfo(parsed.hostname, None)
-    except socket.gaierror as exc:
-        raise HTTPException(status_code=400, detail="Invalid image host") from exc
-
-    for _, _, _, _, sockaddr in records:
-        ip_str = sockaddr[0]
-        ip = ipaddress.ip_address(ip_str)
-        if ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_multicast or ip.is_link_local:
-            raise HTTPException(status_code=400, detail="Refusing private or internal image host")
-
-    return parsed.geturl()
+        return await get_image_fetcher().validate_url(url)
+    except ImageFetchError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
 
 
-def _download_image_bytes(url: str) -> tuple[bytes, str]:
-    safe_url = _validate_image_url(url)
+async def _download_image_bytes(url: str) -> tuple[bytes, str]:
     try:
-        with requests.get(safe_url, timeout=15, stream=True) as resp:
-            resp.raise_for_status()
-            content_length = resp.headers.get("Content-Length")
-            try:
-                if content_length and int(content_length) > MAX_IMAGE_BYTES:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail="Image too large",
-                    )
-            except ValueError:
-                content_length = None
-            buf = bytearray()
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    buf.extend(chunk)
-                if len(buf) > MAX_IMAGE_BYTES:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail="Image too large",
-                    )
-            content_type = resp.headers.get("Content-Type", "image/png")
-            return bytes(buf), content_type
-    except HTTPException:
-        raise
-    except requests.RequestException as exc:
-        logger.warning("Failed to download image %s: %s", url, exc)
-        raise HTTPException(status_code=400, detail="Failed to fetch image_url") from exc
+        image = await get_image_fetcher().fetch(url)
+    except ImageFetchError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return image.data, image.content_type
 
 
 @router.get("/export/w3c")
@@ -229,6 +193,9 @@ class BatchExtractionResponse(BaseModel):
     statistics: dict
     library_id: str | None = None
     design_tokens: dict[str, Any] | None = None
+    errors: list[BatchItemError] = Field(
+        default_factory=list, description="Images that failed and were left out of the library"
+    )
 
 
 # Dependency for extractor instance
@@ -237,16 +204,95 @@ def get_extractor() -> AISpacingExtractor:
     return AISpacingExtractor()
 
 
+async def _cached_cv_spacing(
+    content: bytes | str, max_tokens: int, expected_base_px: int | None
+) -> SpacingExtractionResult:
+    """CV spacing for raw bytes or base64, reusing earlier results for the same image."""
+    extractor = CVSpacingExtractor(max_tokens=max_tokens, expected_base_px=expected_base_px)
+    extract = (
+        extractor.extract_from_bytes
+        if isinstance(content, bytes)
+        else extractor.extract_from_base64
+    )
+    return await get_result_cache().get_or_compute_model(
+        "cv-spacing",
+        SpacingExtractionResult,
+        content,
+        lambda: get_cv_executor().run(extract, content),
+        max_tokens=max_tokens,
+        expected_base_px=expected_base_px,
+    )
+
+
+async def _cached_ai_spacing(
+    extractor: AISpacingExtractor,
+    image_base64: str,
+    media_type: str,
+    max_tokens: int,
+    on_token: Callable[[SpacingTokenModel], None] | None = None,
+) -> SpacingExtractionResult:
+    """AI spacing refinement, skipping the Claude call for images seen before.
+
+    ``on_token`` receives tokens as the model streams them; it is not called
+    when the result comes from the cache. A streaming call is not shared with
+    concurrent requests for the same image, whose tokens would go to this
+    caller's ``on_token``.
+    """
+    return await get_result_cache().get_or_compute_model(
+        "ai-spacing",
+        SpacingExtractionResult,
+        image_base64,
+        lambda: extractor.extract_spacing_from_base64(
+            image_base64, media_type, max_tokens, on_token=on_token
+        ),
+        version=extractor.model,
+        cache_if=lambda result: not AISpacingExtractor.is_fallback(result),
+        single_flight=on_token is None,
+        max_tokens=max_tokens,
+    )
+
+
 async def _extract_cv_from_url(
     url: str, max_tokens: int, expected_base_px: int | None
 ) -> tuple[SpacingExtractionResult, str, str]:
-    loop = asyncio.get_event_loop()
-    data, content_type = await loop.run_in_executor(None, lambda: _download_image_bytes(url))
-    extractor = CVSpacingExtractor(max_tokens=max_tokens, expected_base_px=expected_base_px)
-    cv_result = await loop.run_in_executor(None, lambda: extractor.extract_from_bytes(data))
+    data, content_type = await _download_image_bytes(url)
+    cv_result = await _cached_cv_spacing(data, max_tokens, expected_base_px)
     return cv_result, base64.b64encode(data).decode("utf-8"), content_type
 
 
+async def _spacing_cv_pass(
+    request: SpacingExtractionRequest,
+) -> tuple[SpacingExtractionResult, str, str]:
+    """CV spacing for the request image; returns (result, image base64, media type)."""
+    if request.image_base64:
+        cv_result = await _cached_cv_spacing(
+            request.image_base64, request.max_tokens, request.expected_base_px
+        )
+        return cv_result, request.image_base64, request.image_media_type or "image/png"
+    if request.image_url:
+        return await _extract_cv_from_url(
+            str(request.image_url), request.max_tokens, request.expected_base_px
+        )
+    raise HTTPException(status_code=400, detail="Provide image_url or image_base64")
+
+
+async def _spacing_ai_pass(
+    request: SpacingExtractionRequest,
+    cv_result: SpacingExtractionResult,
+    image_base64: str,
+    media_type: str,
+) -> SpacingExtractionResult:
+    """AI refinement merged over the CV result (non-blocking failure)."""
+    try:
+        ai_result = await _cached_ai_spacing(
+            get_extractor(), image_base64, media_type, request.max_tokens
+        )
+        return _merge_spacing(cv_result, ai_result)
+    except (anthropic.APIError, requests.RequestException) as e:
+        logger.warning("AI spacing refinement failed, using CV only: %s", e)
+        return cv_result
+
+
 # Endpoints
 
 
@@ -279,73 +325,38 @@ async def extract_spacing(
         }
     """
     try:
-        loop = asyncio.get_event_loop()
-        extractor = get_extractor()
-
-        cv_b64 = None
-        media_type = request.image_media_type or "image/png"
-        if request.image_base64:
-            cv_b64 = request.image_base64
-            cv_result = await loop.run_in_executor(
-                None,
-                lambda: CVSpacingExtractor(
-                    max_tokens=request.max_tokens, expected_base_px=request.expected_base_px
-                ).extract_from_base64(request.image_base64 or ""),
-            )
-        elif request.image_url:
-            cv_result, cv_b64, media_type = await _extract_cv_from_url(
-                str(request.image_url), request.max_tokens, request.expected_base_px
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Provide image_url or image_base64")
-
-        # AI refinement (non-blocking failure)
-        try:
-            ai_result = await loop.run_in_executor(
-                None,
-                lambda: extractor.extract_spacing_from_base64(
-                    request.image_base64 or cv_b64 or "",
-                    media_type,
-                    request.max_tokens,
-                ),
-            )
-            merged = _merge_spacing(cv_result, ai_result)
-        except (anthropic.APIError, requests.RequestException) as e:
-            logger.warning("AI spacing refinement failed, using CV only: %s", e)
-            merged = cv_result
+        cv_result, cv_b64, media_type = await _spacing_cv_pass(request)
+        merged = await _spacing_ai_pass(request, cv_result, cv_b64, media_type)
 
         # Persist extraction job + tokens
-        job = ExtractionJob(
-            project_id=request.project_id or 0,
-            source_url=str(request.image_url) if request.image_url else "base64_upload",
-            extraction_type="spacing",
-            status="completed",
-            result_data=json.dumps({"token_count": len(merged.tokens)}),
-        )
-        db.add(job)
-        await db.flush()
-
-        for t in merged.tokens:
-            db.add(
-                SpacingToken(
-                    project_id=request.project_id or 0,
-                    extraction_job_id=job.id,
-                    value_px=t.value_px,
-                    name=t.name,
-                    semantic_role=t.semantic_role,
-                    spacing_type=t.spacing_type.value
-                    if hasattr(t.spacing_type, "value")
-                    else t.spacing_type,
-                    category=t.category,
-                    confidence=t.confidence,
-                    usage=json.dumps(t.usage) if t.usage else None,
+        persisted = await persist_tokens(
+            db,
+            request.project_id or 0,
+            [
+                TokenGroup(
+                    SpacingToken,
+                    [spacing_token_row(token) for token in merged.tokens],
+                    job={
+                        "source_url": str(request.image_url)
+                        if request.image_url
+                        else "base64_upload",
+                        "extraction_type": "spacing",
+                        "status": "completed",
+                        "result_data": json.dumps({"token_count": len(merged.tokens)}),
+                    },
                 )
-            )
-        await db.commit()
+            ],
+        )
 
-        namespace = f"token/spacing/project/{request.project_id or 0}/job/{job.id}"
+        namespace = f"token/spacing/project/{request.project_id or 0}/job/{persisted.job_ids[0]}"
         return _result_to_response(merged, namespace=namespace)
 
+    except CVExecutorBusyError as e:
+        logger.warning("CV pool saturated: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Extraction capacity exhausted, please retry shortly",
+        )
     except Exception as e:
         logger.exception("Spacing extraction failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -369,7 +380,7 @@ async def extract_spacing_streaming(
 
     Events:
         - progress: Extraction progress updates
-        - token: Individual token extracted
+        - token: Individual token, sent as soon as the model has written it
         - complete: Final result
         - error: Error occurred
 
@@ -382,7 +393,7 @@ async def extract_spacing_streaming(
     if not request.image_url:
         raise HTTPException(status_code=400, detail="image_url is required for streaming")
 
-    safe_url = _validate_image_url(str(request.image_url))
+    safe_url = await _validate_image_url(str(request.image_url))
 
     async def event_generator() -> AsyncGenerator[str, None]:
         try:
@@ -401,8 +412,6 @@ async def extract_spacing_streaming(
             )
 
             # Run extraction
-            loop = asyncio.get_event_loop()
-
             yield _format_sse_event(
                 "progress",
                 {
@@ -412,26 +421,35 @@ async def extract_spacing_streaming(
                 },
             )
 
-            result = await loop.run_in_executor(
-                None,
-                lambda: extractor.extract_spacing_from_image_url(safe_url, request.max_tokens),
-            )
+            data, media_type = await _download_image_bytes(safe_url)
+
+            async def analyze(emit: EventEmitter) -> SpacingExtractionResult:
+                return await _cached_ai_spacing(
+                    extractor,
+                    base64.b64encode(data).decode("utf-8"),
+                    media_type,
+                    request.max_tokens,
+                    on_token=lambda token: emit("token", token),
+                )
+
+            # Forward each token as soon as the model has finished writing it
+            streamed = 0
+            async for event, value in stream_events(analyze):
+                if event == "token":
+                    streamed += 1
+                    yield _format_sse_event("token", _token_event(value))
+                else:
+                    result = value
 
             yield _format_sse_event(
                 "progress",
                 {"status": "processing", "progress": 0.8, "message": "Processing tokens..."},
             )
 
-            # Emit individual tokens
-            for token in result.tokens:
-                yield _format_sse_event(
-                    "token",
-                    {
-                        "value_px": token.value_px,
-                        "name": token.name,
-                        "confidence": token.confidence,
-                    },
-                )
+            # Cached results arrive without streamed tokens
+            if not streamed:
+                for token in result.tokens:
+                    yield _format_sse_event("token", _token_event(token))
 
             # Emit complete
             response = _result_to_response(result)
@@ -481,25 +499,18 @@ async def extract_spacing_batch(
     """
     try:
         extractor = get_extractor()
-        loop = asyncio.get_event_loop()
-
-        # Extract from each image (CV first, then AI merge)
-        all_tokens = []
-        for url in request.image_urls:
-            try:
-                safe_url = _validate_image_url(str(url))
-                cv_result, _, _ = await _extract_cv_from_url(safe_url, request.max_tokens, None)
-                ai_result = await loop.run_in_executor(
-                    None,
-                    lambda u=safe_url: extractor.extract_spacing_from_image_url(
-                        u, request.max_tokens
-                    ),
-                )
-                merged = _merge_spacing(cv_result, ai_result)
-                all_tokens.append(merged.tokens)
-            except (anthropic.APIError, requests.RequestException) as e:
-                logger.warning("Batch spacing extraction failed for %s: %s", url, e)
-                continue
+
+        async def extract(url: HttpUrl) -> list[SpacingTokenModel]:
+            # One download feeds both the CV pass and the AI refinement
+            cv_result, cv_b64, media_type = await _extract_cv_from_url(
+                str(url), request.max_tokens, None
+            )
+            ai_result = await _cached_ai_spacing(extractor, cv_b64, media_type, request.max_tokens)
+            return _merge_spacing(cv_result, ai_result).tokens
+
+        # All images in flight at once (bounded); failures are reported, not fatal
+        items = await run_batch(request.image_urls, extract)
+        all_tokens = [item.result for item in items if item.ok]
 
         # Aggregate results
         library = SpacingAggregator.aggregate_batch(all_tokens, request.similarity_threshold)
@@ -527,6 +538,11 @@ async def extract_spacing_batch(
             tokens=token_responses,
             statistics=library.statistics,
             design_tokens=tokens_to_w3c(repo),
+            errors=[
+                BatchItemError(index=item.index, image_url=str(item.source), error=item.error)
+                for item in items
+                if not item.ok
+            ],
         )
 
     except Exception as e:
@@ -884,6 +900,11 @@ def _merge_spacing(
     )
 
 
+def _token_event(token: SpacingTokenModel) -> dict[str, Any]:
+    """Payload of a streamed ``token`` event."""
+    return {"value_px": token.value_px, "name": token.name, "confidence": token.confidence}
+
+
 def _format_sse_event(event: str, data: dict) -> str:
     """Format data as Server-Sent Event."""
     json_data = json.dumps(data)
@@ -17,18 +17,28 @@ from copy_that.application.ai_typography_extractor import (
     AITypographyExtractor,
     TypographyExtractionResult,
 )
+from copy_that.application.batch_executor import run_batch
 from copy_that.application.cv.typography_cv_extractor import CVTypographyExtractor
-from copy_that.domain.models import ExtractionJob, Project, TypographyToken
+from copy_that.domain.models import Project, TypographyToken
+from copy_that.infrastructure.cache import get_result_cache
 from copy_that.infrastructure.database import get_db
+from copy_that.infrastructure.http import get_image_fetcher
 from copy_that.infrastructure.security.rate_limiter import rate_limit
 from copy_that.interfaces.api.schemas import (
+    BatchItemError,
     ExtractTypographyRequest,
+    TypographyBatchResponse,
     TypographyExtractionResponse,
     TypographyTokenCreateRequest,
     TypographyTokenDetailResponse,
     TypographyTokenResponse,
 )
 from copy_that.interfaces.api.utils import sanitize_json_value
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    persist_tokens,
+    typography_token_row,
+)
 from copy_that.services.typography_service import (
     build_typography_repo_from_db,
     merge_typography,
@@ -37,6 +47,9 @@ from core.tokens.adapters.w3c import tokens_to_w3c
 
 logger = logging.getLogger(__name__)
 
+# Below this AI confidence, CV-detected typography is merged into the result
+CV_FALLBACK_CONFIDENCE = 0.6
+
 
 def _detect_image_format(base64_data: str) -> str | None:
     """Detect image format from base64 data by reading magic bytes.
@@ -95,6 +108,82 @@ def _result_to_response(
     )
 
 
+async def _validate_typography_request(db: AsyncSession, request: ExtractTypographyRequest) -> None:
+    """Reject requests for unknown projects or without an image."""
+    result = await db.execute(select(Project).where(Project.id == request.project_id))
+    project = result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {request.project_id} not found"
+        )
+
+    # Verify at least one image source is provided
+    if not request.image_url and not request.image_base64:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image_url or image_base64 must be provided",
+        )
+
+
+async def _typography_ai_pass(request: ExtractTypographyRequest) -> TypographyExtractionResult:
+    """AI typography extraction (cached per image for base64 payloads)."""
+    ai_extractor = AITypographyExtractor()
+    if request.image_base64:
+        # Use provided media type or detect from magic bytes
+        media_type = (
+            request.image_media_type or _detect_image_format(request.image_base64) or "image/jpeg"
+        )
+        return await get_result_cache().get_or_compute_model(
+            "ai-typography",
+            TypographyExtractionResult,
+            request.image_base64,
+            lambda: ai_extractor.extract_typography_from_base64(
+                request.image_base64, media_type=media_type, max_tokens=request.max_tokens
+            ),
+            version=ai_extractor.model,
+            cache_if=lambda result: not AITypographyExtractor.is_fallback(result),
+            max_tokens=request.max_tokens,
+        )
+    return await ai_extractor.extract_typography_from_image_url(
+        request.image_url, max_tokens=request.max_tokens
+    )
+
+
+async def _typography_cv_pass(
+    request: ExtractTypographyRequest,
+) -> TypographyExtractionResult | None:
+    """CV typography extraction; None when the image cannot be analyzed."""
+    cv_extractor = CVTypographyExtractor()
+    try:
+        if request.image_base64:
+            image_base64 = request.image_base64
+        else:
+            image_base64 = (await get_image_fetcher().fetch(request.image_url)).base64
+        result: TypographyExtractionResult | None = cv_extractor.extract_from_base64(image_base64)
+        return result
+    except Exception as e:
+        logger.debug("CV fallback skipped: %s", e)
+        return None
+
+
+def _merge_typography_passes(
+    ai_result: TypographyExtractionResult | None, cv_result: TypographyExtractionResult | None
+) -> TypographyExtractionResult:
+    """AI result, with CV tokens merged in only when the AI pass is unsure."""
+    if cv_result and ai_result and ai_result.extraction_confidence < CV_FALLBACK_CONFIDENCE:
+        merged_tokens = merge_typography(cv_result.tokens, ai_result.tokens)
+    else:
+        merged_tokens = ai_result.tokens if ai_result else []
+
+    return TypographyExtractionResult(
+        tokens=merged_tokens,
+        typography_palette=ai_result.typography_palette if ai_result else None,
+        extraction_confidence=ai_result.extraction_confidence if ai_result else 0.0,
+        extractor_used=ai_result.extractor_used if ai_result else "unknown",
+        color_associations=ai_result.color_associations if ai_result else None,
+    )
+
+
 @router.post("/typography/extract", response_model=TypographyExtractionResponse)
 async def extract_typography_from_image(
     request: ExtractTypographyRequest,
@@ -119,114 +208,41 @@ async def extract_typography_from_image(
     Raises:
         HTTPException: If project not found or extraction fails
     """
-    # Verify project exists
-    result = await db.execute(select(Project).where(Project.id == request.project_id))
-    project = result.scalar_one_or_none()
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {request.project_id} not found"
-        )
-
-    # Verify at least one image source is provided
-    if not request.image_url and not request.image_base64:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Either image_url or image_base64 must be provided",
-        )
+    await _validate_typography_request(db, request)
 
     try:
-        # AI extraction
-        ai_extractor = AITypographyExtractor()
-        if request.image_base64:
-            # Use provided media type or detect from magic bytes
-            media_type = (
-                request.image_media_type
-                or _detect_image_format(request.image_base64)
-                or "image/jpeg"
-            )
-            ai_result = ai_extractor.extract_typography_from_base64(
-                request.image_base64, media_type=media_type, max_tokens=request.max_tokens
-            )
-        else:
-            ai_result = ai_extractor.extract_typography_from_image_url(
-                request.image_url, max_tokens=request.max_tokens
-            )
+        ai_result = await _typography_ai_pass(request)
 
         # CV fallback if AI result has low confidence
         cv_result = None
-        if ai_result and ai_result.extraction_confidence < 0.6:
-            cv_extractor = CVTypographyExtractor()
-            try:
-                if request.image_base64:
-                    cv_result = cv_extractor.extract_from_base64(request.image_base64)
-                else:
-                    resp = requests.get(request.image_url, timeout=10)
-                    resp.raise_for_status()
-                    import base64
-
-                    cv_b64 = base64.b64encode(resp.content).decode("utf-8")
-                    cv_result = cv_extractor.extract_from_base64(cv_b64)
-            except Exception as e:
-                logger.debug("CV fallback skipped: %s", e)
-                cv_result = None
-
-        # Merge results
-        if cv_result and ai_result:
-            merged_tokens = merge_typography(cv_result.tokens, ai_result.tokens)
-        else:
-            merged_tokens = ai_result.tokens if ai_result else []
-
-        extraction_result = TypographyExtractionResult(
-            tokens=merged_tokens,
-            typography_palette=ai_result.typography_palette if ai_result else None,
-            extraction_confidence=ai_result.extraction_confidence if ai_result else 0.0,
-            extractor_used=ai_result.extractor_used if ai_result else "unknown",
-            color_associations=ai_result.color_associations if ai_result else None,
-        )
+        if ai_result and ai_result.extraction_confidence < CV_FALLBACK_CONFIDENCE:
+            cv_result = await _typography_cv_pass(request)
 
-        # Create extraction job record
-        source_identifier = request.image_url or "base64_upload"
-        extraction_job = ExtractionJob(
-            project_id=request.project_id,
-            source_url=source_identifier,
-            extraction_type="typography",
-            status="completed",
-            result_data=json.dumps(
-                {
-                    "typography_count": len(extraction_result.tokens),
-                    "palette": extraction_result.typography_palette,
-                },
-                default=str,
-            ),
-        )
-        db.add(extraction_job)
-        await db.flush()
-
-        # Store typography tokens in database
-        for token in extraction_result.tokens:
-            typography_token = TypographyToken(
-                project_id=request.project_id,
-                extraction_job_id=extraction_job.id,
-                font_family=token.font_family,
-                font_weight=token.font_weight,
-                font_size=token.font_size,
-                line_height=token.line_height,
-                letter_spacing=token.letter_spacing,
-                text_transform=token.text_transform,
-                semantic_role=token.semantic_role,
-                category=token.category,
-                name=token.name,
-                confidence=token.confidence,
-                prominence=token.prominence,
-                is_readable=token.is_readable,
-                readability_score=token.readability_score,
-                extraction_metadata=json.dumps(token.extraction_metadata)
-                if token.extraction_metadata
-                else None,
-            )
-            db.add(typography_token)
+        extraction_result = _merge_typography_passes(ai_result, cv_result)
 
-        await db.commit()
+        # Store the extraction job and its typography tokens in one transaction
+        persisted = await persist_tokens(
+            db,
+            request.project_id,
+            [
+                TokenGroup(
+                    TypographyToken,
+                    [typography_token_row(token) for token in extraction_result.tokens],
+                    job={
+                        "source_url": request.image_url or "base64_upload",
+                        "extraction_type": "typography",
+                        "status": "completed",
+                        "result_data": json.dumps(
+                            {
+                                "typography_count": len(extraction_result.tokens),
+                                "palette": extraction_result.typography_palette,
+                            },
+                            default=str,
+                        ),
+                    },
+                )
+            ],
+        )
         logger.info(
             "Extracted %d typography tokens for project %d",
             len(extraction_result.tokens),
@@ -235,7 +251,7 @@ async def extract_typography_from_image(
 
         return _result_to_response(
             extraction_result,
-            namespace=f"token/typography/project/{request.project_id}/job/{extraction_job.id}",
+            namespace=f"token/typography/project/{request.project_id}/job/{persisted.job_ids[0]}",
         )
 
     except ValueError as e:
@@ -338,67 +354,73 @@ async def export_typography_w3c(project_id: int | None = None, db: AsyncSession
     return sanitize_json_value(tokens_to_w3c(repo))
 
 
-@router.post("/typography/batch", response_model=list[TypographyExtractionResponse])
+@router.post("/typography/batch", response_model=TypographyBatchResponse)
 async def batch_extract_typography(
     request: TypographyBatchRequest,
     db: AsyncSession = Depends(get_db),
     _rate_limit: None = Depends(rate_limit(requests=5, seconds=60)),
-) -> list[TypographyExtractionResponse]:
-    """Batch extract typography from multiple image URLs."""
-    ai_extractor = AITypographyExtractor()
-    responses: list[TypographyExtractionResponse] = []
-    for url in request.image_urls:
-        try:
-            extraction_result = ai_extractor.extract_typography_from_image_url(
-                url, max_tokens=request.max_tokens
+) -> TypographyBatchResponse:
+    """Batch extract typography from multiple image URLs.
+
+    AI calls for all images run concurrently and the tokens of the whole batch
+    are inserted at once. Failed images leave a null in ``results`` and are
+    listed in ``errors``.
+    """
+
+    async def extract(url: str) -> TypographyExtractionResult:
+        return await _typography_ai_pass(
+            ExtractTypographyRequest(
+                image_url=url, project_id=request.project_id or 0, max_tokens=request.max_tokens
             )
-            job_id: int | None = None
-            # Optional persistence
-            if request.project_id:
-                job = ExtractionJob(
-                    project_id=request.project_id,
-                    source_url=url,
-                    extraction_type="typography",
-                    status="completed",
-                    result_data=json.dumps({"typography_count": len(extraction_result.tokens)}),
+        )
+
+    items = await run_batch(request.image_urls, extract)
+    succeeded = [item for item in items if item.ok]
+
+    # Optional persistence: one insert for the jobs, one for all their tokens
+    job_ids: dict[int, int] = {}
+    if request.project_id and succeeded:
+        persisted = await persist_tokens(
+            db,
+            request.project_id,
+            [
+                TokenGroup(
+                    TypographyToken,
+                    [typography_token_row(token) for token in item.result.tokens],
+                    job={
+                        "source_url": item.source,
+                        "extraction_type": "typography",
+                        "status": "completed",
+                        "result_data": json.dumps({"typography_count": len(item.result.tokens)}),
+                    },
                 )
-                db.add(job)
-                await db.flush()
-                for token in extraction_result.tokens:
-                    db.add(
-                        TypographyToken(
-                            project_id=request.project_id,
-                            extraction_job_id=job.id,
-                            font_family=token.font_family,
-                            font_weight=token.font_weight,
-                            font_size=token.font_size,
-                            line_height=token.line_height,
-                            letter_spacing=token.letter_spacing,
-                            text_transform=token.text_transform,
-                            semantic_role=token.semantic_role,
-                            category=token.category,
-                            name=token.name,
-                            confidence=token.confidence,
-                            prominence=token.prominence,
-                            is_readable=token.is_readable,
-                            readability_score=token.readability_score,
-                            extraction_metadata=json.dumps(token.extraction_metadata)
-                            if token.extraction_metadata
-                            else None,
-                        )
-                    )
-                await db.commit()
-                job_id = job.id
-            namespace = (
-                f"token/typography/project/{request.project_id}/job/{job_id}"
-                if job_id is not None and request.project_id
-                else f"token/typography/batch/{len(responses) + 1:02d}"
+                for item in succeeded
+            ],
+        )
+        job_ids = {
+            item.index: job_id
+            for item, job_id in zip(succeeded, persisted.job_ids, strict=True)
+            if job_id is not None
+        }
+
+    return TypographyBatchResponse(
+        results=[
+            _result_to_response(
+                item.result,
+                namespace=f"token/typography/project/{request.project_id}/job/{job_ids[item.index]}"
+                if item.index in job_ids
+                else f"token/typography/batch/{item.index + 1:02d}",
             )
-            responses.append(_result_to_response(extraction_result, namespace=namespace))
-        except Exception as e:
-            logger.error("Batch typography extraction failed for %s: %s", url, str(e))
-            continue
-    return responses
+            if item.ok
+            else None
+            for item in items
+        ],
+        errors=[
+            BatchItemError(index=item.index, image_url=item.source, error=item.error)
+            for item in items
+            if not item.ok
+        ],
+    )
 
 
 @router.post("/typography", response_model=TypographyTokenDetailResponse, status_code=201)
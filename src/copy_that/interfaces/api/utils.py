@@ -1,8 +1,17 @@
 """Shared utilities for API routers."""
 
+import asyncio
+import json
 import math
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
+from fastapi import Request
+
+# Thread-safe emitter handed to streamed work: emit(event_name, payload)
+EventEmitter = Callable[[str, Any], None]
+
 
 def sanitize_json_value(value: Any) -> Any:
     """Replace NaN/Inf floats for JSON serialization.
@@ -46,3 +55,63 @@ def sanitize_numbers(obj: Any) -> Any:
     if isinstance(obj, list):
         return [sanitize_numbers(v) for v in obj]
     return obj
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """Format data as a Server-Sent Event (NaN/Inf become null)."""
+    return f"event: {event}\ndata: {json.dumps(sanitize_numbers(data))}\n\n"
+
+
+async def stream_events(
+    work: Callable[[EventEmitter], Awaitable[Any]],
+    request: Request | None = None,
+    cancel_event: threading.Event | None = None,
+    poll_interval_s: float = 0.25,
+) -> AsyncIterator[tuple[str, Any]]:
+    """Run ``work(emit)`` and yield its events as they are emitted.
+
+    ``emit`` may be called from worker threads. Yields ``(event, payload)``
+    pairs in emission order, then ``("result", value)`` with the return value
+    of ``work``; exceptions from ``work`` propagate.
+
+    If the client disconnects (checked every ``poll_interval_s``) or the
+    consumer stops iterating, ``work`` is cancelled and ``cancel_event`` is
+    set so code running in a thread can stop at its next checkpoint.
+
+    Args:
+        work: Coroutine function receiving the emitter
+        request: Incoming request, polled for client disconnects
+        cancel_event: Event shared with blocking code inside ``work``
+        poll_interval_s: How often to check for a disconnect while idle
+
+    Yields:
+        (event name, payload) tuples
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+
+    def emit(event: str, payload: Any) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+    task = asyncio.ensure_future(work(emit))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, timeout=poll_interval_s)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            if task in done:
+                # Events emitted right before returning are already queued
+                while not queue.empty():
+                    yield queue.get_nowait()
+                yield "result", task.result()
+                return
+            if request is not None and await request.is_disconnected():
+                return
+    finally:
+        if not task.done():
+            if cancel_event is not None:
+                cancel_event.set()
+            task.cancel()
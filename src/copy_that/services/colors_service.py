@@ -16,6 +16,11 @@ from copy_that.application.color_extractor import (
     ColorExtractionResult,
     ExtractedColorToken,
 )
+from copy_that.application.color_properties import (
+    apply_properties,
+    compute_properties_batch,
+    is_hex_color,
+)
 from copy_that.application.openai_color_extractor import OpenAIColorExtractor
 from core.tokens.adapters.w3c import tokens_to_w3c
 from core.tokens.color import make_color_ramp, make_color_token
@@ -189,10 +194,19 @@ def find_accent_hex(colors: Sequence[Any]) -> str | None:
 def post_process_colors(
     colors: list[ExtractedColorToken], background_palette: list[str] | None = None
 ) -> tuple[list[ExtractedColorToken], list[str]]:
-    """Cluster near-duplicate colors, assign background roles, and label contrast."""
+    """Cluster near-duplicate colors, fill missing properties, and assign roles/contrast."""
     clustered = cast(
         list[ExtractedColorToken], color_utils.cluster_color_tokens(colors, threshold=2.5)
     )
+    if clustered:
+        # CV-only tokens arrive without WCAG/variant fields; fill them in one batch
+        apply_properties(
+            clustered,
+            compute_properties_batch(
+                [c.hex for c in clustered if is_hex_color(c.hex)],
+                background_palette[:3] if background_palette else None,
+            ),
+        )
     backgrounds = color_utils.assign_background_roles(clustered)
     primary_bg = (
         backgrounds[0] if backgrounds else (background_palette[0] if background_palette else None)
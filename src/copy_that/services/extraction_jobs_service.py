@@ -0,0 +1,87 @@
+"""Extraction job helpers: the queued -> running -> completed/failed lifecycle of a job row."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from copy_that.domain.models import ExtractionJob, utc_now
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+TERMINAL_STATUSES = frozenset({JOB_COMPLETED, JOB_FAILED})
+
+
+async def create_job(
+    db: AsyncSession,
+    project_id: int,
+    source_url: str,
+    extraction_type: str,
+    task_id: str | None = None,
+) -> ExtractionJob:
+    job = ExtractionJob(
+        project_id=project_id,
+        source_url=source_url[:512],
+        extraction_type=extraction_type,
+        status=JOB_QUEUED,
+        progress=0.0,
+        task_id=task_id,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int) -> ExtractionJob | None:
+    result = await db.execute(select(ExtractionJob).where(ExtractionJob.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def mark_running(db: AsyncSession, job: ExtractionJob, progress: float) -> None:
+    job.status = JOB_RUNNING
+    job.progress = max(job.progress or 0.0, progress)
+    await db.commit()
+
+
+async def complete_job(db: AsyncSession, job: ExtractionJob, result: dict[str, Any]) -> None:
+    job.status = JOB_COMPLETED
+    job.progress = 1.0
+    job.result_data = json.dumps(result, default=str)
+    job.completed_at = utc_now()
+    await db.commit()
+
+
+async def fail_job(db: AsyncSession, job_id: int, error: str) -> None:
+    job = await get_job(db, job_id)
+    if job is None or job.status in TERMINAL_STATUSES:
+        return
+    job.status = JOB_FAILED
+    job.error_message = error
+    job.completed_at = utc_now()
+    await db.commit()
+
+
+def job_to_dict(job: ExtractionJob) -> dict[str, Any]:
+    try:
+        result = json.loads(job.result_data) if job.result_data else None
+    except json.JSONDecodeError:
+        result = None
+    return {
+        "job_id": job.id,
+        "project_id": job.project_id,
+        "extraction_type": job.extraction_type,
+        "source_url": job.source_url,
+        "status": job.status,
+        "progress": job.progress,
+        "task_id": job.task_id,
+        "result": result,
+        "error": job.error_message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
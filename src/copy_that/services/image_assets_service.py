@@ -0,0 +1,147 @@
+"""Image asset storage: content-addressed blobs plus generated previews.
+
+An uploaded image is stored once under its SHA-256 hash, together with WebP
+variants rendered at upload time (``thumbnail`` for lists and cards,
+``preview`` for detail views). Rows reference the image by hash and clients
+fetch bytes from ``/api/v1/assets/{sha256}[/{variant}]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from copy_that.domain.models import ImageAsset
+from copy_that.infrastructure.compute import get_cv_executor
+from copy_that.infrastructure.storage import BlobStore, get_blob_store
+
+logger = logging.getLogger(__name__)
+
+ASSETS_URL_PREFIX = "/api/v1/assets"
+
+# Longest edge in pixels per generated variant
+VARIANTS: dict[str, int] = {"thumbnail": 256, "preview": 1024}
+VARIANT_MEDIA_TYPE = "image/webp"
+VARIANT_QUALITY = 80
+
+
+@dataclass
+class RenderedImage:
+    """Dimensions of an uploaded image and its encoded variants."""
+
+    width: int | None = None
+    height: int | None = None
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+
+def decode_image_base64(image_base64: str) -> bytes:
+    """Decode a base64 payload (a ``data:`` URL prefix is tolerated)."""
+    payload = image_base64.split(",", 1)[1] if image_base64.startswith("data:") else image_base64
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid base64 image payload") from e
+
+
+def variant_key(sha256: str, variant: str | None = None) -> str:
+    """Blob key of the original image (``variant=None``) or one of its variants."""
+    return sha256 if variant is None else f"{sha256}.{variant}"
+
+
+def asset_urls(sha256: str | None) -> dict[str, str | None]:
+    """API URLs of an asset's original and thumbnail."""
+    if sha256 is None:
+        return {"image_url": None, "thumbnail_url": None}
+    return {
+        "image_url": f"{ASSETS_URL_PREFIX}/{sha256}",
+        "thumbnail_url": f"{ASSETS_URL_PREFIX}/{sha256}/thumbnail",
+    }
+
+
+def render_variants(data: bytes) -> RenderedImage:
+    """
+    Read image dimensions and encode the downscaled WebP variants (CPU-bound)
+
+    Images Pillow cannot open are still stored, just without dimensions or
+    variants; the original is served in their place.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            rendered = RenderedImage(width=img.width, height=img.height)
+            source = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA")
+            for name, edge in VARIANTS.items():
+                variant = source.copy()
+                variant.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                variant.save(buffer, format="WEBP", quality=VARIANT_QUALITY)
+                rendered.variants[name] = buffer.getvalue()
+            return rendered
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning("Storing image without variants: %s", e)
+        return RenderedImage()
+
+
+def write_image_blobs(
+    store: BlobStore, sha256: str, data: bytes, media_type: str, rendered: RenderedImage
+) -> None:
+    """Write the original and its variants to the blob store (blocking)."""
+    store.put(variant_key(sha256), data, media_type)
+    for name, variant in rendered.variants.items():
+        store.put(variant_key(sha256, name), variant, VARIANT_MEDIA_TYPE)
+
+
+def image_asset_row(
+    sha256: str, data: bytes, media_type: str, rendered: RenderedImage
+) -> dict[str, object]:
+    """ImageAsset column values for a stored image."""
+    return {
+        "sha256": sha256,
+        "media_type": media_type,
+        "size_bytes": len(data),
+        "width": rendered.width,
+        "height": rendered.height,
+        "variants": json.dumps(sorted(rendered.variants)),
+    }
+
+
+async def get_asset(db: AsyncSession, sha256: str) -> ImageAsset | None:
+    return await db.get(ImageAsset, sha256)
+
+
+async def store_image(db: AsyncSession, data: bytes, media_type: str) -> ImageAsset:
+    """
+    Store an image and its variants, deduplicated by content hash
+
+    The asset row is flushed but not committed; the caller commits it
+    together with whatever references it.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    existing = await get_asset(db, sha256)
+    if existing is not None:
+        return existing
+
+    rendered = await get_cv_executor().run(render_variants, data)
+    await asyncio.to_thread(write_image_blobs, get_blob_store(), sha256, data, media_type, rendered)
+
+    asset = ImageAsset(**image_asset_row(sha256, data, media_type, rendered))
+    db.add(asset)
+    await db.flush()
+    return asset
+
+
+async def store_base64_image(
+    db: AsyncSession, image_base64: str, media_type: str | None
+) -> ImageAsset:
+    """``store_image`` for a base64 upload; raises ValueError for invalid base64."""
+    return await store_image(db, decode_image_base64(image_base64), media_type or "image/png")
@@ -12,6 +12,8 @@ from typing import Any
 import anthropic
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from copy_that.infrastructure.ai import get_ai_client_pool
+
 from .base import MetricProvider, MetricResult, MetricTier
 from .token_graph import TokenGraph
 
@@ -54,7 +56,7 @@ class QualitativeMetricsProvider(MetricProvider):
             logger.warning("ANTHROPIC_API_KEY not set - qualitative metrics will return null")
             self.client = None
         else:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = get_ai_client_pool().anthropic(self.api_key)
 
     async def compute(self, project_id: int) -> MetricResult:
         """Compute qualitative metrics for a project using AI analysis.
@@ -92,7 +94,7 @@ class QualitativeMetricsProvider(MetricProvider):
             prompt = self._create_analysis_prompt(token_summary)
 
             # Call Claude API
-            message = self.client.messages.create(
+            message = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2000,
                 messages=[
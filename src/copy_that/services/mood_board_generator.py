@@ -12,8 +12,7 @@ import os
 import time
 from typing import Any
 
-from anthropic import Anthropic
-from openai import OpenAI
+from copy_that.infrastructure.ai import get_ai_client_pool
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +27,9 @@ class MoodBoardGenerator:
             anthropic_api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY env var)
             openai_api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
         """
-        self.anthropic = Anthropic(api_key=anthropic_api_key or os.getenv("ANTHROPIC_API_KEY"))
-        self.openai = OpenAI(api_key=openai_api_key or os.getenv("OPENAI_API_KEY"))
+        pool = get_ai_client_pool()
+        self.anthropic = pool.anthropic(anthropic_api_key or os.getenv("ANTHROPIC_API_KEY"))
+        self.openai = pool.openai(openai_api_key or os.getenv("OPENAI_API_KEY"))
         self.claude_model = "claude-sonnet-4-5-20250929"
         self.dalle_model = "dall-e-3"
 
@@ -155,7 +155,7 @@ Return your response as valid JSON matching this structure:
 }}"""
 
         try:
-            response = self.anthropic.messages.create(
+            response = await self.anthropic.messages.create(
                 model=self.claude_model,
                 max_tokens=4096,
                 temperature=0.7,
@@ -201,7 +201,7 @@ Return your response as valid JSON matching this structure:
                 variation = variations[i % len(variations)]
                 full_prompt = f"{base_prompt} {variation}"
 
-                response = self.openai.images.generate(
+                response = await self.openai.images.generate(
                     model=self.dalle_model,
                     prompt=full_prompt,
                     size="1024x1024",
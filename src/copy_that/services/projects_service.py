@@ -13,8 +13,13 @@ async def get_project(db: AsyncSession, project_id: int) -> Project | None:
     return result.scalar_one_or_none()
 
 
-async def create_project(db: AsyncSession, name: str, description: str | None = None) -> Project:
-    project = Project(name=name, description=description)
+async def create_project(
+    db: AsyncSession,
+    name: str,
+    description: str | None = None,
+    image_asset_hash: str | None = None,
+) -> Project:
+    project = Project(name=name, description=description, image_asset_hash=image_asset_hash)
     db.add(project)
     await db.commit()
     await db.refresh(project)
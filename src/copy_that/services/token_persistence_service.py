@@ -0,0 +1,237 @@
+"""Bulk persistence of extracted tokens.
+
+Extraction results are written as plain column dicts rather than ORM objects:
+the jobs, the token rows of every table and the optional project snapshot go
+to the database in one transaction, with one multi-row round-trip per table.
+
+- PostgreSQL: ``INSERT ... VALUES (...), (...) RETURNING id``; batches of at
+  least ``TOKEN_COPY_MIN_ROWS`` rows use asyncpg ``COPY`` with ids reserved
+  from the table sequence up front.
+- SQLite and other drivers: ``executemany`` of the same statement, which
+  SQLAlchemy batches into one multi-row ``INSERT ... RETURNING`` per page.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from copy_that.domain.models import ExtractionJob, ProjectSnapshot
+
+# Below this many rows a RETURNING insert is as fast as COPY and needs no id reservation
+TOKEN_COPY_MIN_ROWS = int(os.getenv("TOKEN_COPY_MIN_ROWS", "1000"))
+
+
+@dataclass
+class TokenGroup:
+    """Token rows of one table, optionally with the job they belong to.
+
+    ``job`` holds ExtractionJob column values for a job created alongside the
+    tokens; ``job_id`` links the rows to an existing job instead.
+    """
+
+    model: type[Any]
+    rows: list[dict[str, Any]]
+    job: dict[str, Any] | None = None
+    job_id: int | None = None
+
+
+@dataclass
+class PersistedTokens:
+    """Generated ids, aligned with the groups passed to ``persist_tokens``."""
+
+    job_ids: list[int | None] = field(default_factory=list)
+    token_ids: list[list[int]] = field(default_factory=list)
+    snapshot_id: int | None = None
+
+
+def _json_or_none(value: Any) -> str | None:
+    return json.dumps(value) if value else None
+
+
+def color_token_row(color: Any) -> dict[str, Any]:
+    """ColorToken column values for an extracted color."""
+    return {
+        "hex": color.hex,
+        "rgb": color.rgb,
+        "name": color.name,
+        "design_intent": color.design_intent,
+        "semantic_names": _json_or_none(color.semantic_names),
+        "extraction_metadata": _json_or_none(color.extraction_metadata),
+        "confidence": color.confidence,
+        "harmony": color.harmony,
+        "usage": _json_or_none(color.usage),
+    }
+
+
+def spacing_token_row(token: Any) -> dict[str, Any]:
+    """SpacingToken column values for an extracted spacing token."""
+    spacing_type = token.spacing_type
+    return {
+        "value_px": token.value_px,
+        "name": token.name,
+        "semantic_role": token.semantic_role,
+        "spacing_type": spacing_type.value if hasattr(spacing_type, "value") else spacing_type,
+        "category": token.category,
+        "confidence": token.confidence,
+        "usage": _json_or_none(token.usage),
+    }
+
+
+def shadow_token_row(shadow: Any) -> dict[str, Any]:
+    """ShadowToken column values for an extracted shadow."""
+    return {
+        "x_offset": shadow.x_offset,
+        "y_offset": shadow.y_offset,
+        "blur_radius": shadow.blur_radius,
+        "spread_radius": shadow.spread_radius,
+        "color_hex": shadow.color_hex,
+        "opacity": shadow.opacity,
+        "name": shadow.semantic_name,
+        "shadow_type": shadow.shadow_type,
+        "semantic_role": "inset" if shadow.is_inset else "drop",
+        "confidence": shadow.confidence,
+        "extraction_metadata": json.dumps(
+            {"is_inset": shadow.is_inset, "affects_text": shadow.affects_text}
+        ),
+    }
+
+
+def typography_token_row(token: Any) -> dict[str, Any]:
+    """TypographyToken column values for an extracted typography token."""
+    return {
+        "font_family": token.font_family,
+        "font_weight": token.font_weight,
+        "font_size": token.font_size,
+        "line_height": token.line_height,
+        "letter_spacing": token.letter_spacing,
+        "text_transform": token.text_transform,
+        "semantic_role": token.semantic_role,
+        "category": token.category,
+        "name": token.name,
+        "confidence": token.confidence,
+        "prominence": token.prominence,
+        "is_readable": token.is_readable,
+        "readability_score": token.readability_score,
+        "extraction_metadata": _json_or_none(token.extraction_metadata),
+    }
+
+
+async def bulk_insert(
+    db: AsyncSession, model: type[Any], rows: Sequence[dict[str, Any]]
+) -> list[int]:
+    """Insert ``rows`` into ``model``'s table; returns the new ids in row order. No commit."""
+    if not rows:
+        return []
+    conn = await db.connection()
+    # render_nulls keeps rows with different None columns in the same batch
+    options = {"render_nulls": True}
+    if conn.dialect.name != "postgresql":
+        # One multi-row statement: rows get increasing ids in VALUES order, while
+        # asking SQLAlchemy for ordered RETURNING would make it insert row by row
+        result = await db.execute(
+            insert(model).returning(model.id), list(rows), execution_options=options
+        )
+        return sorted(result.scalars())
+    if len(rows) >= TOKEN_COPY_MIN_ROWS:
+        return await _copy_rows(db, model, rows)
+    result = await db.execute(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        list(rows),
+        execution_options=options,
+    )
+    return list(result.scalars())
+
+
+async def _copy_rows(
+    db: AsyncSession, model: type[Any], rows: Sequence[dict[str, Any]]
+) -> list[int]:
+    """PostgreSQL COPY; COPY returns nothing, so ids are taken from the sequence first."""
+    table = model.__table__
+    id_result = await db.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)"),
+        {"table": table.name, "n": len(rows)},
+    )
+    ids = list(id_result.scalars())
+
+    # COPY bypasses SQLAlchemy, so client-side column defaults are applied here
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    defaults = {
+        column.key: column.default
+        for column in table.columns
+        if column.key not in keys and column.default is not None and not column.primary_key
+    }
+    columns = ["id", *keys, *defaults]
+    records = []
+    for row_id, row in zip(ids, rows, strict=True):
+        default_values = [
+            default.arg(None) if default.is_callable else default.arg
+            for default in defaults.values()
+        ]
+        records.append((row_id, *(row.get(key) for key in keys), *default_values))
+
+    raw = await (await db.connection()).get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+    return ids
+
+
+async def persist_tokens(
+    db: AsyncSession,
+    project_id: int,
+    groups: Sequence[TokenGroup],
+    snapshot: dict[str, Any] | None = None,
+    commit: bool = True,
+) -> PersistedTokens:
+    """
+    Persist jobs, token rows and an optional snapshot in one transaction
+
+    New jobs are inserted together first so their ids can be written into the
+    token rows; token rows are then inserted with one statement per table,
+    whatever the number of groups.
+
+    Args:
+        db: Database session
+        project_id: Project the jobs, tokens and snapshot belong to
+        groups: Token rows per table and job
+        snapshot: Snapshot payload stored as a ProjectSnapshot row
+        commit: Commit the transaction (False when the caller commits)
+
+    Returns:
+        Generated job, token and snapshot ids
+    """
+    new_jobs = [(group, group.job) for group in groups if group.job is not None]
+    created_job_ids = await bulk_insert(
+        db, ExtractionJob, [{"project_id": project_id, **job} for _, job in new_jobs]
+    )
+    job_id_by_group = {
+        id(group): job_id for (group, _), job_id in zip(new_jobs, created_job_ids, strict=True)
+    }
+    job_ids = [job_id_by_group.get(id(group), group.job_id) for group in groups]
+
+    rows_by_model: dict[type[Any], list[dict[str, Any]]] = {}
+    for group, job_id in zip(groups, job_ids, strict=True):
+        rows_by_model.setdefault(group.model, []).extend(
+            {"project_id": project_id, "extraction_job_id": job_id, **row} for row in group.rows
+        )
+    ids_by_model = {
+        model: iter(await bulk_insert(db, model, rows)) for model, rows in rows_by_model.items()
+    }
+    token_ids = [[next(ids_by_model[group.model]) for _ in group.rows] for group in groups]
+
+    snapshot_id = None
+    if snapshot is not None:
+        (snapshot_id,) = await bulk_insert(
+            db,
+            ProjectSnapshot,
+            [{"project_id": project_id, "version": 1, "data": json.dumps(snapshot)}],
+        )
+
+    if commit:
+        await db.commit()
+    return PersistedTokens(job_ids=job_ids, token_ids=token_ids, snapshot_id=snapshot_id)
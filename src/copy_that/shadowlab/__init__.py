@@ -30,6 +30,10 @@ from .advanced import (
     run_advanced_analysis,
 )
 
+# Batch processing
+from .batch import BatchItem, BatchReport, BatchShadowRunner, collect_images
+from .batching import MicroBatcher, configure_inference_batching
+
 # BDRAR shadow detection
 from .bdrar import (
     download_bdrar_weights,
@@ -38,6 +42,16 @@ from .bdrar import (
 )
 from .classical import ShadowClassicalConfig, detect_shadows_classical
 
+# Stage dependency-graph executor
+from .dag import (
+    StageCancelledError,
+    StageGraph,
+    StageGraphError,
+    StageGraphResult,
+    StageNode,
+    shutdown_stage_executor,
+)
+
 # Depth & normals estimation
 from .depth_normals import (
     estimate_depth,
@@ -88,6 +102,9 @@ from .pipeline import (
     run_shadow_model_with_sam,
 )
 
+# Per-stage progress events (streaming)
+from .progress import StageEvent, StageEventHooks
+
 # 8-stage pipeline (original)
 from .stages import (
     stage_01_input,
@@ -109,6 +126,9 @@ from .stages_v2 import (
     stage_04_depth_lighting,
     stage_05_fusion,
 )
+
+# Tiled / preview execution for large images
+from .tiling import QUALITY_LEVELS, map_tiles, refine_uncertain_tiles
 from .tokens import (
     ShadowFeatures,
     ShadowTokens,
@@ -205,6 +225,25 @@ __all__ = [
     # Orchestration
     "ShadowPipelineOrchestrator",
     "run_shadow_pipeline",
+    "StageGraph",
+    "StageNode",
+    "StageGraphResult",
+    "StageGraphError",
+    "StageCancelledError",
+    "shutdown_stage_executor",
+    "StageEvent",
+    "StageEventHooks",
+    # Batch processing
+    "BatchShadowRunner",
+    "BatchItem",
+    "BatchReport",
+    "collect_images",
+    "MicroBatcher",
+    "configure_inference_batching",
+    # Tiled / preview execution for large images
+    "QUALITY_LEVELS",
+    "map_tiles",
+    "refine_uncertain_tiles",
     # Enhanced models (v2)
     "estimate_depth",
     "estimate_normals",
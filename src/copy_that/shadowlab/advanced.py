@@ -13,6 +13,8 @@ from typing import Any
 
 import numpy as np
 
+from cv_pipeline.model_registry import get_model_registry, register_model
+
 logger = logging.getLogger(__name__)
 
 
@@ -172,37 +174,27 @@ def _light_dir_to_angles(L: np.ndarray) -> tuple[float, float]:
 # CLIP Shadow Style Embeddings
 # ============================================================================
 
-# Global cache for CLIP model
-_clip_model = None
-_clip_processor = None
+CLIP_MODEL_NAME = "shadowlab.clip"
 
 
-def _get_clip_model():
-    """Load and cache CLIP model."""
-    global _clip_model, _clip_processor
+def _load_clip_model():
+    from transformers import CLIPModel, CLIPProcessor
 
-    if _clip_model is not None:
-        return _clip_model, _clip_processor
+    model_name = "openai/clip-vit-base-patch32"
+    logger.info(f"Loading CLIP model: {model_name}")
 
-    try:
-        from transformers import CLIPModel, CLIPProcessor
+    processor = CLIPProcessor.from_pretrained(model_name)
+    model = CLIPModel.from_pretrained(model_name)
+    model.eval()
+    return model, processor
 
-        model_name = "openai/clip-vit-base-patch32"
-        logger.info(f"Loading CLIP model: {model_name}")
 
-        _clip_processor = CLIPProcessor.from_pretrained(model_name)
-        _clip_model = CLIPModel.from_pretrained(model_name)
-        _clip_model.eval()
+register_model(CLIP_MODEL_NAME, _load_clip_model)
 
-        logger.info("CLIP model loaded successfully")
-        return _clip_model, _clip_processor
 
-    except ImportError:
-        logger.warning("transformers not available for CLIP")
-        return None, None
-    except Exception as e:
-        logger.warning(f"Failed to load CLIP model: {e}")
-        return None, None
+def _get_clip_model():
+    """Load and cache CLIP model."""
+    return get_model_registry().get_optional(CLIP_MODEL_NAME) or (None, None)
 
 
 @dataclass
@@ -284,7 +276,7 @@ def extract_shadow_style_embedding(
         inputs = processor(images=pil_image, return_tensors="pt")
 
         # Get image embedding
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(CLIP_MODEL_NAME):
             image_features = model.get_image_features(**inputs)
             image_embedding = image_features[0].cpu().numpy()
 
@@ -330,40 +322,31 @@ def extract_shadow_style_embedding(
 # LLaVA Shadow Descriptions
 # ============================================================================
 
-_llava_model = None
-_llava_processor = None
+LLAVA_MODEL_NAME = "shadowlab.llava"
 
 
-def _get_llava_model():
-    """Load and cache LLaVA model."""
-    global _llava_model, _llava_processor
+def _load_llava_model():
+    from transformers import AutoProcessor, LlavaForConditionalGeneration
 
-    if _llava_model is not None:
-        return _llava_model, _llava_processor
+    # Use smaller LLaVA variant for efficiency
+    model_name = "llava-hf/llava-1.5-7b-hf"
+    logger.info(f"Loading LLaVA model: {model_name}")
 
-    try:
-        from transformers import AutoProcessor, LlavaForConditionalGeneration
+    processor = AutoProcessor.from_pretrained(model_name)
+    model = LlavaForConditionalGeneration.from_pretrained(
+        model_name,
+        torch_dtype="auto",
+        device_map="auto",
+    )
+    return model, processor
 
-        # Use smaller LLaVA variant for efficiency
-        model_name = "llava-hf/llava-1.5-7b-hf"
-        logger.info(f"Loading LLaVA model: {model_name}")
 
-        _llava_processor = AutoProcessor.from_pretrained(model_name)
-        _llava_model = LlavaForConditionalGeneration.from_pretrained(
-            model_name,
-            torch_dtype="auto",
-            device_map="auto",
-        )
+register_model(LLAVA_MODEL_NAME, _load_llava_model)
 
-        logger.info("LLaVA model loaded successfully")
-        return _llava_model, _llava_processor
 
-    except ImportError:
-        logger.warning("transformers not available for LLaVA")
-        return None, None
-    except Exception as e:
-        logger.warning(f"Failed to load LLaVA model: {e}")
-        return None, None
+def _get_llava_model():
+    """Load and cache LLaVA model."""
+    return get_model_registry().get_optional(LLAVA_MODEL_NAME) or (None, None)
 
 
 @dataclass
@@ -434,7 +417,7 @@ def generate_shadow_description(
         inputs = {k: v.to(model.device) for k, v in inputs.items()}
 
         # Generate
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(LLAVA_MODEL_NAME):
             output_ids = model.generate(
                 **inputs,
                 max_new_tokens=200,
@@ -0,0 +1,372 @@
+"""
+Batched, resumable shadow analysis over folders or manifests of images.
+
+Streams images through a worker pool that shares one process (and therefore one
+set of warm models from the model registry), orders work by image size so
+concurrent images can share batched neural inference (``shadowlab.batching``),
+and appends one JSON line per image to ``results.jsonl`` as soon as it
+finishes. Re-running with the same output directory skips images already
+recorded as ``ok``, so an interrupted nightly run resumes where it stopped.
+
+Usage:
+    python -m copy_that.shadowlab.batch screenshots/ --output out/ --workers 4
+    python -m copy_that.shadowlab.batch manifest.jsonl --output out/ --artifacts
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from cv_pipeline.model_registry import get_model_registry, warm_models_from_env
+
+from .batching import batching_stats, configure_inference_batching, inference_batching_config
+from .pipeline import MIDAS_MODEL_NAME, SAM_MODEL_NAME, SHADOW_MODEL_NAME, _numpy_json_default
+from .stages_v2 import run_pipeline_v2
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+RESULTS_FILENAME = "results.jsonl"
+ARTIFACT_NAMES = ("final_shadow_mask", "shadow_overlay", "ml_shadow_mask", "depth_map")
+# Images are bucketed by size (in px) so similarly sized ones run together
+SIZE_BUCKET_PX = 64
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One image to analyze; ``id`` keys results and resume state."""
+
+    id: str
+    path: Path
+
+
+def collect_images(source: str | Path) -> list[BatchItem]:
+    """
+    Images from a directory (recursive) or a manifest file.
+
+    Manifests are either ``.jsonl`` with ``{"path": ..., "id": ...}`` objects
+    (``id`` optional) or plain text with one path per line. Relative paths are
+    resolved against the manifest's directory.
+    """
+    source = Path(source)
+    if source.is_dir():
+        return [
+            BatchItem(id=p.relative_to(source).as_posix(), path=p)
+            for p in sorted(source.rglob("*"))
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+        ]
+
+    items = []
+    for line in source.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if source.suffix == ".jsonl":
+            entry = json.loads(line)
+            raw_path, item_id = entry["path"], entry.get("id")
+        else:
+            raw_path, item_id = line, None
+        path = Path(raw_path)
+        if not path.is_absolute():
+            path = source.parent / path
+        items.append(BatchItem(id=item_id or raw_path, path=path))
+    return items
+
+
+def _size_bucket(path: Path) -> tuple[int, int]:
+    try:
+        # Reads the header only, not the pixels
+        with Image.open(path) as img:
+            w, h = img.size
+    except Exception:
+        return (0, 0)
+    return (round(w / SIZE_BUCKET_PX), round(h / SIZE_BUCKET_PX))
+
+
+def _percentiles(values: Sequence[float]) -> dict[str, float]:
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p90, p95, p99 = np.percentile(arr, [50, 90, 95, 99])
+    return {
+        "p50": float(p50),
+        "p90": float(p90),
+        "p95": float(p95),
+        "p99": float(p99),
+        "count": len(values),
+    }
+
+
+def _format_percentiles(p: dict[str, float]) -> str:
+    return "  ".join(f"{q} {p[q]:.0f}ms" for q in ("p50", "p90", "p95", "p99"))
+
+
+@dataclass
+class BatchReport:
+    """Throughput and latency summary of one batch run."""
+
+    processed: int
+    failed: int
+    skipped: int
+    wall_seconds: float
+    image_percentiles: dict[str, float] = field(default_factory=dict)
+    stage_percentiles: dict[str, dict[str, float]] = field(default_factory=dict)
+    batching: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def images_per_second(self) -> float:
+        done = self.processed + self.failed
+        return done / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "wall_seconds": self.wall_seconds,
+            "images_per_second": self.images_per_second,
+            "image_percentiles_ms": self.image_percentiles,
+            "stage_percentiles_ms": self.stage_percentiles,
+            "batching": self.batching,
+        }
+
+    def format(self) -> str:
+        lines = [
+            f"Processed {self.processed} images ({self.failed} failed, "
+            f"{self.skipped} already done) in {self.wall_seconds:.1f}s "
+            f"= {self.images_per_second:.2f} images/sec",
+        ]
+        if self.image_percentiles:
+            lines.append(f"  per image: {_format_percentiles(self.image_percentiles)}")
+        for stage, p in self.stage_percentiles.items():
+            lines.append(f"  {stage:<20} {_format_percentiles(p)}")
+        for name, stats in self.batching.items():
+            lines.append(
+                f"  batching {name}: {stats['items']} calls in {stats['batches']} batches "
+                f"(mean {stats['mean_batch_size']:.1f})"
+            )
+        return "\n".join(lines)
+
+
+class BatchShadowRunner:
+    """Run ``run_pipeline_v2`` over many images with warm models and resume support."""
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        workers: int = 4,
+        high_quality: bool = True,
+        write_artifacts: bool = False,
+        target_size: tuple[int, int] | None = None,
+        inference_batch: int = 8,
+        inference_wait_ms: float = 10.0,
+    ):
+        """
+        Args:
+            output_dir: Receives results.jsonl (and artifacts/ if enabled)
+            workers: Images analyzed concurrently
+            high_quality: Use SAM boundary refinement (see run_pipeline_v2)
+            write_artifacts: Also write PNG masks/overlays per image
+            target_size: Optional (height, width) every image is resized to
+            inference_batch: Max images per batched model call (<=1 disables)
+            inference_wait_ms: How long a model call waits for batch peers
+        """
+        self.output_dir = Path(output_dir)
+        self.workers = max(1, workers)
+        self.high_quality = high_quality
+        self.write_artifacts = write_artifacts
+        self.target_size = target_size
+        self.inference_batch = inference_batch
+        self.inference_wait_ms = inference_wait_ms
+
+    @property
+    def results_path(self) -> Path:
+        return self.output_dir / RESULTS_FILENAME
+
+    def completed_ids(self) -> set[str]:
+        """Ids recorded as ``ok`` by earlier runs (truncated last lines are ignored)."""
+        done: set[str] = set()
+        if not self.results_path.exists():
+            return done
+        with open(self.results_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+        return done
+
+    def warm_models(self) -> dict[str, bool]:
+        """Load the models every image will need once, before the first image."""
+        names = [f"{MIDAS_MODEL_NAME}:MiDaS_small"]
+        names.append(SAM_MODEL_NAME if self.high_quality else SHADOW_MODEL_NAME)
+        warmed = get_model_registry().warm_up(names)
+        warmed.update(warm_models_from_env())
+        return warmed
+
+    def run(
+        self, items: Iterable[BatchItem], cancel_event: threading.Event | None = None
+    ) -> BatchReport:
+        """Analyze ``items``, appending to results.jsonl as each one finishes."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        items = list(items)
+        done = self.completed_ids()
+        todo = [item for item in items if item.id not in done]
+        todo.sort(key=lambda item: _size_bucket(item.path))
+        skipped = len(items) - len(todo)
+
+        image_ms: list[float] = []
+        stage_ms: dict[str, list[float]] = defaultdict(list)
+        processed = failed = 0
+        started = time.perf_counter()
+
+        # Batching is process-wide; put back whatever the host process had configured
+        previous_batching = inference_batching_config()
+        configure_inference_batching(self.inference_batch, self.inference_wait_ms)
+        # Each in-flight image runs up to three stages at once
+        stage_pool = ThreadPoolExecutor(
+            max_workers=self.workers * 3, thread_name_prefix="batch-stage"
+        )
+        image_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-image")
+        try:
+            self.warm_models()
+            queue = iter(todo)
+            running: dict[Future, BatchItem] = {}
+            with open(self.results_path, "a+") as out:
+                # A run killed mid-write leaves a partial line; start on a fresh one
+                if out.tell() > 0:
+                    out.seek(out.tell() - 1)
+                    if out.read(1) != "\n":
+                        out.write("\n")
+                while True:
+                    # Keep a small backlog in flight instead of submitting everything
+                    while len(running) < self.workers * 2 and not (
+                        cancel_event is not None and cancel_event.is_set()
+                    ):
+                        item = next(queue, None)
+                        if item is None:
+                            break
+                        running[image_pool.submit(self._process, item, stage_pool)] = item
+                    if not running:
+                        break
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        running.pop(future)
+                        record = future.result()
+                        out.write(json.dumps(record, default=_numpy_json_default) + "\n")
+                        out.flush()
+                        if record["status"] == "ok":
+                            processed += 1
+                            image_ms.append(record["duration_ms"])
+                            for stage, ms in record["stage_timings"].items():
+                                stage_ms[stage].append(ms)
+                        else:
+                            failed += 1
+        finally:
+            image_pool.shutdown(wait=True)
+            stage_pool.shutdown(wait=True)
+            stats = batching_stats()
+            configure_inference_batching(*previous_batching)
+
+        return BatchReport(
+            processed=processed,
+            failed=failed,
+            skipped=skipped,
+            wall_seconds=time.perf_counter() - started,
+            image_percentiles=_percentiles(image_ms) if image_ms else {},
+            stage_percentiles={name: _percentiles(v) for name, v in stage_ms.items()},
+            batching=stats,
+        )
+
+    def _process(self, item: BatchItem, stage_pool: ThreadPoolExecutor) -> dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = run_pipeline_v2(
+                str(item.path),
+                target_size=self.target_size,
+                high_quality=self.high_quality,
+                executor=stage_pool,
+            )
+            artifact_paths = self._write_artifacts(item, result["artifacts"])
+        except Exception as e:
+            logger.warning("Shadow analysis failed for %s: %s", item.path, e)
+            return {"id": item.id, "path": str(item.path), "status": "error", "error": str(e)}
+
+        return {
+            "id": item.id,
+            "path": str(item.path),
+            "status": "ok",
+            "tokens": result["shadow_tokens"].to_dict(),
+            "stage_timings": result["stage_timings"],
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "artifacts": artifact_paths,
+        }
+
+    def _write_artifacts(self, item: BatchItem, artifacts: dict[str, Any]) -> dict[str, str]:
+        if not self.write_artifacts:
+            return {}
+        target = self.output_dir / "artifacts" / item.id.replace("/", "__")
+        target.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name in ARTIFACT_NAMES:
+            data = artifacts.get(name)
+            if data is None:
+                continue
+            if data.dtype != np.uint8:
+                data = (np.clip(data, 0, 1) * 255).astype(np.uint8)
+            if data.ndim == 3:
+                data = cv2.cvtColor(data, cv2.COLOR_RGB2BGR)
+            path = target / f"{name}.png"
+            cv2.imwrite(str(path), data)
+            paths[name] = str(path)
+        return paths
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch shadow analysis")
+    parser.add_argument("source", help="Directory of images or manifest (.txt/.jsonl)")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=4, help="Images processed concurrently")
+    parser.add_argument("--fast", action="store_true", help="Skip SAM boundary refinement")
+    parser.add_argument("--artifacts", action="store_true", help="Also write PNG artifacts")
+    parser.add_argument("--batch-size", type=int, default=8, help="Max images per model call")
+    parser.add_argument("--batch-wait-ms", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, help="Only the first N images")
+    parser.add_argument("--report", help="Write the final report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    items = collect_images(args.source)
+    if args.limit:
+        items = items[: args.limit]
+
+    runner = BatchShadowRunner(
+        args.output,
+        workers=args.workers,
+        high_quality=not args.fast,
+        write_artifacts=args.artifacts,
+        inference_batch=args.batch_size,
+        inference_wait_ms=args.batch_wait_ms,
+    )
+    report = runner.run(items)
+    print(report.format())
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.to_dict(), indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
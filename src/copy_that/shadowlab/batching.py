@@ -0,0 +1,160 @@
+"""
+Cross-image micro-batching for neural inference.
+
+When many images are analyzed concurrently (see ``shadowlab.batch``), each
+worker thread still calls the models one image at a time. ``MicroBatcher``
+coalesces those calls: requests with the same key (model + input tensor shape,
+so only images of similar size are grouped) wait up to ``max_wait_ms`` for
+peers and then run as one batched forward pass.
+
+Batching is off unless enabled (``SHADOWLAB_INFERENCE_BATCH=8`` or
+``configure_inference_batching``), because a lone API request would otherwise
+pay the wait for nothing.
+"""
+
+import os
+import threading
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+BatchFn = Callable[[Hashable, list[Any]], Sequence[Any]]
+
+
+@dataclass(eq=False)
+class _Request:
+    item: Any
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent same-key calls into one ``batch_fn`` invocation."""
+
+    def __init__(self, batch_fn: BatchFn, max_batch: int = 8, max_wait_ms: float = 10.0):
+        """
+        Args:
+            batch_fn: ``batch_fn(key, items) -> results`` (same length and order)
+            max_batch: Flush as soon as this many requests share a key
+            max_wait_ms: Longest a request waits for peers before flushing
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._pending: dict[Hashable, list[_Request]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, item: Any) -> Any:
+        """Run ``item`` as part of a batch and return its individual result."""
+        request = _Request(item)
+        batch: list[_Request] | None = None
+        with self._lock:
+            group = self._pending.setdefault(key, [])
+            group.append(request)
+            if len(group) >= self.max_batch:
+                batch = self._pending.pop(key)
+
+        if batch is None and not request.done.wait(self.max_wait):
+            with self._lock:
+                group = self._pending.get(key)
+                if group is not None and request in group:
+                    # Waited long enough: this thread flushes whatever has gathered
+                    batch = self._pending.pop(key)
+
+        if batch is not None:
+            self._execute(key, batch)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _execute(self, key: Hashable, batch: list[_Request]) -> None:
+        try:
+            results = self.batch_fn(key, [r.item for r in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(batch)} items"
+                )
+            for request, result in zip(batch, results, strict=True):
+                request.result = result
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+            for request in batch:
+                request.done.set()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+# Process-wide batchers, created per model on first use while batching is enabled
+_batchers: dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+_max_batch = int(os.getenv("SHADOWLAB_INFERENCE_BATCH", "0"))
+_max_wait_ms = float(os.getenv("SHADOWLAB_INFERENCE_BATCH_WAIT_MS", "10"))
+
+
+def configure_inference_batching(max_batch: int, max_wait_ms: float = 10.0) -> None:
+    """Enable (``max_batch > 1``) or disable cross-image batching process-wide."""
+    global _max_batch, _max_wait_ms
+    with _batchers_lock:
+        _max_batch = max_batch
+        _max_wait_ms = max_wait_ms
+        _batchers.clear()
+
+
+def inference_batching_config() -> tuple[int, float]:
+    """Current ``(max_batch, max_wait_ms)``, e.g. to restore after a temporary change."""
+    with _batchers_lock:
+        return _max_batch, _max_wait_ms
+
+
+def get_batcher(name: str, batch_fn: BatchFn) -> MicroBatcher | None:
+    """Shared batcher for ``name``, or None when batching is disabled."""
+    if _max_batch <= 1:
+        return None
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = _batchers[name] = MicroBatcher(batch_fn, _max_batch, _max_wait_ms)
+        return batcher
+
+
+def batching_stats() -> dict[str, dict[str, float]]:
+    with _batchers_lock:
+        return {name: b.stats() for name, b in _batchers.items()}
+
+
+def concat_batch(items: Sequence[Any]) -> Any:
+    """Concatenate per-image tensors/arrays (each with a leading batch dim of 1)."""
+    if hasattr(items[0], "detach"):
+        import torch
+
+        return torch.cat(list(items), dim=0)
+    import numpy as np
+
+    return np.concatenate(items, axis=0)
+
+
+def split_batch(batch: Any, count: int) -> list[Any]:
+    """Inverse of ``concat_batch``: one slice (keeping the batch dim) per image.
+
+    Slices are copies, not views: results are cached per image, and a view
+    would keep the whole batch alive for as long as any one of them is.
+    """
+    if hasattr(batch, "detach"):
+        return [batch[i : i + 1].clone() for i in range(count)]
+    import numpy as np
+
+    return [np.copy(batch[i : i + 1]) for i in range(count)]
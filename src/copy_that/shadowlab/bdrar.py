@@ -17,18 +17,18 @@ Weight sources:
 """
 
 import logging
+from functools import partial
 from pathlib import Path
 
 import cv2
 import numpy as np
 
+from cv_pipeline.model_registry import get_model_registry
+
 logger = logging.getLogger(__name__)
 
-# Global cache for BDRAR model
-_bdrar_model = None
-_bdrar_device = None
-_bdrar_load_attempted = False
-_bdrar_load_failed = False
+# BDRAR is cached per device in the process-wide model registry
+BDRAR_MODEL_NAME = "shadowlab.bdrar"
 
 # Paths to check for BDRAR weights
 BDRAR_WEIGHT_PATHS = [
@@ -295,6 +295,42 @@ def _load_bdrar_weights(model, weights_path: Path, device: str = "cpu"):
         return None
 
 
+def _load_bdrar_model(device: str):
+    """Build BDRAR on ``device`` and load pretrained weights if present."""
+    import torch
+
+    # Determine device
+    if device == "cuda" and torch.cuda.is_available():
+        resolved = "cuda"
+    elif device == "mps" and hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        resolved = "mps"
+    else:
+        resolved = "cpu"
+
+    # Create model
+    model = _create_bdrar_model(resolved)
+    if model is None:
+        raise RuntimeError("BDRAR model creation failed")
+
+    # Try to load pretrained weights
+    weights_loaded = False
+    for weights_path in BDRAR_WEIGHT_PATHS:
+        if weights_path.exists():
+            result = _load_bdrar_weights(model, weights_path, resolved)
+            if result is not None:
+                model = result
+                weights_loaded = True
+                break
+
+    if not weights_loaded:
+        logger.info(
+            "BDRAR weights not found. Using random initialization. "
+            "Download weights to ~/.cache/shadowlab/bdrar.pth for better results."
+        )
+
+    return model, resolved
+
+
 def get_bdrar_model(device: str = "cpu"):
     """
     Get BDRAR model instance (cached).
@@ -308,65 +344,10 @@ def get_bdrar_model(device: str = "cpu"):
     Returns:
         (model, device) or (None, None) if creation fails
     """
-    global _bdrar_model, _bdrar_device, _bdrar_load_attempted, _bdrar_load_failed
-
-    if _bdrar_load_failed:
-        return None, None
-
-    if _bdrar_model is not None:
-        return _bdrar_model, _bdrar_device
-
-    if _bdrar_load_attempted:
-        return None, None
-
-    _bdrar_load_attempted = True
-
-    try:
-        import torch
-
-        # Determine device
-        if device == "cuda" and torch.cuda.is_available():
-            _bdrar_device = "cuda"
-        elif (
-            device == "mps" and hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
-        ):
-            _bdrar_device = "mps"
-        else:
-            _bdrar_device = "cpu"
-
-        # Create model
-        _bdrar_model = _create_bdrar_model(_bdrar_device)
-
-        if _bdrar_model is None:
-            _bdrar_load_failed = True
-            return None, None
-
-        # Try to load pretrained weights
-        weights_loaded = False
-        for weights_path in BDRAR_WEIGHT_PATHS:
-            if weights_path.exists():
-                result = _load_bdrar_weights(_bdrar_model, weights_path, _bdrar_device)
-                if result is not None:
-                    _bdrar_model = result
-                    weights_loaded = True
-                    break
-
-        if not weights_loaded:
-            logger.info(
-                "BDRAR weights not found. Using random initialization. "
-                "Download weights to ~/.cache/shadowlab/bdrar.pth for better results."
-            )
-
-        return _bdrar_model, _bdrar_device
-
-    except ImportError:
-        logger.warning("PyTorch not available for BDRAR")
-        _bdrar_load_failed = True
-        return None, None
-    except Exception as e:
-        logger.warning(f"BDRAR initialization failed: {e}")
-        _bdrar_load_failed = True
-        return None, None
+    loaded = get_model_registry().get_optional(
+        f"{BDRAR_MODEL_NAME}:{device}", partial(_load_bdrar_model, device)
+    )
+    return loaded or (None, None)
 
 
 def run_bdrar(
@@ -417,7 +398,7 @@ def run_bdrar(
         input_tensor = transform(image_uint8).unsqueeze(0).to(device)
 
         # Run inference
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(BDRAR_MODEL_NAME):
             output = model(input_tensor)
 
         # Convert to numpy
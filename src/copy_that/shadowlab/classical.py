@@ -20,11 +20,14 @@ Limitations:
 """
 
 from dataclasses import dataclass
+from functools import partial
 from typing import Any
 
 import cv2
 import numpy as np
 
+from .tiling import map_tiles, uint8_percentiles
+
 
 @dataclass
 class ShadowClassicalConfig:
@@ -50,6 +53,77 @@ class ShadowClassicalConfig:
     min_shadow_area_fraction: float = 0.001
     """Minimum shadow area as fraction of image size."""
 
+    # Execution
+    tile_size: int | None = None
+    """Compute the per-pixel and local maps in parallel tiles of this size (None = whole frame)."""
+
+
+def _value_channel(image_bgr: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)[:, :, 2]
+
+
+def _log_chromaticity_norm(image_bgr: np.ndarray) -> np.ndarray:
+    # Safe division: avoid log(0)
+    log_bgr = image_bgr.astype(np.float32)
+    log_bgr += 1e-6
+    np.log(log_bgr, out=log_bgr)
+    log_bgr -= log_bgr.sum(axis=2, keepdims=True) / 3.0
+    return np.linalg.norm(log_bgr, axis=2)
+
+
+def _shadow_likelihood(
+    brightness_threshold: float,
+    kernel_size: int,
+    config: ShadowClassicalConfig,
+    value: np.ndarray,
+) -> np.ndarray:
+    """Brightness/contrast likelihoods, soft map and cleaned soft map, stacked as planes."""
+    brightness = value.astype(np.float32)
+    brightness /= 255.0  # Normalize to [0, 1]
+
+    # Brightness-based likelihood: darker regions are likely shadows
+    brightness_likelihood = np.clip(
+        (brightness_threshold - brightness) / (brightness_threshold + 1e-8),
+        0,
+        1,
+    )
+
+    # Local contrast: shadows are darker than their surroundings
+    # Use morphological operations to estimate local brightness
+    local_max = cv2.morphologyEx(
+        (brightness * 255).astype(np.uint8),
+        cv2.MORPH_DILATE,
+        cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size)),
+    )
+    local_contrast = 1.0 - (brightness * 255 / (local_max.astype(np.float32) + 1e-8))
+    local_contrast = np.clip(local_contrast, 0, 1)
+
+    # Combine: soft shadow map
+    shadow_soft = brightness_likelihood * 0.6 + local_contrast * 0.4
+
+    # Convert soft map to uint8 for morphology operations
+    shadow_uint8 = (shadow_soft * 255).astype(np.uint8)
+
+    # Opening: remove small noise
+    open_kernel = cv2.getStructuringElement(
+        cv2.MORPH_ELLIPSE,
+        (config.morph_open_size, config.morph_open_size),
+    )
+    shadow_opened = cv2.morphologyEx(shadow_uint8, cv2.MORPH_OPEN, open_kernel, iterations=1)
+
+    # Closing: fill holes
+    close_kernel = cv2.getStructuringElement(
+        cv2.MORPH_ELLIPSE,
+        (config.morph_close_size, config.morph_close_size),
+    )
+    shadow_closed = cv2.morphologyEx(shadow_opened, cv2.MORPH_CLOSE, close_kernel, iterations=1)
+
+    return np.stack(
+        [brightness, brightness_likelihood, local_contrast, shadow_soft, shadow_closed],
+        axis=2,
+        dtype=np.float32,
+    )
+
 
 def detect_shadows_classical(
     image_bgr: np.ndarray,
@@ -88,73 +162,32 @@ def detect_shadows_classical(
 
     # ========== Step 1: Convert to illumination-invariant representations ==========
 
-    # HSV: Extract value (brightness) channel
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV).astype(np.float32)
-    brightness = hsv[:, :, 2] / 255.0  # Normalize to [0, 1]
+    # HSV value (brightness) channel; its 8-bit histogram gives the global
+    # brightness percentile exactly, so tiles can share the threshold
+    value = map_tiles(_value_channel, (image_bgr,), config.tile_size)
+    brightness_threshold = float(uint8_percentiles(value, config.brightness_percentile)[()] / 255.0)
 
-    # Log-chromaticity (illumination-invariant color)
-    # Safe division: avoid log(0)
-    img_float = image_bgr.astype(np.float32) + 1e-6
-    log_r = np.log(img_float[:, :, 2])
-    log_g = np.log(img_float[:, :, 1])
-    log_b = np.log(img_float[:, :, 0])
-
-    log_sum = log_r + log_g + log_b
-    log_chromaticity = np.stack(
-        [
-            log_r - log_sum / 3.0,
-            log_g - log_sum / 3.0,
-            log_b - log_sum / 3.0,
-        ],
-        axis=2,
-    )
-
-    # Normalize chromaticity for comparison
-    chroma_norm = np.linalg.norm(log_chromaticity, axis=2)
-    chroma_norm = (chroma_norm - chroma_norm.min()) / (chroma_norm.max() - chroma_norm.min() + 1e-8)
-
-    # ========== Step 2: Compute shadow likelihood maps ==========
+    # Log-chromaticity (illumination-invariant color), normalized globally
+    chroma_norm = map_tiles(_log_chromaticity_norm, (image_bgr,), config.tile_size)
+    chroma_min, chroma_max = chroma_norm.min(), chroma_norm.max()
+    chroma_norm -= chroma_min
+    chroma_norm /= chroma_max - chroma_min + 1e-8
 
-    # Brightness-based likelihood: darker regions are likely shadows
-    brightness_threshold = np.percentile(brightness, config.brightness_percentile)
-    brightness_likelihood = np.clip(
-        (brightness_threshold - brightness) / (brightness_threshold + 1e-8),
-        0,
-        1,
-    )
+    # ========== Steps 2-3: Shadow likelihood maps and morphological cleanup ==========
 
-    # Local contrast: shadows are darker than their surroundings
-    # Use morphological operations to estimate local brightness
+    # Local operations only; the halo covers the dilation plus open/close radii
     kernel_size = max(3, config.local_window_size - (config.local_window_size % 2))
-    local_max = cv2.morphologyEx(
-        (brightness * 255).astype(np.uint8),
-        cv2.MORPH_DILATE,
-        cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size)),
+    halo = kernel_size // 2 + 2 * (config.morph_open_size // 2 + config.morph_close_size // 2)
+    planes = map_tiles(
+        partial(_shadow_likelihood, brightness_threshold, kernel_size, config),
+        (value,),
+        config.tile_size,
+        halo=halo,
     )
-    local_contrast = 1.0 - (brightness * 255 / (local_max.astype(np.float32) + 1e-8))
-    local_contrast = np.clip(local_contrast, 0, 1)
-
-    # Combine: soft shadow map
-    shadow_soft = brightness_likelihood * 0.6 + local_contrast * 0.4
-
-    # ========== Step 3: Morphological cleanup ==========
-
-    # Convert soft map to uint8 for morphology operations
-    shadow_uint8 = (shadow_soft * 255).astype(np.uint8)
-
-    # Opening: remove small noise
-    open_kernel = cv2.getStructuringElement(
-        cv2.MORPH_ELLIPSE,
-        (config.morph_open_size, config.morph_open_size),
-    )
-    shadow_opened = cv2.morphologyEx(shadow_uint8, cv2.MORPH_OPEN, open_kernel, iterations=1)
-
-    # Closing: fill holes
-    close_kernel = cv2.getStructuringElement(
-        cv2.MORPH_ELLIPSE,
-        (config.morph_close_size, config.morph_close_size),
+    brightness, brightness_likelihood, local_contrast, shadow_soft = (
+        planes[:, :, i] for i in range(4)
     )
-    shadow_closed = cv2.morphologyEx(shadow_opened, cv2.MORPH_CLOSE, close_kernel, iterations=1)
+    shadow_closed = planes[:, :, 4].astype(np.uint8)
 
     # ========== Step 4: Binary mask via adaptive threshold ==========
 
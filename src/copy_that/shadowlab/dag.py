@@ -0,0 +1,290 @@
+"""
+Dependency-graph executor for shadow pipeline stages.
+
+Stages declare the artifacts they consume and produce by name; the graph runs
+every stage as soon as its inputs exist, so independent stages (classical
+candidates, ML mask, intrinsic, depth/normals) overlap and per-image latency
+approaches the critical path rather than the sum of all stages.
+
+Stage functions keep the existing convention
+``fn(**inputs) -> (ShadowStageResult, list[ShadowVisualLayer], artifacts, *extras)``;
+``extras`` names trailing return values (e.g. ``shadow_tokens``) so they can be
+consumed like artifacts.
+
+Stages run on a shared thread pool (``SHADOWLAB_STAGE_WORKERS``, default 4):
+the heavy work is NumPy/OpenCV/torch, which releases the GIL, and threads
+share the large arrays between stages without pickling.
+
+Passing ``retain`` to ``run`` switches to memory mode: each artifact is dropped
+as soon as its last consuming stage has finished (unless retained), after
+``on_artifacts`` has had a chance to persist it.
+
+Example:
+    >>> graph = StageGraph([
+    ...     StageNode("illumination", stage_02_illumination, ("rgb_image",), ("illumination_map",)),
+    ...     StageNode("ml_mask", stage_04_ml_mask, ("rgb_image",), ("ml_shadow_mask",)),
+    ... ])
+    >>> run = graph.run({"rgb_image": rgb})
+    >>> run.artifacts["ml_shadow_mask"]
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Collection, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from .memory import RssMonitor
+from .pipeline import ShadowStageResult, ShadowVisualLayer
+
+
+class StageCancelledError(RuntimeError):
+    """Raised when a graph run is cancelled before all stages finished."""
+
+
+class StageGraphError(ValueError):
+    """Raised for graphs with missing inputs, duplicate outputs or cycles."""
+
+
+@dataclass(frozen=True)
+class StageNode:
+    """One pipeline stage and the artifacts it reads and writes."""
+
+    name: str
+    fn: Callable[..., tuple]
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    extras: tuple[str, ...] = ()
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageTiming:
+    """Wall-clock placement of a stage relative to the start of the run."""
+
+    start_ms: float
+    end_ms: float
+    # Peak process RSS while the stage ran (set when the run tracks memory)
+    peak_rss_bytes: int | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms
+
+
+@dataclass
+class StageGraphResult:
+    """Outputs of a graph run; stage-ordered fields follow declaration order."""
+
+    stages: list[ShadowStageResult]
+    stage_layers: list[list[ShadowVisualLayer]]
+    artifacts: dict[str, Any]
+    timings: dict[str, StageTiming]
+    wall_ms: float
+
+    @property
+    def visual_layers(self) -> list[ShadowVisualLayer]:
+        return [layer for layers in self.stage_layers for layer in layers]
+
+    @property
+    def stage_sum_ms(self) -> float:
+        """Latency the stages would have had if run strictly in sequence."""
+        return sum(t.duration_ms for t in self.timings.values())
+
+
+# Shared pool for all graph runs in the process
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Get or create the shared stage thread pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.getenv("SHADOWLAB_STAGE_WORKERS", "4"))
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, workers), thread_name_prefix="shadow-stage"
+            )
+        return _executor
+
+
+def shutdown_stage_executor() -> None:
+    """Stop the shared stage pool (a new one is created on next use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+class StageGraph:
+    """Validated DAG of ``StageNode`` that runs independent stages concurrently."""
+
+    def __init__(self, nodes: Sequence[StageNode], seeds: Sequence[str] = ()):
+        """
+        Args:
+            nodes: Stages in their canonical (reporting) order
+            seeds: Artifact names supplied by the caller at run time
+        """
+        self.nodes = list(nodes)
+        self.seeds = tuple(seeds)
+        self._validate()
+        # Number of stages reading each artifact, for releasing it after the last one
+        self._consumers = Counter(i for node in self.nodes for i in node.inputs)
+
+    def _validate(self) -> None:
+        producers: dict[str, str] = {}
+        names = set()
+        for node in self.nodes:
+            if node.name in names:
+                raise StageGraphError(f"Duplicate stage name: {node.name}")
+            names.add(node.name)
+            for output in (*node.outputs, *node.extras):
+                if output in producers or output in self.seeds:
+                    raise StageGraphError(f"Artifact {output!r} is produced more than once")
+                producers[output] = node.name
+
+        available = set(self.seeds)
+        pending = list(self.nodes)
+        while pending:
+            ready = [n for n in pending if all(i in available for i in n.inputs)]
+            if not ready:
+                missing = {i for n in pending for i in n.inputs if i not in producers}
+                if missing:
+                    raise StageGraphError(f"No stage produces: {sorted(missing)}")
+                raise StageGraphError(f"Cycle between stages: {[n.name for n in pending]}")
+            for node in ready:
+                available.update(node.outputs)
+                available.update(node.extras)
+                pending.remove(node)
+
+    def run(
+        self,
+        seeds: Mapping[str, Any],
+        executor: ThreadPoolExecutor | None = None,
+        cancel_event: threading.Event | None = None,
+        on_stage_complete: Callable[[StageNode, ShadowStageResult, StageTiming], None]
+        | None = None,
+        retain: Collection[str] | None = None,
+        on_artifacts: Callable[[StageNode, Mapping[str, Any]], None] | None = None,
+        memory_monitor: RssMonitor | None = None,
+    ) -> StageGraphResult:
+        """
+        Execute the graph.
+
+        Args:
+            seeds: Values for the graph's seed artifacts (e.g. image_path)
+            executor: Pool to run stages on (default: shared stage pool)
+            cancel_event: Set to stop scheduling; raises StageCancelledError
+            on_stage_complete: Called on the scheduling thread after each stage
+            retain: Enables memory mode: only these artifacts survive the run;
+                every other one is released after its last consumer finished
+            on_artifacts: Called with each stage's artifacts before any are
+                released (e.g. to write them to disk)
+            memory_monitor: Running RssMonitor; fills ``StageTiming.peak_rss_bytes``
+
+        Returns:
+            StageGraphResult with merged (or, in memory mode, retained)
+            artifacts and per-stage timings
+
+        Raises:
+            StageCancelledError: If cancel_event was set mid-run
+            Exception: The first stage failure; stages not yet started are cancelled
+        """
+        missing = [s for s in self.seeds if s not in seeds]
+        if missing:
+            raise StageGraphError(f"Missing seed artifacts: {missing}")
+
+        pool = executor or get_stage_executor()
+        available: dict[str, Any] = {k: seeds[k] for k in self.seeds}
+        raw: dict[str, tuple] = {}
+        timings: dict[str, StageTiming] = {}
+        pending = list(self.nodes)
+        running: dict[Future, StageNode] = {}
+        remaining = Counter(self._consumers)
+        owners: dict[str, dict[str, Any]] = {}
+        run_start = time.perf_counter()
+
+        def _call(
+            node: StageNode, inputs: dict[str, Any]
+        ) -> tuple[tuple, float, float, int | None]:
+            window = memory_monitor.open_window() if memory_monitor is not None else None
+            started = time.perf_counter()
+            result = node.fn(**inputs, **node.kwargs)
+            ended = time.perf_counter()
+            peak = memory_monitor.close_window(window) if window is not None else None
+            return result, started, ended, peak
+
+        def _release(name: str) -> None:
+            available.pop(name, None)
+            owner = owners.pop(name, None)
+            if owner is not None:
+                owner.pop(name, None)
+
+        try:
+            while pending or running:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise StageCancelledError("Shadow pipeline run cancelled")
+
+                for node in [n for n in pending if all(i in available for i in n.inputs)]:
+                    pending.remove(node)
+                    inputs = {i: available[i] for i in node.inputs}
+                    running[pool.submit(_call, node, inputs)] = node
+
+                done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    result, started, ended, peak = future.result()
+                    stage_result, layers, artifacts, *extra_values = result
+                    for output in node.outputs:
+                        if output not in artifacts:
+                            raise StageGraphError(f"Stage {node.name!r} did not produce {output!r}")
+                        available[output] = artifacts[output]
+                    available.update(zip(node.extras, extra_values, strict=True))
+                    timings[node.name] = StageTiming(
+                        start_ms=(started - run_start) * 1000,
+                        end_ms=(ended - run_start) * 1000,
+                        peak_rss_bytes=peak,
+                    )
+                    if on_artifacts is not None:
+                        on_artifacts(node, artifacts)
+                    if retain is not None:
+                        # Keep our own dict so releasing never mutates the stage's
+                        artifacts = dict(artifacts)
+                        result = (stage_result, layers, artifacts, *extra_values)
+                        owners.update(dict.fromkeys(artifacts, artifacts))
+                        for name in node.inputs:
+                            remaining[name] -= 1
+                            if remaining[name] <= 0 and name not in retain:
+                                _release(name)
+                        for name in list(artifacts):
+                            if remaining[name] <= 0 and name not in retain:
+                                _release(name)
+                    raw[node.name] = result
+                    if on_stage_complete is not None:
+                        on_stage_complete(node, stage_result, timings[node.name])
+        finally:
+            for future in running:
+                future.cancel()
+
+        stages: list[ShadowStageResult] = []
+        layers: list[list[ShadowVisualLayer]] = []
+        merged: dict[str, Any] = {}
+        for node in self.nodes:
+            stage_result, stage_layers, artifacts, *extra_values = raw[node.name]
+            stages.append(stage_result)
+            layers.append(list(stage_layers))
+            merged.update(artifacts)
+            merged.update(zip(node.extras, extra_values, strict=True))
+
+        return StageGraphResult(
+            stages=stages,
+            stage_layers=layers,
+            artifacts=merged,
+            timings=timings,
+            wall_ms=(time.perf_counter() - run_start) * 1000,
+        )
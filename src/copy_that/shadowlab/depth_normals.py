@@ -19,127 +19,90 @@ References:
 """
 
 import logging
+from functools import partial
 from typing import Any
 
 import cv2
 import numpy as np
 
-logger = logging.getLogger(__name__)
-
-
-# Global model caches
-_zoedepth_model = None
-_midas_model = None
-_omnidata_normals_model = None
+from cv_pipeline.model_registry import get_model_registry
 
+logger = logging.getLogger(__name__)
 
-def _get_zoedepth_model(device: str = "cpu"):
-    """Load and cache ZoeDepth model."""
-    global _zoedepth_model
 
-    if _zoedepth_model is not None:
-        return _zoedepth_model
+# Models are loaded once per (model, device) via the process-wide registry;
+# failed loads are retried with backoff instead of on every call.
 
-    try:
-        import torch
 
-        logger.info("Loading ZoeDepth model...")
+def _registry_model(name: str, device: str, loader):
+    """Fetch ``name`` on ``device`` from the model registry, or None if unavailable."""
+    return get_model_registry().get_optional(f"{name}:{device}", partial(loader, device))
 
-        # Try to load ZoeDepth from torch hub
-        try:
-            _zoedepth_model = torch.hub.load(
-                "isl-org/ZoeDepth",
-                "ZoeD_NK",  # ZoeDepth with NYU+KITTI training
-                pretrained=True,
-            )
-            _zoedepth_model.eval()
-            _zoedepth_model = _zoedepth_model.to(device)
-            logger.info("ZoeDepth model loaded successfully")
-            return _zoedepth_model
-        except Exception as e:
-            logger.warning(f"Could not load ZoeDepth from hub: {e}")
-            return None
 
-    except ImportError:
-        logger.warning("PyTorch not available for ZoeDepth")
-        return None
+def _load_zoedepth(device: str):
+    import torch
 
+    logger.info("Loading ZoeDepth model...")
+    model = torch.hub.load(
+        "isl-org/ZoeDepth",
+        "ZoeD_NK",  # ZoeDepth with NYU+KITTI training
+        pretrained=True,
+    )
+    model.eval()
+    return model.to(device)
 
-def _get_midas_model(device: str = "cpu"):
-    """Load and cache MiDaS v3 model (fallback for ZoeDepth)."""
-    global _midas_model
 
-    if _midas_model is not None:
-        return _midas_model
+def _load_midas(device: str):
+    import torch
 
-    try:
-        import torch
+    logger.info("Loading MiDaS v3 model...")
+    model = torch.hub.load(
+        "intel-isl/MiDaS",
+        "DPT_Large",  # Best quality
+        pretrained=True,
+    )
+    model.eval()
+    return model.to(device)
 
-        logger.info("Loading MiDaS v3 model...")
 
-        try:
-            _midas_model = torch.hub.load(
-                "intel-isl/MiDaS",
-                "DPT_Large",  # Best quality
-                pretrained=True,
-            )
-            _midas_model.eval()
-            _midas_model = _midas_model.to(device)
-            logger.info("MiDaS model loaded successfully")
-            return _midas_model
-        except Exception as e:
-            logger.warning(f"Could not load MiDaS: {e}")
-            return None
+def _load_omnidata(device: str):
+    import torch
 
-    except ImportError:
-        logger.warning("PyTorch not available for MiDaS")
-        return None
+    logger.info("Loading Omnidata normals model...")
 
+    # Omnidata models via torch hub
+    try:
+        model = torch.hub.load(
+            "EPFL-VILAB/omnidata",
+            "normals",
+            pretrained=True,
+        )
+    except Exception as hub_error:
+        logger.warning(f"Could not load Omnidata from hub: {hub_error}")
 
-def _get_omnidata_model(device: str = "cpu"):
-    """Load and cache Omnidata normals model."""
-    global _omnidata_normals_model
+        # Try alternative: DPT-based normals from transformers
+        from transformers import DPTForDepthEstimation
 
-    if _omnidata_normals_model is not None:
-        return _omnidata_normals_model
+        # DPT can also do normals
+        model = DPTForDepthEstimation.from_pretrained("Intel/dpt-large")
+        logger.info("Loaded DPT as normals fallback")
+    model.eval()
+    return model.to(device)
 
-    try:
-        import torch
 
-        logger.info("Loading Omnidata normals model...")
+def _get_zoedepth_model(device: str = "cpu"):
+    """Load and cache ZoeDepth model."""
+    return _registry_model("shadowlab.zoedepth", device, _load_zoedepth)
 
-        # Omnidata models via torch hub
-        try:
-            _omnidata_normals_model = torch.hub.load(
-                "EPFL-VILAB/omnidata",
-                "normals",
-                pretrained=True,
-            )
-            _omnidata_normals_model.eval()
-            _omnidata_normals_model = _omnidata_normals_model.to(device)
-            logger.info("Omnidata normals model loaded successfully")
-            return _omnidata_normals_model
-        except Exception as hub_error:
-            logger.warning(f"Could not load Omnidata from hub: {hub_error}")
-
-            # Try alternative: DPT-based normals from timm
-            try:
-                from transformers import DPTForDepthEstimation
 
-                # DPT can also do normals
-                _omnidata_normals_model = DPTForDepthEstimation.from_pretrained("Intel/dpt-large")
-                _omnidata_normals_model.eval()
-                _omnidata_normals_model = _omnidata_normals_model.to(device)
-                logger.info("Loaded DPT as normals fallback")
-                return _omnidata_normals_model
-            except Exception:
-                pass
+def _get_midas_model(device: str = "cpu"):
+    """Load and cache MiDaS v3 model (fallback for ZoeDepth)."""
+    return _registry_model("shadowlab.midas_dpt", device, _load_midas)
 
-            return None
 
-    except ImportError:
-        logger.warning("PyTorch not available for Omnidata")
-        return None
+def _get_omnidata_model(device: str = "cpu"):
+    """Load and cache Omnidata normals model."""
+    return _registry_model("shadowlab.omnidata", device, _load_omnidata)
 
 
 def _estimate_depth_zoedepth(
@@ -276,7 +239,8 @@ def estimate_depth(
         zoedepth = _get_zoedepth_model(device)
         if zoedepth is not None:
             try:
-                return _estimate_depth_zoedepth(image_bgr, zoedepth, device)
+                with get_model_registry().track("shadowlab.zoedepth"):
+                    return _estimate_depth_zoedepth(image_bgr, zoedepth, device)
             except Exception as e:
                 logger.warning(f"ZoeDepth inference failed: {e}")
 
@@ -284,7 +248,8 @@ def estimate_depth(
     midas = _get_midas_model(device)
     if midas is not None:
         try:
-            return _estimate_depth_midas(image_bgr, midas, device)
+            with get_model_registry().track("shadowlab.midas_dpt"):
+                return _estimate_depth_midas(image_bgr, midas, device)
         except Exception as e:
             logger.warning(f"MiDaS inference failed: {e}")
 
@@ -417,7 +382,8 @@ def estimate_normals(
         omnidata = _get_omnidata_model(device)
         if omnidata is not None:
             try:
-                return _estimate_normals_omnidata(image_bgr, omnidata, device)
+                with get_model_registry().track("shadowlab.omnidata"):
+                    return _estimate_normals_omnidata(image_bgr, omnidata, device)
             except Exception as e:
                 logger.warning(f"Omnidata inference failed: {e}")
 
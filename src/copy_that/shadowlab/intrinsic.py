@@ -27,20 +27,21 @@ References:
 """
 
 import logging
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 import cv2
 import numpy as np
 
+from cv_pipeline.model_registry import get_model_registry
+
 logger = logging.getLogger(__name__)
 
 
-# Global caches for models
-_cgintrinsics_model = None
-_cgintrinsics_transform = None
-_intrinsicnet_model = None
-_intrinsicnet_device = None
+# Models are cached per device in the process-wide model registry
+CGINTRINSICS_MODEL_NAME = "shadowlab.cgintrinsics"
+INTRINSICNET_MODEL_NAME = "shadowlab.intrinsicnet"
 
 # Paths for IntrinsicNet weights
 INTRINSICNET_WEIGHT_PATHS = [
@@ -50,6 +51,54 @@ INTRINSICNET_WEIGHT_PATHS = [
 ]
 
 
+def _load_cgintrinsics_model(device: str):
+    import torch
+    import torchvision.transforms as T
+
+    # Try to load from torch hub or local weights
+    # CGIntrinsics architecture: ResNet encoder + decoder heads
+    logger.info("Loading CGIntrinsics model...")
+
+    # Check for local weights first
+    weights_path = Path.home() / ".cache" / "shadowlab" / "cgintrinsics.pth"
+
+    if weights_path.exists():
+        logger.info(f"Loading CGIntrinsics from {weights_path}")
+        model = torch.load(weights_path, map_location=device)
+    else:
+        # Try torch hub
+        try:
+            model = torch.hub.load(
+                "CSAILVision/semantic-segmentation-pytorch",
+                "resnet50dilated",
+                pretrained=True,
+            )
+            logger.info("Loaded ResNet50 backbone (CGIntrinsics-style)")
+        except Exception as hub_error:
+            logger.warning(f"Could not load from hub: {hub_error}")
+            # Use our own simple intrinsic network
+            model = _create_simple_intrinsic_net(device)
+
+    if model is None:
+        raise RuntimeError("No CGIntrinsics model could be created")
+    model.eval()
+    if hasattr(model, "to"):
+        model = model.to(device)
+
+    # Transform for preprocessing
+    transform = T.Compose(
+        [
+            T.ToPILImage(),
+            T.Resize((384, 384)),
+            T.ToTensor(),
+            T.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+        ]
+    )
+
+    logger.info("CGIntrinsics model loaded successfully")
+    return model, transform
+
+
 def _get_cgintrinsics_model(device: str = "cpu"):
     """
     Load and cache CGIntrinsics model.
@@ -57,65 +106,10 @@ def _get_cgintrinsics_model(device: str = "cpu"):
     CGIntrinsics uses an encoder-decoder architecture trained on
     physically-based rendered images for high-quality decomposition.
     """
-    global _cgintrinsics_model, _cgintrinsics_transform
-
-    if _cgintrinsics_model is not None:
-        return _cgintrinsics_model, _cgintrinsics_transform
-
-    try:
-        import torch
-        import torchvision.transforms as T
-
-        # Try to load from torch hub or local weights
-        # CGIntrinsics architecture: ResNet encoder + decoder heads
-        logger.info("Loading CGIntrinsics model...")
-
-        # Check for local weights first
-        from pathlib import Path
-
-        weights_path = Path.home() / ".cache" / "shadowlab" / "cgintrinsics.pth"
-
-        if weights_path.exists():
-            logger.info(f"Loading CGIntrinsics from {weights_path}")
-            _cgintrinsics_model = torch.load(weights_path, map_location=device)
-        else:
-            # Try torch hub
-            try:
-                _cgintrinsics_model = torch.hub.load(
-                    "CSAILVision/semantic-segmentation-pytorch",
-                    "resnet50dilated",
-                    pretrained=True,
-                )
-                logger.info("Loaded ResNet50 backbone (CGIntrinsics-style)")
-            except Exception as hub_error:
-                logger.warning(f"Could not load from hub: {hub_error}")
-                # Use our own simple intrinsic network
-                _cgintrinsics_model = _create_simple_intrinsic_net(device)
-
-        if _cgintrinsics_model is not None:
-            _cgintrinsics_model.eval()
-            if hasattr(_cgintrinsics_model, "to"):
-                _cgintrinsics_model = _cgintrinsics_model.to(device)
-
-        # Transform for preprocessing
-        _cgintrinsics_transform = T.Compose(
-            [
-                T.ToPILImage(),
-                T.Resize((384, 384)),
-                T.ToTensor(),
-                T.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
-            ]
-        )
-
-        logger.info("CGIntrinsics model loaded successfully")
-        return _cgintrinsics_model, _cgintrinsics_transform
-
-    except ImportError:
-        logger.warning("PyTorch not available for CGIntrinsics")
-        return None, None
-    except Exception as e:
-        logger.warning(f"Failed to load CGIntrinsics: {e}")
-        return None, None
+    loaded = get_model_registry().get_optional(
+        f"{CGINTRINSICS_MODEL_NAME}:{device}", partial(_load_cgintrinsics_model, device)
+    )
+    return loaded or (None, None)
 
 
 def _create_simple_intrinsic_net(device: str = "cpu"):
@@ -463,6 +457,33 @@ def _load_intrinsicnet_weights(model, weights_path: Path, device: str = "cpu"):
         return None
 
 
+def _load_intrinsicnet_model(device: str):
+    import torch
+
+    # Determine device
+    if device == "cuda" and torch.cuda.is_available():
+        resolved = "cuda"
+    elif device == "mps" and hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        resolved = "mps"
+    else:
+        resolved = "cpu"
+
+    # Create model
+    model = _create_intrinsicnet(resolved)
+    if model is None:
+        raise RuntimeError("IntrinsicNet model creation failed")
+
+    # Try to load pretrained weights
+    for weights_path in INTRINSICNET_WEIGHT_PATHS:
+        if weights_path.exists():
+            result = _load_intrinsicnet_weights(model, weights_path, resolved)
+            if result is not None:
+                model = result
+                break
+
+    return model, resolved
+
+
 def get_intrinsicnet_model(device: str = "cpu"):
     """
     Get IntrinsicNet model instance (cached).
@@ -475,45 +496,10 @@ def get_intrinsicnet_model(device: str = "cpu"):
     Returns:
         (model, device) or (None, None) if creation fails
     """
-    global _intrinsicnet_model, _intrinsicnet_device
-
-    if _intrinsicnet_model is not None:
-        return _intrinsicnet_model, _intrinsicnet_device
-
-    try:
-        import torch
-
-        # Determine device
-        if device == "cuda" and torch.cuda.is_available():
-            _intrinsicnet_device = "cuda"
-        elif (
-            device == "mps" and hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
-        ):
-            _intrinsicnet_device = "mps"
-        else:
-            _intrinsicnet_device = "cpu"
-
-        # Create model
-        _intrinsicnet_model = _create_intrinsicnet(_intrinsicnet_device)
-
-        if _intrinsicnet_model is None:
-            return None, None
-
-        # Try to load pretrained weights
-        for weights_path in INTRINSICNET_WEIGHT_PATHS:
-            if weights_path.exists():
-                result = _load_intrinsicnet_weights(
-                    _intrinsicnet_model, weights_path, _intrinsicnet_device
-                )
-                if result is not None:
-                    _intrinsicnet_model = result
-                    break
-
-        return _intrinsicnet_model, _intrinsicnet_device
-
-    except ImportError:
-        logger.warning("PyTorch not available for IntrinsicNet")
-        return None, None
+    loaded = get_model_registry().get_optional(
+        f"{INTRINSICNET_MODEL_NAME}:{device}", partial(_load_intrinsicnet_model, device)
+    )
+    return loaded or (None, None)
 
 
 def decompose_intrinsic_intrinsicnet(
@@ -562,7 +548,7 @@ def decompose_intrinsic_intrinsicnet(
         input_tensor = transform(image_rgb).unsqueeze(0).to(device)
 
         # Run inference
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(INTRINSICNET_MODEL_NAME):
             reflectance, shading = model(input_tensor)
 
         # Convert to numpy
@@ -627,7 +613,7 @@ def decompose_intrinsic_cgintrinsics(
             input_tensor = input_tensor.to(device)
 
         # Run model
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(CGINTRINSICS_MODEL_NAME):
             if hasattr(model, "forward"):
                 output = model(input_tensor)
 
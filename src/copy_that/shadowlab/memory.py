@@ -0,0 +1,90 @@
+"""
+Process memory measurement for shadow pipeline runs.
+
+``RssMonitor`` samples the resident set size on a background thread so each
+stage can report the peak RSS observed while it ran. Stages overlap on the
+stage pool, so a stage's peak includes whatever concurrent stages held at the
+same moment; that is the number that matters for a container memory limit.
+
+RSS is read from ``/proc/self/statm`` (Linux); elsewhere the monitor reports
+None instead of failing.
+"""
+
+import itertools
+import os
+import threading
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # Windows
+    _PAGE_SIZE = None
+
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where it can't be read."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssMonitor:
+    """Track peak RSS over overlapping windows (one per running stage)."""
+
+    def __init__(self, interval_s: float = 0.005):
+        """
+        Args:
+            interval_s: Sampling period; short allocations between samples are missed
+        """
+        self.interval_s = interval_s
+        self._windows: dict[int, int] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def available(self) -> bool:
+        return current_rss_bytes() is not None
+
+    def __enter__(self) -> "RssMonitor":
+        if self.available:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample, name="rss-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            rss = current_rss_bytes()
+            if rss is None:
+                return
+            with self._lock:
+                for window, peak in self._windows.items():
+                    if rss > peak:
+                        self._windows[window] = rss
+
+    def open_window(self) -> int:
+        """Start tracking a peak; returns a handle for ``close_window``."""
+        window = next(self._ids)
+        with self._lock:
+            self._windows[window] = current_rss_bytes() or 0
+        return window
+
+    def close_window(self, window: int) -> int | None:
+        """Peak RSS (bytes) seen since ``open_window``, or None if unmeasurable."""
+        rss = current_rss_bytes()
+        with self._lock:
+            peak = self._windows.pop(window, 0)
+        if rss is None:
+            return None
+        return max(peak, rss)
@@ -4,10 +4,12 @@ Provides unified interfaces for:
 - Shadow detection (DSDNet/BDRAR)
 - Depth estimation (MiDaS v3)
 - Intrinsic decomposition (IntrinsicNet)
+- Encode-once SAM boundary refinement
 """
 
 from .depth_model import DepthEstimationModel, load_depth_model
 from .intrinsic_model import IntrinsicDecompositionModel, load_intrinsic_model
+from .sam_refiner import EmbeddingCache, SAMRefiner
 from .shadow_model import ShadowDetectionModel, load_shadow_model
 
 __all__ = [
@@ -17,4 +19,6 @@ __all__ = [
     "load_depth_model",
     "IntrinsicDecompositionModel",
     "load_intrinsic_model",
+    "EmbeddingCache",
+    "SAMRefiner",
 ]
@@ -0,0 +1,182 @@
+"""Encode-once SAM (Segment Anything) mask prediction for boundary refinement.
+
+SAM's ViT image encoder dominates inference cost; the prompt encoder and mask
+decoder are cheap. ``SAMRefiner`` therefore embeds each image once, keeps the
+embedding in a byte-bounded LRU keyed by image hash, and decodes every point
+prompt for that image in a single batched decoder call. With cross-image
+batching enabled (``shadowlab.batching``), concurrent images also share
+encoder passes.
+
+Works with HuggingFace ``SamModel``/``SamProcessor`` and with any object
+exposing the same calls (``get_image_embeddings``, ``model(image_embeddings=...,
+input_points=...)`` and ``processor.image_processor.post_process_masks``), which
+is how the tests run without torch or a model download.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+import cv2
+import numpy as np
+
+from ..batching import concat_batch, get_batcher, split_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = int(os.getenv("SHADOWLAB_SAM_CACHE_MB", "256")) * 1024 * 1024
+
+
+def _nbytes(value: Any) -> int:
+    """Size of a numpy array or torch tensor (0 if unknown)."""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if hasattr(value, "element_size") and hasattr(value, "nelement"):
+        return int(value.element_size() * value.nelement())
+    return 0
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    if hasattr(value, "detach"):
+        value = value.detach()
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        value = value.numpy()
+    return np.asarray(value)
+
+
+def _no_grad() -> contextlib.AbstractContextManager[Any]:
+    try:
+        import torch
+    except ImportError:
+        return contextlib.nullcontext()
+    return torch.no_grad()
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of image embeddings bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any) -> None:
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SAMRefiner:
+    """Predict one SAM mask per point prompt with a single image encode."""
+
+    def __init__(
+        self,
+        model: Any,
+        processor: Any,
+        device: Any = None,
+        cache: EmbeddingCache | None = None,
+    ):
+        self.model = model
+        self.processor = processor
+        self.device = device
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def _to_device(self, value: Any) -> Any:
+        if self.device is not None and hasattr(value, "to"):
+            return value.to(self.device)
+        return value
+
+    @staticmethod
+    def image_key(rgb_uint8: np.ndarray) -> str:
+        digest = hashlib.sha256(np.ascontiguousarray(rgb_uint8).data).hexdigest()
+        return f"{digest}:{rgb_uint8.shape}"
+
+    def embed(self, rgb_uint8: np.ndarray) -> Any:
+        """Image embedding from the cache, running the encoder only on a miss."""
+        key = self.image_key(rgb_uint8)
+        embeddings = self.cache.get(key)
+        if embeddings is None:
+            inputs = self.processor(images=rgb_uint8, return_tensors="pt")
+            pixel_values = self._to_device(inputs["pixel_values"])
+            # Concurrent images share one encoder pass when batching is enabled
+            batcher = get_batcher(f"sam.encoder:{id(self)}", self._encode_batch)
+            if batcher is None:
+                with _no_grad():
+                    embeddings = self.model.get_image_embeddings(pixel_values)
+            else:
+                embeddings = batcher.submit(tuple(pixel_values.shape), pixel_values)
+            self.cache.put(key, embeddings)
+        return embeddings
+
+    def _encode_batch(self, _shape: Any, pixel_values: list[Any]) -> list[Any]:
+        with _no_grad():
+            embeddings = self.model.get_image_embeddings(concat_batch(pixel_values))
+        return split_batch(embeddings, len(pixel_values))
+
+    def predict_masks(self, rgb_uint8: np.ndarray, points: Sequence[Sequence[float]]) -> np.ndarray:
+        """First mask for each (x, y) point prompt, as float32 (n_points, H, W)."""
+        h, w = rgb_uint8.shape[:2]
+        if len(points) == 0:
+            return np.zeros((0, h, w), dtype=np.float32)
+
+        embeddings = self.embed(rgb_uint8)
+        # One prompt per point: (image batch, point batch, points per prompt, xy)
+        input_points = [[[[float(x), float(y)]] for x, y in points]]
+        inputs = dict(
+            self.processor(images=rgb_uint8, input_points=input_points, return_tensors="pt")
+        )
+        inputs.pop("pixel_values", None)
+        inputs = {k: self._to_device(v) for k, v in inputs.items()}
+
+        with _no_grad():
+            outputs = self.model(image_embeddings=embeddings, **inputs)
+        masks = self.processor.image_processor.post_process_masks(
+            _to_cpu(outputs.pred_masks),
+            _to_cpu(inputs["original_sizes"]),
+            _to_cpu(inputs["reshaped_input_sizes"]),
+        )[0]
+
+        first = _to_numpy(masks)[:, 0].astype(np.float32)
+        if first.shape[1:] != (h, w):
+            first = np.stack([cv2.resize(m, (w, h), interpolation=cv2.INTER_LINEAR) for m in first])
+        return first
+
+
+def _to_cpu(value: Any) -> Any:
+    return value.cpu() if hasattr(value, "cpu") else value
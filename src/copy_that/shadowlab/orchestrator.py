@@ -2,15 +2,28 @@
 Shadow Pipeline Orchestrator.
 
 Coordinates all 8 stages, manages state, and produces final outputs.
+
+Memory modes (``memory_mode`` or ``SHADOWLAB_MEMORY_MODE``), for large inputs
+in memory-limited containers:
+- ``off``: keep every intermediate until the run ends (default)
+- ``release``: write each visual artifact as soon as its stage finishes and
+  drop every intermediate once its last consuming stage is done
+- ``spill``: like ``release``, but also keep all arrays as memory-mapped
+  ``.npy`` files in ``output_dir`` (see ``ShadowPipeline.artifacts``)
 """
 
+import os
+import threading
 import time
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 
+from .dag import StageGraph, StageNode
+from .memory import RssMonitor
 from .pipeline import ShadowPipeline, ShadowTokenSet
+from .progress import StageCallback, StageEventHooks
 from .stages import (
     stage_01_input,
     stage_02_illumination,
@@ -22,6 +35,62 @@ from .stages import (
     stage_08_tokens,
 )
 
+# Stages 3-6 only need the RGB input or the illumination map, so they overlap
+SHADOW_STAGE_GRAPH = StageGraph(
+    [
+        StageNode("input", stage_01_input, ("image_path", "target_size"), ("rgb_image",)),
+        StageNode("illumination", stage_02_illumination, ("rgb_image",), ("illumination_map",)),
+        StageNode("candidates", stage_03_candidates, ("illumination_map",), ("candidate_mask",)),
+        StageNode("ml_mask", stage_04_ml_mask, ("rgb_image",), ("ml_shadow_mask",)),
+        StageNode(
+            "intrinsic", stage_05_intrinsic, ("rgb_image",), ("reflectance_map", "shading_map")
+        ),
+        StageNode(
+            "geometry",
+            stage_06_geometry,
+            ("rgb_image",),
+            ("depth_map", "normal_map", "normal_map_rgb"),
+        ),
+        StageNode(
+            "lighting",
+            stage_07_lighting,
+            ("normal_map", "shading_map"),
+            ("light_direction", "lighting_error_map"),
+        ),
+        StageNode(
+            "tokens",
+            stage_08_tokens,
+            (
+                "candidate_mask",
+                "ml_shadow_mask",
+                "shading_map",
+                "light_direction",
+                "lighting_error_map",
+                "rgb_image",
+            ),
+            ("final_shadow_mask", "shadow_overlay"),
+            extras=("shadow_tokens",),
+        ),
+    ],
+    seeds=("image_path", "target_size"),
+)
+
+# Artifacts written as PNGs under output_dir/artifacts
+VISUAL_ARTIFACTS = (
+    "rgb_image",
+    "illumination_map",
+    "candidate_mask",
+    "ml_shadow_mask",
+    "reflectance_map",
+    "shading_map",
+    "depth_map",
+    "normal_map_rgb",
+    "final_shadow_mask",
+    "shadow_overlay",
+)
+
+MEMORY_MODES = ("off", "release", "spill")
+
 
 class ShadowPipelineOrchestrator:
     """
@@ -40,6 +109,8 @@ class ShadowPipelineOrchestrator:
         output_dir: Path | None = None,
         target_size: tuple | None = None,
         verbose: bool = True,
+        memory_mode: str | None = None,
+        on_stage: StageCallback | None = None,
     ):
         """
         Initialize orchestrator.
@@ -49,15 +120,30 @@ class ShadowPipelineOrchestrator:
             output_dir: Where to save outputs
             target_size: Optional (height, width) for resizing
             verbose: Enable logging
+            memory_mode: "off", "release" or "spill" (default: SHADOWLAB_MEMORY_MODE or "off")
+            on_stage: Called with a StageEvent (timing, metrics, map previews)
+                as each stage finishes, for streaming progress
         """
         self.image_path = image_path
         self.output_dir = output_dir or Path("/tmp/shadow_pipeline")
         self.target_size = target_size
         self.verbose = verbose
+        self.memory_mode = memory_mode or os.getenv("SHADOWLAB_MEMORY_MODE", "off")
+        if self.memory_mode not in MEMORY_MODES:
+            raise ValueError(
+                f"Unknown memory mode {self.memory_mode!r}; expected one of {MEMORY_MODES}"
+            )
 
-        self.pipeline = ShadowPipeline(self.output_dir)
+        self.events = StageEventHooks(on_stage, VISUAL_ARTIFACTS) if on_stage else None
+        self.pipeline = ShadowPipeline(self.output_dir, spill_artifacts=self.memory_mode == "spill")
         self.execution_log: list[dict[str, Any]] = []
         self.start_time = time.time()
+        # Set from another thread to stop scheduling further stages
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Cancel a running pipeline; ``run`` raises StageCancelledError."""
+        self.cancel_event.set()
 
     def log(self, message: str) -> None:
         """Log message if verbose mode enabled."""
@@ -79,157 +165,64 @@ class ShadowPipelineOrchestrator:
             }
         """
         self.log("Starting shadow extraction pipeline...")
+        artifacts_paths: dict[str, str] = {}
 
-        artifacts = {}
-
-        try:
-            # ================================================================
-            # STAGE 1: Input & Preprocessing
-            # ================================================================
-            self.log("Stage 1: Input & Preprocessing...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_01_input(
-                self.image_path, self.target_size
+        def on_stage_complete(node, stage_result, timing) -> None:
+            peak_rss_mb = (
+                timing.peak_rss_bytes / 2**20 if timing.peak_rss_bytes is not None else None
             )
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            rgb_image = artifacts["rgb_image"]
-
-            # ================================================================
-            # STAGE 2: Illumination-Invariant View
-            # ================================================================
-            self.log("Stage 2: Illumination-Invariant View...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_02_illumination(rgb_image)
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            illumination_map = artifacts["illumination_map"]
-
-            # ================================================================
-            # STAGE 3: Classical Shadow Candidates
-            # ================================================================
-            self.log("Stage 3: Classical Shadow Candidates...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_03_candidates(illumination_map)
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            candidate_mask = artifacts["candidate_mask"]
-
-            # ================================================================
-            # STAGE 4: ML Shadow Mask
-            # ================================================================
-            self.log("Stage 4: ML Shadow Mask...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_04_ml_mask(rgb_image)
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            ml_shadow_mask = artifacts["ml_shadow_mask"]
-
-            # ================================================================
-            # STAGE 5: Intrinsic Image Decomposition
-            # ================================================================
-            self.log("Stage 5: Intrinsic Image Decomposition...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_05_intrinsic(rgb_image)
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            shading_map = artifacts["shading_map"]
-
-            # ================================================================
-            # STAGE 6: Depth & Surface Normals
-            # ================================================================
-            self.log("Stage 6: Depth & Surface Normals...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_06_geometry(rgb_image)
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            normal_map = artifacts["normal_map"]
-
-            # ================================================================
-            # STAGE 7: Lighting Fit & Consistency
-            # ================================================================
-            self.log("Stage 7: Lighting Fit & Consistency...")
-            start = time.time()
-
-            stage_result, visual_layers, stage_artifacts = stage_07_lighting(
-                normal_map, shading_map
+            self.execution_log.append(
+                {
+                    "stage": node.name,
+                    "stage_id": stage_result.id,
+                    "start_ms": timing.start_ms,
+                    "duration_ms": timing.duration_ms,
+                    "peak_rss_mb": peak_rss_mb,
+                }
             )
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
-
-            light_direction = artifacts["light_direction"]
-            lighting_error_map = artifacts["lighting_error_map"]
-
-            # ================================================================
-            # STAGE 8: Fusion & Token Generation
-            # ================================================================
-            self.log("Stage 8: Fusion & Token Generation...")
-            start = time.time()
-
-            result = stage_08_tokens(
-                candidate_mask=candidate_mask,
-                ml_shadow_mask=ml_shadow_mask,
-                shading_map=shading_map,
-                light_direction=light_direction,
-                lighting_error_map=lighting_error_map,
-                rgb_image=rgb_image,
+            memory = f", peak RSS {peak_rss_mb:.0f}MB" if peak_rss_mb is not None else ""
+            self.log(
+                f"{stage_result.name}: ✓ Completed in {timing.duration_ms / 1000:.2f}s{memory}"
             )
+            if self.events is not None:
+                self.events.on_stage_complete(node, stage_result, timing)
+
+        def on_artifacts(node, artifacts) -> None:
+            if self.events is not None:
+                self.events.on_artifacts(node, artifacts)
+            if release:
+                persist_artifacts(node, artifacts)
+
+        def persist_artifacts(node, artifacts) -> None:
+            # Memory mode: write outputs now so the arrays can be released early
+            for name, data in artifacts.items():
+                if name in VISUAL_ARTIFACTS:
+                    path = self._save_artifact_image(name, data)
+                    if path:
+                        artifacts_paths[name] = str(path)
+                if self.memory_mode == "spill" and isinstance(data, np.ndarray):
+                    self.pipeline.register_artifact(name, data)
 
-            stage_result, visual_layers, stage_artifacts, shadow_tokens = result
-
-            for layer in visual_layers:
-                self.pipeline.visual_layers[layer.id] = layer
-
-            artifacts.update(stage_artifacts)
-            self.pipeline.register_stage(stage_result, visual_layers)
-            self.log(f"  ✓ Completed in {time.time() - start:.2f}s")
+        release = self.memory_mode != "off"
+        try:
+            with RssMonitor() as monitor:
+                run = SHADOW_STAGE_GRAPH.run(
+                    {"image_path": self.image_path, "target_size": self.target_size},
+                    cancel_event=self.cancel_event,
+                    on_stage_complete=on_stage_complete,
+                    retain=() if release else None,
+                    on_artifacts=on_artifacts if release or self.events else None,
+                    memory_monitor=monitor,
+                )
+            for stage_result, layers in zip(run.stages, run.stage_layers, strict=True):
+                self.pipeline.register_stage(stage_result, layers)
+
+            artifacts = run.artifacts
+            shadow_tokens = artifacts["shadow_tokens"]
+            self.log(
+                f"Stages took {run.stage_sum_ms / 1000:.2f}s combined, "
+                f"{run.wall_ms / 1000:.2f}s wall-clock"
+            )
 
             # ================================================================
             # Finalization
@@ -246,23 +239,11 @@ class ShadowPipelineOrchestrator:
             self.log(f"   Mean strength: {shadow_tokens.mean_strength:.1%}")
             self.log(f"   Physics consistency: {shadow_tokens.physics_consistency:.1%}")
 
-            # Save artifacts to disk
+            # Save artifacts to disk (already written per stage in memory mode)
             self.log("\nSaving artifacts...")
-            artifacts_paths = {}
 
             # Save visual artifacts
-            for name in [
-                "rgb_image",
-                "illumination_map",
-                "candidate_mask",
-                "ml_shadow_mask",
-                "reflectance_map",
-                "shading_map",
-                "depth_map",
-                "normal_map_rgb",
-                "final_shadow_mask",
-                "shadow_overlay",
-            ]:
+            for name in VISUAL_ARTIFACTS:
                 if name in artifacts:
                     path = self._save_artifact_image(name, artifacts[name])
                     if path:
@@ -286,6 +267,10 @@ class ShadowPipelineOrchestrator:
                 "shadow_token_set": token_set.to_dict(),
                 "execution_log": self.execution_log,
                 "total_duration_ms": total_duration * 1000,
+                "peak_rss_mb": max(
+                    (e["peak_rss_mb"] for e in self.execution_log if e["peak_rss_mb"]),
+                    default=None,
+                ),
                 "artifacts_paths": artifacts_paths,
                 "output_dir": str(self.output_dir),
             }
@@ -366,6 +351,7 @@ def run_shadow_pipeline(
     output_dir: Path | None = None,
     target_size: tuple | None = None,
     verbose: bool = True,
+    memory_mode: str | None = None,
 ) -> dict[str, Any]:
     """
     Convenience function to run complete shadow pipeline.
@@ -375,12 +361,17 @@ def run_shadow_pipeline(
         output_dir: Where to save outputs
         target_size: Optional (height, width) for resizing
         verbose: Enable logging
+        memory_mode: "off", "release" or "spill" (see module docstring)
 
     Returns:
         Pipeline results dictionary
     """
     orchestrator = ShadowPipelineOrchestrator(
-        image_path=image_path, output_dir=output_dir, target_size=target_size, verbose=verbose
+        image_path=image_path,
+        output_dir=output_dir,
+        target_size=target_size,
+        verbose=verbose,
+        memory_mode=memory_mode,
     )
 
     results = orchestrator.run()
@@ -21,12 +21,32 @@ import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import cv2
 import numpy as np
 
+from cv_pipeline.model_registry import ModelUnavailableError, get_model_registry, register_model
+
+from .batching import concat_batch, get_batcher, split_batch
+from .tiling import map_tiles, pyramid_gaussian_blur, uint8_percentiles
+
+if TYPE_CHECKING:
+    from cv_pipeline.context import ImageContext
+
+# Rec. 601 luma weights; ``rgb @ _LUMA_WEIGHTS`` converts to gray in one float32 pass
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _numpy_json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 
 class VisualLayerType(str, Enum):
     """Visual layer render type."""
@@ -221,7 +241,7 @@ class ShadowTokenSet:
 
     def to_json(self) -> str:
         """Serialize to JSON."""
-        return json.dumps(self.to_dict(), indent=2)
+        return json.dumps(self.to_dict(), indent=2, default=_numpy_json_default)
 
 
 class ShadowPipeline:
@@ -231,15 +251,18 @@ class ShadowPipeline:
     Manages the flow through all 8 stages and produces structured outputs.
     """
 
-    def __init__(self, output_dir: Path | None = None):
+    def __init__(self, output_dir: Path | None = None, spill_artifacts: bool = False):
         """
         Initialize pipeline.
 
         Args:
             output_dir: Where to save artifacts and visualizations
+            spill_artifacts: Write registered arrays to ``output_dir/<name>.npy``
+                and keep only a read-only memory map of them in RAM
         """
         self.output_dir = output_dir or Path("/tmp/shadow_pipeline")
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.spill_artifacts = spill_artifacts
 
         self.stages: dict[str, ShadowStageResult] = {}
         self.visual_layers: dict[str, ShadowVisualLayer] = {}
@@ -268,10 +291,21 @@ class ShadowPipeline:
 
         Args:
             name: Artifact name (e.g., 'illumination_map')
-            data: NumPy array
+            data: NumPy array (float64 is stored as float32)
         """
+        if isinstance(data, np.ndarray) and data.dtype == np.float64:
+            data = data.astype(np.float32)
+        if self.spill_artifacts and isinstance(data, np.ndarray):
+            path = self.output_dir / f"{name}.npy"
+            np.save(path, data)
+            # Pages of the map are file-backed, so the OS can drop them under pressure
+            data = np.load(path, mmap_mode="r")
         self.artifacts[name] = data
 
+    def release_artifact(self, name: str) -> None:
+        """Drop an artifact from memory (a spilled ``.npy`` file is kept)."""
+        self.artifacts.pop(name, None)
+
     def get_results_summary(self) -> dict[str, Any]:
         """
         Get summary of all stages.
@@ -298,7 +332,8 @@ class ShadowPipeline:
         """
         output_path = self.output_dir / filename
         with open(output_path, "w") as f:
-            json.dump(self.get_results_summary(), f, indent=2)
+            # Stage metrics are often NumPy scalars
+            json.dump(self.get_results_summary(), f, indent=2, default=_numpy_json_default)
         return output_path
 
     def save_artifact(self, name: str, filename: str | None = None) -> Path | None:
@@ -317,7 +352,11 @@ class ShadowPipeline:
 
         filename = filename or f"{name}.npy"
         output_path = self.output_dir / filename
-        np.save(output_path, self.artifacts[name])
+        data = self.artifacts[name]
+        if isinstance(data, np.memmap) and Path(data.filename).resolve() == output_path.resolve():
+            # Already spilled to this file; rewriting it would truncate the live map
+            return output_path
+        np.save(output_path, data)
         return output_path
 
     def save_all_artifacts(self) -> dict[str, Path]:
@@ -340,16 +379,22 @@ class ShadowPipeline:
 # ============================================================================
 
 
-def load_rgb(path: str) -> np.ndarray:
+def load_rgb(path: "str | ImageContext | np.ndarray") -> np.ndarray:
     """
     Load image and normalize to float32 RGB.
 
     Args:
-        path: Image file path
+        path: Image file path, an ImageContext whose decoded view is reused,
+            or an already decoded float RGB array (copied)
 
     Returns:
         RGB image as float32 in range [0, 1]
     """
+    if isinstance(path, np.ndarray):
+        return path.astype(np.float32)
+    if not isinstance(path, str):
+        return path.rgb_float.copy()
+
     img = cv2.imread(path)
     if img is None:
         raise OSError(f"Cannot load image: {path}")
@@ -363,7 +408,23 @@ def load_rgb(path: str) -> np.ndarray:
     return img_float
 
 
-def illumination_invariant_v(rgb: np.ndarray) -> np.ndarray:
+def _value_channel(rgb: np.ndarray) -> np.ndarray:
+    # HSV value (brightness) channel, uint8
+    rgb_uint8 = (rgb * 255).astype(np.uint8)
+    return cv2.cvtColor(rgb_uint8, cv2.COLOR_RGB2HSV)[:, :, 2]
+
+
+def _stretch_value(v_min: float, v_max: float, v_uint8: np.ndarray) -> np.ndarray:
+    v_channel = v_uint8.astype(np.float32)
+    v_channel /= 255.0
+    if v_max > v_min:
+        v_channel -= np.float32(v_min)
+        v_channel /= np.float32(v_max - v_min)
+        np.clip(v_channel, 0, 1, out=v_channel)
+    return v_channel
+
+
+def illumination_invariant_v(rgb: np.ndarray, tile_size: int | None = None) -> np.ndarray:
     """
     Compute illumination-invariant brightness map.
 
@@ -371,26 +432,19 @@ def illumination_invariant_v(rgb: np.ndarray) -> np.ndarray:
 
     Args:
         rgb: RGB image, float32 in [0, 1]
+        tile_size: Process in parallel tiles of this size (identical result)
 
     Returns:
         Grayscale illumination map, float32 in [0, 1]
     """
-    # Convert to HSV
-    rgb_uint8 = (rgb * 255).astype(np.uint8)
-    hsv = cv2.cvtColor(rgb_uint8, cv2.COLOR_RGB2HSV)
-
     # Extract V (value/brightness) channel
-    v_channel = hsv[:, :, 2].astype(np.float32) / 255.0
+    v_uint8 = map_tiles(_value_channel, (rgb,), tile_size)
 
-    # Optional: contrast stretching for emphasis
-    v_min, v_max = np.percentile(v_channel, [2, 98])
-    if v_max > v_min:
-        v_stretched = (v_channel - v_min) / (v_max - v_min)
-        v_stretched = np.clip(v_stretched, 0, 1)
-    else:
-        v_stretched = v_channel
+    # Optional: contrast stretching for emphasis; the 8-bit histogram gives
+    # the global percentiles exactly, so tiles stretch consistently
+    v_min, v_max = uint8_percentiles(v_uint8, [2, 98]) / 255.0
 
-    return v_stretched.astype(np.float32)
+    return map_tiles(partial(_stretch_value, v_min, v_max), (v_uint8,), tile_size)
 
 
 # ============================================================================
@@ -398,8 +452,29 @@ def illumination_invariant_v(rgb: np.ndarray) -> np.ndarray:
 # ============================================================================
 
 
+# Support radius of _dark_regions: 31x31 blur (15) plus 5x5 opening (2 + 2)
+_CANDIDATE_HALO = 20
+
+
+def _dark_regions(threshold: float, v_uint8: np.ndarray) -> np.ndarray:
+    # Step 1: Adaptive thresholding
+    # Compute local mean in 31x31 neighborhood
+    local_mean = cv2.blur(v_uint8, (31, 31))
+
+    # Threshold: pixels significantly darker than local mean
+    dark_mask = v_uint8 < (local_mean * 0.8)
+    dark_mask &= v_uint8 < threshold
+
+    # Step 2: Morphological cleanup (open to remove noise)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    return cv2.morphologyEx(dark_mask.astype(np.uint8), cv2.MORPH_OPEN, kernel)
+
+
 def classical_shadow_candidates(
-    v: np.ndarray, threshold_percentile: float = 20.0, min_area: int = 10
+    v: np.ndarray,
+    threshold_percentile: float = 20.0,
+    min_area: int = 10,
+    tile_size: int | None = None,
 ) -> np.ndarray:
     """
     Classical shadow detection via adaptive thresholding and morphology.
@@ -408,24 +483,19 @@ def classical_shadow_candidates(
         v: Illumination map from illumination_invariant_v()
         threshold_percentile: Percentile for darkness threshold (lower = darker)
         min_area: Minimum connected component size in pixels
+        tile_size: Run the local thresholding/morphology in parallel tiles
+            (same result; component filtering stays whole-frame)
 
     Returns:
         Soft shadow mask in [0, 1]
     """
     v_uint8 = (v * 255).astype(np.uint8)
+    threshold = float(uint8_percentiles(v_uint8, threshold_percentile))
 
-    # Step 1: Adaptive thresholding
-    # Compute local mean in 31x31 neighborhood
-    local_mean = cv2.blur(v_uint8, (31, 31))
-
-    # Threshold: pixels significantly darker than local mean
-    threshold = np.percentile(v_uint8, threshold_percentile)
-    dark_mask = v_uint8 < (local_mean * 0.8)
-    dark_mask = dark_mask & (v_uint8 < threshold)
-
-    # Step 2: Morphological cleanup (open to remove noise)
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-    dark_clean = cv2.morphologyEx(dark_mask.astype(np.uint8), cv2.MORPH_OPEN, kernel)
+    # Steps 1-2: local darkness + opening, tiled with enough halo to be exact
+    dark_clean = map_tiles(
+        partial(_dark_regions, threshold), (v_uint8,), tile_size, halo=_CANDIDATE_HALO
+    )
 
     # Step 3: Remove small components
     from scipy import ndimage
@@ -454,69 +524,65 @@ def classical_shadow_candidates(
 # TASK 3: ML Shadow Model
 # ============================================================================
 
-# Global cache for shadow detection model (load once, reuse)
-_shadow_model = None
-_shadow_processor = None
-_shadow_device = None
-_shadow_load_attempted = False
-_shadow_load_failed = False
+# Shadow detection model is loaded once per process via the model registry
+SHADOW_MODEL_NAME = "shadowlab.segformer"
 
 
-def _get_shadow_model():
-    """
-    Load shadow detection model (cached).
+def _torch_device():
+    """Best available torch device (CUDA, then Apple MPS, then CPU)."""
+    import torch
 
-    Attempts to load a segmentation model suitable for shadow detection.
-    Uses HuggingFace transformers with a semantic segmentation model.
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
 
-    Returns:
-        (model, processor, device) or (None, None, None) if load fails
-    """
-    global _shadow_model, _shadow_processor, _shadow_device
-    global _shadow_load_attempted, _shadow_load_failed
 
-    if _shadow_load_failed:
-        return None, None, None
+def _load_shadow_model():
+    from transformers import SegformerForSemanticSegmentation, SegformerImageProcessor
 
-    if _shadow_model is not None:
-        return _shadow_model, _shadow_processor, _shadow_device
+    device = _torch_device()
+    # Load SegFormer model (trained on ADE20K which includes shadow-like classes)
+    # This model can detect dark regions that often correspond to shadows
+    model_id = "nvidia/segformer-b0-finetuned-ade-512-512"
+    processor = SegformerImageProcessor.from_pretrained(model_id)
+    model = SegformerForSemanticSegmentation.from_pretrained(model_id)
+    model.to(device)
+    model.eval()
+    return model, processor, device
 
-    if _shadow_load_attempted:
-        return None, None, None
 
-    _shadow_load_attempted = True
+register_model(SHADOW_MODEL_NAME, _load_shadow_model)
+
 
+def _get_registered(name: str, message: str, default: tuple) -> tuple:
+    """Fetch ``name`` from the model registry, warning once per failed load."""
     try:
-        import torch
-        from transformers import SegformerForSemanticSegmentation, SegformerImageProcessor
+        return get_model_registry().get(name)
+    except ModelUnavailableError as e:
+        if e.fresh:
+            import warnings
 
-        # Determine device
-        if torch.cuda.is_available():
-            _shadow_device = torch.device("cuda")
-        elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-            _shadow_device = torch.device("mps")
-        else:
-            _shadow_device = torch.device("cpu")
+            warnings.warn(f"{message}: {e.cause}", stacklevel=3)
+        return default
 
-        # Load SegFormer model (trained on ADE20K which includes shadow-like classes)
-        # This model can detect dark regions that often correspond to shadows
-        model_id = "nvidia/segformer-b0-finetuned-ade-512-512"
-        _shadow_processor = SegformerImageProcessor.from_pretrained(model_id)
-        _shadow_model = SegformerForSemanticSegmentation.from_pretrained(model_id)
-        _shadow_model.to(_shadow_device)
-        _shadow_model.eval()
 
-        return _shadow_model, _shadow_processor, _shadow_device
+def _get_shadow_model():
+    """
+    Load shadow detection model (cached).
 
-    except Exception as e:
-        import warnings
+    Attempts to load a segmentation model suitable for shadow detection.
+    Uses HuggingFace transformers with a semantic segmentation model.
 
-        warnings.warn(
-            f"Shadow model load failed: {e}. Using enhanced classical fallback.",
-            stacklevel=2,
-        )
-        _shadow_load_failed = True
-        return None, None, None
+    Returns:
+        (model, processor, device) or (None, None, None) if load fails
+    """
+    return _get_registered(
+        SHADOW_MODEL_NAME,
+        "Shadow model load failed. Using enhanced classical fallback",
+        (None, None, None),
+    )
 
 
 def _multi_scale_shadow_features(rgb: np.ndarray) -> np.ndarray:
@@ -537,57 +603,71 @@ def _multi_scale_shadow_features(rgb: np.ndarray) -> np.ndarray:
 
     # Build feature pyramid at multiple scales (similar to BDRAR's FPN)
     scales = [1.0, 0.5, 0.25]
-    pyramid_features = []
+    # Fuse pyramid features (attention-weighted similar to BDRAR)
+    # Weight coarse scales more for global context, fine for details
+    weights = [0.5, 0.3, 0.2]  # Fine to coarse
+    fused = np.zeros((h, w), dtype=np.float32)
 
-    for scale in scales:
+    # Each scale is accumulated into ``fused`` as soon as it is computed, and
+    # the per-scale cues are combined in place, so only a few float32 planes
+    # are alive at once
+    for scale, weight in zip(scales, weights, strict=True):
         if scale < 1.0:
             sh, sw = int(h * scale), int(w * scale)
             scaled = cv2.resize(rgb_uint8, (sw, sh), interpolation=cv2.INTER_LINEAR)
         else:
             scaled = rgb_uint8
-            sh, sw = h, w
 
         # Extract shadow-relevant features at this scale
         # 1. LAB color space (better for illumination analysis)
         lab = cv2.cvtColor(scaled, cv2.COLOR_RGB2LAB).astype(np.float32)
-        L = lab[:, :, 0] / 255.0  # Lightness
-        A = (lab[:, :, 1] - 128) / 128.0  # Green-Red
-        B = (lab[:, :, 2] - 128) / 128.0  # Blue-Yellow
+        L = lab[:, :, 0]  # Lightness
+        A = lab[:, :, 1]  # Green-Red
+        B = lab[:, :, 2]  # Blue-Yellow
+        L /= 255.0
+        A -= 128
+        A /= 128.0
+        B -= 128
+        B /= 128.0
 
         # 2. Darkness feature (inverse of lightness)
-        darkness = 1.0 - L
+        scale_features = np.subtract(1.0, L, dtype=np.float32)
+        scale_features *= 0.35
 
         # 3. Chromatic attenuation (shadows reduce color saturation)
-        chroma = np.sqrt(A**2 + B**2)
-        chroma_norm = chroma / (chroma.max() + 1e-8)
-        low_chroma = 1.0 - chroma_norm
-
-        # 4. Blue-shift (shadows tend toward blue)
-        blue_shift = np.clip(-B + 0.5, 0, 1)  # Negative B = blue
+        chroma = np.hypot(A, B)
+        chroma /= chroma.max() + 1e-8
+        np.subtract(1.0, chroma, out=chroma)
+        chroma *= 0.25
+        scale_features += chroma
+
+        # 4. Blue-shift (shadows tend toward blue; negative B = blue)
+        np.negative(B, out=B)
+        B += 0.5
+        np.clip(B, 0, 1, out=B)
+        B *= 0.20
+        scale_features += B
 
         # 5. Local contrast (edges of shadows)
-        gray = L
-        local_mean = cv2.blur(gray, (15, 15))
-        local_std = np.sqrt(cv2.blur((gray - local_mean) ** 2, (15, 15)) + 1e-8)
-        contrast = local_std / (local_std.max() + 1e-8)
-
-        # Combine features for this scale
-        scale_features = 0.35 * darkness + 0.25 * low_chroma + 0.20 * blue_shift + 0.20 * contrast
+        local_var = cv2.blur(L, (15, 15))
+        np.subtract(L, local_var, out=local_var)
+        np.square(local_var, out=local_var)
+        local_std = cv2.blur(local_var, (15, 15))
+        local_std += 1e-8
+        np.sqrt(local_std, out=local_std)
+        local_std /= local_std.max() + 1e-8
+        local_std *= 0.20
+        scale_features += local_std
 
         # Resize back to original size
         if scale < 1.0:
             scale_features = cv2.resize(scale_features, (w, h), interpolation=cv2.INTER_LINEAR)
 
-        pyramid_features.append(scale_features)
-
-    # Fuse pyramid features (attention-weighted similar to BDRAR)
-    # Weight coarse scales more for global context, fine for details
-    weights = [0.5, 0.3, 0.2]  # Fine to coarse
-    fused = np.zeros((h, w), dtype=np.float32)
-    for feat, weight in zip(pyramid_features, weights, strict=True):
-        fused += weight * feat
+        scale_features *= weight
+        fused += scale_features
 
-    return np.clip(fused, 0, 1).astype(np.float32)
+    np.clip(fused, 0, 1, out=fused)
+    return fused
 
 
 def _recurrent_attention_refinement(
@@ -606,25 +686,29 @@ def _recurrent_attention_refinement(
     Returns:
         Refined shadow probability map
     """
-    h, w = shadow_prob.shape
-    current = shadow_prob.copy()
+    current = shadow_prob.astype(np.float32, copy=True)
+    kernel = np.ones((5, 5), np.uint8)
 
     for _ in range(iterations):
+        current_uint8 = (current * 255).astype(np.uint8)
+
         # Compute edge attention (focus on boundaries)
-        edges = cv2.Canny((current * 255).astype(np.uint8), 50, 150)
-        edge_attention = cv2.dilate(edges, np.ones((5, 5), np.uint8), iterations=1)
-        edge_attention = edge_attention.astype(np.float32) / 255.0
+        edges = cv2.Canny(current_uint8, 50, 150)
+        edge_attention = cv2.dilate(edges, kernel, iterations=1).astype(np.float32)
+        edge_attention /= 255.0
 
         # Bilateral filter for edge-aware smoothing
-        current_uint8 = (current * 255).astype(np.uint8)
-        refined = cv2.bilateralFilter(current_uint8, 9, 75, 75)
-        refined = refined.astype(np.float32) / 255.0
+        refined = cv2.bilateralFilter(current_uint8, 9, 75, 75).astype(np.float32)
+        refined /= 255.0
 
         # Apply attention: preserve edges, smooth interiors
-        current = current * edge_attention + refined * (1 - edge_attention)
-        current = np.clip(current, 0, 1)
+        # (current * a + refined * (1 - a), rewritten to update in place)
+        current -= refined
+        current *= edge_attention
+        current += refined
+        np.clip(current, 0, 1, out=current)
 
-    return current.astype(np.float32)
+    return current
 
 
 def _enhanced_classical_shadow(rgb: np.ndarray) -> np.ndarray:
@@ -643,56 +727,68 @@ def _enhanced_classical_shadow(rgb: np.ndarray) -> np.ndarray:
     Returns:
         Shadow probability map in [0, 1]
     """
-    h, w = rgb.shape[:2]
+    # Each cue is weighted and accumulated into ``shadow_prob`` in place, so
+    # at most one full-resolution temporary exists besides the accumulator
 
-    # Stage 1: Multi-scale feature extraction (BDRAR-style FPN)
-    multi_scale = _multi_scale_shadow_features(rgb)
+    # Stage 1: Multi-scale feature extraction (BDRAR-style FPN) - primary
+    shadow_prob = _multi_scale_shadow_features(rgb)
+    shadow_prob *= 0.40
 
     # Stage 2: Additional cues for robustness
 
     # Illumination-based: dark regions are shadow candidates
-    illum = illumination_invariant_v(rgb)
-    darkness = 1.0 - illum
+    darkness = illumination_invariant_v(rgb)
+    np.subtract(1.0, darkness, out=darkness)
+    darkness *= 0.25
+    shadow_prob += darkness
+    del darkness
 
     # Color ratio: shadows often have higher blue relative to red
     r, g, b = rgb[:, :, 0], rgb[:, :, 1], rgb[:, :, 2]
-    intensity = (r + g + b) / 3.0 + 1e-6
-    blue_ratio = b / (intensity + 1e-6)
-    red_ratio = r / (intensity + 1e-6)
-    color_shadow = np.clip((blue_ratio - red_ratio + 0.5), 0, 1)
+    intensity = np.add(r, g, dtype=np.float32)
+    intensity += b
+    intensity /= 3.0
+    intensity += 2e-6
+    color_shadow = np.subtract(b, r, dtype=np.float32)
+    color_shadow /= intensity
+    del intensity
+    color_shadow += 0.5
+    np.clip(color_shadow, 0, 1, out=color_shadow)
+    color_shadow *= 0.20
+    shadow_prob += color_shadow
+    del color_shadow
 
     # Saturation: shadows often have lower saturation
     rgb_uint8 = (rgb * 255).astype(np.uint8)
     hsv = cv2.cvtColor(rgb_uint8, cv2.COLOR_RGB2HSV)
-    saturation = hsv[:, :, 1].astype(np.float32) / 255.0
-    low_sat = 1.0 - saturation
-
-    # Stage 3: Fuse all cues
-    shadow_prob = (
-        0.40 * multi_scale  # BDRAR-style features (primary)
-        + 0.25 * darkness  # Simple darkness
-        + 0.20 * color_shadow  # Color shift
-        + 0.15 * low_sat  # Desaturation
-    )
+    low_sat = hsv[:, :, 1].astype(np.float32)
+    low_sat /= 255.0
+    np.subtract(1.0, low_sat, out=low_sat)
+    low_sat *= 0.15
+    shadow_prob += low_sat
+    del low_sat, hsv, rgb_uint8
 
     # Stage 4: Recurrent attention refinement (BDRAR-style)
     shadow_prob = _recurrent_attention_refinement(shadow_prob, rgb, iterations=2)
 
     # Stage 5: Final morphological cleanup
-    shadow_prob = cv2.GaussianBlur(shadow_prob, (3, 3), 0)
+    cv2.GaussianBlur(shadow_prob, (3, 3), 0, dst=shadow_prob)
 
     # Adaptive thresholding for cleaner boundaries
     shadow_uint8 = (shadow_prob * 255).astype(np.uint8)
     adaptive = cv2.adaptiveThreshold(
         shadow_uint8, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, -5
     )
-    adaptive_mask = adaptive.astype(np.float32) / 255.0
+    adaptive_mask = adaptive.astype(np.float32)
+    adaptive_mask /= 255.0
+    adaptive_mask *= 0.4
 
     # Blend adaptive with soft probability
-    final = 0.6 * shadow_prob + 0.4 * adaptive_mask
-    final = np.clip(final, 0, 1)
+    shadow_prob *= 0.6
+    shadow_prob += adaptive_mask
+    np.clip(shadow_prob, 0, 1, out=shadow_prob)
 
-    return final.astype(np.float32)
+    return shadow_prob
 
 
 def run_shadow_model(rgb: np.ndarray, high_quality: bool = True) -> np.ndarray:
@@ -731,7 +827,7 @@ def run_shadow_model(rgb: np.ndarray, high_quality: bool = True) -> np.ndarray:
         inputs = {k: v.to(device) for k, v in inputs.items()}
 
         # Run inference
-        with torch.no_grad():
+        with torch.no_grad(), get_model_registry().track(SHADOW_MODEL_NAME):
             outputs = model(**inputs)
             logits = outputs.logits  # (1, num_classes, H', W')
 
@@ -775,65 +871,54 @@ def run_shadow_model(rgb: np.ndarray, high_quality: bool = True) -> np.ndarray:
 # SAM (Segment Anything) for Boundary Refinement
 # ============================================================================
 
-# Global cache for SAM model
-_sam_model = None
-_sam_processor = None
-_sam_device = None
-_sam_load_attempted = False
-_sam_load_failed = False
+# SAM is loaded once per process via the model registry
+SAM_MODEL_NAME = "shadowlab.sam"
 
+# Point prompts decoded per image (all share one image embedding)
+SAM_MAX_PROMPTS = 5
 
-def _get_sam_model():
-    """
-    Load SAM (Segment Anything Model) for boundary refinement.
 
-    Uses HuggingFace transformers SAM implementation.
-    Falls back gracefully if unavailable.
+def _load_sam_model():
+    from transformers import SamModel, SamProcessor
 
-    Returns:
-        (model, processor, device) or (None, None, None) if load fails
-    """
-    global _sam_model, _sam_processor, _sam_device
-    global _sam_load_attempted, _sam_load_failed
+    device = _torch_device()
+    # Load SAM-ViT-Base (smaller, faster)
+    model_id = "facebook/sam-vit-base"
+    processor = SamProcessor.from_pretrained(model_id)
+    model = SamModel.from_pretrained(model_id)
+    model.to(device)
+    model.eval()
 
-    if _sam_load_failed:
-        return None, None, None
+    from .models.sam_refiner import SAMRefiner
 
-    if _sam_model is not None:
-        return _sam_model, _sam_processor, _sam_device
+    # The refiner keeps its embedding cache alongside the model it belongs to
+    return SAMRefiner(model, processor, device)
 
-    if _sam_load_attempted:
-        return None, None, None
 
-    _sam_load_attempted = True
+register_model(SAM_MODEL_NAME, _load_sam_model)
 
-    try:
-        import torch
-        from transformers import SamModel, SamProcessor
 
-        # Determine device
-        if torch.cuda.is_available():
-            _sam_device = torch.device("cuda")
-        elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-            _sam_device = torch.device("mps")
-        else:
-            _sam_device = torch.device("cpu")
+def _get_sam_refiner():
+    """Encode-once SAM refiner around the registry's SAM model, or None if unavailable."""
+    return _get_registered(
+        SAM_MODEL_NAME, "SAM model load failed. Boundary refinement disabled", None
+    )
 
-        # Load SAM-ViT-Base (smaller, faster)
-        model_id = "facebook/sam-vit-base"
-        _sam_processor = SamProcessor.from_pretrained(model_id)
-        _sam_model = SamModel.from_pretrained(model_id)
-        _sam_model.to(_sam_device)
-        _sam_model.eval()
 
-        return _sam_model, _sam_processor, _sam_device
+def _get_sam_model():
+    """
+    Load SAM (Segment Anything Model) for boundary refinement.
 
-    except Exception as e:
-        import warnings
+    Uses HuggingFace transformers SAM implementation.
+    Falls back gracefully if unavailable.
 
-        warnings.warn(f"SAM model load failed: {e}. Boundary refinement disabled.", stacklevel=2)
-        _sam_load_failed = True
+    Returns:
+        (model, processor, device) or (None, None, None) if load fails
+    """
+    refiner = _get_sam_refiner()
+    if refiner is None:
         return None, None, None
+    return refiner.model, refiner.processor, refiner.device
 
 
 def _refine_shadow_boundaries_sam(
@@ -854,14 +939,13 @@ def _refine_shadow_boundaries_sam(
     """
     h, w = rgb.shape[:2]
 
-    model, processor, device = _get_sam_model()
+    refiner = _get_sam_refiner()
 
-    if model is None:
+    if refiner is None:
         # SAM unavailable, return original mask
         return shadow_mask
 
     try:
-        import torch
         from scipy import ndimage
 
         # Extract shadow regions as binary mask
@@ -892,28 +976,10 @@ def _refine_shadow_boundaries_sam(
         # Prepare for SAM
         rgb_uint8 = (rgb * 255).astype(np.uint8)
 
-        # Process each point and accumulate masks
-        refined_mask = np.zeros((h, w), dtype=np.float32)
-
-        for point in input_points[:5]:  # Limit to 5 points for speed
-            inputs = processor(images=rgb_uint8, input_points=[[[point]]], return_tensors="pt")
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-
-            with torch.no_grad():
-                outputs = model(**inputs)
-                masks = processor.image_processor.post_process_masks(
-                    outputs.pred_masks.cpu(),
-                    inputs["original_sizes"].cpu(),
-                    inputs["reshaped_input_sizes"].cpu(),
-                )[0]
-
-            # Take best mask (highest score)
-            if masks.shape[0] > 0:
-                best_mask = masks[0, 0].numpy().astype(np.float32)
-                # Resize if needed
-                if best_mask.shape != (h, w):
-                    best_mask = cv2.resize(best_mask, (w, h), interpolation=cv2.INTER_LINEAR)
-                refined_mask = np.maximum(refined_mask, best_mask)
+        # One image encode (cached by image hash), all prompts in one decoder call
+        with get_model_registry().track(SAM_MODEL_NAME):
+            masks = refiner.predict_masks(rgb_uint8, input_points[:SAM_MAX_PROMPTS])
+        refined_mask = masks.max(axis=0) if len(masks) else np.zeros((h, w), dtype=np.float32)
 
         # Combine: use SAM boundaries with original probability
         # Where SAM found segments, use sharper boundaries
@@ -958,17 +1024,35 @@ def run_shadow_model_with_sam(rgb: np.ndarray) -> np.ndarray:
 # ============================================================================
 
 
-# Global cache for MiDaS model (load once, reuse)
-_midas_model = None
-_midas_transform = None
-_midas_device = None
-_midas_load_attempted = False
-_midas_load_failed = False
+# MiDaS variants are loaded once per process via the model registry
+MIDAS_MODEL_NAME = "shadowlab.midas"
+
+
+def _load_midas_model(model_type: str):
+    import torch
+
+    device = _torch_device()
+    # Load MiDaS from torch hub
+    model = torch.hub.load("intel-isl/MiDaS", model_type, trust_repo=True)
+    model.to(device)
+    model.eval()
+
+    # Load transforms
+    midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms", trust_repo=True)
+    if model_type in ["DPT_Large", "DPT_Hybrid"]:
+        transform = midas_transforms.dpt_transform
+    else:
+        transform = midas_transforms.small_transform
+    return model, transform, device
+
+
+for _midas_type in ("MiDaS_small", "DPT_Hybrid", "DPT_Large"):
+    register_model(f"{MIDAS_MODEL_NAME}:{_midas_type}", partial(_load_midas_model, _midas_type))
 
 
 def _get_midas_model(model_type: str = "MiDaS_small"):
     """
-    Load MiDaS model (cached).
+    Load MiDaS model (cached per model type).
 
     Args:
         model_type: One of 'DPT_Large', 'DPT_Hybrid', 'MiDaS_small'
@@ -977,53 +1061,12 @@ def _get_midas_model(model_type: str = "MiDaS_small"):
     Returns:
         (model, transform, device) or (None, None, None) if load fails
     """
-    global _midas_model, _midas_transform, _midas_device, _midas_load_attempted, _midas_load_failed
-
-    if _midas_load_failed:
-        return None, None, None
-
-    if _midas_model is not None:
-        return _midas_model, _midas_transform, _midas_device
-
-    if _midas_load_attempted:
-        return None, None, None
-
-    _midas_load_attempted = True
-
-    try:
-        import torch
-
-        # Determine device
-        if torch.cuda.is_available():
-            _midas_device = torch.device("cuda")
-        elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-            _midas_device = torch.device("mps")
-        else:
-            _midas_device = torch.device("cpu")
-
-        # Load MiDaS from torch hub
-        _midas_model = torch.hub.load("intel-isl/MiDaS", model_type, trust_repo=True)
-        _midas_model.to(_midas_device)
-        _midas_model.eval()
-
-        # Load transforms
-        midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms", trust_repo=True)
-        if model_type in ["DPT_Large", "DPT_Hybrid"]:
-            _midas_transform = midas_transforms.dpt_transform
-        else:
-            _midas_transform = midas_transforms.small_transform
-
-        return _midas_model, _midas_transform, _midas_device
-
-    except Exception as e:
-        import warnings
-
-        warnings.warn(
-            f"MiDaS model load failed: {e}. Using depth estimation fallback.",
-            stacklevel=2,
-        )
-        _midas_load_failed = True
-        return None, None, None
+    name = f"{MIDAS_MODEL_NAME}:{model_type}"
+    if not get_model_registry().is_registered(name):
+        register_model(name, partial(_load_midas_model, model_type))
+    return _get_registered(
+        name, "MiDaS model load failed. Using depth estimation fallback", (None, None, None)
+    )
 
 
 def _fallback_depth_estimation(rgb: np.ndarray) -> np.ndarray:
@@ -1039,27 +1082,41 @@ def _fallback_depth_estimation(rgb: np.ndarray) -> np.ndarray:
         Approximate depth map, normalized to [0, 1]
     """
     # Convert to grayscale
-    gray = 0.299 * rgb[:, :, 0] + 0.587 * rgb[:, :, 1] + 0.114 * rgb[:, :, 2]
+    gray = np.asarray(rgb, dtype=np.float32) @ _LUMA_WEIGHTS
+
+    # Heuristic 3: Blur indicates distance (defocus)
+    blur_depth = cv2.GaussianBlur(gray, (21, 21), 0)
+    np.subtract(gray, blur_depth, out=blur_depth)
+    np.abs(blur_depth, out=blur_depth)
 
     # Heuristic 1: Darker regions tend to be further (ambient occlusion)
-    darkness_depth = 1.0 - gray
+    depth = np.subtract(1.0, gray, out=gray)
 
     # Heuristic 2: Vertical position (higher = further in many scenes)
-    h, w = rgb.shape[:2]
-    y_gradient = np.linspace(0, 1, h)[:, np.newaxis]
-    y_gradient = np.broadcast_to(y_gradient, (h, w))
-
-    # Heuristic 3: Blur indicates distance (defocus)
-    blurred = cv2.GaussianBlur(gray, (21, 21), 0)
-    blur_depth = np.abs(gray - blurred)
+    h = rgb.shape[0]
+    y_gradient = np.linspace(0, 1, h, dtype=np.float32)[:, np.newaxis]
 
-    # Combine heuristics
-    depth = 0.4 * darkness_depth + 0.4 * y_gradient + 0.2 * blur_depth
+    # Combine heuristics (accumulated in place into ``depth``)
+    depth *= 0.4
+    depth += 0.4 * y_gradient
+    blur_depth *= 0.2
+    depth += blur_depth
 
     # Normalize
-    depth = (depth - depth.min()) / (depth.max() - depth.min() + 1e-8)
+    lo, hi = depth.min(), depth.max()
+    depth -= lo
+    depth /= hi - lo + 1e-8
+
+    return depth
 
-    return depth.astype(np.float32)
+
+def _midas_forward_batch(model_type: str, _shape: Any, inputs: list[Any]) -> list[Any]:
+    import torch
+
+    model, _, _ = _get_midas_model(model_type)
+    with torch.no_grad():
+        predictions = model(concat_batch(inputs))
+    return split_batch(predictions, len(inputs))
 
 
 def run_midas_depth(rgb: np.ndarray, model_type: str = "MiDaS_small") -> np.ndarray:
@@ -1092,9 +1149,13 @@ def run_midas_depth(rgb: np.ndarray, model_type: str = "MiDaS_small") -> np.ndar
     # Apply MiDaS transform
     input_batch = transform(rgb_uint8).to(device)
 
-    # Inference
-    with torch.no_grad():
-        prediction = model(input_batch)
+    # Inference (coalesced with concurrent same-shape images when batching is on)
+    batcher = get_batcher(f"midas:{model_type}", partial(_midas_forward_batch, model_type))
+    with torch.no_grad(), get_model_registry().track(f"{MIDAS_MODEL_NAME}:{model_type}"):
+        if batcher is None:
+            prediction = model(input_batch)
+        else:
+            prediction = batcher.submit(tuple(input_batch.shape), input_batch)
 
         # Resize to original resolution
         prediction = torch.nn.functional.interpolate(
@@ -1140,31 +1201,34 @@ def _multi_scale_retinex(rgb: np.ndarray, scales: list[int] | None = None) -> np
     if scales is None:
         scales = [15, 80, 250]
 
-    # Add small epsilon to avoid log(0)
-    rgb_safe = np.maximum(rgb, 1e-6)
-
-    # Convert to log domain
-    log_rgb = np.log(rgb_safe)
+    # Add small epsilon to avoid log(0), then convert to log domain (float32, in place)
+    log_rgb = np.maximum(rgb, 1e-6, out=np.empty(rgb.shape, dtype=np.float32))
+    np.log(log_rgb, out=log_rgb)
 
     # Multi-scale retinex
     retinex = np.zeros_like(log_rgb)
 
     for scale in scales:
-        # Gaussian blur in log domain estimates illumination
-        blurred = cv2.GaussianBlur(log_rgb, (scale | 1, scale | 1), scale / 3.0)
+        # Gaussian blur in log domain estimates illumination; the illumination
+        # is smooth, so wide kernels run on a downsampled pyramid level
+        blurred = pyramid_gaussian_blur(log_rgb, scale | 1, scale / 3.0)
         # Subtract to get reflectance (in log domain)
-        retinex += log_rgb - blurred
+        retinex += log_rgb
+        retinex -= blurred
+    del log_rgb, blurred
 
     # Average across scales
     retinex /= len(scales)
 
     # Convert back from log domain
-    reflectance = np.exp(retinex)
+    reflectance = np.exp(retinex, out=retinex)
 
     # Normalize to [0, 1]
-    reflectance = (reflectance - reflectance.min()) / (reflectance.max() - reflectance.min() + 1e-8)
+    lo, hi = reflectance.min(), reflectance.max()
+    reflectance -= lo
+    reflectance /= hi - lo + 1e-8
 
-    return reflectance.astype(np.float32)
+    return reflectance
 
 
 def _estimate_shading_from_reflectance(rgb: np.ndarray, reflectance: np.ndarray) -> np.ndarray:
@@ -1181,26 +1245,25 @@ def _estimate_shading_from_reflectance(rgb: np.ndarray, reflectance: np.ndarray)
         Shading map (grayscale or RGB)
     """
     # Avoid division by zero
-    reflectance_safe = np.maximum(reflectance, 0.01)
+    shading = np.maximum(reflectance, 0.01, out=np.empty(reflectance.shape, dtype=np.float32))
 
     # Compute shading
-    shading = rgb / reflectance_safe
+    np.divide(rgb, shading, out=shading)
 
-    # Convert to grayscale for shadow detection
+    # Convert to grayscale for shadow detection (single pass, no per-channel temporaries)
     if shading.ndim == 3:
-        shading_gray = (
-            0.299 * shading[:, :, 0] + 0.587 * shading[:, :, 1] + 0.114 * shading[:, :, 2]
-        )
+        shading_gray = shading @ _LUMA_WEIGHTS
     else:
         shading_gray = shading
 
     # Normalize
-    shading_gray = np.clip(shading_gray, 0, None)
+    np.clip(shading_gray, 0, None, out=shading_gray)
     shading_max = np.percentile(shading_gray, 99)
     if shading_max > 0:
-        shading_gray = shading_gray / shading_max
+        shading_gray /= np.float32(shading_max)
 
-    return np.clip(shading_gray, 0, 1).astype(np.float32)
+    np.clip(shading_gray, 0, 1, out=shading_gray)
+    return shading_gray
 
 
 def _color_constancy_correction(reflectance: np.ndarray) -> np.ndarray:
@@ -1226,9 +1289,10 @@ def _color_constancy_correction(reflectance: np.ndarray) -> np.ndarray:
     scale = avg_gray / (avg_per_channel + 1e-8)
 
     # Apply correction
-    corrected = reflectance * scale
+    corrected = np.multiply(reflectance, scale, dtype=np.float32)
 
-    return np.clip(corrected, 0, 1).astype(np.float32)
+    np.clip(corrected, 0, 1, out=corrected)
+    return corrected
 
 
 def run_intrinsic(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
@@ -1261,15 +1325,15 @@ def run_intrinsic(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     # Step 4: Refine shading with edge-aware smoothing
     # Use bilateral filter to smooth shading while preserving edges
     shading_uint8 = (shading * 255).astype(np.uint8)
-    shading_smooth = cv2.bilateralFilter(shading_uint8, 9, 75, 75)
-    shading = shading_smooth.astype(np.float32) / 255.0
+    shading = cv2.bilateralFilter(shading_uint8, 9, 75, 75).astype(np.float32)
+    shading /= 255.0
 
     # Step 5: Enhance shadow regions in shading map
     # Dark regions in shading correspond to shadows
     # Apply gamma correction to emphasize shadows
-    shading = np.power(shading, 0.8)  # Slight gamma to enhance contrast
+    np.power(shading, 0.8, out=shading)  # Slight gamma to enhance contrast
 
-    return reflectance.astype(np.float32), shading.astype(np.float32)
+    return reflectance, shading
 
 
 # ============================================================================
@@ -1277,35 +1341,55 @@ def run_intrinsic(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
 # ============================================================================
 
 
-def depth_to_normals(depth: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+def _unit_normals(depth: np.ndarray) -> np.ndarray:
+    h, w = depth.shape
+
+    # Compute gradients
+    grad_x = cv2.Sobel(depth, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(depth, cv2.CV_32F, 0, 1, ksize=3)
+
+    # Build normal vectors: (−∂z/∂x, −∂z/∂y, 1)
+    normals = np.empty((h, w, 3), dtype=np.float32)
+    np.negative(grad_x, out=normals[:, :, 0])
+    np.negative(grad_y, out=normals[:, :, 1])
+    normals[:, :, 2] = 1.0
+
+    # Normalize
+    norm = np.linalg.norm(normals, axis=2, keepdims=True)
+    norm += 1e-8
+    normals /= norm
+    return normals
+
+
+def _normals_to_rgb(normals: np.ndarray) -> np.ndarray:
+    # Normal.xyz ≈ (−1, −1, 1) to (1, 1, 1) maps to (0, 0, 0) to (1, 1, 1)
+    normals_vis = normals + 1  # Map from [-1, 1] to [0, 1]
+    normals_vis /= 2
+    np.clip(normals_vis, 0, 1, out=normals_vis)
+    return normals_vis
+
+
+def depth_to_normals(
+    depth: np.ndarray, tile_size: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
     """
     Derive surface normals from depth map.
 
     Args:
         depth: Depth map, float32
+        tile_size: Process in parallel tiles of this size (same result up to
+            float rounding)
 
     Returns:
         (normals, normals_vis)
         - normals: (H, W, 3) unit normal vectors
         - normals_vis: (H, W, 3) RGB visualization (0-1)
     """
-    h, w = depth.shape
-
-    # Compute gradients
-    grad_x = cv2.Sobel(depth, cv2.CV_32F, 1, 0, ksize=3)
-    grad_y = cv2.Sobel(depth, cv2.CV_32F, 0, 1, ksize=3)
-
-    # Build normal vectors: (−∂z/∂x, −∂z/∂y, 1)
-    normals = np.stack([-grad_x, -grad_y, np.ones_like(depth)], axis=2)
-
-    # Normalize
-    norm = np.linalg.norm(normals, axis=2, keepdims=True)
-    normals = normals / (norm + 1e-8)
+    # 3x3 Sobel gradients need one pixel of context around each tile
+    normals = map_tiles(_unit_normals, (depth,), tile_size, halo=1)
 
     # Visualize: map to [0, 1] RGB
-    # Normal.xyz ≈ (−1, −1, 1) to (1, 1, 1) maps to (0, 0, 0) to (1, 1, 1)
-    normals_vis = (normals + 1) / 2  # Map from [-1, 1] to [0, 1]
-    normals_vis = np.clip(normals_vis, 0, 1)
+    normals_vis = map_tiles(_normals_to_rgb, (normals,), tile_size)
 
     return normals, normals_vis
 
@@ -1408,17 +1492,19 @@ def fuse_shadow_masks(
     else:
         shading_gray = shading
 
-    # Invert shading (bright = no shadow, dark = shadow)
-    shading_shadow = 1.0 - shading_gray
-
-    # Weighted average
-    fused = classical_weight * classical + ml_weight * ml_mask + shading_weight * shading_shadow
+    # Invert shading (bright = no shadow, dark = shadow), then weighted average
+    # accumulated in place
+    fused = np.subtract(1.0, shading_gray, dtype=np.float32)
+    fused *= shading_weight
+    fused += classical_weight * classical
+    fused += ml_weight * ml_mask
 
     # Normalize if weights don't sum to 1
     total_weight = classical_weight + ml_weight + shading_weight
-    fused = fused / total_weight
+    fused /= total_weight
 
-    return np.clip(fused, 0, 1).astype(np.float32)
+    np.clip(fused, 0, 1, out=fused)
+    return fused
 
 
 def compute_shadow_strength(shading: np.ndarray, fused_mask: np.ndarray) -> float:
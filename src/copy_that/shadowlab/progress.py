@@ -0,0 +1,129 @@
+"""
+Per-stage progress events for streaming shadow analysis.
+
+A ``StageEvent`` is emitted as soon as a stage finishes: its timing, metrics
+(the intermediate tokens known so far) and small PNG previews of the maps it
+produced, so a client can render partial results long before the full run
+completes.
+
+``StageEventHooks`` adapts a ``StageGraph`` run (``on_artifacts`` /
+``on_stage_complete``) to a ``StageEvent`` callback; the step-by-step
+``analyze_image_for_shadows`` builds its events directly.
+"""
+
+import base64
+from collections.abc import Callable, Collection, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import cv2
+import numpy as np
+
+from .dag import StageNode, StageTiming
+from .pipeline import ShadowStageResult
+
+# Long side of preview thumbnails, in pixels
+PREVIEW_LAYER_SIDE = 160
+
+
+@dataclass
+class StageEvent:
+    """One finished stage, ready to be sent to a client."""
+
+    stage: str
+    name: str
+    duration_ms: float
+    metrics: dict[str, float] = field(default_factory=dict)
+    # Artifact name -> base64 PNG thumbnail
+    previews: dict[str, str] = field(default_factory=dict)
+    tokens: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "name": self.name,
+            "duration_ms": self.duration_ms,
+            "metrics": self.metrics,
+            "previews": self.previews,
+            "tokens": self.tokens,
+        }
+
+
+StageCallback = Callable[[StageEvent], None]
+
+
+def encode_layer_preview(data: Any, max_side: int = PREVIEW_LAYER_SIDE) -> str | None:
+    """
+    Downscale a map to a small base64 PNG.
+
+    Float maps in [0, 1] are scaled to 8 bits; other ranges (depth, signed
+    normals) are min-max normalized first. Returns None for anything that is
+    not an (H, W) or (H, W, 3) array.
+    """
+    if not isinstance(data, np.ndarray) or data.size == 0:
+        return None
+    if not (data.ndim == 2 or (data.ndim == 3 and data.shape[2] == 3)):
+        return None
+
+    height, width = data.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = cv2.resize(np.asarray(data, dtype=np.float32), size, interpolation=cv2.INTER_AREA)
+
+    if data.dtype != np.uint8:
+        lo, hi = float(small.min()), float(small.max())
+        if lo < 0.0 or hi > 1.0:
+            small = (small - lo) / (hi - lo) if hi > lo else np.zeros_like(small)
+        small *= 255.0
+    small_uint8 = np.clip(small, 0, 255).astype(np.uint8)
+    if small_uint8.ndim == 3:
+        # Pipeline maps are RGB; OpenCV encodes BGR
+        small_uint8 = np.ascontiguousarray(small_uint8[:, :, ::-1])
+
+    ok, png = cv2.imencode(".png", small_uint8)
+    return base64.b64encode(png.tobytes()).decode("ascii") if ok else None
+
+
+def encode_layer_previews(
+    artifacts: Mapping[str, Any], names: Collection[str] | None = None
+) -> dict[str, str]:
+    """Previews for every image-like artifact (restricted to ``names`` if given)."""
+    previews = {}
+    for name, data in artifacts.items():
+        if names is not None and name not in names:
+            continue
+        encoded = encode_layer_preview(data)
+        if encoded is not None:
+            previews[name] = encoded
+    return previews
+
+
+class StageEventHooks:
+    """Turn ``StageGraph.run`` callbacks into ``StageEvent`` callbacks."""
+
+    def __init__(self, on_stage: StageCallback, preview_artifacts: Collection[str] | None = None):
+        """
+        Args:
+            on_stage: Receives one StageEvent per finished stage
+            preview_artifacts: Artifacts to render previews for (default: all image-like)
+        """
+        self.on_stage = on_stage
+        self.preview_artifacts = preview_artifacts
+        self._previews: dict[str, dict[str, str]] = {}
+
+    def on_artifacts(self, node: StageNode, artifacts: Mapping[str, Any]) -> None:
+        # Runs right before on_stage_complete for the same stage, on the same thread
+        self._previews[node.name] = encode_layer_previews(artifacts, self.preview_artifacts)
+
+    def on_stage_complete(
+        self, node: StageNode, stage_result: ShadowStageResult, timing: StageTiming
+    ) -> None:
+        self.on_stage(
+            StageEvent(
+                stage=node.name,
+                name=stage_result.name,
+                duration_ms=timing.duration_ms,
+                metrics=dict(stage_result.metrics),
+                previews=self._previews.pop(node.name, {}),
+            )
+        )
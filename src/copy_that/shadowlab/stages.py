@@ -8,6 +8,7 @@ Each stage is a standalone function that:
 """
 
 import time
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
@@ -31,13 +32,16 @@ from .pipeline import (
     run_shadow_model,
 )
 
+if TYPE_CHECKING:
+    from cv_pipeline.context import ImageContext
+
 # ============================================================================
 # STAGE 1: Input & Preprocessing
 # ============================================================================
 
 
 def stage_01_input(
-    image_path: str, target_size: tuple[int, int] | None = None
+    image_path: "str | ImageContext", target_size: tuple[int, int] | None = None
 ) -> tuple[ShadowStageResult, list[ShadowVisualLayer], dict[str, np.ndarray]]:
     """
     Stage 1: Input & Preprocessing.
@@ -45,7 +49,7 @@ def stage_01_input(
     Standardize input image and optionally segment.
 
     Args:
-        image_path: Path to input image
+        image_path: Path to input image, or a shared ImageContext
         target_size: Optional (height, width) for resizing
 
     Returns:
@@ -11,14 +11,20 @@ Consolidates the 8-stage pipeline into 5 focused stages:
 Dropped: MSR intrinsic decomposition (weak quality, adds complexity)
 """
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
 
+from .dag import StageGraph, StageNode
 from .pipeline import (
+    _LUMA_WEIGHTS,
     RenderParams,
     ShadowStageResult,
+    ShadowTokens,
     ShadowVisualLayer,
     UIConfig,
     VisualLayerType,
@@ -33,6 +39,10 @@ from .pipeline import (
     run_midas_depth,
     run_shadow_model,
 )
+from .tiling import preview_size, refine_uncertain_tiles, tile_size_for
+
+if TYPE_CHECKING:
+    from cv_pipeline.context import ImageContext
 
 # ============================================================================
 # STAGE 1: Input & Illumination
@@ -40,7 +50,9 @@ from .pipeline import (
 
 
 def stage_01_input_illumination(
-    image_path: str, target_size: tuple[int, int] | None = None
+    image_path: "str | ImageContext | np.ndarray",
+    target_size: tuple[int, int] | None = None,
+    tile_size: int | None = None,
 ) -> tuple[ShadowStageResult, list[ShadowVisualLayer], dict[str, np.ndarray]]:
     """
     Stage 1: Input & Illumination.
@@ -48,8 +60,9 @@ def stage_01_input_illumination(
     Load image and compute illumination-invariant view in one step.
 
     Args:
-        image_path: Path to input image
+        image_path: Path to input image, a shared ImageContext, or decoded RGB
         target_size: Optional (height, width) for resizing
+        tile_size: Tiled processing (see ``tiling``); None = whole frame
 
     Returns:
         (stage_result, visual_layers, artifacts)
@@ -65,7 +78,7 @@ def stage_01_input_illumination(
         rgb_image = cv2.resize(rgb_image, (w, h), interpolation=cv2.INTER_LANCZOS4)
 
     # Compute illumination map
-    illumination_map = illumination_invariant_v(rgb_image)
+    illumination_map = illumination_invariant_v(rgb_image, tile_size=tile_size)
 
     # Metrics
     metrics = {
@@ -129,7 +142,9 @@ def stage_01_input_illumination(
 
 
 def stage_02_classical(
-    illumination_map: np.ndarray, threshold_percentile: float = 20.0
+    illumination_map: np.ndarray,
+    threshold_percentile: float = 20.0,
+    tile_size: int | None = None,
 ) -> tuple[ShadowStageResult, list[ShadowVisualLayer], dict[str, np.ndarray]]:
     """
     Stage 2: Classical Shadow Detection.
@@ -146,7 +161,9 @@ def stage_02_classical(
     start_time = time.time()
 
     # Classical candidates
-    candidate_mask = classical_shadow_candidates(illumination_map, threshold_percentile)
+    candidate_mask = classical_shadow_candidates(
+        illumination_map, threshold_percentile, tile_size=tile_size
+    )
 
     # Metrics
     metrics = {
@@ -264,7 +281,7 @@ def stage_03_ml_shadow(
 
 
 def stage_04_depth_lighting(
-    rgb_image: np.ndarray, illumination_map: np.ndarray
+    rgb_image: np.ndarray, illumination_map: np.ndarray, tile_size: int | None = None
 ) -> tuple[ShadowStageResult, list[ShadowVisualLayer], dict[str, np.ndarray]]:
     """
     Stage 4: Depth & Lighting.
@@ -274,6 +291,7 @@ def stage_04_depth_lighting(
     Args:
         rgb_image: From Stage 1
         illumination_map: From Stage 1 (used as shading proxy)
+        tile_size: Tiled normal estimation (see ``tiling``); None = whole frame
 
     Returns:
         (stage_result, visual_layers, artifacts)
@@ -284,7 +302,7 @@ def stage_04_depth_lighting(
     depth_map = run_midas_depth(rgb_image)
 
     # Normal estimation from depth
-    normal_map, normal_map_rgb = depth_to_normals(depth_map)
+    normal_map, normal_map_rgb = depth_to_normals(depth_map, tile_size=tile_size)
 
     # Use illumination map as shading proxy (simpler than MSR)
     shading_proxy = illumination_map
@@ -493,71 +511,156 @@ def stage_05_fusion(
 # CONVENIENCE: Run full pipeline
 # ============================================================================
 
+PIPELINE_V2_GRAPH = StageGraph(
+    [
+        StageNode(
+            "input_illumination",
+            stage_01_input_illumination,
+            ("image_path", "target_size", "tile_size"),
+            ("rgb_image", "illumination_map"),
+        ),
+        StageNode(
+            "classical",
+            stage_02_classical,
+            ("illumination_map", "tile_size"),
+            ("candidate_mask",),
+        ),
+        StageNode(
+            "ml_shadow", stage_03_ml_shadow, ("rgb_image", "high_quality"), ("ml_shadow_mask",)
+        ),
+        StageNode(
+            "depth_lighting",
+            stage_04_depth_lighting,
+            ("rgb_image", "illumination_map", "tile_size"),
+            ("depth_map", "normal_map", "light_direction", "lighting_error_map"),
+        ),
+        StageNode(
+            "fusion",
+            stage_05_fusion,
+            (
+                "candidate_mask",
+                "ml_shadow_mask",
+                "illumination_map",
+                "light_direction",
+                "lighting_error_map",
+                "rgb_image",
+            ),
+            ("final_shadow_mask", "shadow_overlay"),
+            extras=("shadow_tokens",),
+        ),
+    ],
+    seeds=("image_path", "target_size", "high_quality", "tile_size"),
+)
+
 
 def run_pipeline_v2(
-    image_path: str,
+    image_path: "str | ImageContext",
     target_size: tuple[int, int] | None = None,
     high_quality: bool = True,
+    cancel_event: threading.Event | None = None,
+    executor: ThreadPoolExecutor | None = None,
+    quality: str = "full",
 ) -> dict:
     """
     Run the simplified 5-stage shadow pipeline.
 
+    Classical detection, ML mask and depth/lighting only depend on stage 1,
+    so they run concurrently on the shared stage executor.
+
     Args:
-        image_path: Path to input image
+        image_path: Path to input image, or a shared ImageContext
         target_size: Optional resize dimensions
         high_quality: Use SAM boundary refinement
+        cancel_event: Optional event that aborts the run when set
+        executor: Stage pool to use instead of the shared one (batch runs)
+        quality: "full", "tiled" (same output, parallel tiles) or "preview"
+            (stages run at reduced scale; only ``final_shadow_mask``,
+            ``shadow_overlay`` and the tokens are produced at full resolution)
 
     Returns:
         Dictionary with all stage results, artifacts, and tokens
     """
-    all_stages = []
-    all_layers = []
-    all_artifacts = {}
-
-    # Stage 1: Input & Illumination
-    s1, l1, a1 = stage_01_input_illumination(image_path, target_size)
-    all_stages.append(s1)
-    all_layers.extend(l1)
-    all_artifacts.update(a1)
-
-    # Stage 2: Classical Detection
-    s2, l2, a2 = stage_02_classical(a1["illumination_map"])
-    all_stages.append(s2)
-    all_layers.extend(l2)
-    all_artifacts.update(a2)
-
-    # Stage 3: ML Shadow Mask
-    s3, l3, a3 = stage_03_ml_shadow(a1["rgb_image"], high_quality=high_quality)
-    all_stages.append(s3)
-    all_layers.extend(l3)
-    all_artifacts.update(a3)
-
-    # Stage 4: Depth & Lighting
-    s4, l4, a4 = stage_04_depth_lighting(a1["rgb_image"], a1["illumination_map"])
-    all_stages.append(s4)
-    all_layers.extend(l4)
-    all_artifacts.update(a4)
-
-    # Stage 5: Fusion & Tokens
-    s5, l5, a5, shadow_tokens = stage_05_fusion(
-        candidate_mask=a2["candidate_mask"],
-        ml_shadow_mask=a3["ml_shadow_mask"],
-        illumination_map=a1["illumination_map"],
-        light_direction=a4["light_direction"],
-        lighting_error_map=a4["lighting_error_map"],
-        rgb_image=a1["rgb_image"],
+    tile_size = tile_size_for(quality)
+    image = image_path
+    full_rgb = None
+    if quality == "preview":
+        full_rgb = load_rgb(image_path)
+        if target_size:
+            full_rgb = cv2.resize(full_rgb, target_size[::-1], interpolation=cv2.INTER_LANCZOS4)
+        height, width = full_rgb.shape[:2]
+        preview_h, preview_w = preview_size(height, width)
+        if (preview_h, preview_w) == (height, width):
+            full_rgb = None  # Already small: nothing to gain
+        else:
+            image = cv2.resize(full_rgb, (preview_w, preview_h), interpolation=cv2.INTER_AREA)
+        target_size = None
+
+    run = PIPELINE_V2_GRAPH.run(
+        {
+            "image_path": image,
+            "target_size": target_size,
+            "high_quality": high_quality,
+            "tile_size": tile_size,
+        },
+        executor=executor,
+        cancel_event=cancel_event,
     )
-    all_stages.append(s5)
-    all_layers.extend(l5)
-    all_artifacts.update(a5)
-
-    # Total duration
-    total_ms = sum(s.duration_ms for s in all_stages)
+    artifacts = dict(run.artifacts)
+    shadow_tokens = artifacts.pop("shadow_tokens")
+    stage_timings = {name: t.duration_ms for name, t in run.timings.items()}
+    total_duration_ms = run.wall_ms
+
+    refined_fraction = None
+    if full_rgb is not None:
+        start = time.perf_counter()
+        shadow_tokens, refined_fraction = _refine_preview(artifacts, shadow_tokens, full_rgb)
+        stage_timings["preview_refine"] = 1000.0 * (time.perf_counter() - start)
+        total_duration_ms += stage_timings["preview_refine"]
 
     return {
-        "stages": all_stages,
-        "visual_layers": all_layers,
-        "artifacts": all_artifacts,
+        "stages": run.stages,
+        "visual_layers": run.visual_layers,
+        "artifacts": artifacts,
         "shadow_tokens": shadow_tokens,
-        "total_duration_ms": total_ms,
+        # Wall-clock: stages 2-4 overlap, so this tracks the critical path
+        "total_duration_ms": total_duration_ms,
+        "stage_timings": stage_timings,
+        "quality": quality,
+        # Preview only: share of full-resolution tiles that needed refinement
+        "refined_fraction": refined_fraction,
     }
+
+
+def _refine_preview(
+    artifacts: dict, shadow_tokens: ShadowTokens, full_rgb: np.ndarray
+) -> tuple[ShadowTokens, float]:
+    """Bring a preview run's final mask and tokens back to full resolution."""
+    height, width = full_rgb.shape[:2]
+
+    # Upsample the preview mask, then snap it to full-resolution edges only in
+    # tiles where it is uncertain; confident tiles keep the upsampled values
+    mask = cv2.resize(
+        artifacts["final_shadow_mask"], (width, height), interpolation=cv2.INTER_LINEAR
+    )
+    guide = full_rgb @ _LUMA_WEIGHTS
+    mask, refined_fraction = refine_uncertain_tiles(mask, guide)
+
+    shading_signal = cv2.resize(
+        artifacts["illumination_map"], (width, height), interpolation=cv2.INTER_LINEAR
+    )
+    np.subtract(1.0, shading_signal, out=shading_signal)
+    tokens = compute_shadow_tokens(
+        fused_mask=mask,
+        shading=shading_signal,
+        light_direction=artifacts["light_direction"],
+        physics_consistency=shadow_tokens.physics_consistency,
+    )
+
+    # Same overlay as stage 5, at full resolution
+    overlay = full_rgb * 0.7
+    overlay[:, :, 0] += mask * 0.3
+    np.clip(overlay, 0, 1, out=overlay)
+
+    artifacts["final_shadow_mask"] = mask
+    artifacts["shadow_overlay"] = overlay
+    return tokens, refined_fraction
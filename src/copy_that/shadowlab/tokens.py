@@ -8,14 +8,23 @@ Converts raw shadow analysis (masks, maps, geometry) into:
 This layer bridges computer vision output and design systems.
 """
 
+import threading
+import time
 from dataclasses import asdict, dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import cv2
 import numpy as np
 
-from .classical import detect_shadows_classical
+from .classical import ShadowClassicalConfig, detect_shadows_classical
+from .dag import StageCancelledError
 from .depth_normals import estimate_depth_and_normals
 from .intrinsic import decompose_intrinsic
+from .progress import StageCallback, StageEvent, encode_layer_previews
+from .tiling import preview_size, tile_size_for
+
+if TYPE_CHECKING:
+    from cv_pipeline.context import ImageContext
 
 
 @dataclass
@@ -349,10 +358,13 @@ def quantize_shadow_tokens(features: ShadowFeatures) -> ShadowTokens:
 
 
 def analyze_image_for_shadows(
-    image_bgr: np.ndarray,
+    image_bgr: "np.ndarray | ImageContext",
     use_deep: bool = False,
     use_geometry: bool = True,
     device: str = "cpu",
+    quality: str = "full",
+    on_stage: StageCallback | None = None,
+    cancel_event: threading.Event | None = None,
 ) -> dict[str, Any]:
     """
     High-level entrypoint for comprehensive shadow analysis.
@@ -361,10 +373,17 @@ def analyze_image_for_shadows(
     intrinsic decomposition, feature extraction, and tokenization.
 
     Args:
-        image_bgr: Input image in BGR format (H×W×3, uint8)
+        image_bgr: Input image in BGR format (H×W×3, uint8), or an ImageContext
+            whose decoded BGR view is reused
         use_deep: Whether to use deep learning models (slower, potentially more accurate)
         use_geometry: Whether to estimate depth/normals for geometry-aware analysis
         device: Compute device ("cuda" or "cpu")
+        quality: "full", "tiled" (same result, classical detection in parallel
+            tiles) or "preview" (analyze a copy downscaled to
+            ``PREVIEW_MAX_SIDE``; maps are returned at that size)
+        on_stage: Called with a StageEvent (timing, metrics, map previews)
+            after each step, for streaming progress
+        cancel_event: Set to stop before the next step (raises StageCancelledError)
 
     Returns:
         Dictionary containing:
@@ -377,6 +396,9 @@ def analyze_image_for_shadows(
             - tokens: ShadowTokens dataclass
             - debug: Debug information
 
+    Raises:
+        StageCancelledError: If cancel_event was set mid-run
+
     Example:
         >>> result = analyze_image_for_shadows(image_bgr)
         >>> print(f"Shadow area: {result['features'].shadow_area_fraction:.1%}")
@@ -385,10 +407,47 @@ def analyze_image_for_shadows(
         >>> import cv2
         >>> cv2.imshow("Shadows", result["shadow_mask"])
     """
+    if not isinstance(image_bgr, np.ndarray):
+        image_bgr = image_bgr.cv_bgr
+
+    step_start = time.perf_counter()
+
+    def finish_step(stage: str, name: str, maps: dict, metrics=None, tokens=None) -> None:
+        nonlocal step_start
+        if on_stage is not None:
+            on_stage(
+                StageEvent(
+                    stage=stage,
+                    name=name,
+                    duration_ms=1000.0 * (time.perf_counter() - step_start),
+                    metrics=metrics or {},
+                    previews=encode_layer_previews(maps),
+                    tokens=tokens,
+                )
+            )
+        if cancel_event is not None and cancel_event.is_set():
+            raise StageCancelledError("Shadow analysis cancelled")
+        step_start = time.perf_counter()
+
+    tile_size = tile_size_for(quality)
+    if quality == "preview":
+        height, width = image_bgr.shape[:2]
+        preview_h, preview_w = preview_size(height, width)
+        if (preview_h, preview_w) != (height, width):
+            image_bgr = cv2.resize(image_bgr, (preview_w, preview_h), interpolation=cv2.INTER_AREA)
+
     # Step 1: Classical shadow detection
-    classical_result = detect_shadows_classical(image_bgr)
+    classical_result = detect_shadows_classical(
+        image_bgr, ShadowClassicalConfig(tile_size=tile_size)
+    )
     shadow_soft = classical_result["shadow_soft"]
     shadow_mask = classical_result["shadow_mask"]
+    finish_step(
+        "classical",
+        "Classical Detection",
+        {"shadow_soft": shadow_soft},
+        metrics={"shadow_area_fraction": float(np.mean(shadow_mask > 0))},
+    )
 
     # Step 2: Geometry estimation (optional)
     depth = None
@@ -402,6 +461,7 @@ def analyze_image_for_shadows(
             import logging
 
             logging.warning(f"Geometry estimation failed: {e}")
+        finish_step("geometry", "Depth & Normals", {"depth": depth, "normals": normals})
 
     # Step 3: Intrinsic decomposition
     try:
@@ -412,6 +472,7 @@ def analyze_image_for_shadows(
 
         logging.warning(f"Intrinsic decomposition failed: {e}")
         shading = None
+    finish_step("intrinsic", "Intrinsic Decomposition", {"shading": shading})
 
     # Step 4: Feature extraction
     features = compute_shadow_features(
@@ -425,6 +486,7 @@ def analyze_image_for_shadows(
 
     # Step 5: Tokenization
     tokens = quantize_shadow_tokens(features)
+    finish_step("tokens", "Features & Tokens", {}, tokens=tokens.to_dict())
 
     return {
         "shadow_soft": shadow_soft,
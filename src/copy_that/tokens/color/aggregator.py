@@ -3,6 +3,7 @@ ColorAggregator - Batch color aggregation and deduplication
 
 Core logic for:
 - De-duplicating colors from multiple image extractions using Delta-E
+  (candidates come from an incremental Lab grid index, see DeltaEIndex)
 - Tracking provenance (which images contributed each color)
 - Generating library statistics
 """
@@ -13,7 +14,7 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from copy_that.application.color_extractor import ExtractedColorToken
-from copy_that.application.color_utils import calculate_delta_e
+from copy_that.application.color_index import DeltaEIndex
 from copy_that.constants import DEFAULT_DELTA_E_THRESHOLD
 
 logger = logging.getLogger(__name__)
@@ -104,18 +105,13 @@ class ColorAggregator:
     def deduplicate(self, tokens: list[AggregatedColorToken]) -> list[AggregatedColorToken]:
         """Deduplicate a list of aggregated color tokens using Delta-E matching."""
         deduped: list[AggregatedColorToken] = []
+        index = DeltaEIndex(self.delta_e_threshold)
 
         for token in tokens:
-            match = next(
-                (
-                    existing
-                    for existing in deduped
-                    if calculate_delta_e(token.hex, existing.hex) < self.delta_e_threshold
-                ),
-                None,
-            )
+            position = index.first_match(token.hex)
 
-            if match:
+            if position is not None:
+                match = deduped[position]
                 # Prefer higher-confidence attributes
                 if token.confidence > match.confidence:
                     match.confidence = token.confidence
@@ -126,6 +122,7 @@ class ColorAggregator:
                     match.temperature = token.temperature or match.temperature
                     match.saturation_level = token.saturation_level or match.saturation_level
                     match.lightness_level = token.lightness_level or match.lightness_level
+                    index.update(position, match.hex)
 
                 # Track all provenance contributions
                 match.merge_provenance(token)
@@ -146,6 +143,7 @@ class ColorAggregator:
                     role=token.role,
                 )
             )
+            index.add(token.hex)
 
         return deduped
 
@@ -181,20 +179,19 @@ class ColorAggregator:
         # Flatten and index colors by image
         image_count = len(colors_batch)
         image_index = 0
+        index = DeltaEIndex(delta_e_threshold)
         for image_colors in colors_batch:
             image_id = f"image_{image_index}"
 
             for source_color in image_colors:
                 # Try to find existing color to merge
-                existing_token = ColorAggregator._find_matching_token(
-                    source_color,
-                    library.tokens,
-                    delta_e_threshold,
-                )
+                position = index.first_match(source_color.hex)
 
-                if existing_token:
-                    # Merge with existing token
+                if position is not None:
+                    # Merge with existing token (its hex may change to the new source)
+                    existing_token = library.tokens[position]
                     existing_token.update_from_source(source_color, image_id)
+                    index.update(position, existing_token.hex)
                 else:
                     # Create new token
                     new_token = AggregatedColorToken(
@@ -210,6 +207,7 @@ class ColorAggregator:
                     )
                     new_token.add_provenance(image_id, source_color.confidence)
                     library.tokens.append(new_token)
+                    index.add(new_token.hex)
 
             image_index += 1
 
@@ -222,32 +220,6 @@ class ColorAggregator:
 
         return library
 
-    @staticmethod
-    def _find_matching_token(
-        source: ExtractedColorToken,
-        existing_tokens: list[AggregatedColorToken],
-        delta_e_threshold: float,
-    ) -> AggregatedColorToken | None:
-        """
-        Find existing token matching source color using Delta-E
-
-        Args:
-            source: Source color to match
-            existing_tokens: List of existing tokens
-            delta_e_threshold: Delta-E threshold for match
-
-        Returns:
-            Matching token or None
-        """
-        for existing in existing_tokens:
-            # Calculate Delta-E between source and existing
-            delta_e = calculate_delta_e(source.hex, existing.hex)
-
-            if delta_e < delta_e_threshold:
-                return existing
-
-        return None
-
     @staticmethod
     def _generate_statistics(
         tokens: list[AggregatedColorToken], image_count: int
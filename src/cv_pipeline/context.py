@@ -0,0 +1,217 @@
+"""Per-request image context shared by CV extractors and shadow analysis.
+
+An ``ImageContext`` wraps one uploaded image: the payload is base64-decoded and
+run through ``preprocess_image`` at most once, and derived artifacts (Lab view,
+connected-component boxes, superpixel labels, thumbnails) are computed lazily on
+first use and reused by every consumer of the same request.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import threading
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import Any, TypeVar, cast
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from cv_pipeline import superpixels
+from cv_pipeline.preprocess import preprocess_image
+
+T = TypeVar("T")
+
+DEFAULT_MEDIA_TYPE = "image/png"
+
+
+def split_data_url(image_base64: str) -> tuple[str, str | None]:
+    """Split a data URL into (raw base64 payload, media type or None)."""
+    if "," not in image_base64:
+        return image_base64, None
+    header, payload = image_base64.split(",", 1)
+    media_type = None
+    if header.startswith("data:"):
+        media_type = header[len("data:") :].split(";", 1)[0] or None
+    return payload, media_type
+
+
+class ImageContext:
+    """Image payload plus lazily decoded, cached views for one request.
+
+    Either encoding of the payload (raw bytes or base64) is produced from the
+    other at most once, on first use.
+    """
+
+    def __init__(
+        self,
+        data: bytes | None = None,
+        *,
+        media_type: str = DEFAULT_MEDIA_TYPE,
+        base64_data: str | None = None,
+    ):
+        if data is None and base64_data is None:
+            raise ValueError("ImageContext requires image bytes or base64 data")
+        self.media_type = media_type
+        self._data = data
+        self._base64 = base64_data
+        self._cache: dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_base64(cls, image_base64: str, media_type: str | None = None) -> ImageContext:
+        """Build a context from raw base64 or a ``data:`` URL (its media type wins)."""
+        payload, url_media_type = split_data_url(image_base64)
+        return cls(
+            media_type=url_media_type or media_type or DEFAULT_MEDIA_TYPE,
+            base64_data=payload,
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, media_type: str | None = None) -> ImageContext:
+        return cls(bytes(data), media_type=media_type or DEFAULT_MEDIA_TYPE)
+
+    @classmethod
+    def from_path(cls, path: str | Path) -> ImageContext:
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(path)
+        suffix = path.suffix.lower().lstrip(".")
+        media_type = f"image/{'jpeg' if suffix == 'jpg' else suffix}" if suffix else None
+        return cls.from_bytes(path.read_bytes(), media_type=media_type)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Ship only the encoded payload to worker processes; views are rebuilt there
+        return {"media_type": self.media_type, "data": self._data, "base64": self._base64}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.media_type = state["media_type"]
+        self._data = state["data"]
+        self._base64 = state["base64"]
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def cached(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Return the artifact stored under ``key``, computing it once if missing."""
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = factory()
+            return cast(T, self._cache[key])
+
+    # --- Encoded payload -------------------------------------------------
+
+    @property
+    def data(self) -> bytes:
+        """Raw image bytes, decoded from base64 at most once."""
+        if self._data is None:
+            self._data = base64.b64decode(self._base64 or "")
+        return self._data
+
+    @property
+    def base64_data(self) -> str:
+        """Raw base64 payload (no ``data:`` prefix), encoded at most once."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("ascii")
+        return self._base64
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.media_type};base64,{self.base64_data}"
+
+    # --- Decoded views ---------------------------------------------------
+
+    def preprocessed(
+        self, preprocess: Callable[[bytes], dict[str, Any]] | None = None
+    ) -> dict[str, Any]:
+        """Run ``preprocess`` (``preprocess_image`` by default) on the payload once.
+
+        Results are cached per preprocess function, so callers passing a different
+        function never receive another preprocessor's views.
+        """
+        run = preprocess or preprocess_image
+        return self.cached(("views", run), lambda: run(self.data))
+
+    @property
+    def views(self) -> dict[str, Any]:
+        """``preprocess_image`` output (EXIF-transposed, downscaled PIL/BGR/gray)."""
+        return self.preprocessed()
+
+    @property
+    def pil_image(self) -> Image.Image:
+        image: Image.Image = self.views["pil_image"]
+        return image
+
+    @property
+    def cv_bgr(self) -> np.ndarray:
+        bgr: np.ndarray = self.views["cv_bgr"]
+        return bgr
+
+    @property
+    def cv_gray(self) -> np.ndarray:
+        gray: np.ndarray = self.views["cv_gray"]
+        return gray
+
+    @property
+    def cv_lab(self) -> np.ndarray:
+        """OpenCV 8-bit Lab view of ``cv_bgr``."""
+        return self.cached("cv_lab", lambda: cv2.cvtColor(self.cv_bgr, cv2.COLOR_BGR2LAB))
+
+    @property
+    def rgb_float(self) -> np.ndarray:
+        """RGB float32 in [0, 1], the input format of the shadowlab stages."""
+        return self.cached(
+            "rgb_float",
+            lambda: cv2.cvtColor(self.cv_bgr, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0,
+        )
+
+    # --- Derived artifacts -----------------------------------------------
+
+    def component_bboxes(
+        self,
+        detect: Callable[[Any], list[tuple[int, int, int, int]]] | None = None,
+        preprocess: Callable[[bytes], dict[str, Any]] | None = None,
+    ) -> list[tuple[int, int, int, int]]:
+        """Connected-component boxes of the gray view.
+
+        ``detect`` (``components_to_bboxes`` by default) runs on the ``cv_gray``
+        view produced by ``preprocess`` (see :meth:`preprocessed`).
+        """
+        if detect is None:
+            from cv_pipeline.primitives import components_to_bboxes
+
+            detect = components_to_bboxes
+        run = detect
+        views = preprocess or preprocess_image
+        return list(
+            self.cached(
+                ("component_bboxes", run, views),
+                lambda: run(self.preprocessed(views)["cv_gray"]),
+            )
+        )
+
+    def superpixel_labels(
+        self, n_segments: int = 120, compactness: float = 20, backend: str | None = None
+    ) -> np.ndarray:
+        """Superpixel labels of the RGB view (see ``cv_pipeline.superpixels``)."""
+        resolved = superpixels.resolve_backend(backend)
+
+        def compute() -> np.ndarray:
+            return superpixels.superpixel_labels(
+                self.cv_bgr[:, :, ::-1], n_segments, compactness, resolved
+            )
+
+        return self.cached(("superpixel_labels", n_segments, compactness, resolved), compute)
+
+    def thumbnail(self, max_dim: int = 256, fmt: str = "PNG") -> bytes:
+        """Encoded thumbnail of the preprocessed image."""
+
+        def compute() -> bytes:
+            thumb = self.pil_image.copy()
+            thumb.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumb.save(buffer, format=fmt)
+            return buffer.getvalue()
+
+        return self.cached(("thumbnail", max_dim, fmt.upper()), compute)
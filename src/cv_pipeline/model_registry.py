@@ -0,0 +1,343 @@
+"""Process-wide registry for optional ML models (SAM, MiDaS, LayoutParser, ...).
+
+Every optional model loads through one ``ModelRegistry`` instead of ad-hoc
+module globals, so all of them share the same semantics:
+
+- lazy loading on first use, or eager warm-up at worker start
+  (``MODEL_WARMUP=shadowlab.sam,layoutparser``)
+- concurrent first use loads once (per-model lock); other callers wait
+- failed loads are negatively cached and retried with exponential backoff
+  instead of on every request (or never again)
+- loaded models are evicted least-recently-used when their estimated size
+  exceeds ``MODEL_MEMORY_BUDGET_MB``
+- load time, load failures and inference time are exported as Prometheus
+  metrics
+
+Modules register loaders at import time and fetch models by name::
+
+    register_model("shadowlab.sam", _load_sam)
+    refiner = get_model_registry().get_optional("shadowlab.sam")
+
+    with get_model_registry().track("shadowlab.sam"):
+        masks = refiner.predict_masks(...)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_BACKOFF_SECONDS = 60.0
+MAX_RETRY_BACKOFF_SECONDS = 3600.0
+
+MODEL_LOAD_SECONDS = Histogram(
+    "copythat_model_load_seconds",
+    "Time spent loading optional ML models",
+    ["model"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+MODEL_LOAD_FAILURES = Counter(
+    "copythat_model_load_failures_total",
+    "Optional ML model load failures",
+    ["model"],
+)
+MODEL_INFERENCE_SECONDS = Histogram(
+    "copythat_model_inference_seconds",
+    "Inference time per optional ML model call",
+    ["model"],
+)
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model failed to load or is still in its retry backoff.
+
+    ``fresh`` is True only for the call that actually attempted (and failed)
+    the load, so callers can warn once per attempt rather than per request.
+    """
+
+    def __init__(self, name: str, cause: BaseException | None, retry_at: float, fresh: bool):
+        super().__init__(f"Model {name!r} unavailable: {cause}")
+        self.name = name
+        self.cause = cause
+        self.retry_at = retry_at
+        self.fresh = fresh
+
+
+def estimate_model_bytes(obj: Any, _depth: int = 0) -> int:
+    """Best-effort memory footprint: torch parameters/buffers, arrays, containers."""
+    if obj is None or _depth > 3:
+        return 0
+    if isinstance(obj, tuple | list):
+        return sum(estimate_model_bytes(o, _depth + 1) for o in obj)
+    if isinstance(obj, dict):
+        return sum(estimate_model_bytes(o, _depth + 1) for o in obj.values())
+    if hasattr(obj, "parameters") and callable(obj.parameters):
+        try:
+            tensors = list(obj.parameters())
+            if hasattr(obj, "buffers"):
+                tensors += list(obj.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return 0
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    # Wrappers (SAMRefiner, FastSAMSegmenter, ...) hold the network on an attribute
+    for attr in ("model", "_model"):
+        inner = getattr(obj, attr, None)
+        if inner is not None:
+            return estimate_model_bytes(inner, _depth + 1)
+    return 0
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    size_bytes: int | None = None
+    warm: bool = False
+    value: Any = None
+    loaded: bool = False
+    loaded_bytes: int = 0
+    last_used: float = 0.0
+    failures: int = 0
+    last_error: BaseException | None = None
+    retry_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """Thread-safe lazy model cache with backoff and a memory budget."""
+
+    def __init__(
+        self,
+        memory_budget_bytes: int | None = None,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF_SECONDS,
+        max_backoff: float = MAX_RETRY_BACKOFF_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> ModelRegistry:
+        budget_mb = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+        return cls(
+            memory_budget_bytes=budget_mb * 1024 * 1024 or None,
+            retry_backoff=float(
+                os.getenv("MODEL_RETRY_BACKOFF_SECONDS", DEFAULT_RETRY_BACKOFF_SECONDS)
+            ),
+        )
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        *,
+        size_bytes: int | None = None,
+        warm: bool = False,
+    ) -> None:
+        """Declare how to load ``name``; re-registering replaces an unloaded entry."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.loaded:
+                return
+            self._entries[name] = _Entry(loader=loader, size_bytes=size_bytes, warm=warm)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._entries
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.loaded
+
+    def _entry(self, name: str, loader: Callable[[], Any] | None) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                if loader is None:
+                    raise KeyError(f"No loader registered for model {name!r}")
+                entry = self._entries[name] = _Entry(loader=loader)
+            return entry
+
+    def get(self, name: str, loader: Callable[[], Any] | None = None) -> Any:
+        """Return the loaded model, loading it on first use.
+
+        ``loader`` registers ``name`` on the fly (for parametrized keys such as
+        a weights path). Raises ``ModelUnavailableError`` if loading fails or a
+        previous failure is still inside its backoff window.
+        """
+        entry = self._entry(name, loader)
+        if entry.loaded:
+            entry.last_used = self._clock()
+            return entry.value
+
+        with entry.lock:
+            # Another thread may have finished loading while we waited
+            if entry.loaded:
+                entry.last_used = self._clock()
+                return entry.value
+            now = self._clock()
+            if entry.last_error is not None and now < entry.retry_at:
+                raise ModelUnavailableError(name, entry.last_error, entry.retry_at, fresh=False)
+
+            started = time.perf_counter()
+            try:
+                value = entry.loader()
+            except Exception as e:
+                entry.failures += 1
+                entry.last_error = e
+                backoff = min(self.retry_backoff * 2 ** (entry.failures - 1), self.max_backoff)
+                entry.retry_at = now + backoff
+                MODEL_LOAD_FAILURES.labels(model=name).inc()
+                logger.warning("Model %s failed to load (retry in %.0fs): %s", name, backoff, e)
+                raise ModelUnavailableError(name, e, entry.retry_at, fresh=True) from e
+
+            MODEL_LOAD_SECONDS.labels(model=name).observe(time.perf_counter() - started)
+            entry.value = value
+            entry.loaded = True
+            entry.failures = 0
+            entry.last_error = None
+            entry.loaded_bytes = (
+                entry.size_bytes if entry.size_bytes is not None else estimate_model_bytes(value)
+            )
+            entry.last_used = self._clock()
+            logger.info(
+                "Loaded model %s in %.2fs (~%d MB)",
+                name,
+                time.perf_counter() - started,
+                entry.loaded_bytes // (1024 * 1024),
+            )
+
+        self._enforce_budget(keep=name)
+        return value
+
+    def get_optional(self, name: str, loader: Callable[[], Any] | None = None) -> Any | None:
+        """Like ``get`` but returns None when the model is unavailable."""
+        try:
+            return self.get(name, loader)
+        except ModelUnavailableError:
+            return None
+
+    @contextlib.contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        """Record the duration of one inference call for ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            MODEL_INFERENCE_SECONDS.labels(model=name).observe(time.perf_counter() - started)
+
+    def _enforce_budget(self, keep: str) -> None:
+        if not self.memory_budget_bytes:
+            return
+        with self._lock:
+            loaded = [(n, e) for n, e in self._entries.items() if e.loaded]
+            total = sum(e.loaded_bytes for _, e in loaded)
+            for name, entry in sorted(loaded, key=lambda item: item[1].last_used):
+                if total <= self.memory_budget_bytes:
+                    break
+                if name == keep:
+                    continue
+                total -= entry.loaded_bytes
+                self._unload(entry)
+                self.evictions += 1
+                logger.info("Evicted model %s to stay within the memory budget", name)
+
+    @staticmethod
+    def _unload(entry: _Entry) -> None:
+        entry.value = None
+        entry.loaded = False
+        entry.loaded_bytes = 0
+
+    def evict(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._unload(entry)
+
+    def warm_up(self, names: Iterable[str] | None = None) -> dict[str, bool]:
+        """Load ``names`` (default: models registered with ``warm=True``) now."""
+        if names is None:
+            names = [n for n, e in self._entries.items() if e.warm]
+        results: dict[str, bool] = {}
+        for name in names:
+            if not self.is_registered(name):
+                logger.warning("Cannot warm unknown model %s", name)
+                results[name] = False
+                continue
+            results[name] = self.get_optional(name) is not None
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            models = {
+                name: {
+                    "loaded": e.loaded,
+                    "bytes": e.loaded_bytes,
+                    "failures": e.failures,
+                    "retry_in": round(max(0.0, e.retry_at - self._clock()), 1)
+                    if e.last_error is not None
+                    else 0.0,
+                }
+                for name, e in self._entries.items()
+            }
+        return {
+            "models": models,
+            "loaded_bytes": sum(m["bytes"] for m in models.values()),
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "evictions": self.evictions,
+        }
+
+
+# Global registry shared by every model user in the process
+_registry: ModelRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the process-wide model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry.from_env()
+        return _registry
+
+
+def register_model(
+    name: str, loader: Callable[[], Any], *, size_bytes: int | None = None, warm: bool = False
+) -> None:
+    """Register a loader on the global registry (used at module import time)."""
+    get_model_registry().register(name, loader, size_bytes=size_bytes, warm=warm)
+
+
+def warm_models_from_env() -> dict[str, bool]:
+    """Eagerly load the comma-separated ``MODEL_WARMUP`` models, if any."""
+    names = [n.strip() for n in os.getenv("MODEL_WARMUP", "").split(",") if n.strip()]
+    if not names:
+        return {}
+    return get_model_registry().warm_up(names)
+
+
+def reset_model_registry() -> None:
+    """Forget all loaded models and failures, keeping registered loaders."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            return
+        previous, _registry = _registry, ModelRegistry.from_env()
+    for name, entry in previous._entries.items():
+        _registry.register(name, entry.loader, size_bytes=entry.size_bytes, warm=entry.warm)
@@ -8,6 +8,7 @@ This module:
 4. Provides async session fixtures
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -25,6 +26,9 @@ collect_ignore = [
     "token_smoke_test.py",
 ]
 
+# Run CV extraction on threads in tests so unittest.mock patches still apply
+os.environ.setdefault("CV_POOL_MODE", "thread")
+
 # Add src directory to path so imports work
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
@@ -34,9 +38,11 @@ sys.path.insert(0, str(src_path))
 # This must happen BEFORE calling Base.metadata.create_all()
 import copy_that.domain.models  # noqa: F401
 from copy_that.domain.models import ExtractionSession, Project, TokenLibrary
+from copy_that.infrastructure.cache import reset_result_cache
 from copy_that.infrastructure.database import Base
 from copy_that.infrastructure.security.rate_limiter import reset_rate_limiter
 from copy_that.interfaces.api.main import app
+from cv_pipeline.model_registry import reset_model_registry
 
 
 def pytest_configure(config):
@@ -52,6 +58,22 @@ def reset_rate_limiter_fixture():
     reset_rate_limiter()
 
 
+@pytest.fixture(autouse=True)
+def reset_result_cache_fixture():
+    """Drop cached extraction results so tests never see each other's mocks."""
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_model_registry_fixture():
+    """Unload registry models so monkeypatched loaders never leak between tests."""
+    reset_model_registry()
+    yield
+    reset_model_registry()
+
+
 @pytest_asyncio.fixture
 async def test_db():
     """
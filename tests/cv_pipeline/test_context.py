@@ -0,0 +1,108 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from cv_pipeline import context as context_module
+from cv_pipeline.context import ImageContext, split_data_url
+from cv_pipeline.preprocess import preprocess_image
+from cv_pipeline.primitives import components_to_bboxes
+
+
+def _make_png(size: tuple[int, int] = (1600, 800)) -> bytes:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((100, 100, 400, 400), fill="black")
+    draw.rectangle((600, 100, 900, 400), fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_split_data_url() -> None:
+    assert split_data_url("data:image/jpeg;base64,QUJD") == ("QUJD", "image/jpeg")
+    assert split_data_url("QUJD") == ("QUJD", None)
+
+
+def test_from_base64_uses_data_url_media_type_and_keeps_payload() -> None:
+    payload = base64.b64encode(_make_png()).decode("ascii")
+    ctx = ImageContext.from_base64(f"data:image/webp;base64,{payload}", "image/png")
+
+    assert ctx.media_type == "image/webp"
+    assert ctx.base64_data == payload
+    assert ctx.data == _make_png()
+    assert ctx.data_url.startswith("data:image/webp;base64,")
+
+
+def test_payload_is_not_decoded_until_needed() -> None:
+    ctx = ImageContext.from_base64("data:image/png;base64,AAA")
+    assert ctx.base64_data == "AAA"
+    with pytest.raises(ValueError):
+        _ = ctx.data
+
+
+def test_preprocess_runs_once_and_views_are_shared(monkeypatch) -> None:
+    calls = []
+    real_preprocess = context_module.preprocess_image
+
+    def counting_preprocess(data):
+        calls.append(len(data))
+        return real_preprocess(data)
+
+    monkeypatch.setattr(context_module, "preprocess_image", counting_preprocess)
+    ctx = ImageContext.from_bytes(_make_png())
+
+    views = ctx.views
+    assert ctx.preprocessed() is views
+    assert ctx.cv_bgr is views["cv_bgr"]
+    assert len(calls) == 1
+    assert max(ctx.pil_image.size) <= 1024
+
+
+def test_views_are_cached_per_preprocess_function() -> None:
+    ctx = ImageContext.from_bytes(_make_png())
+
+    def gray_only(data: bytes) -> dict:
+        return {"cv_gray": preprocess_image(data)["cv_gray"]}
+
+    views = ctx.preprocessed(preprocess_image)
+    custom = ctx.preprocessed(gray_only)
+
+    assert set(custom) == {"cv_gray"}
+    assert ctx.preprocessed(gray_only) is custom
+    assert ctx.views is views
+    assert ctx.component_bboxes(lambda gray: [(0, 0, 1, 1)]) == [(0, 0, 1, 1)]
+    assert ctx.component_bboxes() != [(0, 0, 1, 1)]
+
+
+def test_derived_artifacts_are_cached() -> None:
+    ctx = ImageContext.from_bytes(_make_png())
+
+    assert ctx.cv_lab is ctx.cv_lab
+    assert ctx.cv_lab.shape == ctx.cv_bgr.shape
+    assert ctx.rgb_float.dtype == np.float32
+    assert float(ctx.rgb_float.max()) <= 1.0
+
+    boxes = ctx.component_bboxes()
+    assert len(boxes) >= 2
+    assert ctx.component_bboxes() == boxes
+
+    thumb = ctx.thumbnail(128)
+    assert ctx.thumbnail(128) is thumb
+    assert max(Image.open(io.BytesIO(thumb)).size) == 128
+
+
+def test_extractors_accept_shared_context() -> None:
+    from copy_that.application.cv.color_cv_extractor import CVColorExtractor
+    from copy_that.application.cv.spacing_cv_extractor import CVSpacingExtractor
+
+    ctx = ImageContext.from_bytes(_make_png())
+    colors = CVColorExtractor(max_colors=4, use_superpixels=False).extract_from_context(ctx)
+    spacing = CVSpacingExtractor(max_tokens=4).extract_from_context(ctx)
+
+    assert colors.colors
+    assert spacing.tokens
+    assert ("views", preprocess_image) in ctx._cache
+    assert ("component_bboxes", components_to_bboxes, preprocess_image) in ctx._cache
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cv_pipeline.model_registry import (
+    ModelRegistry,
+    ModelUnavailableError,
+    estimate_model_bytes,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_concurrent_first_use_loads_once():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry()
+    registry.register("slow", loader)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("slow"))) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+
+def test_failed_load_is_negatively_cached_with_backoff():
+    clock = FakeClock()
+    attempts = []
+
+    def loader():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise ImportError("torch missing")
+        return "model"
+
+    registry = ModelRegistry(retry_backoff=10, clock=clock)
+    registry.register("flaky", loader)
+
+    with pytest.raises(ModelUnavailableError) as first:
+        registry.get("flaky")
+    assert first.value.fresh
+    with pytest.raises(ModelUnavailableError) as cached:
+        registry.get("flaky")
+    assert not cached.value.fresh
+    assert registry.get_optional("flaky") is None
+    assert len(attempts) == 1
+
+    clock.now = 10
+    with pytest.raises(ModelUnavailableError):
+        registry.get("flaky")
+    # Second failure doubles the backoff
+    clock.now = 29
+    assert registry.get_optional("flaky") is None
+    assert len(attempts) == 2
+
+    clock.now = 30
+    assert registry.get("flaky") == "model"
+    assert attempts == [0, 10, 30]
+
+
+def test_memory_budget_evicts_least_recently_used():
+    clock = FakeClock()
+    registry = ModelRegistry(memory_budget_bytes=250, clock=clock)
+    for name in ("a", "b", "c"):
+        registry.register(name, lambda n=name: np.zeros(100, dtype=np.uint8))
+
+    registry.get("a")
+    clock.now = 1
+    registry.get("b")
+    clock.now = 2
+    registry.get("a")  # refresh "a"
+    clock.now = 3
+    registry.get("c")
+
+    assert registry.is_loaded("a") and registry.is_loaded("c")
+    assert not registry.is_loaded("b")
+    assert registry.stats()["loaded_bytes"] == 200
+    assert registry.evictions == 1
+
+
+def test_warm_up_and_on_the_fly_registration():
+    registry = ModelRegistry()
+    registry.register("eager", lambda: "e", warm=True)
+    registry.register("lazy", lambda: "l")
+    registry.register("broken", lambda: 1 / 0)
+
+    assert registry.warm_up() == {"eager": True}
+    assert not registry.is_loaded("lazy")
+    assert registry.warm_up(["broken", "unknown"]) == {"broken": False, "unknown": False}
+
+    assert registry.get("param:cpu", lambda: "p") == "p"
+    with pytest.raises(KeyError):
+        registry.get("never-registered")
+
+
+def test_estimate_model_bytes_walks_wrappers():
+    class Wrapper:
+        def __init__(self):
+            self.model = np.zeros(64, dtype=np.float32)
+
+    assert estimate_model_bytes((Wrapper(), np.zeros(10, dtype=np.uint8), None)) == 266
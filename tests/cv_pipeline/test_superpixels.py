@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from cv_pipeline import superpixels
+
+pytest.importorskip("skimage")
+
+
+def _blocks(size: int) -> np.ndarray:
+    image = np.full((size, size, 3), 240, dtype=np.uint8)
+    half = size // 2
+    image[:half, :half] = (200, 40, 40)
+    image[half:, half:] = (40, 40, 200)
+    return image
+
+
+def test_segment_mean_colors_matches_masked_means():
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, (40, 30, 3), dtype=np.uint8)
+    labels = rng.integers(0, 7, (40, 30))
+    labels[labels == 3] = 4  # leave an empty label id
+
+    means, counts = superpixels.segment_mean_colors(rgb, labels)
+
+    present = [lbl for lbl in range(7) if (labels == lbl).any()]
+    assert len(means) == len(present)
+    for mean, count, lbl in zip(means, counts, present, strict=True):
+        mask = labels == lbl
+        assert count == mask.sum()
+        np.testing.assert_allclose(mean, rgb[mask].mean(axis=0))
+
+
+def test_fast_backend_labels_full_resolution():
+    rgb = _blocks(1024)
+    labels = superpixels.superpixel_labels(rgb, n_segments=60, backend="slic-fast")
+
+    assert labels.shape == (1024, 1024)
+    means, _ = superpixels.segment_mean_colors(rgb, labels)
+    # Segments of a flat-colored image keep the block colors
+    assert any(np.allclose(m, (200, 40, 40), atol=2) for m in means)
+    assert any(np.allclose(m, (40, 40, 200), atol=2) for m in means)
+
+
+def test_small_images_and_missing_contrib_use_slic(monkeypatch):
+    rgb = _blocks(64)
+    full = superpixels.superpixel_labels(rgb, n_segments=20, backend="slic")
+    np.testing.assert_array_equal(
+        superpixels.superpixel_labels(rgb, n_segments=20, backend="slic-fast"), full
+    )
+
+    monkeypatch.delattr(superpixels.cv2, "ximgproc", raising=False)
+    np.testing.assert_array_equal(
+        superpixels.superpixel_labels(rgb, n_segments=20, backend="seeds"), full
+    )
+
+
+def test_backend_from_env_and_validation(monkeypatch):
+    monkeypatch.setenv("CV_SUPERPIXEL_BACKEND", "SLIC")
+    assert superpixels.default_backend() == "slic"
+    with pytest.raises(ValueError):
+        superpixels.superpixel_labels(_blocks(16), backend="watershed")
+
+
+def test_resolve_backend_normalizes_names_and_contrib_fallback(monkeypatch):
+    assert superpixels.resolve_backend("SLIC") == "slic"
+    monkeypatch.setenv("CV_SUPERPIXEL_BACKEND", "slic")
+    assert superpixels.resolve_backend() == "slic"
+
+    monkeypatch.delattr(superpixels.cv2, "ximgproc", raising=False)
+    assert superpixels.resolve_backend("lsc") == "slic-fast"
+    with pytest.raises(ValueError):
+        superpixels.resolve_backend("watershed")
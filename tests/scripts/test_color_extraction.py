@@ -77,7 +77,7 @@ async def test_color_extraction_with_file(file_path: str):
         extractor = AIColorExtractor(api_key=api_key)
         print("🔄 Extracting colors... (this may take 10-30 seconds)")
 
-        result = extractor.extract_colors_from_file(file_path, max_colors=10)
+        result = await extractor.extract_colors_from_file(file_path, max_colors=10)
 
         print(f"\n✅ Successfully extracted {len(result.colors)} colors!")
         print(f"🎯 Dominant colors: {result.dominant_colors}")
@@ -0,0 +1,184 @@
+"""Tests for image assets: upload through projects, serving with ETag and ranges"""
+
+import base64
+import hashlib
+import io
+import json
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from copy_that.domain.models import ImageAsset, Project
+from copy_that.infrastructure.database import Base, get_db
+from copy_that.infrastructure.storage import LocalBlobStore, set_blob_store
+from copy_that.interfaces.api.main import app
+
+
+def _png(width=800, height=600) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 90, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+PNG = _png()
+PNG_SHA = hashlib.sha256(PNG).hexdigest()
+PNG_B64 = base64.b64encode(PNG).decode()
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    store = LocalBlobStore(tmp_path / "blobs")
+    set_blob_store(store)
+    yield store
+    set_blob_store(None)
+
+
+@pytest_asyncio.fixture
+async def async_db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(async_db, blob_store):
+    async def override_get_db():
+        yield async_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+async def _create_project(client, name="With image", **extra):
+    response = await client.post(
+        "/api/v1/projects",
+        json={"name": name, "image_base64": PNG_B64, "image_media_type": "image/png", **extra},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_project_image_is_stored_once_with_variants(client, async_db, blob_store):
+    first = await _create_project(client, description="hero", spacing_tokens=[{"px": 8}])
+    await _create_project(client, name="Same image")
+
+    assert first["image_asset_hash"] == PNG_SHA
+    assert first["image_media_type"] == "image/png"
+    assert first["image_url"] == f"/api/v1/assets/{PNG_SHA}"
+    assert first["thumbnail_url"] == f"/api/v1/assets/{PNG_SHA}/thumbnail"
+    assert "image_base64" not in first
+
+    project = await async_db.get(Project, first["id"])
+    assert "image_base64" not in project.description
+    assert json.loads(project.description) == {"text": "hero", "spacing_tokens": [{"px": 8}]}
+
+    asset = await async_db.get(ImageAsset, PNG_SHA)
+    assert (asset.width, asset.height, asset.size_bytes) == (800, 600, len(PNG))
+    assert blob_store.read(PNG_SHA) == PNG
+    with Image.open(io.BytesIO(blob_store.read(f"{PNG_SHA}.thumbnail"))) as thumb:
+        assert thumb.format == "WEBP"
+        assert max(thumb.size) == 256
+
+
+@pytest.mark.asyncio
+async def test_list_projects_returns_urls_not_image_payloads(client):
+    for i in range(3):
+        await _create_project(client, name=f"Project {i}")
+
+    response = await client.get("/api/v1/projects")
+
+    assert response.status_code == 200
+    assert PNG_B64[:100] not in response.text
+    assert len(response.content) < 3000
+    assert {p["thumbnail_url"] for p in response.json()} == {f"/api/v1/assets/{PNG_SHA}/thumbnail"}
+
+
+@pytest.mark.asyncio
+async def test_update_replaces_and_clears_image(client):
+    project = await _create_project(client)
+    other = _png(320, 200)
+
+    replaced = await client.put(
+        f"/api/v1/projects/{project['id']}",
+        json={"image_base64": base64.b64encode(other).decode(), "image_media_type": "image/png"},
+    )
+    assert replaced.json()["image_asset_hash"] == hashlib.sha256(other).hexdigest()
+
+    cleared = await client.put(f"/api/v1/projects/{project['id']}", json={"image_base64": ""})
+    assert cleared.json()["image_asset_hash"] is None
+    assert cleared.json()["thumbnail_url"] is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_base64_image_is_rejected(client):
+    response = await client.post(
+        "/api/v1/projects", json={"name": "Broken", "image_base64": "not base64!"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_asset_is_served_with_etag_and_revalidates(client):
+    await _create_project(client)
+
+    response = await client.get(f"/api/v1/assets/{PNG_SHA}")
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{PNG_SHA}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    revalidated = await client.get(
+        f"/api/v1/assets/{PNG_SHA}", headers={"If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    thumbnail = await client.get(f"/api/v1/assets/{PNG_SHA}/thumbnail")
+    assert thumbnail.headers["content-type"] == "image/webp"
+    assert thumbnail.headers["etag"] == f'"{PNG_SHA}.thumbnail"'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("range_header", "expected", "content_range"),
+    [
+        ("bytes=0-99", slice(0, 100), f"bytes 0-99/{len(PNG)}"),
+        ("bytes=100-", slice(100, None), f"bytes 100-{len(PNG) - 1}/{len(PNG)}"),
+        ("bytes=-50", slice(-50, None), f"bytes {len(PNG) - 50}-{len(PNG) - 1}/{len(PNG)}"),
+    ],
+)
+async def test_asset_range_requests(client, range_header, expected, content_range):
+    await _create_project(client)
+
+    response = await client.get(f"/api/v1/assets/{PNG_SHA}", headers={"Range": range_header})
+
+    assert response.status_code == 206
+    assert response.content == PNG[expected]
+    assert response.headers["content-range"] == content_range
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+@pytest.mark.asyncio
+async def test_asset_unsatisfiable_range_and_unknown_assets(client):
+    await _create_project(client)
+
+    unsatisfiable = await client.get(
+        f"/api/v1/assets/{PNG_SHA}", headers={"Range": f"bytes={len(PNG)}-"}
+    )
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(PNG)}"
+
+    assert (await client.get(f"/api/v1/assets/{'0' * 64}")).status_code == 404
+    assert (await client.get("/api/v1/assets/not-a-hash")).status_code == 404
+    assert (await client.get(f"/api/v1/assets/{PNG_SHA}/poster")).status_code == 404
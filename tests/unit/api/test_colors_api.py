@@ -1,11 +1,14 @@
 """Comprehensive tests for colors API endpoints to achieve 80%+ coverage"""
 
+import base64
+import io
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from PIL import Image
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
@@ -523,3 +526,94 @@ class TestGetColorToken:
         assert data["semantic_names"] is None
         assert data["extraction_metadata"] is None
         assert data["usage"] is None
+
+
+class TestBatchExtractColors:
+    """Test POST /api/v1/colors/batch"""
+
+    @pytest.mark.asyncio
+    async def test_batch_reports_failed_images_and_persists_the_rest(
+        self, client, async_db, test_project
+    ):
+        """One bad URL is reported per item; the other images are persisted together"""
+        from sqlalchemy import select
+
+        from copy_that.application.color_extractor import (
+            ColorExtractionResult,
+            ExtractedColorToken,
+        )
+        from copy_that.infrastructure.http import FetchedImage
+
+        def png(rgb):
+            buf = io.BytesIO()
+            Image.new("RGB", (16, 16), rgb).save(buf, format="PNG")
+            return buf.getvalue()
+
+        images = {
+            "https://example.com/a.png": png((200, 90, 40)),
+            "https://example.com/broken.png": png((0, 0, 0)),
+            "https://example.com/c.png": png((30, 60, 140)),
+        }
+        broken_b64 = base64.b64encode(images["https://example.com/broken.png"]).decode()
+
+        async def fetch(url):
+            return FetchedImage(url=url, data=images[url], content_type="image/png", sha256=url)
+
+        def extract(image_b64, media_type, max_colors):
+            if image_b64 == broken_b64:
+                raise RuntimeError("model overloaded")
+            return ColorExtractionResult(
+                colors=[
+                    ExtractedColorToken(
+                        hex="#C85A28", rgb="rgb(200, 90, 40)", name="Rust", confidence=0.9
+                    ),
+                    ExtractedColorToken(
+                        hex="#1E3C8C", rgb="rgb(30, 60, 140)", name="Navy", confidence=0.8
+                    ),
+                ],
+                dominant_colors=["#C85A28"],
+                color_palette="Warm",
+                extraction_confidence=0.9,
+                extractor_used="claude",
+            )
+
+        extractor = MagicMock()
+        extractor.extract_colors_from_base64 = AsyncMock(side_effect=extract)
+        fetcher = MagicMock()
+        fetcher.fetch = AsyncMock(side_effect=fetch)
+
+        with (
+            patch("copy_that.interfaces.api.colors.get_image_fetcher", return_value=fetcher),
+            patch(
+                "copy_that.interfaces.api.colors.get_extractor", return_value=(extractor, "claude")
+            ),
+        ):
+            response = await client.post(
+                "/api/v1/colors/batch",
+                json={
+                    "image_urls": [
+                        "https://example.com/a.png",
+                        "https://example.com/broken.png",
+                        "https://example.com/c.png",
+                    ],
+                    "project_id": test_project.id,
+                },
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r is None for r in data["results"]] == [False, True, False]
+        assert data["errors"] == [
+            {"index": 1, "image_url": "https://example.com/broken.png", "error": "model overloaded"}
+        ]
+        jobs = (await async_db.execute(select(ExtractionJob))).scalars().all()
+        tokens = (await async_db.execute(select(ColorToken))).scalars().all()
+        assert [job.source_url for job in jobs] == [
+            "https://example.com/a.png",
+            "https://example.com/c.png",
+        ]
+        # Each image's AI colors plus the CV-only colors of its pixels
+        assert len(tokens) == sum(len(r["colors"]) for r in data["results"] if r)
+        assert {"#C85A28", "#1E3C8C"} <= {t.hex for t in tokens}
+        assert {t.extraction_job_id for t in tokens} == {job.id for job in jobs}
+        assert data["results"][2]["design_tokens"] is not None
@@ -0,0 +1,232 @@
+"""Tests for the extraction jobs API (Celery tasks run eagerly)"""
+
+import asyncio
+import base64
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import cv2
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from copy_that.application.color_extractor import ColorExtractionResult, ExtractedColorToken
+from copy_that.domain.models import (
+    ColorToken,
+    ExtractionJob,
+    ExtractionSession,
+    Project,
+    TokenLibrary,
+)
+from copy_that.infrastructure.celery import tasks
+from copy_that.infrastructure.celery.app import AI_QUEUE, CV_QUEUE
+from copy_that.infrastructure.celery.app import app as celery_app
+from copy_that.infrastructure.celery.tasks import set_task_session_factory
+from copy_that.infrastructure.database import Base, get_db
+from copy_that.interfaces.api.main import app
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """File-backed SQLite shared by the API and the eagerly-run tasks"""
+    monkeypatch.setitem(celery_app.conf, "task_always_eager", True)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}", poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    set_task_session_factory(factory)
+    yield factory
+    set_task_session_factory(None)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def project(session_factory):
+    async with session_factory() as db:
+        project = Project(name="Jobs", description="Extraction jobs")
+        db.add(project)
+        await db.commit()
+        return project
+
+
+@pytest.fixture
+def image_base64():
+    image = np.full((64, 64, 3), (40, 90, 200), dtype=np.uint8)
+    image[16:48, 16:48] = (60, 160, 30)
+    ok, png = cv2.imencode(".png", image)
+    return base64.b64encode(png.tobytes()).decode("utf-8")
+
+
+def _ai_colors():
+    return ColorExtractionResult(
+        colors=[
+            ExtractedColorToken(hex="#C85A28", rgb="rgb(200, 90, 40)", name="Rust", confidence=0.9)
+        ],
+        dominant_colors=["#C85A28"],
+        color_palette="Warm",
+        extraction_confidence=0.9,
+        extractor_used="claude",
+    )
+
+
+def _mock_extractor(**behaviour):
+    extractor = MagicMock()
+    extractor.extract_colors_from_base64 = AsyncMock(**behaviour)
+    return extractor
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        event_line, data_line = block.split("\n", 1)
+        events.append((event_line.removeprefix("event: "), json.loads(data_line[len("data: ") :])))
+    return events
+
+
+def test_cv_and_ai_passes_are_routed_to_separate_queues():
+    route = celery_app.amqp.router.route
+    assert route({}, "copy_that.extract.cv_pass")["queue"].name == CV_QUEUE
+    assert route({}, "copy_that.extract.ai_pass")["queue"].name == AI_QUEUE
+    assert route({}, "copy_that.extract.session")["queue"].name == AI_QUEUE
+
+
+def test_task_steps_share_one_long_lived_loop():
+    async def running_loop():
+        return asyncio.get_running_loop()
+
+    first = tasks._run_step(1, running_loop())
+    second = tasks._run_step(2, running_loop())
+
+    # Process-wide async clients stay usable from one job to the next
+    assert first is second
+    assert first.is_running()
+
+
+@pytest.mark.asyncio
+async def test_color_job_runs_cv_then_ai_and_persists_tokens(
+    client, project, session_factory, image_base64
+):
+    extractor = _mock_extractor(return_value=_ai_colors())
+    with patch("copy_that.interfaces.api.colors.get_extractor", return_value=(extractor, "claude")):
+        response = await client.post(
+            "/api/v1/jobs/color",
+            json={"image_base64": image_base64, "project_id": project.id, "max_colors": 4},
+        )
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert job["completed_at"] is not None
+    hexes = [c["hex"] for c in job["result"]["colors"]]
+    # AI colors first, then the CV-only green
+    assert [h.lower() for h in hexes] == ["#c85a28", "#1ea03c"]
+
+    polled = await client.get(f"/api/v1/jobs/{job['job_id']}")
+    assert polled.json()["result"] == job["result"]
+
+    async with session_factory() as db:
+        rows = (await db.execute(select(ColorToken))).scalars().all()
+    assert {row.extraction_job_id for row in rows} == {job["job_id"]}
+    assert len(rows) == len(hexes)
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error_and_streams_failure(client, project, image_base64):
+    extractor = _mock_extractor(side_effect=RuntimeError("model overloaded"))
+    with patch("copy_that.interfaces.api.colors.get_extractor", return_value=(extractor, "claude")):
+        job = (
+            await client.post(
+                "/api/v1/jobs/color",
+                json={"image_base64": image_base64, "project_id": project.id},
+            )
+        ).json()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "model overloaded"
+    # The CV pass finished before the AI pass failed
+    assert job["progress"] == 0.5
+
+    events = _parse_sse((await client.get(f"/api/v1/jobs/{job['job_id']}/events")).text)
+    assert events == [("failed", job)]
+
+
+@pytest.mark.asyncio
+async def test_submission_is_validated_before_queueing(client, project):
+    unknown = await client.post("/api/v1/jobs/gradients", json={})
+    missing_project = await client.post(
+        "/api/v1/jobs/color", json={"image_url": "https://example.com/a.png", "project_id": 999}
+    )
+    no_image = await client.post("/api/v1/jobs/spacing", json={"project_id": project.id})
+    invalid = await client.post("/api/v1/jobs/color", json={"image_url": "https://x/a.png"})
+
+    assert unknown.status_code == 404
+    assert missing_project.status_code == 404
+    assert no_image.status_code == 400
+    assert invalid.status_code == 422
+    assert (await client.get("/api/v1/jobs/1")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_that_cannot_be_queued_is_marked_failed(
+    client, project, image_base64, session_factory
+):
+    chain = MagicMock()
+    chain.apply_async.side_effect = ConnectionError("broker unavailable")
+
+    with (
+        patch("copy_that.interfaces.api.jobs.extraction_signature", return_value=chain),
+        pytest.raises(ConnectionError),
+    ):
+        await client.post(
+            "/api/v1/jobs/color", json={"image_base64": image_base64, "project_id": project.id}
+        )
+
+    async with session_factory() as db:
+        job = (await db.execute(select(ExtractionJob))).scalar_one()
+    assert job.status == "failed"
+    assert "broker unavailable" in job.error_message
+
+
+@pytest.mark.asyncio
+async def test_session_extraction_job_fills_library(client, project, session_factory):
+    async with session_factory() as db:
+        session = ExtractionSession(project_id=project.id, name="Moodboard")
+        db.add(session)
+        await db.commit()
+
+    with patch("copy_that.application.batch_extractor.AIColorExtractor") as extractor_class:
+        extractor_class.return_value.extract_colors_from_image_url = AsyncMock(
+            return_value=_ai_colors()
+        )
+        response = await client.post(
+            f"/api/v1/jobs/sessions/{session.id}/extract",
+            json={"image_urls": ["https://example.com/a.png", "https://example.com/b.png"]},
+        )
+
+    job = response.json()
+    assert response.status_code == 202
+    assert job["status"] == "completed"
+    assert job["result"]["session_id"] == session.id
+    assert job["result"]["statistics"]["total_extracted"] == 2
+
+    async with session_factory() as db:
+        library = (await db.execute(select(TokenLibrary))).scalar_one()
+    assert library.id == job["result"]["library_id"]
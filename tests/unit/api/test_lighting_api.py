@@ -0,0 +1,100 @@
+"""Tests for lighting analysis API endpoints"""
+
+import asyncio
+import base64
+import json
+import threading
+
+import cv2
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from copy_that.infrastructure.cache import reset_result_cache
+from copy_that.interfaces.api.main import app
+from copy_that.interfaces.api.utils import stream_events
+
+
+@pytest_asyncio.fixture
+async def client():
+    reset_result_cache()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture
+def image_base64():
+    image = np.full((96, 128, 3), 210, dtype=np.uint8)
+    image[30:70, 20:60] = 50
+    ok, png = cv2.imencode(".png", image)
+    return base64.b64encode(png.tobytes()).decode("utf-8")
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        event_line, data_line = block.split("\n", 1)
+        events.append((event_line.removeprefix("event: "), json.loads(data_line[len("data: ") :])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_analyze_streaming_emits_stage_events_then_result(client, image_base64):
+    response = await client.post(
+        "/api/v1/lighting/analyze-streaming",
+        json={"image_base64": image_base64, "image_id": "hero"},
+    )
+
+    assert response.status_code == 200
+    assert "text/event-stream" in response.headers["content-type"]
+    events = _parse_sse(response.text)
+    stages = [data for event, data in events if event == "stage"]
+    assert [s["stage"] for s in stages] == ["classical", "geometry", "intrinsic", "tokens"]
+    assert base64.b64decode(stages[0]["previews"]["shadow_soft"]).startswith(b"\x89PNG")
+    assert stages[-1]["tokens"]["style_density"]
+
+    event, complete = events[-1]
+    assert event == "complete"
+    assert complete["image_id"] == "hero"
+    assert complete["style_density"] == stages[-1]["tokens"]["style_density"]
+
+    # The streamed run populated the same cache as /analyze
+    plain = await client.post("/api/v1/lighting/analyze", json={"image_base64": image_base64})
+    assert plain.json()["shadow_area_fraction"] == complete["shadow_area_fraction"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_streaming_reports_decode_errors(client):
+    response = await client.post(
+        "/api/v1/lighting/analyze-streaming",
+        json={"image_base64": base64.b64encode(b"not an image").decode()},
+    )
+
+    events = _parse_sse(response.text)
+    assert events[-1][0] == "error"
+
+
+@pytest.mark.asyncio
+async def test_stream_events_cancels_worker_when_consumer_stops():
+    cancel_event = threading.Event()
+    stopped = threading.Event()
+
+    def blocking_stages(emit):
+        for i in range(100):
+            emit("stage", {"stage": i})
+            if cancel_event.wait(0.01):
+                stopped.set()
+                return "cancelled"
+        return "finished"
+
+    async def work(emit):
+        return await asyncio.to_thread(blocking_stages, emit)
+
+    stream = stream_events(work, cancel_event=cancel_event)
+    assert await anext(stream) == ("stage", {"stage": 0})
+    await stream.aclose()
+
+    assert cancel_event.is_set()
+    assert await asyncio.to_thread(stopped.wait, 5)
@@ -1,7 +1,8 @@
 """Comprehensive tests for shadows API endpoints"""
 
 import base64
-from unittest.mock import MagicMock, patch
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import pytest_asyncio
@@ -96,7 +97,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = mock_shadow_extractor
             mock_extractor_class.return_value = mock_instance
 
@@ -134,7 +135,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = mock_shadow_extractor
             mock_extractor_class.return_value = mock_instance
 
@@ -209,7 +210,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = multiple_shadows
             mock_extractor_class.return_value = mock_instance
 
@@ -273,7 +274,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = ShadowExtractionResult(
                 shadows=[], shadow_count=0, extraction_confidence=0.0
             )
@@ -305,7 +306,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = ShadowExtractionResult(
                 shadows=[], shadow_count=0, extraction_confidence=0.0
             )
@@ -333,7 +334,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = mock_shadow_extractor
             mock_extractor_class.return_value = mock_instance
 
@@ -376,7 +377,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = mock_shadow_extractor
             mock_extractor_class.return_value = mock_instance
 
@@ -446,7 +447,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = result
             mock_extractor_class.return_value = mock_instance
 
@@ -500,7 +501,7 @@ class TestShadowExtraction:
         image_base64 = base64.b64encode(png_bytes).decode("utf-8")
 
         with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
-            mock_instance = MagicMock()
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
             mock_instance.extract_shadows.return_value = result
             mock_extractor_class.return_value = mock_instance
 
@@ -861,3 +862,48 @@ class TestShadowAggregation:
         assert len(aggregated) == 3
         names = {s.semantic_name for s in aggregated}
         assert names == {"shadow.subtle", "shadow.medium", "shadow.strong"}
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        event_line, data_line = block.split("\n", 1)
+        events.append((event_line.removeprefix("event: "), json.loads(data_line[len("data: ") :])))
+    return events
+
+
+class TestShadowExtractionStreaming:
+    """Test the SSE shadow extraction endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_streams_cv_tokens_before_ai_result(self, client, mock_shadow_extractor):
+        png_bytes = (
+            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01"
+            b"\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDATx\x9cc\xf8\x0f\x00"
+            b"\x00\x01\x01\x00\x05\x00\x00\x00\x00IEND\xaeB`\x82"
+        )
+
+        with patch("copy_that.interfaces.api.shadows.AIShadowExtractor") as mock_extractor_class:
+            mock_instance = MagicMock(extract_shadows=AsyncMock())
+            mock_instance.extract_shadows.return_value = mock_shadow_extractor
+            mock_extractor_class.return_value = mock_instance
+
+            response = await client.post(
+                "/api/v1/shadows/extract-streaming",
+                json={"image_base64": base64.b64encode(png_bytes).decode("utf-8")},
+            )
+
+        assert response.status_code == 200
+        assert "text/event-stream" in response.headers["content-type"]
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["stage", "stage", "complete"]
+        assert [d["stage"] for _, d in events[:2]] == ["cv", "ai"]
+        assert events[1][1]["extraction_source"] == "claude_sonnet_4.5_with_cv_fallback"
+        complete = events[2][1]
+        assert complete["tokens"][0]["x_offset"] == 2.0
+        assert complete["extraction_confidence"] == 0.95
+
+    @pytest.mark.asyncio
+    async def test_requires_image(self, client):
+        response = await client.post("/api/v1/shadows/extract-streaming", json={})
+        assert response.status_code == 400
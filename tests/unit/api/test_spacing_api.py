@@ -1,7 +1,11 @@
 """Comprehensive tests for spacing API endpoints to achieve 80%+ coverage"""
 
+import asyncio
 import base64
+import json
 from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
 import pytest
 import pytest_asyncio
@@ -10,6 +14,7 @@ from PIL import Image
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from copy_that.application.spacing_models import SpacingExtractionResult, SpacingToken
 from copy_that.domain.models import ExtractionJob, Project
 from copy_that.domain.models import SpacingToken as DBSpacingToken
 from copy_that.infrastructure.database import Base, get_db
@@ -118,6 +123,100 @@ class TestSpacingExtraction:
         if response.status_code == 200:
             assert "text/event-stream" in response.headers.get("content-type", "")
 
+    @pytest.mark.asyncio
+    async def test_extract_spacing_streaming_forwards_tokens_as_streamed(self, client):
+        """Tokens are sent while the model streams; cached results still send them"""
+        tokens = [SpacingToken(value_px=px, name=f"spacing-{px}", confidence=0.9) for px in (8, 16)]
+        result = SpacingExtractionResult(
+            tokens=tokens,
+            scale_system="8pt",
+            base_unit=8,
+            base_unit_confidence=0.9,
+            grid_compliance=1.0,
+            extraction_confidence=0.9,
+            min_spacing=8,
+            max_spacing=16,
+            unique_values=[8, 16],
+        )
+
+        async def extract(image_base64, media_type, max_tokens, on_token=None):
+            for token in tokens:
+                on_token(token)
+            return result
+
+        extractor = SimpleNamespace(
+            model="gpt-4o-mini", extract_spacing_from_base64=AsyncMock(side_effect=extract)
+        )
+        with (
+            patch(
+                "copy_that.interfaces.api.spacing._validate_image_url",
+                AsyncMock(return_value="https://example.com/design.png"),
+            ),
+            patch(
+                "copy_that.interfaces.api.spacing._download_image_bytes",
+                AsyncMock(return_value=(b"png-bytes", "image/png")),
+            ),
+            patch("copy_that.interfaces.api.spacing.get_extractor", return_value=extractor),
+        ):
+            responses = [
+                await client.post(
+                    "/api/v1/spacing/extract-streaming",
+                    json={"image_url": "https://example.com/design.png"},
+                )
+                for _ in range(2)
+            ]
+
+        # The second request is served from the result cache
+        assert extractor.extract_spacing_from_base64.await_count == 1
+        for response in responses:
+            events = [
+                (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("data: ")[1]))
+                for block in response.text.strip().split("\n\n")
+            ]
+            token_events = [data for event, data in events if event == "token"]
+            assert [t["value_px"] for t in token_events] == [8, 16]
+            assert events[-1][0] == "complete"
+            assert events[-1][1]["base_unit"] == 8
+
+    @pytest.mark.asyncio
+    async def test_concurrent_streaming_calls_each_stream_their_tokens(self):
+        """Identical in-flight requests do not share a call that streams to one of them"""
+        from copy_that.interfaces.api.spacing import _cached_ai_spacing
+
+        token = SpacingToken(value_px=8, name="spacing-8", confidence=0.9)
+        result = SpacingExtractionResult(
+            tokens=[token],
+            scale_system="8pt",
+            base_unit=8,
+            base_unit_confidence=0.9,
+            grid_compliance=1.0,
+            extraction_confidence=0.9,
+            min_spacing=8,
+            max_spacing=8,
+            unique_values=[8],
+        )
+        both_started = asyncio.Barrier(2)
+
+        async def extract(image_base64, media_type, max_tokens, on_token=None):
+            await both_started.wait()
+            on_token(token)
+            return result
+
+        extractor = SimpleNamespace(
+            model="gpt-4o-mini", extract_spacing_from_base64=AsyncMock(side_effect=extract)
+        )
+        first, second = [], []
+        await asyncio.wait_for(
+            asyncio.gather(
+                _cached_ai_spacing(extractor, "aW1hZ2U=", "image/png", 8, on_token=first.append),
+                _cached_ai_spacing(extractor, "aW1hZ2U=", "image/png", 8, on_token=second.append),
+            ),
+            timeout=5,
+        )
+
+        assert extractor.extract_spacing_from_base64.await_count == 2
+        assert first == [token] and second == [token]
+
     @pytest.mark.asyncio
     async def test_extract_spacing_with_cv_enabled(self, client, test_project):
         """Test spacing extraction with CV features enabled"""
@@ -1,9 +1,10 @@
 """Comprehensive tests for typography extraction API endpoints."""
 
 import json
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+from sqlalchemy import select
 
 from copy_that.domain.models import Project, TypographyToken
 
@@ -76,7 +77,10 @@ class TestTypographyExtraction:
         project = await create_project()
 
         with patch("copy_that.interfaces.api.typography.AITypographyExtractor") as mock_extractor:
-            mock_ai = Mock()
+            mock_ai = Mock(
+                extract_typography_from_image_url=AsyncMock(),
+                extract_typography_from_base64=AsyncMock(),
+            )
             mock_ai.extract_typography_from_image_url.return_value = self._mock_extraction_result()
             mock_extractor.return_value = mock_ai
 
@@ -101,7 +105,10 @@ class TestTypographyExtraction:
         base64_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
 
         with patch("copy_that.interfaces.api.typography.AITypographyExtractor") as mock_extractor:
-            mock_ai = Mock()
+            mock_ai = Mock(
+                extract_typography_from_image_url=AsyncMock(),
+                extract_typography_from_base64=AsyncMock(),
+            )
             mock_ai.extract_typography_from_base64.return_value = self._mock_extraction_result()
             mock_extractor.return_value = mock_ai
 
@@ -342,7 +349,10 @@ class TestTypographyExtraction:
         project = await create_project()
 
         with patch("copy_that.interfaces.api.typography.AITypographyExtractor") as mock_extractor:
-            mock_ai = Mock()
+            mock_ai = Mock(
+                extract_typography_from_image_url=AsyncMock(),
+                extract_typography_from_base64=AsyncMock(),
+            )
             mock_ai.extract_typography_from_image_url.return_value = self._mock_extraction_result()
             mock_extractor.return_value = mock_ai
 
@@ -360,8 +370,58 @@ class TestTypographyExtraction:
 
             assert response.status_code == 200
             data = response.json()
-            assert isinstance(data, list)
-            assert len(data) == 2
+            assert len(data["results"]) == 2
+            assert data["errors"] == []
+
+    async def test_batch_extract_typography_reports_failed_images(
+        self, async_client, create_project, test_db
+    ):
+        """A failing image is reported per item; the others are still persisted."""
+        project = await create_project()
+
+        def extract(url, max_tokens):
+            if url.endswith("broken.png"):
+                raise RuntimeError("image could not be decoded")
+            return self._mock_extraction_result()
+
+        with patch("copy_that.interfaces.api.typography.AITypographyExtractor") as mock_extractor:
+            mock_extractor.return_value.extract_typography_from_image_url = AsyncMock(
+                side_effect=extract
+            )
+
+            response = await async_client.post(
+                "/api/v1/typography/batch",
+                json={
+                    "image_urls": [
+                        "https://example.com/image1.png",
+                        "https://example.com/broken.png",
+                        "https://example.com/image3.png",
+                    ],
+                    "project_id": project.id,
+                },
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r is None for r in data["results"]] == [False, True, False]
+        assert data["errors"] == [
+            {
+                "index": 1,
+                "image_url": "https://example.com/broken.png",
+                "error": "image could not be decoded",
+            }
+        ]
+        rows = (
+            (
+                await test_db.execute(
+                    select(TypographyToken).where(TypographyToken.project_id == project.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert len(rows) == 4
+        assert len({row.extraction_job_id for row in rows}) == 2
 
     # W3C Export Tests
 
@@ -0,0 +1,94 @@
+"""Tests for streamed Claude shadow extraction."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from anthropic.types import (
+    InputJSONDelta,
+    RawContentBlockDeltaEvent,
+    RawMessageStopEvent,
+    TextDelta,
+)
+
+from copy_that.application.ai_shadow_extractor import AIShadowExtractor
+
+SHADOW = {
+    "x_offset": 0,
+    "y_offset": 4,
+    "blur_radius": 12,
+    "spread_radius": 0,
+    "color_hex": "#000000",
+    "opacity": 0.15,
+    "shadow_type": "drop",
+    "semantic_name": "card-shadow",
+    "confidence": 0.8,
+    "is_inset": False,
+    "affects_text": False,
+}
+
+
+def _events(tool_input: str, read: list[int]):
+    async def events():
+        # Text before the tool call must not reach the JSON parser
+        yield RawContentBlockDeltaEvent(
+            type="content_block_delta",
+            index=0,
+            delta=TextDelta(type="text_delta", text='Looking for "shadows" {'),
+        )
+        for i in range(0, len(tool_input), 12):
+            read.append(i + 12)
+            yield RawContentBlockDeltaEvent(
+                type="content_block_delta",
+                index=1,
+                delta=InputJSONDelta(type="input_json_delta", partial_json=tool_input[i : i + 12]),
+            )
+        yield RawMessageStopEvent(type="message_stop")
+
+    return events()
+
+
+def _extractor(create: AsyncMock) -> AIShadowExtractor:
+    extractor = AIShadowExtractor(api_key="test-key")
+    extractor.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    return extractor
+
+
+@pytest.mark.asyncio
+async def test_streamed_tool_input_hands_out_each_shadow():
+    tool_input = json.dumps(
+        {"shadows": [SHADOW, {**SHADOW, "opacity": 3}, {**SHADOW, "semantic_name": "lifted"}]}
+    )
+    read: list[int] = []
+    create = AsyncMock(return_value=_events(tool_input, read))
+    streamed = []
+
+    with patch(
+        "copy_that.application.ai_shadow_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        result = await _extractor(create).extract_shadows(
+            base64_image="aGVsbG8=", on_token=lambda s: streamed.append((s, read[-1]))
+        )
+
+    # The invalid opacity is skipped, as in the full parse
+    assert [s.semantic_name for s, _ in streamed] == ["card-shadow", "lifted"]
+    assert streamed[0][1] < len(tool_input) / 2
+    assert [s.semantic_name for s in result.shadows] == ["card-shadow", "lifted"]
+    assert result.shadow_count == 2
+    assert create.await_args.kwargs["stream"] is True
+    assert create.await_args.kwargs["tools"][0]["name"] == "extract_shadows"
+
+
+@pytest.mark.asyncio
+async def test_stream_without_tool_call_returns_no_shadows():
+    create = AsyncMock(return_value=_events("", []))
+    streamed = []
+
+    result = await _extractor(create).extract_shadows(
+        image_url="https://example.com/ui.png", on_token=streamed.append
+    )
+
+    assert streamed == []
+    assert result.shadow_count == 0
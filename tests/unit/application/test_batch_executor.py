@@ -0,0 +1,61 @@
+"""Tests for the shared batch executor"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from copy_that.application.batch_executor import run_batch
+
+
+@pytest.mark.asyncio
+async def test_run_batch_overlaps_items_and_keeps_input_order():
+    delays = [0.2, 0.05, 0.1, 0.15]
+
+    async def work(delay):
+        await asyncio.sleep(delay)
+        return delay * 10
+
+    start = time.perf_counter()
+    items = await run_batch(delays, work)
+    elapsed = time.perf_counter() - start
+
+    assert [item.result for item in items] == [2.0, 0.5, 1.0, 1.5]
+    assert [item.index for item in items] == [0, 1, 2, 3]
+    # Roughly the slowest item, not the sum of all of them
+    assert elapsed < sum(delays)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_respects_concurrency_bound():
+    in_flight = 0
+    peak = 0
+
+    async def work(_):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await run_batch(range(10), work, max_concurrent=3)
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_run_batch_captures_per_item_errors():
+    async def work(source):
+        if source == "bad":
+            raise HTTPException(status_code=400, detail="Failed to fetch image")
+        if source == "worse":
+            raise ValueError()
+        return source.upper()
+
+    items = await run_batch(["ok", "bad", "worse"], work)
+
+    assert [item.ok for item in items] == [True, False, False]
+    assert items[0].result == "OK"
+    assert items[1].error == "Failed to fetch image"
+    assert items[2].error == "ValueError"
@@ -0,0 +1,241 @@
+import random
+
+import numpy as np
+import pytest
+from coloraide import Color
+
+from copy_that.application import color_index
+from copy_that.application.color_index import (
+    DeltaEIndex,
+    NamedColorIndex,
+    css_named_index,
+    delta_e_2000,
+    greedy_radius_groups,
+    material_index,
+    parse_colors,
+    web_safe_index,
+)
+from copy_that.application.color_properties import rgb_to_lab
+from copy_that.application.color_utils import (
+    CSS_NAMED_COLORS,
+    calculate_delta_e,
+    cluster_color_tokens,
+    delta_oklch,
+    find_nearest_color,
+    get_closest_css_named,
+    get_closest_web_safe,
+    hex_to_rgb,
+    merge_similar_colors,
+)
+
+
+def _random_hexes(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [f"#{rng.randint(0, 0xFFFFFF):06X}" for _ in range(n)]
+
+
+def _legacy_css_named(hex_code: str) -> str:
+    r, g, b = hex_to_rgb(hex_code)
+    best, best_dist = None, float("inf")
+    for name, css_hex in CSS_NAMED_COLORS.items():
+        cr, cg, cb = hex_to_rgb(css_hex)
+        dist = (r - cr) ** 2 + (g - cg) ** 2 + (b - cb) ** 2
+        if dist < best_dist:
+            best, best_dist = name, dist
+    return best
+
+
+def test_css_index_matches_legacy_rgb_scan():
+    for hx in _random_hexes(300) + ["#00FFFF", "#808080"]:
+        assert get_closest_css_named(hx) == _legacy_css_named(hx)
+
+
+def test_css_index_perceptual_metric_returns_css_name():
+    assert get_closest_css_named("#FF0000", metric="oklab") == "red"
+    assert get_closest_css_named("#010180", metric="oklab") == "navy"
+
+
+def test_batch_query_matches_single_lookups():
+    hexes = _random_hexes(50)
+    index = css_named_index()
+    batch = index.nearest_many(hexes, metric="oklab")
+    singles = [index.nearest(hx, metric="oklab") for hx in hexes]
+    assert [key for key, _ in batch] == [key for key, _ in singles]
+    np.testing.assert_allclose([d for _, d in batch], [d for _, d in singles], atol=1e-9)
+
+
+def test_lab_distance_matches_coloraide_delta_e():
+    index = material_index()
+    (family, level), distance = index.nearest("#F15925", metric="lab")
+    expected = calculate_delta_e("#F15925", index.colors[index.keys.index((family, level))])
+    assert distance == pytest.approx(expected, abs=1e-9)
+
+
+def test_oklab_distance_matches_delta_oklch_scale():
+    index = NamedColorIndex({"a": "#3366CC"})
+    _, distance = index.nearest("#3366CD", metric="oklab")
+    assert distance == pytest.approx(delta_oklch("#3366CC", "#3366CD"), abs=1e-9)
+
+
+def _legacy_find_nearest(target, palette, threshold=10.0):
+    best = ("NONE", threshold + 1)
+    for name, color in palette.items():
+        de = calculate_delta_e(target, color)
+        if de < best[1]:
+            best = (name, de)
+    return best
+
+
+@pytest.mark.parametrize(
+    "palette",
+    [
+        {"red": "#FF0000", "teal": "#008080", "short": "#F0F"},
+        # Not plain sRGB hex: must keep the ColorAide ΔE scan (and its RGB fallback)
+        {"bare": "ff0000", "teal": "#008080"},
+        {"broken": "#FF000", "teal": "#008080"},
+        {"p3": "color(display-p3 1 0 0)", "teal": "#008080"},
+    ],
+)
+def test_find_nearest_color_matches_legacy_scan(palette):
+    for target in ["#FF0001", "#017F80", "#EE00EE"]:
+        name, de = find_nearest_color(target, palette)
+        legacy_name, legacy_de = _legacy_find_nearest(target, palette)
+        assert name == legacy_name
+        assert de == pytest.approx(legacy_de, abs=1e-9)
+
+
+def test_web_safe_rgb_matches_rounding():
+    index = web_safe_index()
+    assert len(index) == 216
+    for hx in _random_hexes(100):
+        assert index.nearest(hx)[0] == get_closest_web_safe(hx)
+
+
+def test_kdtree_path_matches_bruteforce(monkeypatch):
+    pytest.importorskip("scipy")
+    palette = _random_hexes(600, seed=11)
+    queries = _random_hexes(200, seed=12)
+
+    tree_index = NamedColorIndex(list(enumerate(palette)), default_metric="lab")
+    tree_idx, tree_dist = tree_index.query(queries)
+
+    monkeypatch.setattr(color_index, "KDTREE_MIN_SIZE", 10_000)
+    brute_index = NamedColorIndex(list(enumerate(palette)), default_metric="lab")
+    brute_idx, brute_dist = brute_index.query(queries)
+
+    np.testing.assert_allclose(tree_dist, brute_dist, atol=1e-9)
+    assert (tree_idx == brute_idx).mean() > 0.99
+
+
+def test_parse_colors_accepts_css_names():
+    rgb = parse_colors(["#FF0000", "blue"])
+    np.testing.assert_allclose(rgb, [[255, 0, 0], [0, 0, 255]], atol=1e-9)
+
+
+def test_unknown_metric_raises():
+    with pytest.raises(ValueError):
+        css_named_index().nearest("#FFFFFF", metric="hsv")
+
+
+def _legacy_groups(hexes: list[str], threshold: float) -> list[list[int]]:
+    groups, used = [], set()
+    for i, base in enumerate(hexes):
+        if i in used:
+            continue
+        group = [i]
+        for j in range(i + 1, len(hexes)):
+            if j not in used and delta_oklch(base, hexes[j]) < threshold:
+                group.append(j)
+                used.add(j)
+        used.add(i)
+        groups.append(group)
+    return groups
+
+
+def _near_duplicate_hexes(n: int, seed: int = 3) -> list[str]:
+    rng = random.Random(seed)
+    bases = [hex_to_rgb(hx) for hx in _random_hexes(n // 8, seed=seed)]
+    out = []
+    for _ in range(n):
+        r, g, b = rng.choice(bases)
+        jitter = [max(0, min(255, c + rng.randint(-6, 6))) for c in (r, g, b)]
+        out.append("#{:02X}{:02X}{:02X}".format(*jitter))
+    return out
+
+
+@pytest.mark.parametrize("threshold", [1.0, 2.0, 2.5, 5.0])
+def test_greedy_radius_groups_match_pairwise_scan(threshold):
+    hexes = _near_duplicate_hexes(400)
+    assert greedy_radius_groups(hexes, threshold) == _legacy_groups(hexes, threshold)
+
+
+def test_greedy_radius_groups_keep_unparseable_colors_separate():
+    groups = greedy_radius_groups(["#FF0000", "not-a-color", "#FF0001", None], 2.0)
+    assert groups == [[0, 2], [1], [3]]
+    assert greedy_radius_groups([], 2.0) == []
+    assert greedy_radius_groups(["#FFFFFF", "#FFFFFF"], 0) == [[0], [1]]
+
+
+def test_cluster_and_merge_use_grid_groups():
+    from copy_that.application.color_extractor import ExtractedColorToken
+
+    hexes = _near_duplicate_hexes(120, seed=5)
+    tokens = [
+        ExtractedColorToken(hex=hx, rgb="rgb(0, 0, 0)", name=hx, confidence=0.5, count=1)
+        for hx in hexes
+    ]
+    groups = _legacy_groups(hexes, 2.5)
+
+    clustered = cluster_color_tokens(tokens, threshold=2.5)
+    assert [tok.hex for tok in clustered] == [hexes[g[0]] for g in groups]
+    assert [tok.count for tok in clustered] == [len(g) for g in groups]
+    merged_meta = [(tok.extraction_metadata or {}).get("merged_hex") for tok in clustered]
+    assert merged_meta == [[hexes[j] for j in g] if len(g) > 1 else None for g in groups]
+
+    assert len(merge_similar_colors(hexes, threshold=2.5)) == len(groups)
+
+
+def test_delta_e_2000_kernel_matches_coloraide():
+    first = _random_hexes(300, seed=21) + ["#000000", "#FFFFFF", "#808080"]
+    second = _near_duplicate_hexes(300, seed=22) + ["#FFFFFF", "#000000", "#7F8080"]
+    ours = delta_e_2000(rgb_to_lab(parse_colors(first)), rgb_to_lab(parse_colors(second)))
+    expected = [Color(a).delta_e(b, method="2000") for a, b in zip(first, second, strict=True)]
+    np.testing.assert_allclose(ours, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ["76", "2000"])
+@pytest.mark.parametrize("threshold", [1.0, 2.3, 5.0])
+def test_delta_e_index_first_match_matches_linear_scan(method, threshold):
+    hexes = _near_duplicate_hexes(300, seed=9)
+    index = DeltaEIndex(threshold, method=method)
+    library: list[str] = []
+    for hx in hexes:
+        expected = next(
+            (
+                i
+                for i, entry in enumerate(library)
+                if Color(hx).delta_e(entry, method=method) < threshold
+            ),
+            None,
+        )
+        assert index.first_match(hx) == expected
+        if expected is None:
+            library.append(hx)
+            index.add(hx)
+
+
+def test_delta_e_index_update_moves_entry():
+    index = DeltaEIndex(2.3, method="76")
+    index.add("#FF0000")
+    assert index.first_match("#0000FE") is None
+    index.update(0, "#0000FF")
+    assert index.first_match("#0000FE") == 0
+    assert index.first_match("#FF0000") is None
+
+
+def test_delta_e_index_checks_out_of_gamut_entries_exhaustively():
+    index = DeltaEIndex(2.3, method="2000")
+    index.add("#00FF00")
+    index.add("color(display-p3 0 1 0)")
+    assert index.first_match("color(display-p3 0 0.999 0)") == 1
+    assert index.first_match("#00FF01") == 0
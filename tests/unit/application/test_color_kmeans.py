@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from copy_that.application.color_clustering import AdaptiveColorKMeans, ColorKMeansClustering
+
+STRIPES = [
+    (200, 30, 30),
+    (30, 200, 30),
+    (30, 30, 200),
+    (220, 220, 40),
+    (40, 180, 180),
+]
+
+
+def _striped_image(noise: float = 4.0) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    image = np.zeros((200, 200, 3), dtype=np.float64)
+    for i, color in enumerate(STRIPES):
+        image[:, i * 40 : (i + 1) * 40] = color
+    return np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+
+
+def _nearest_distance(hex_colors: list[str], target: tuple[int, int, int]) -> float:
+    rgbs = np.array([ColorKMeansClustering._hex_to_rgb(h) for h in hex_colors], dtype=float)
+    return float(np.linalg.norm(rgbs - np.array(target), axis=1).min())
+
+
+@pytest.mark.parametrize("color_space", ["rgb", "lab"])
+def test_adaptive_palette_recovers_distinct_colors(color_space):
+    clusterer = AdaptiveColorKMeans(min_k=5, max_k=8, color_space=color_space)
+    clusters = clusterer.extract_palette_adaptive(_striped_image())
+
+    hexes = [c.hex_color for c in clusters]
+    assert clusterer.min_k <= clusterer.k <= clusterer.max_k
+    for color in STRIPES:
+        assert _nearest_distance(hexes, color) < 20
+    assert sum(c.prominence_percentage for c in clusters) == pytest.approx(100.0)
+    assert clusters == sorted(clusters, key=lambda c: c.prominence_percentage, reverse=True)
+
+
+def test_warm_started_inertia_decreases_with_k():
+    clusterer = AdaptiveColorKMeans(min_k=2, max_k=10)
+    clusterer.extract_palette_adaptive(_striped_image())
+
+    inertias = [clusterer.inertias[k] for k in sorted(clusterer.inertias)]
+    assert len(inertias) == 9
+    # Splitting a cluster never makes the fit worse by more than mini-batch noise
+    assert all(b <= a * 1.05 for a, b in zip(inertias, inertias[1:], strict=False))
+    assert inertias[-1] < inertias[0] / 10
+
+
+def test_adaptive_is_deterministic_and_handles_tiny_images():
+    image = _striped_image()
+    first = AdaptiveColorKMeans(min_k=3, max_k=6).extract_palette_adaptive(image)
+    second = AdaptiveColorKMeans(min_k=3, max_k=6).extract_palette_adaptive(image)
+    assert [c.hex_color for c in first] == [c.hex_color for c in second]
+
+    tiny = np.full((2, 2, 3), 128, dtype=np.uint8)
+    clusters = AdaptiveColorKMeans(
+        min_k=5, max_k=20, resize_for_speed=False
+    ).extract_palette_adaptive(tiny)
+    assert clusters[0].hex_color == "#808080"
+
+
+def test_unknown_color_space_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveColorKMeans(color_space="hsv")
@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+import pytest
+from coloraide import Color
+
+from copy_that.application import color_utils
+from copy_that.application.color_extractor import ExtractedColorToken
+from copy_that.application.color_properties import (
+    apply_properties,
+    compute_properties_batch,
+    hex_array_to_rgb,
+    rgb_to_lab,
+    rgb_to_oklab,
+)
+
+
+def _random_hexes(n: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    return [f"#{rng.randint(0, 0xFFFFFF):06X}" for _ in range(n)]
+
+
+def test_batch_matches_scalar_compute_all_properties():
+    hexes = _random_hexes(300) + ["#FFFFFF", "#000000", "#808080", "#FF0000", "#00ff00"]
+    dominant = hexes[:3]
+    table = compute_properties_batch(hexes, dominant)
+
+    assert len(table) == len(hexes)
+    for i, hx in enumerate(hexes):
+        assert table.row(i) == color_utils.compute_all_properties(hx, dominant)
+
+
+def test_row_with_metadata_matches_scalar_sources():
+    table = compute_properties_batch(["#3366CC"], ["#FF0000"])
+    props, metadata = table.row_with_metadata(0)
+    expected_props, expected_meta = color_utils.compute_all_properties_with_metadata(
+        "#3366CC", ["#FF0000"]
+    )
+    assert props == expected_props
+    assert metadata == expected_meta
+
+
+def test_no_dominant_colors_omits_delta_e():
+    table = compute_properties_batch(["#3366CC"])
+    assert table.delta_e_to_dominant is None
+    assert "delta_e_to_dominant" not in table.row(0)
+
+
+def test_empty_input_returns_empty_table():
+    table = compute_properties_batch([], ["#FFFFFF"])
+    assert len(table) == 0
+    assert table.rows() == []
+
+
+def test_short_hex_is_expanded():
+    rgb = hex_array_to_rgb(["#fff", "#0A0"])
+    assert rgb.tolist() == [[255, 255, 255], [0, 170, 0]]
+
+
+@pytest.mark.parametrize("hx", ["#3366CC", "#F15925", "#123456", "#FAFAFA"])
+def test_lab_and_oklab_match_coloraide(hx):
+    rgb = hex_array_to_rgb([hx])
+    np.testing.assert_allclose(rgb_to_lab(rgb)[0], Color(hx).convert("lab-d65").coords(), atol=1e-9)
+    np.testing.assert_allclose(rgb_to_oklab(rgb)[0], Color(hx).convert("oklab").coords(), atol=1e-9)
+
+
+def test_apply_properties_fills_only_missing_fields():
+    token = ExtractedColorToken(
+        hex="#3366CC", rgb="rgb(51, 102, 204)", name="Blue", hsl="custom", confidence=0.6
+    )
+    apply_properties([token], compute_properties_batch(["#3366cc"]))
+
+    assert token.hsl == "custom"
+    assert token.hsv == "hsv(220, 75%, 80%)"
+    assert token.closest_css_named == color_utils.get_closest_css_named("#3366CC")
+    assert token.wcag_contrast_on_white == round(
+        color_utils.calculate_wcag_contrast("#3366CC", "#FFFFFF"), 2
+    )
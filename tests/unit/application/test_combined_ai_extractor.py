@@ -0,0 +1,244 @@
+"""Tests for the single-call combined AI extractor and its streaming JSON parser."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from copy_that.application.combined_ai_extractor import CombinedAIExtractor
+from copy_that.application.json_stream import JSONObjectStream
+
+ANSWER = {
+    "color": {
+        "colors": [
+            {"hex": "#1E88E5", "name": "Blue {primary}", "confidence": 0.9},
+            {"hex": "#F5F5F5", "name": 'Off "white"', "confidence": 0.8},
+        ],
+        "dominant_colors": ["#1E88E5", "#F5F5F5"],
+        "color_palette": "Cool, [flat] UI",
+    },
+    "spacing": {
+        "tokens": [{"value_px": 8, "name": "spacing-sm"}, {"value_px": 16, "name": "spacing-md"}],
+        "base_unit": 8,
+        "scale_system": "8pt",
+    },
+    "shadow": {
+        "shadows": [
+            {
+                "x_offset": 0,
+                "y_offset": 4,
+                "blur_radius": 12,
+                "spread_radius": 0,
+                "color_hex": "#000000",
+                "opacity": 0.15,
+                "shadow_type": "drop",
+                "semantic_name": "card-shadow",
+                "confidence": 0.8,
+                "is_inset": False,
+                "affects_text": False,
+            }
+        ]
+    },
+    "typography": {
+        "tokens": [
+            {
+                "font_family": "Inter",
+                "font_weight": 600,
+                "font_size": 24,
+                "line_height": 1.3,
+                "semantic_role": "heading",
+                "confidence": 0.9,
+            },
+            {"font_family": "Inter", "font_weight": 1000, "font_size": 16},
+        ],
+        "typography_palette": "Single sans family",
+    },
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 10_000])
+def test_json_stream_yields_each_member_once_complete(chunk_size):
+    text = json.dumps(ANSWER, indent=2)
+    parser = JSONObjectStream()
+    members = []
+    for i in range(0, len(text), chunk_size):
+        members.extend(parser.feed(text[i : i + chunk_size]))
+
+    assert [path for path, _ in members] == [(key,) for key in ANSWER]
+    assert {path[0]: value for path, value in members} == ANSWER
+    assert parser.closed
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10_000])
+def test_json_stream_yields_watched_array_items_before_their_member(chunk_size):
+    text = json.dumps(ANSWER)
+    parser = JSONObjectStream(items=[("color", "colors"), ("typography", "tokens")])
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[i : i + chunk_size]))
+
+    assert [path for path, _ in events] == [
+        ("color", "colors", 0),
+        ("color", "colors", 1),
+        ("color",),
+        ("spacing",),
+        ("shadow",),
+        ("typography", "tokens", 0),
+        ("typography", "tokens", 1),
+        ("typography",),
+    ]
+    assert events[1][1] == ANSWER["color"]["colors"][1]
+    assert events[6][1] == ANSWER["typography"]["tokens"][1]
+
+
+def test_json_stream_emits_values_before_the_object_closes():
+    parser = JSONObjectStream(items=[("a", "b")])
+    assert parser.feed('{"a": {"b": [{"x": "},"}, [1') == [(("a", "b", 0), {"x": "},"})]
+    assert parser.feed("], 3]}, ") == [
+        (("a", "b", 1), [1]),
+        (("a",), {"b": [{"x": "},"}, [1], 3]}),
+    ]
+    assert parser.feed('"c": "x,}"') == []
+    assert parser.feed("}") == [(("c",), "x,}")]
+
+
+def test_json_stream_skips_malformed_values():
+    parser = JSONObjectStream(items=[("t",)])
+    assert parser.feed('{"a": nope, "t": [{"v": bad}, {"v": 2}], "b": 2}') == [
+        (("t", 1), {"v": 2}),
+        (("b",), 2),
+    ]
+
+
+def _stream(text: str, chunk_size: int, consumed: list[int]):
+    async def events():
+        for i in range(0, len(text), chunk_size):
+            consumed.append(i + chunk_size)
+            delta = SimpleNamespace(content=text[i : i + chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=900))
+
+    return events()
+
+
+def _extractor(create: AsyncMock) -> CombinedAIExtractor:
+    extractor = CombinedAIExtractor(api_key="test-key")
+    extractor.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    return extractor
+
+
+@pytest.mark.asyncio
+async def test_sections_stream_into_existing_models_as_they_complete():
+    text = json.dumps(ANSWER)
+    consumed: list[int] = []
+    create = AsyncMock(return_value=_stream(text, 16, consumed))
+    extractor = _extractor(create)
+
+    sections = []
+    with patch(
+        "copy_that.application.combined_ai_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        async for section, result in extractor.stream_sections(
+            "aGVsbG8=", "image/png", max_colors=1, max_typography_tokens=5
+        ):
+            sections.append((section, result, consumed[-1]))
+
+    assert [s for s, _, _ in sections] == ["color", "spacing", "shadow", "typography"]
+    # Each section was handed out before the rest of the answer had been read
+    positions = [position for _, _, position in sections]
+    assert positions == sorted(positions)
+    assert positions[0] < len(text) / 2
+    assert positions[-2] < len(text)
+
+    color, spacing, shadow, typography = (result for _, result, _ in sections)
+    assert [c.hex for c in color.colors] == ["#1E88E5"]
+    assert color.colors[0].rgb == "rgb(30, 136, 229)"
+    assert color.extractor_used == "openai_combined"
+    assert [t.value_px for t in spacing.tokens] == [8, 16]
+    assert spacing.base_unit == 8
+    assert shadow.shadows[0].semantic_name == "card-shadow"
+    assert shadow.extractor_used == "openai_combined"
+    # The invalid second style is dropped, the valid one kept
+    assert [t.font_size for t in typography.tokens] == [24]
+    assert typography.typography_palette == "Single sans family"
+
+    kwargs = create.await_args.kwargs
+    assert kwargs["stream"] is True
+    assert kwargs["response_format"] == {"type": "json_object"}
+    assert "the 1 most important colors" in kwargs["messages"][0]["content"][0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_missing_sections_fall_back_like_per_type_extractors():
+    text = json.dumps({"shadow": ANSWER["shadow"]})
+    create = AsyncMock(return_value=_stream(text, 32, []))
+    extractor = _extractor(create)
+
+    with patch(
+        "copy_that.application.combined_ai_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        result = await extractor.extract_from_base64(
+            "aGVsbG8=", sections=["spacing", "shadow", "typography"]
+        )
+
+    assert result.color is None
+    assert len(result.shadow.shadows) == 1
+    assert result.spacing.unique_values == [4, 8, 16, 24, 32, 48]
+    assert {t.extraction_metadata["extraction_source"] for t in result.typography.tokens} == {
+        "fallback"
+    }
+    prompt = create.await_args.kwargs["messages"][0]["content"][0]["text"]
+    assert '"color"' not in prompt
+
+
+@pytest.mark.asyncio
+async def test_unknown_sections_are_rejected():
+    extractor = _extractor(AsyncMock())
+    with pytest.raises(ValueError, match="layout"):
+        await extractor.extract_from_base64("aGVsbG8=", sections=["color", "layout"])
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_handed_out_as_each_object_closes():
+    text = json.dumps(ANSWER)
+    consumed: list[int] = []
+    create = AsyncMock(return_value=_stream(text, 16, consumed))
+    extractor = _extractor(create)
+
+    events = []
+    with patch(
+        "copy_that.application.combined_ai_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        async for section, _ in extractor.stream_sections(
+            "aGVsbG8=",
+            "image/png",
+            max_colors=1,
+            on_token=lambda section, token: events.append((section, token, consumed[-1])),
+        ):
+            events.append((section, None, consumed[-1]))
+
+    # Tokens (beyond max_colors and invalid ones excepted) precede their section result
+    assert [(section, token is None) for section, token, _ in events] == [
+        ("color", False),
+        ("color", True),
+        ("spacing", False),
+        ("spacing", False),
+        ("spacing", True),
+        ("shadow", False),
+        ("shadow", True),
+        ("typography", False),
+        ("typography", True),
+    ]
+    _, color, position = events[0]
+    assert color.hex == "#1E88E5"
+    assert color.semantic_names
+    assert position < text.index('"dominant_colors"')
+    assert [token.value_px for section, token, _ in events[2:4]] == [8, 16]
+    assert events[5][1].semantic_name == "card-shadow"
+    assert events[7][1].font_family == "Inter"
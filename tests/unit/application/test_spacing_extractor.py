@@ -1,5 +1,11 @@
 """Unit tests for AI spacing extractor parsing and fallbacks."""
 
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
 from copy_that.application.spacing_extractor import AISpacingExtractor
 
 
@@ -32,3 +38,66 @@ def test_parse_spacing_response_fallback_on_empty():
     assert result.tokens  # fallback tokens present
     assert result.base_unit == 4
     assert result.scale_system == "4pt"
+
+
+@pytest.mark.asyncio
+async def test_failed_call_returns_recognizable_fallback():
+    extractor = AISpacingExtractor(api_key="dummy", model="dummy")
+    extractor.client = SimpleNamespace(
+        chat=SimpleNamespace(
+            completions=SimpleNamespace(create=AsyncMock(side_effect=RuntimeError("down")))
+        )
+    )
+
+    with patch(
+        "copy_that.application.spacing_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        result = await extractor.extract_spacing_from_base64("aGVsbG8=", "image/png", 4)
+
+    assert AISpacingExtractor.is_fallback(result)
+    parsed = extractor._parse_spacing_response(  # type: ignore[attr-defined]
+        {"tokens": [{"value_px": 8, "name": "spacing-sm"}], "base_unit": 8}, max_tokens=4
+    )
+    assert not AISpacingExtractor.is_fallback(parsed)
+
+
+@pytest.mark.asyncio
+async def test_streamed_spacing_values_reach_on_token_once_each():
+    content = json.dumps(
+        {
+            "tokens": [
+                {"value_px": 8, "name": "spacing-sm", "confidence": 0.9},
+                {"value_px": 8, "name": "dup", "confidence": 0.7},
+                {"value_px": "wide"},
+                {"value_px": 16, "name": "spacing-md", "confidence": 0.8},
+                {"value_px": 24, "name": "over-limit"},
+            ],
+            "base_unit": 8,
+        }
+    )
+
+    async def chunks():
+        for i in range(0, len(content), 8):
+            delta = SimpleNamespace(content=content[i : i + 8])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    extractor = AISpacingExtractor(api_key="dummy", model="dummy")
+    create = AsyncMock(return_value=chunks())
+    extractor.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    streamed = []
+    with patch(
+        "copy_that.application.spacing_extractor.prepare_vision_image",
+        AsyncMock(return_value=("aGVsbG8=", "image/png")),
+    ):
+        result = await extractor.extract_spacing_from_base64(
+            "aGVsbG8=", "image/png", max_tokens=4, on_token=streamed.append
+        )
+
+    assert [(t.value_px, t.name) for t in streamed] == [(8, "spacing-sm"), (16, "spacing-md")]
+    assert [t.value_px for t in result.tokens] == [8, 16]
+    assert result.base_unit == 8
+    assert create.await_args.kwargs["stream"] is True
+    assert create.await_args.kwargs["stream_options"] == {"include_usage": True}
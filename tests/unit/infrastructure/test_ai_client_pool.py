@@ -0,0 +1,342 @@
+"""AIClientPool against a local stand-in for the Anthropic and OpenAI APIs."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import pytest
+
+from copy_that.application.openai_color_extractor import OpenAIColorExtractor
+from copy_that.infrastructure.ai import AIClientPool, RetryPolicy, set_ai_client_pool
+
+FAST_RETRY = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01)
+
+
+def _anthropic_message(text: str = "ok") -> dict:
+    return {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-sonnet-4-5-20250929",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    }
+
+
+def _chat_completion(content: str = "{}") -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+    }
+
+
+def _chat_completion_events(content: str) -> list[str]:
+    """Server-sent events of a streamed chat completion, usage last."""
+    chunk = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0}
+    events = [
+        {
+            **chunk,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": content[i : i + 4]}}],
+        }
+        for i in range(0, len(content), 4)
+    ]
+    usage = {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}
+    events.append({**chunk, "model": "gpt-4o", "choices": [], "usage": usage})
+    return [json.dumps(event) for event in events] + ["[DONE]"]
+
+
+class StandInAPI:
+    """Threaded HTTP/1.1 server answering ``/v1/messages`` and ``/v1/chat/completions``."""
+
+    def __init__(self):
+        self.failures: list[tuple[int, dict[str, str]]] = []
+        self.chat_content = "{}"
+        self.delay = 0.0
+        self.requests = 0
+        self.client_ports: set[int] = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with api._lock:
+                    api.requests += 1
+                    api.client_ports.add(self.client_address[1])
+                    api.in_flight += 1
+                    api.peak_in_flight = max(api.peak_in_flight, api.in_flight)
+                    failure = api.failures.pop(0) if api.failures else None
+                try:
+                    time.sleep(api.delay)
+                    if failure is not None:
+                        status, headers = failure
+                        body = {"type": "error", "error": {"type": "api_error", "message": "x"}}
+                    elif self.path.endswith("/messages"):
+                        status, headers, body = 200, {}, _anthropic_message()
+                    elif request.get("stream"):
+                        status, headers, body = 200, {}, _chat_completion_events(api.chat_content)
+                    else:
+                        status, headers, body = 200, {}, _chat_completion(api.chat_content)
+                finally:
+                    with api._lock:
+                        api.in_flight -= 1
+                if isinstance(body, list):
+                    content_type = "text/event-stream"
+                    payload = "".join(f"data: {event}\n\n" for event in body).encode()
+                else:
+                    content_type = "application/json"
+                    payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def __enter__(self) -> "StandInAPI":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def api():
+    with StandInAPI() as server:
+        yield server
+
+
+def _pool(api: StandInAPI, **kwargs) -> AIClientPool:
+    return AIClientPool(
+        base_urls={"anthropic": api.url, "openai": f"{api.url}/v1"},
+        retry=kwargs.pop("retry", FAST_RETRY),
+        **kwargs,
+    )
+
+
+async def _ask_claude(pool: AIClientPool):
+    return await pool.anthropic("test-key").messages.create(
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=16,
+        messages=[{"role": "user", "content": "hi"}],
+    )
+
+
+@pytest.mark.asyncio
+async def test_calls_share_keep_alive_connections_and_record_usage(api):
+    pool = _pool(api)
+    try:
+        for _ in range(4):
+            message = await _ask_claude(pool)
+            assert message.content[0].text == "ok"
+        for _ in range(2):
+            await pool.openai("test-key").chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "hi"}]
+            )
+    finally:
+        await pool.aclose()
+
+    assert api.requests == 6
+    # One keep-alive connection per provider, reused by every call
+    assert len(api.client_ports) == 2
+    stats = pool.stats()["providers"]
+    assert stats["anthropic"]["requests"] == 4
+    assert stats["anthropic"]["input_tokens"] == 40
+    assert stats["anthropic"]["output_tokens"] == 20
+    assert stats["openai"]["input_tokens"] == 14
+    assert stats["openai"]["output_tokens"] == 6
+    assert stats["openai"]["by_model"]["gpt-4o"]["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_provider_limit_caps_concurrent_requests(api):
+    api.delay = 0.05
+    pool = _pool(api, provider_limits={"anthropic": 2})
+    try:
+        await asyncio.gather(*(_ask_claude(pool) for _ in range(6)))
+    finally:
+        await pool.aclose()
+
+    assert api.requests == 6
+    assert api.peak_in_flight == 2
+    assert pool.stats()["providers"]["anthropic"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_global_limit_applies_across_providers(api):
+    api.delay = 0.05
+    pool = _pool(api, max_concurrency=3)
+    try:
+        await asyncio.gather(
+            *(_ask_claude(pool) for _ in range(4)),
+            *(
+                pool.openai("test-key").chat.completions.create(
+                    model="gpt-4o", messages=[{"role": "user", "content": "hi"}]
+                )
+                for _ in range(4)
+            ),
+        )
+    finally:
+        await pool.aclose()
+
+    assert api.peak_in_flight == 3
+
+
+def test_limits_hold_across_event_loops_and_each_loop_closes_its_clients(api):
+    api.delay = 0.05
+    pool = _pool(api, provider_limits={"anthropic": 2})
+    http_clients = []
+
+    async def burst():
+        await asyncio.gather(*(_ask_claude(pool) for _ in range(3)))
+        http_clients.append(pool._loop_resources().http["anthropic"])
+
+    # e.g. the API's loop and a Celery worker loop in one process
+    threads = [threading.Thread(target=asyncio.run, args=(burst(),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api.requests == 6
+    assert api.peak_in_flight == 2
+    assert len(http_clients) == 2 and http_clients[0] is not http_clients[1]
+    assert all(client.is_closed for client in http_clients)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(api):
+    api.failures = [(429, {"Retry-After": "0"}), (529, {}), (503, {})]
+    pool = _pool(api)
+    try:
+        message = await _ask_claude(pool)
+    finally:
+        await pool.aclose()
+
+    assert message.content[0].text == "ok"
+    assert api.requests == 4
+    stats = pool.stats()["providers"]["anthropic"]
+    assert stats["retries"] == 3
+    assert stats["requests"] == 1
+    assert stats["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_and_exhausted_retries_are_raised(api):
+    api.failures = [(400, {})]
+    pool = _pool(api)
+    try:
+        with pytest.raises(anthropic.BadRequestError):
+            await _ask_claude(pool)
+        assert api.requests == 1
+
+        api.failures = [(500, {})] * 4
+        with pytest.raises(anthropic.InternalServerError):
+            await _ask_claude(pool)
+        assert api.requests == 5
+    finally:
+        await pool.aclose()
+
+    assert pool.stats()["providers"]["anthropic"]["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_streamed_calls_yield_events_and_hold_the_slot_until_done(api):
+    api.chat_content = '{"colors": []}'
+    api.failures = [(503, {})]
+    pool = _pool(api, provider_limits={"openai": 1})
+    try:
+        stream = await pool.openai("test-key").chat.completions.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": "hi"}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        text = ""
+        async for chunk in stream:
+            assert pool.stats()["providers"]["openai"]["in_flight"] == 1
+            if chunk.choices:
+                text += chunk.choices[0].delta.content or ""
+    finally:
+        await pool.aclose()
+
+    assert text == '{"colors": []}'
+    stats = pool.stats()["providers"]["openai"]
+    assert stats["in_flight"] == 0
+    assert stats["retries"] == 1
+    assert stats["requests"] == 1
+    assert stats["input_tokens"] == 7
+    assert stats["output_tokens"] == 3
+
+
+def test_retry_delay_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    delays = [policy.delay(2) for _ in range(200)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert all(0 <= policy.delay(10) <= 5.0 for _ in range(50))
+    assert policy.delay(0, retry_after=2.5) == 2.5
+    assert policy.delay(0, retry_after=60) == 5.0
+
+
+@pytest.mark.asyncio
+async def test_extractor_calls_go_through_the_global_pool(api):
+    api.chat_content = json.dumps(
+        {
+            "colors": [{"hex": "#FF5733", "name": "Coral", "confidence": 0.9}],
+            "dominant_colors": ["#FF5733"],
+            "color_palette": "Warm",
+        }
+    )
+    pool = _pool(api)
+    set_ai_client_pool(pool)
+    try:
+        result = await OpenAIColorExtractor(api_key="test-key").extract_colors_from_base64(
+            "aGVsbG8=", media_type="image/png", max_colors=3
+        )
+    finally:
+        set_ai_client_pool(None)
+        await pool.aclose()
+
+    assert result.colors[0].hex == "#FF5733"
+    assert api.requests == 1
+    assert pool.stats()["providers"]["openai"]["input_tokens"] == 7
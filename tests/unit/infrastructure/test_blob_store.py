@@ -0,0 +1,36 @@
+import pytest
+
+from copy_that.infrastructure.storage import BlobNotFoundError, LocalBlobStore
+
+DATA = bytes(range(256)) * 4
+
+
+def test_local_store_round_trip_and_ranges(tmp_path):
+    store = LocalBlobStore(tmp_path)
+    store.put("abc123", DATA, "application/octet-stream")
+
+    assert store.exists("abc123")
+    assert store.size("abc123") == len(DATA)
+    assert store.read("abc123") == DATA
+    assert store.read("abc123", 10, 20) == DATA[10:20]
+    assert store.read("abc123", len(DATA) - 5) == DATA[-5:]
+    assert (tmp_path / "ab" / "abc123").is_file()
+
+
+def test_local_store_put_is_idempotent_and_delete_is_quiet(tmp_path):
+    store = LocalBlobStore(tmp_path)
+    store.put("abc123", DATA, "application/octet-stream")
+    store.put("abc123", b"other", "application/octet-stream")
+
+    assert store.read("abc123") == DATA
+    store.delete("abc123")
+    store.delete("abc123")
+    assert store.size("abc123") is None
+    with pytest.raises(BlobNotFoundError):
+        store.read("abc123")
+
+
+@pytest.mark.parametrize("key", ["../escape", "a/b", ".hidden", ""])
+def test_local_store_rejects_path_like_keys(tmp_path, key):
+    with pytest.raises(ValueError):
+        LocalBlobStore(tmp_path).put(key, DATA, "application/octet-stream")
@@ -0,0 +1,124 @@
+import asyncio
+import operator
+import threading
+
+import pytest
+
+from copy_that.infrastructure.compute import cv_executor
+from copy_that.infrastructure.compute.cv_executor import (
+    CVExecutor,
+    CVExecutorBusyError,
+    CVTaskTimeoutError,
+)
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_runs_task_and_counts():
+    executor = CVExecutor(max_workers=2, mode="thread")
+    try:
+        assert await executor.run(operator.add, 2, 3) == 5
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["mode"] == "thread"
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_counted_and_reraised():
+    executor = CVExecutor(max_workers=1, mode="thread")
+
+    def boom():
+        raise ValueError("bad image")
+
+    try:
+        with pytest.raises(ValueError):
+            await executor.run(boom)
+        assert executor.stats()["failed"] == 1
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_saturated():
+    executor = CVExecutor(max_workers=1, max_pending=1, mode="thread")
+    release = threading.Event()
+    try:
+        blocked = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(CVExecutorBusyError):
+            await executor.run(operator.add, 1, 1)
+        release.set()
+        assert await blocked is True
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_task_timeout():
+    executor = CVExecutor(max_workers=1, mode="thread", task_timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(CVTaskTimeoutError):
+            await executor.run(release.wait, 5)
+        assert executor.stats()["timed_out"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_task_keeps_its_slot_until_it_finishes():
+    executor = CVExecutor(max_workers=1, max_pending=1, mode="thread", task_timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(CVTaskTimeoutError):
+            await executor.run(release.wait, 5)
+        # The abandoned job is still running on the worker
+        assert executor.stats()["in_flight"] == 1
+        with pytest.raises(CVExecutorBusyError):
+            await executor.run(operator.add, 1, 1)
+
+        release.set()
+        for _ in range(100):
+            if executor.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await executor.run(operator.add, 1, 1) == 2
+        assert executor.stats()["in_flight"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_mode_runs_picklable_task():
+    executor = CVExecutor(max_workers=1, mode="process")
+    try:
+        await executor.warm_up()
+        assert await executor.run(operator.mul, 6, 7) == 42
+    finally:
+        executor.shutdown()
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("CV_POOL_MODE", "thread")
+    monkeypatch.setenv("CV_POOL_WORKERS", "3")
+    monkeypatch.setenv("CV_POOL_MAX_PENDING", "5")
+    monkeypatch.setenv("CV_TASK_TIMEOUT_SECONDS", "0")
+    executor = CVExecutor.from_env()
+    assert executor.mode == "thread"
+    assert executor.max_workers == 3
+    assert executor.max_pending == 5
+    assert executor.task_timeout is None
+
+
+def test_global_executor_is_shared_and_resettable():
+    first = cv_executor.get_cv_executor()
+    assert cv_executor.get_cv_executor() is first
+    cv_executor.shutdown_cv_executor()
+    assert cv_executor.get_cv_executor() is not first
+    cv_executor.shutdown_cv_executor()
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from copy_that.infrastructure.event_loops import LoopLocal, ProcessSemaphore
+
+
+def test_values_are_per_loop_and_closed_on_loop_shutdown():
+    closed = []
+
+    async def close(value):
+        await asyncio.sleep(0)
+        closed.append(value)
+
+    values: LoopLocal[list[int]] = LoopLocal(close=close)
+
+    async def use(n):
+        value = values.get_or_create(list)
+        value.append(n)
+        assert values.get_or_create(list) is value
+        return value
+
+    first = asyncio.run(use(1))
+    second = asyncio.run(use(2))
+
+    assert first == [1] and second == [2]
+    assert closed == [[1], [2]]
+
+
+def test_popped_values_are_left_to_the_caller():
+    closed = []
+
+    async def close(value):
+        closed.append(value)
+
+    values: LoopLocal[str] = LoopLocal(close=close)
+
+    async def use():
+        values.set("client")
+        assert values.pop() == "client"
+        assert values.get() is None
+
+    asyncio.run(use())
+    assert closed == []
+
+
+def test_process_semaphore_is_shared_across_loops_and_survives_cancellation():
+    slots = ProcessSemaphore(1)
+    in_flight = peak = 0
+
+    async def hold():
+        nonlocal in_flight, peak
+        async with slots:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.02)
+            finally:
+                in_flight -= 1
+
+    async def cancelled_waiter():
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.gather(*(hold() for _ in range(3)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(cancelled_waiter(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 1
+
+    async def acquire_again():
+        await asyncio.wait_for(slots.acquire(), timeout=1)
+        slots.release()
+
+    # No slot was lost to the cancelled waiters
+    asyncio.run(acquire_again())
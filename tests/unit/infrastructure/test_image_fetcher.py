@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from copy_that.infrastructure.http.image_fetcher import (
+    ContentCache,
+    ImageFetcher,
+    ImageFetchError,
+    ImageTooLargeError,
+    UnsafeImageURLError,
+)
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 256
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    hits: dict[str, int] = {}
+
+    def do_GET(self):
+        _ImageHandler.hits[self.path] = _ImageHandler.hits.get(self.path, 0) + 1
+        if self.path == "/image.png":
+            self._send(200, PNG_BYTES, "image/png")
+        elif self.path == "/big.png":
+            self._send(200, PNG_BYTES * 10, "image/png")
+        elif self.path == "/page.html":
+            self._send(200, b"<html></html>", "text/html")
+        elif self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/image.png")
+            self.end_headers()
+        else:
+            self._send(404, b"missing", "text/plain")
+
+    def _send(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    _ImageHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_downloads_once_per_ttl(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True)
+    try:
+        first = await fetcher.fetch(f"{image_server}/image.png")
+        second = await fetcher.fetch(f"{image_server}/image.png")
+    finally:
+        await fetcher.aclose()
+
+    assert first.data == PNG_BYTES
+    assert first.content_type == "image/png"
+    assert first.sha256 == hashlib.sha256(PNG_BYTES).hexdigest()
+    assert second == first
+    assert _ImageHandler.hits["/image.png"] == 1
+    assert fetcher.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_download(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True)
+    try:
+        results = await asyncio.gather(
+            *(fetcher.fetch(f"{image_server}/image.png") for _ in range(5))
+        )
+    finally:
+        await fetcher.aclose()
+
+    assert all(r.data == PNG_BYTES for r in results)
+    assert _ImageHandler.hits["/image.png"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_url_is_refetched(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True, url_ttl=0)
+    try:
+        await fetcher.fetch(f"{image_server}/image.png")
+        await fetcher.fetch(f"{image_server}/image.png")
+    finally:
+        await fetcher.aclose()
+
+    assert _ImageHandler.hits["/image.png"] == 2
+
+
+@pytest.mark.asyncio
+async def test_size_limit(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True, max_bytes=len(PNG_BYTES) * 2)
+    try:
+        with pytest.raises(ImageTooLargeError):
+            await fetcher.fetch(f"{image_server}/big.png")
+    finally:
+        await fetcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_image_and_http_errors(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True)
+    try:
+        with pytest.raises(ImageFetchError):
+            await fetcher.fetch(f"{image_server}/page.html")
+        with pytest.raises(ImageFetchError):
+            await fetcher.fetch(f"{image_server}/missing.png")
+    finally:
+        await fetcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_follows_redirects(image_server):
+    fetcher = ImageFetcher(allow_private_hosts=True)
+    try:
+        image = await fetcher.fetch(f"{image_server}/redirect")
+    finally:
+        await fetcher.aclose()
+
+    assert image.data == PNG_BYTES
+
+
+@pytest.mark.asyncio
+async def test_private_hosts_are_refused_by_default(image_server):
+    fetcher = ImageFetcher()
+    try:
+        with pytest.raises(UnsafeImageURLError):
+            await fetcher.fetch(f"{image_server}/image.png")
+        with pytest.raises(UnsafeImageURLError):
+            await fetcher.validate_url("ftp://example.com/image.png")
+    finally:
+        await fetcher.aclose()
+
+    assert "/image.png" not in _ImageHandler.hits
+
+
+def test_content_cache_lru_eviction(tmp_path):
+    cache = ContentCache(max_bytes=10, directory=tmp_path)
+    first = cache.put(b"aaaaaa")
+    second = cache.put(b"bbbbbb")
+
+    assert cache.size == 6
+    # Evicted from memory but still served from disk
+    assert cache.get(first) == b"aaaaaa"
+    assert cache.get(second) == b"bbbbbb"
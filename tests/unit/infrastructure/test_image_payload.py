@@ -0,0 +1,147 @@
+"""Pre-send image optimization for AI vision calls."""
+
+import asyncio
+import base64
+import io
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.infrastructure.ai import (
+    VISION_PROFILES,
+    VisionImageOptimizer,
+    optimize_vision_image,
+)
+
+TEST_IMAGES = sorted((Path(__file__).parents[3] / "test_images").glob("*.jpeg"))
+
+
+def _encode(img: Image.Image, fmt: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _photo(width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 12, (height, width, 3))
+    pixels = np.clip(gradient + noise + [0, 40, 80], 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels, "RGB")
+
+
+def _decoded(payload: dict) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(payload["data"])))
+
+
+def _lab_grid(data: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    small = cv2.resize(image, (128, 128), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small.astype(np.float32) / 255.0, cv2.COLOR_BGR2Lab)
+
+
+def test_large_photo_is_rotated_downscaled_and_stripped():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # stored sideways; rotate 270 degrees for display
+    data = _encode(_photo(3000, 2000), "JPEG", quality=98, exif=exif.tobytes())
+
+    payload = optimize_vision_image(data, "image/jpeg", 1568, 1_150_000)
+
+    assert payload["optimized"] is True
+    assert payload["media_type"] == "image/jpeg"
+    assert payload["sent_bytes"] < payload["original_bytes"]
+    img = _decoded(payload)
+    assert img.size == (payload["width"], payload["height"])
+    assert img.height > img.width  # upright
+    assert max(img.size) <= 1568
+    assert img.width * img.height <= 1_150_000
+    assert "exif" not in img.info
+
+
+def test_flat_graphics_stay_lossless_png():
+    img = Image.new("RGB", (1600, 1000), "#F5F5F5")
+    img.paste(Image.new("RGB", (600, 120), "#1E88E5"), (100, 100))
+    img.paste(Image.new("RGB", (300, 300), "#E53935"), (900, 400))
+    data = _encode(img, "PNG")
+
+    payload = optimize_vision_image(data, "image/png", 1024, 786_432)
+
+    assert payload["media_type"] == "image/png"
+    colors = {color for _, color in _decoded(payload).convert("RGB").getcolors(256)}
+    assert {(0xF5, 0xF5, 0xF5), (0x1E, 0x88, 0xE5), (0xE5, 0x39, 0x35)} <= colors
+
+
+def test_transparent_photo_becomes_webp():
+    img = _photo(2000, 1200).convert("RGBA")
+    img.putalpha(200)
+    data = _encode(img, "PNG")
+
+    payload = optimize_vision_image(data, "image/png", 1024, 786_432)
+
+    assert payload["media_type"] == "image/webp"
+    assert _decoded(payload).mode == "RGBA"
+    assert payload["sent_bytes"] < payload["original_bytes"]
+
+
+def test_small_compact_images_and_undecodable_input_pass_through():
+    data = _encode(_photo(200, 150), "JPEG", quality=60)
+    payload = optimize_vision_image(data, "image/jpeg", 1568, 1_150_000)
+    assert payload["optimized"] is False
+    assert base64.b64decode(payload["data"]) == data
+    assert (payload["width"], payload["height"]) == (200, 150)
+
+    payload = optimize_vision_image(b"not an image", "image/png", 1568, 1_150_000)
+    assert payload["optimized"] is False
+    assert payload["media_type"] == "image/png"
+    assert payload["width"] is None
+
+
+@pytest.mark.asyncio
+async def test_extractors_share_one_encode_per_profile():
+    optimizer = VisionImageOptimizer()
+    image_base64 = base64.b64encode(_encode(_photo(2400, 1600), "JPEG", quality=97)).decode()
+
+    results = await asyncio.gather(
+        optimizer.prepare(image_base64, "image/jpeg", "shadow"),
+        optimizer.prepare(image_base64, "image/jpeg", "spacing"),
+        optimizer.prepare(f"data:image/jpeg;base64,{image_base64}", "image/png", "typography"),
+    )
+    assert len(set(results)) == 1
+    stats = optimizer.stats()
+    assert stats["encodes"] == 1
+    assert stats["images"] == 3
+    assert stats["saved_bytes"] > 0
+    assert 0 < stats["saved_ratio"] < 1
+
+    color_data, _ = await optimizer.prepare(image_base64, "image/jpeg", "color")
+    assert optimizer.stats()["encodes"] == 2
+    assert len(color_data) < len(results[0][0])
+
+
+@pytest.mark.asyncio
+async def test_disabled_optimizer_sends_input_unchanged():
+    optimizer = VisionImageOptimizer(enabled=False)
+    image_base64 = base64.b64encode(_encode(_photo(2400, 1600), "JPEG")).decode()
+
+    assert await optimizer.prepare(image_base64, "image/jpeg", "color") == (
+        image_base64,
+        "image/jpeg",
+    )
+    assert optimizer.stats()["images"] == 0
+
+
+@pytest.mark.parametrize("path", TEST_IMAGES[:2], ids=lambda p: p.name)
+@pytest.mark.parametrize("purpose", ["color", "typography"])
+def test_sample_images_keep_colors_within_noticeable_difference(path, purpose):
+    data = path.read_bytes()
+    profile = VISION_PROFILES[purpose]
+
+    payload = optimize_vision_image(data, "image/jpeg", profile.max_edge, profile.max_pixels)
+
+    sent = base64.b64decode(payload["data"])
+    assert len(sent) < len(data)
+    delta_e = np.linalg.norm(_lab_grid(data) - _lab_grid(sent), axis=2)
+    assert delta_e.mean() < 2.0
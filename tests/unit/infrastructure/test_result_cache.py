@@ -0,0 +1,192 @@
+import asyncio
+import base64
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+
+from copy_that.infrastructure.cache import redis_cache
+from copy_that.infrastructure.cache.result_cache import ResultCache, content_hash, result_key
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"\x01" * 64
+
+
+class DummyAsyncRedis:
+    def __init__(self):
+        self.storage = {}
+
+    async def get(self, key):
+        return self.storage.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.storage[key] = value
+
+
+class Palette(BaseModel):
+    colors: list[str]
+
+
+def test_content_hash_ignores_encoding():
+    encoded = base64.b64encode(IMAGE).decode()
+    assert content_hash(IMAGE) == content_hash(encoded)
+    assert content_hash(IMAGE) == content_hash(f"data:image/png;base64,{encoded}")
+
+
+def test_result_key_varies_with_extractor_version_and_params():
+    base = result_key(IMAGE, "cv-color", "1.0", max_colors=8)
+    assert base == result_key(IMAGE, "cv-color", "1.0", max_colors=8)
+    assert base != result_key(IMAGE, "cv-color", "1.0", max_colors=12)
+    assert base != result_key(IMAGE, "cv-color", "1.1", max_colors=8)
+    assert base != result_key(IMAGE, "ai-color", "1.0", max_colors=8)
+
+
+@pytest.mark.asyncio
+async def test_memory_hit_skips_factory_and_returns_copy():
+    cache = ResultCache(use_redis=False)
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        return {"colors": ["#ffffff"]}
+
+    first = await cache.get_or_compute("k", factory)
+    first["colors"].append("#000000")
+    second = await cache.get_or_compute("k", factory)
+
+    assert calls == 1
+    assert second == {"colors": ["#ffffff"]}
+    assert cache.stats()["memory_hit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_computation():
+    cache = ResultCache(use_redis=False)
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", factory) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [[1, 2, 3]] * 5
+    assert cache.stats()["shared"] == 4
+
+
+@pytest.mark.asyncio
+async def test_private_computation_is_not_shared_but_is_cached():
+    cache = ResultCache(use_redis=False)
+    started = asyncio.Event()
+    cancelled = False
+
+    async def private():
+        nonlocal cancelled
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return ["private"]
+
+    async def shared():
+        return ["shared"]
+
+    private_call = asyncio.ensure_future(cache.get_or_compute("k", private, single_flight=False))
+    await started.wait()
+    # A concurrent caller does not wait on (or get cancelled with) the private run
+    assert await cache.get_or_compute("k", shared) == ["shared"]
+    private_call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await private_call
+    assert cancelled
+    assert await cache.get_or_compute("k", private, single_flight=False) == ["shared"]
+    assert cache.stats()["shared"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_survives_process_cache():
+    fake_redis = DummyAsyncRedis()
+    writer = ResultCache(redis_cache.RedisCache(fake_redis))
+
+    async def factory():
+        return {"value": 42}
+
+    await writer.get_or_compute("k", factory)
+    assert fake_redis.storage
+
+    # A fresh process-local tier (another worker) is served from Redis
+    reader = ResultCache(redis_cache.RedisCache(fake_redis))
+    factory_mock = MagicMock()
+    assert await reader.get_or_compute("k", factory_mock) == {"value": 42}
+    factory_mock.assert_not_called()
+    assert reader.stats()["redis_hit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_model_roundtrip_and_uncacheable_results():
+    cache = ResultCache(use_redis=False)
+
+    async def palette():
+        return Palette(colors=["#112233"])
+
+    first = await cache.get_or_compute_model("cv-color", Palette, IMAGE, palette, max_colors=4)
+    second = await cache.get_or_compute_model("cv-color", Palette, IMAGE, palette, max_colors=4)
+    assert first == second == Palette(colors=["#112233"])
+    assert cache.stats()["entries"] == 1
+
+    double = MagicMock()
+
+    async def mocked():
+        return double
+
+    assert await cache.get_or_compute_model("cv-color", Palette, b"other", mocked) is double
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_results_are_not_cached_and_models_are_keyed_apart():
+    cache = ResultCache(use_redis=False)
+    answers = [Palette(colors=[]), Palette(colors=["#112233"])]
+    calls = 0
+
+    async def palette():
+        nonlocal calls
+        calls += 1
+        return answers.pop(0)
+
+    def lookup(version: str) -> Any:
+        return cache.get_or_compute_model(
+            "ai-color", Palette, IMAGE, palette, version=version, cache_if=lambda r: r.colors
+        )
+
+    # The empty stand-in answer is returned but the next request tries again
+    assert await lookup("gpt-4o") == Palette(colors=[])
+    assert await lookup("gpt-4o") == Palette(colors=["#112233"])
+    assert await lookup("gpt-4o") == Palette(colors=["#112233"])
+    assert calls == 2
+
+    answers.append(Palette(colors=["#445566"]))
+    assert await lookup("gpt-4o-mini") == Palette(colors=["#445566"])
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_computes(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "0")
+    cache = ResultCache.from_env()
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        return {"n": calls}
+
+    await cache.get_or_compute("k", factory)
+    await cache.get_or_compute("k", factory)
+    assert calls == 2
@@ -10,9 +10,10 @@ This module provides extensive test coverage for:
 - get_color_token endpoint
 """
 
+import base64
 import json
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import anthropic
 import pytest
@@ -26,12 +27,32 @@ from copy_that.application.color_extractor import AIColorExtractor, ExtractedCol
 from copy_that.application.openai_color_extractor import OpenAIColorExtractor
 from copy_that.domain.models import ColorToken, ExtractionJob, Project
 from copy_that.infrastructure.database import Base, get_db
+from copy_that.infrastructure.http import FetchedImage, ImageTooLargeError, UnsafeImageURLError
 from copy_that.interfaces.api.colors import (
     get_extractor,
     serialize_color_token,
 )
 from copy_that.interfaces.api.main import app
 
+# 16x16 green PNG
+GREEN_PNG_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAYAAAAf8/9hAAAAHElEQVR42mNgGAWjYBSMglEwCkbBKBgFo2AUjIJRMBIAMAAf/Baw5d4AAAAASUVORK5CYII="
+
+
+@pytest.fixture(autouse=True)
+def image_fetcher():
+    """URL images are served by a stub fetcher instead of the network"""
+    fetcher = MagicMock()
+    fetcher.fetch = AsyncMock(
+        side_effect=lambda url: FetchedImage(
+            url=url,
+            data=base64.b64decode(GREEN_PNG_BASE64),
+            content_type="image/png",
+            sha256="0" * 64,
+        )
+    )
+    with patch("copy_that.interfaces.api.colors.get_image_fetcher", return_value=fetcher):
+        yield fetcher
+
 
 @pytest_asyncio.fixture
 async def async_db():
@@ -297,7 +318,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -312,7 +333,7 @@ class TestExtractColorsFromImageEndpoint:
 
         assert response.status_code == 200
         data = response.json()
-        assert len(data["colors"]) == 1
+        # AI colors lead; the CV pass over the fetched image appends its own
         assert data["colors"][0]["hex"] == "#FF5733"
         assert data["extractor_used"] == "gpt-4o"
 
@@ -391,7 +412,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key", "OPENAI_API_KEY": ""}),
             patch.object(
                 AIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -409,6 +430,26 @@ class TestExtractColorsFromImageEndpoint:
         data = response.json()
         assert data["extractor_used"] == "claude-sonnet-4-5"
 
+    @pytest.mark.asyncio
+    async def test_extract_colors_rejects_unsafe_url(self, client, test_project, image_fetcher):
+        """A URL the fetcher refuses is a 4xx, never handed to the AI extractor"""
+        image_fetcher.fetch.side_effect = UnsafeImageURLError("Image URL host is not allowed")
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch.object(OpenAIColorExtractor, "extract_colors_from_base64") as extract,
+        ):
+            response = await client.post(
+                "/api/v1/colors/extract",
+                json={
+                    "image_url": "http://169.254.169.254/latest/meta-data",
+                    "project_id": test_project.id,
+                },
+            )
+
+        assert response.status_code == 400
+        assert "not allowed" in response.json()["detail"]
+        extract.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_extract_colors_value_error(self, client, test_project):
         """Test extraction handles ValueError properly"""
@@ -416,7 +457,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=ValueError("Invalid image format"),
             ),
         ):
@@ -439,7 +480,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=requests.RequestException("Failed to fetch"),
             ),
         ):
@@ -462,7 +503,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key", "OPENAI_API_KEY": ""}),
             patch.object(
                 AIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=anthropic.APIError(
                     message="API error",
                     request=MagicMock(),
@@ -490,7 +531,7 @@ class TestExtractColorsFromImageEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=Exception("Unexpected error"),
             ),
         ):
@@ -572,7 +613,7 @@ class TestExtractColorsStreamingEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -594,6 +635,58 @@ class TestExtractColorsStreamingEndpoint:
         assert "extraction_complete" in content
         assert "#FF5733" in content
 
+    @pytest.mark.asyncio
+    async def test_streaming_fetches_url_once(self, client, test_project, image_fetcher):
+        """Phase 1 and Phase 3 share a single download of the URL"""
+        from copy_that.extractors.color.openai_extractor import (
+            OpenAIColorExtractor as EnrichmentExtractor,
+        )
+
+        result = MagicMock()
+        result.colors = [
+            ExtractedColorToken(hex="#FF5733", rgb="rgb(255, 87, 51)", name="Coral", confidence=0.9)
+        ]
+        result.dominant_colors = ["#FF5733"]
+        result.color_palette = "Warm palette"
+        result.extraction_confidence = 0.9
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch.object(
+                OpenAIColorExtractor, "extract_colors_from_base64", return_value=result
+            ) as phase1,
+            patch.object(
+                EnrichmentExtractor, "extract_colors_from_base64", return_value=result
+            ) as phase3,
+        ):
+            response = await client.post(
+                "/api/v1/colors/extract-streaming",
+                json={
+                    "image_url": "https://example.com/image.jpg",
+                    "project_id": test_project.id,
+                    "max_colors": 5,
+                },
+            )
+
+        assert "ai_enhancement_complete" in response.text
+        image_fetcher.fetch.assert_awaited_once_with("https://example.com/image.jpg")
+        assert phase1.call_args.args[0] == GREEN_PNG_BASE64
+        assert phase3.call_args.args[0] == GREEN_PNG_BASE64
+
+    @pytest.mark.asyncio
+    async def test_streaming_reports_fetch_failure(self, client, test_project, image_fetcher):
+        """A refused URL ends the stream with an error event"""
+        image_fetcher.fetch.side_effect = ImageTooLargeError("Image exceeds 10485760 bytes")
+        response = await client.post(
+            "/api/v1/colors/extract-streaming",
+            json={"image_url": "https://example.com/huge.png", "project_id": test_project.id},
+        )
+
+        events = [json.loads(line[6:]) for line in response.text.splitlines() if line]
+        assert events == [
+            {"error": "Image exceeds 10485760 bytes", "phase": -1, "status": "fetch_failed"}
+        ]
+
     @pytest.mark.asyncio
     async def test_streaming_success_with_base64(self, client, async_db, test_project):
         """Test successful streaming extraction from base64"""
@@ -705,7 +798,7 @@ class TestExtractColorsStreamingEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -731,7 +824,7 @@ class TestExtractColorsStreamingEndpoint:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=Exception("Stream error"),
             ),
         ):
@@ -1046,7 +1139,7 @@ class TestDirectFunctionCalls:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -1263,7 +1356,7 @@ class TestDirectFunctionCalls:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=ValueError("Invalid image format"),
             ),
             pytest.raises(HTTPException) as exc_info,
@@ -1291,7 +1384,7 @@ class TestDirectFunctionCalls:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=requests.RequestException("Network error"),
             ),
             pytest.raises(HTTPException) as exc_info,
@@ -1320,7 +1413,7 @@ class TestDirectFunctionCalls:
             patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key", "OPENAI_API_KEY": ""}),
             patch.object(
                 AIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=anthropic.APIError(
                     message="API quota exceeded",
                     request=MagicMock(),
@@ -1352,7 +1445,7 @@ class TestDirectFunctionCalls:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 side_effect=RuntimeError("Unexpected system error"),
             ),
             pytest.raises(HTTPException) as exc_info,
@@ -1426,7 +1519,7 @@ class TestDirectFunctionCoverage:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -1441,7 +1534,7 @@ class TestDirectFunctionCoverage:
 
         assert response.status_code == 200
         data = response.json()
-        assert len(data["colors"]) == 2
+        assert [c["hex"] for c in data["colors"][:2]] == ["#FF5733", "#3498DB"]
         assert data["extraction_confidence"] == 0.92
         assert data["extractor_used"] == "gpt-4o"
 
@@ -1514,7 +1607,7 @@ class TestDirectFunctionCoverage:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -1641,7 +1734,7 @@ class TestEdgeCases:
             patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "ANTHROPIC_API_KEY": ""}),
             patch.object(
                 OpenAIColorExtractor,
-                "extract_colors_from_image_url",
+                "extract_colors_from_base64",
                 return_value=mock_result,
             ),
         ):
@@ -11,10 +11,15 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from copy_that.application.ai_shadow_extractor import ShadowExtractionResult
+from copy_that.application.ai_typography_extractor import (
+    ExtractedTypographyToken,
+    TypographyExtractionResult,
+)
 from copy_that.application.color_extractor import ColorExtractionResult, ExtractedColorToken
 from copy_that.application.spacing_models import SpacingExtractionResult, SpacingToken
 from copy_that.domain.models import Base as ModelBase
-from copy_that.domain.models import ColorToken, Project, ProjectSnapshot
+from copy_that.domain.models import ColorToken, Project, ProjectSnapshot, TypographyToken
 from copy_that.domain.models import SpacingToken as DBSpacing
 from copy_that.infrastructure.database import Base, get_db
 from copy_that.interfaces.api.main import app
@@ -119,11 +124,11 @@ async def test_extract_stream_persists_tokens_and_snapshot(client, async_db, pro
     with (
         patch.dict(os.environ, {"OPENAI_API_KEY": "test"}),
         patch(
-            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_base64",
+            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_context",
             return_value=_fake_color_result(),
         ),
         patch(
-            "copy_that.interfaces.api.multi_extract.CVSpacingExtractor.extract_from_base64",
+            "copy_that.interfaces.api.multi_extract.CVSpacingExtractor.extract_from_context",
             return_value=_fake_spacing_result(),
         ),
         patch(
@@ -155,6 +160,142 @@ async def test_extract_stream_persists_tokens_and_snapshot(client, async_db, pro
     assert len(snapshots) == 1
 
 
+def _fake_typography_result() -> TypographyExtractionResult:
+    token = ExtractedTypographyToken(
+        font_family="Inter",
+        font_weight=600,
+        font_size=24,
+        line_height=1.3,
+        semantic_role="heading",
+        confidence=0.9,
+    )
+    return TypographyExtractionResult(tokens=[token], extraction_confidence=0.9)
+
+
+@pytest.mark.asyncio
+async def test_extract_stream_combined_mode_streams_each_section(client, async_db, project):
+    """Combined mode forwards every AI section from one call and persists typography too."""
+
+    async def sections(*args, **kwargs):
+        kwargs["on_token"]("color", _fake_color_result().colors[0])
+        yield "color", _fake_color_result()
+        yield "spacing", _fake_spacing_result()
+        yield "shadow", ShadowExtractionResult(extractor_used="openai_combined")
+        yield "typography", _fake_typography_result()
+
+    with (
+        patch(
+            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_context",
+            return_value=_fake_color_result(),
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.CVSpacingExtractor.extract_from_context",
+            return_value=_fake_spacing_result(),
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.CombinedAIExtractor.stream_sections",
+            side_effect=sections,
+        ) as stream_sections,
+        patch(
+            "copy_that.interfaces.api.multi_extract.OpenAIColorExtractor.extract_colors_from_base64",
+        ) as per_type_color,
+    ):
+        resp = await client.post(
+            "/api/v1/extract/stream",
+            json={
+                "image_base64": "data:image/png;base64,AAA",
+                "project_id": project.id,
+                "ai_mode": "combined",
+            },
+        )
+
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("data: ", 1)[1]))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    ai_types = [data["type"] for event, data in events if data.get("source") == "ai"]
+    assert ai_types == ["color", "color", "spacing", "shadow", "typography"]
+    assert events[2][0] == "ai_token"
+    assert events[2][1]["token"]["hex"] == "#abcdef"
+    assert events[-1][0] == "complete"
+    assert events[-1][1]["typography_count"] == 1
+    assert events[-1][1]["ai_mode"] == "combined"
+    assert stream_sections.call_args.kwargs["max_typography_tokens"] == 15
+    per_type_color.assert_not_called()
+
+    typography = (await async_db.execute(select(TypographyToken))).scalars().all()
+    assert [t.font_family for t in typography] == ["Inter"]
+    snapshot = (await async_db.execute(select(ProjectSnapshot))).scalars().one()
+    assert json.loads(snapshot.data)["typography"][0]["font_size"] == 24
+
+
+@pytest.mark.asyncio
+async def test_extract_stream_forwards_ai_tokens_before_each_section(client):
+    """Per-type mode sends every streamed AI token ahead of the full section result."""
+    color = _fake_color_result()
+    spacing = _fake_spacing_result()
+
+    async def stream_colors(*args, on_token, **kwargs):
+        for token in color.colors:
+            on_token(token)
+        return color
+
+    async def stream_spacing(*args, on_token, **kwargs):
+        on_token(spacing.tokens[0])
+        return spacing
+
+    async def stream_shadows(*args, on_token, **kwargs):
+        return ShadowExtractionResult()
+
+    with (
+        patch(
+            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_context",
+            return_value=_fake_color_result(),
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.CVSpacingExtractor.extract_from_context",
+            return_value=_fake_spacing_result(),
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.OpenAIColorExtractor.extract_colors_from_base64",
+            side_effect=stream_colors,
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.AISpacingExtractor.extract_spacing_from_base64",
+            side_effect=stream_spacing,
+        ),
+        patch(
+            "copy_that.interfaces.api.multi_extract.AIShadowExtractor.extract_shadows",
+            side_effect=stream_shadows,
+        ),
+    ):
+        resp = await client.post(
+            "/api/v1/extract/stream", json={"image_base64": "data:image/png;base64,AAA"}
+        )
+
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("data: ", 1)[1]))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    ai_events = [(event, data["type"]) for event, data in events if data.get("source") == "ai"]
+    for section in ("color", "spacing"):
+        assert ai_events.index(("ai_token", section)) < ai_events.index(("token", section))
+    assert ("ai_token", "shadow") not in ai_events
+    color_token = next(data for event, data in events if event == "ai_token")
+    assert color_token["index"] == 0
+    assert color_token["token"]["hex"] == "#abcdef"
+    assert events[-1] == (
+        "complete",
+        {
+            "status": "ok",
+            "ai_mode": "per_type",
+            "color_count": 1,
+            "spacing_count": 1,
+            "shadow_count": 0,
+        },
+    )
+
+
 @pytest.mark.asyncio
 async def test_extract_stream_project_not_found(client):
     """Should emit error event when project does not exist."""
@@ -197,7 +338,7 @@ async def test_extract_stream_error_handling(client, project):
     with (
         patch.dict(os.environ, {"OPENAI_API_KEY": "test"}),
         patch(
-            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_base64",
+            "copy_that.interfaces.api.multi_extract.CVColorExtractor.extract_from_context",
             side_effect=ValueError("CV extraction failed"),
         ),
     ):
@@ -0,0 +1,185 @@
+"""Tests for cross-image micro-batching and the batch shadow runner."""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.shadowlab import batching
+from copy_that.shadowlab.batch import BatchShadowRunner, collect_images
+from copy_that.shadowlab.batching import MicroBatcher
+from copy_that.shadowlab.models.sam_refiner import SAMRefiner
+
+
+def _run_concurrently(fn, args_list):
+    results = [None] * len(args_list)
+
+    def call(i, args):
+        results[i] = fn(*args)
+
+    threads = [threading.Thread(target=call, args=(i, a)) for i, a in enumerate(args_list)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_micro_batcher_coalesces_same_key():
+    calls = []
+
+    def double(key, items):
+        calls.append((key, list(items)))
+        return [x * 2 for x in items]
+
+    batcher = MicroBatcher(double, max_batch=4, max_wait_ms=1000)
+    results = _run_concurrently(batcher.submit, [("k", i) for i in range(4)])
+
+    assert results == [0, 2, 4, 6]
+    assert len(calls) == 1 and sorted(calls[0][1]) == [0, 1, 2, 3]
+    assert batcher.stats()["mean_batch_size"] == 4
+
+
+def test_micro_batcher_flushes_after_wait_and_splits_keys():
+    batcher = MicroBatcher(
+        lambda key, items: [(key, x) for x in items], max_batch=8, max_wait_ms=20
+    )
+    results = _run_concurrently(batcher.submit, [("a", 1), ("b", 2)])
+
+    assert results == [("a", 1), ("b", 2)]
+    assert batcher.batches == 2
+
+
+def test_micro_batcher_propagates_errors():
+    def boom(key, items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(boom, max_batch=1)
+    with pytest.raises(ValueError, match="bad batch"):
+        batcher.submit("k", 1)
+
+
+def test_split_batch_copies_each_image():
+    batch = np.arange(24, dtype=np.float32).reshape(3, 8)
+    parts = batching.split_batch(batch, 3)
+
+    assert [part.shape for part in parts] == [(1, 8)] * 3
+    # Cached per image, so no slice may keep the whole batch alive
+    assert all(part.base is None for part in parts)
+    assert np.array_equal(batching.concat_batch(parts), batch)
+
+
+def test_split_batch_copies_torch_tensors():
+    torch = pytest.importorskip("torch")
+    batch = torch.arange(24, dtype=torch.float32).reshape(3, 8)
+    parts = batching.split_batch(batch, 3)
+
+    assert all(part.untyped_storage().nbytes() == 8 * 4 for part in parts)
+    assert torch.equal(batching.concat_batch(parts), batch)
+
+
+class _CountingEncoder:
+    def __init__(self):
+        self.encoder_calls = 0
+
+    def get_image_embeddings(self, pixel_values):
+        self.encoder_calls += 1
+        return pixel_values * 2
+
+
+class _Processor:
+    def __call__(self, images, return_tensors="pt", **kwargs):
+        return {"pixel_values": images.astype(np.float32)[None]}
+
+
+def test_sam_encoder_batches_concurrent_images():
+    model = _CountingEncoder()
+    refiner = SAMRefiner(model, _Processor())
+    images = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(3)]
+
+    batching.configure_inference_batching(3, max_wait_ms=2000)
+    try:
+        embeddings = _run_concurrently(refiner.embed, [(img,) for img in images])
+    finally:
+        batching.configure_inference_batching(0)
+
+    assert model.encoder_calls == 1
+    for i, emb in enumerate(embeddings):
+        assert emb.shape == (1, 8, 8, 3)
+        assert np.all(emb == 2 * i)
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    root = tmp_path / "shots"
+    (root / "nested").mkdir(parents=True)
+    for name, size in [("a.png", (64, 48)), ("nested/b.png", (96, 96)), ("c.jpg", (64, 48))]:
+        image = np.full((size[1], size[0], 3), 200, dtype=np.uint8)
+        image[10:30, 10:30] = 40
+        Image.fromarray(image).save(root / name)
+    (root / "notes.txt").write_text("not an image")
+    return root
+
+
+def test_collect_images_from_directory_and_manifests(image_dir, tmp_path):
+    assert [i.id for i in collect_images(image_dir)] == ["a.png", "c.jpg", "nested/b.png"]
+
+    text = tmp_path / "list.txt"
+    text.write_text("shots/a.png\n# comment\n\nshots/c.jpg\n")
+    assert [i.path for i in collect_images(text)] == [image_dir / "a.png", image_dir / "c.jpg"]
+
+    jsonl = tmp_path / "list.jsonl"
+    jsonl.write_text(json.dumps({"path": "shots/nested/b.png", "id": "hero"}) + "\n")
+    (item,) = collect_images(jsonl)
+    assert item.id == "hero" and item.path == image_dir / "nested" / "b.png"
+
+
+def test_runner_writes_jsonl_and_resumes(image_dir, tmp_path):
+    out = tmp_path / "out"
+    runner = BatchShadowRunner(out, workers=2, high_quality=False, write_artifacts=True)
+
+    report = runner.run(collect_images(image_dir))
+
+    assert (report.processed, report.failed, report.skipped) == (3, 0, 0)
+    assert report.images_per_second > 0
+    assert set(report.stage_percentiles) >= {"input_illumination", "fusion"}
+    assert {"p50", "p95", "p99"} <= set(report.image_percentiles)
+    assert "p95" in report.format()
+    records = [json.loads(line) for line in runner.results_path.read_text().splitlines()]
+    assert {r["id"] for r in records} == {"a.png", "c.jpg", "nested/b.png"}
+    assert all(r["status"] == "ok" and "coverage" in r["tokens"] for r in records)
+    assert (out / "artifacts" / "nested__b.png" / "final_shadow_mask.png").exists()
+
+    # Simulate an interrupted write, then resume: nothing is recomputed
+    with open(runner.results_path, "a") as f:
+        f.write('{"id": "partial')
+    resumed = runner.run(collect_images(image_dir))
+    assert (resumed.processed, resumed.skipped) == (0, 3)
+    assert runner.completed_ids() == {"a.png", "c.jpg", "nested/b.png"}
+
+
+def test_runner_records_failures_for_retry(tmp_path):
+    bad = tmp_path / "broken.png"
+    bad.write_bytes(b"not a png")
+    runner = BatchShadowRunner(tmp_path / "out", workers=1, high_quality=False)
+
+    report = runner.run(collect_images(tmp_path))
+
+    assert report.failed == 1
+    (record,) = [json.loads(line) for line in runner.results_path.read_text().splitlines()]
+    assert record["status"] == "error"
+    assert runner.completed_ids() == set()
+
+
+def test_runner_restores_previous_batching_config(tmp_path):
+    batching.configure_inference_batching(4, max_wait_ms=25)
+    try:
+        runner = BatchShadowRunner(
+            tmp_path / "out", workers=1, high_quality=False, inference_batch=8
+        )
+        runner.run([])
+        assert batching.inference_batching_config() == (4, 25)
+    finally:
+        batching.configure_inference_batching(0)
@@ -0,0 +1,177 @@
+"""Tests for the shadow stage dependency-graph executor (shadowlab.dag)."""
+
+import gc
+import threading
+import time
+import weakref
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.shadowlab.dag import (
+    StageCancelledError,
+    StageGraph,
+    StageGraphError,
+    StageNode,
+)
+from copy_that.shadowlab.orchestrator import ShadowPipelineOrchestrator
+from copy_that.shadowlab.pipeline import ShadowStageResult
+from copy_that.shadowlab.stages_v2 import run_pipeline_v2
+
+
+def _stage(name: str, outputs: tuple[str, ...], delay: float = 0.0, fail: bool = False):
+    """Stage function that sleeps, then emits ``outputs`` derived from its inputs."""
+
+    def fn(**inputs):
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        total = sum(v for v in inputs.values() if isinstance(v, int | float))
+        result = ShadowStageResult(id=name, name=name, description="", inputs=[], outputs=[])
+        return result, [], dict.fromkeys(outputs, total + 1)
+
+    return fn
+
+
+def _diamond(delay: float = 0.0, fail: str | None = None) -> StageGraph:
+    return StageGraph(
+        [
+            StageNode("a", _stage("a", ("x",)), ("seed",), ("x",)),
+            StageNode("b", _stage("b", ("y",), delay, fail == "b"), ("x",), ("y",)),
+            StageNode("c", _stage("c", ("z",), delay, fail == "c"), ("x",), ("z",)),
+            StageNode("d", _stage("d", ("out",)), ("y", "z"), ("out",)),
+        ],
+        seeds=("seed",),
+    )
+
+
+def test_independent_stages_overlap():
+    run = _diamond(delay=0.2).run({"seed": 0})
+
+    assert [s.id for s in run.stages] == ["a", "b", "c", "d"]
+    assert run.artifacts["out"] == 5  # x=1, y=z=2, out=4+1
+    b, c = run.timings["b"], run.timings["c"]
+    assert b.start_ms < c.end_ms and c.start_ms < b.end_ms
+    assert run.wall_ms < run.stage_sum_ms
+
+
+def test_stage_failure_propagates():
+    with pytest.raises(RuntimeError, match="c failed"):
+        _diamond(fail="c").run({"seed": 0})
+
+
+def test_cancellation_stops_scheduling():
+    cancel = threading.Event()
+    seen = []
+
+    def on_complete(node, stage_result, timing):
+        seen.append(node.name)
+        cancel.set()
+
+    with pytest.raises(StageCancelledError):
+        _diamond(delay=0.05).run({"seed": 0}, cancel_event=cancel, on_stage_complete=on_complete)
+    assert seen == ["a"]
+
+
+def test_graph_validation():
+    with pytest.raises(StageGraphError, match="No stage produces"):
+        StageGraph([StageNode("a", _stage("a", ("x",)), ("missing",), ("x",))])
+    with pytest.raises(StageGraphError, match="Cycle"):
+        StageGraph(
+            [
+                StageNode("a", _stage("a", ("x",)), ("y",), ("x",)),
+                StageNode("b", _stage("b", ("y",)), ("x",), ("y",)),
+            ]
+        )
+    with pytest.raises(StageGraphError, match="more than once"):
+        StageGraph(
+            [
+                StageNode("a", _stage("a", ("x",)), (), ("x",)),
+                StageNode("b", _stage("b", ("x",)), (), ("x",)),
+            ]
+        )
+    with pytest.raises(StageGraphError, match="Missing seed"):
+        _diamond().run({})
+
+
+@pytest.fixture
+def shadow_image_path(tmp_path):
+    image = np.full((96, 96, 3), 210, dtype=np.uint8)
+    image[30:70, 20:60] = 50
+    path = tmp_path / "shadow.png"
+    Image.fromarray(image).save(path)
+    return str(path)
+
+
+def test_run_pipeline_v2_on_graph(shadow_image_path):
+    result = run_pipeline_v2(shadow_image_path, high_quality=False)
+
+    assert [s.id for s in result["stages"]][0] == "shadow_stage_01_input"
+    assert len(result["stages"]) == 5
+    assert set(result["stage_timings"]) == {
+        "input_illumination",
+        "classical",
+        "ml_shadow",
+        "depth_lighting",
+        "fusion",
+    }
+    assert result["artifacts"]["final_shadow_mask"].shape == (96, 96)
+    assert result["shadow_tokens"] is not None
+
+
+def test_orchestrator_runs_all_stages(shadow_image_path, tmp_path):
+    orchestrator = ShadowPipelineOrchestrator(
+        shadow_image_path, output_dir=tmp_path / "out", verbose=False
+    )
+    result = orchestrator.run()
+
+    assert len(result["pipeline_results"]["stages"]) == 8
+    assert [entry["stage"] for entry in result["execution_log"]][0] == "input"
+    assert {entry["stage"] for entry in result["execution_log"]} >= {
+        "candidates",
+        "ml_mask",
+        "intrinsic",
+        "geometry",
+    }
+    assert "final_shadow_mask" in result["artifacts_paths"]
+
+
+def test_memory_mode_releases_artifacts_after_last_consumer():
+    refs = {}
+
+    def result(name):
+        return ShadowStageResult(id=name, name=name, description="", inputs=[], outputs=[])
+
+    def produce(seed):
+        x = np.ones(4, dtype=np.float32)
+        refs["x"] = weakref.ref(x)
+        return result("a"), [], {"x": x, "unused": np.zeros(2)}
+
+    def consume(x, label):
+        return result(label), [], {label: float(x.sum())}
+
+    def check(y, z):
+        gc.collect()
+        return result("d"), [], {"x_released": refs["x"]() is None}
+
+    graph = StageGraph(
+        [
+            StageNode("a", produce, ("seed",), ("x",)),
+            StageNode("b", consume, ("x",), ("y",), kwargs={"label": "y"}),
+            StageNode("c", consume, ("x",), ("z",), kwargs={"label": "z"}),
+            StageNode("d", check, ("y", "z"), ("x_released",)),
+        ],
+        seeds=("seed",),
+    )
+    persisted = []
+
+    run = graph.run(
+        {"seed": 0},
+        retain=("y", "x_released"),
+        on_artifacts=lambda node, artifacts: persisted.extend(artifacts),
+    )
+
+    assert run.artifacts == {"y": 4.0, "x_released": True}
+    assert sorted(persisted) == ["unused", "x", "x_released", "y", "z"]
+    assert graph.run({"seed": 0}).artifacts["x_released"] is False
@@ -0,0 +1,90 @@
+"""Tests for shadow pipeline memory mode: RSS tracking, spilling and early release."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.shadowlab.memory import RssMonitor, current_rss_bytes
+from copy_that.shadowlab.orchestrator import ShadowPipelineOrchestrator
+from copy_that.shadowlab.pipeline import ShadowPipeline
+
+requires_rss = pytest.mark.skipif(current_rss_bytes() is None, reason="RSS not readable")
+
+
+@requires_rss
+def test_rss_monitor_sees_allocation_peak():
+    with RssMonitor(interval_s=0.001) as monitor:
+        window = monitor.open_window()
+        before = current_rss_bytes()
+        block = np.ones(64 * 2**20 // 8)  # 64MB, touched
+        del block
+        peak = monitor.close_window(window)
+
+    assert peak >= before + 48 * 2**20
+
+
+def test_spilled_artifacts_are_memory_mapped(tmp_path):
+    pipeline = ShadowPipeline(tmp_path, spill_artifacts=True)
+    data = np.linspace(0, 1, 12, dtype=np.float64).reshape(3, 4)
+
+    pipeline.register_artifact("shading_map", data)
+
+    stored = pipeline.artifacts["shading_map"]
+    assert isinstance(stored, np.memmap)
+    assert stored.dtype == np.float32
+    np.testing.assert_allclose(stored, data, rtol=1e-6)
+    assert pipeline.save_artifact("shading_map") == tmp_path / "shading_map.npy"
+    np.testing.assert_allclose(np.load(tmp_path / "shading_map.npy"), data, rtol=1e-6)
+
+    pipeline.release_artifact("shading_map")
+    assert "shading_map" not in pipeline.artifacts
+    assert (tmp_path / "shading_map.npy").exists()
+
+
+@pytest.fixture
+def shadow_image_path(tmp_path):
+    image = np.full((96, 128, 3), 210, dtype=np.uint8)
+    image[30:70, 20:60] = 50
+    path = tmp_path / "shadow.png"
+    Image.fromarray(image).save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("memory_mode", ["release", "spill"])
+def test_orchestrator_memory_modes_write_same_outputs(shadow_image_path, tmp_path, memory_mode):
+    baseline = ShadowPipelineOrchestrator(
+        shadow_image_path, output_dir=tmp_path / "off", verbose=False
+    ).run()
+    orchestrator = ShadowPipelineOrchestrator(
+        shadow_image_path,
+        output_dir=tmp_path / memory_mode,
+        verbose=False,
+        memory_mode=memory_mode,
+    )
+
+    result = orchestrator.run()
+
+    assert set(result["artifacts_paths"]) == set(baseline["artifacts_paths"])
+    for name in ("final_shadow_mask", "shading_map"):
+        ours = np.asarray(Image.open(result["artifacts_paths"][name]))
+        theirs = np.asarray(Image.open(baseline["artifacts_paths"][name]))
+        assert np.array_equal(ours, theirs)
+    assert (
+        result["shadow_token_set"]["shadow_tokens"]["coverage"]
+        == baseline["shadow_token_set"]["shadow_tokens"]["coverage"]
+    )
+    if current_rss_bytes() is not None:
+        assert all(entry["peak_rss_mb"] > 0 for entry in result["execution_log"])
+        assert result["peak_rss_mb"] > 0
+
+    spilled = set(orchestrator.pipeline.artifacts)
+    if memory_mode == "spill":
+        assert {"depth_map", "normal_map", "final_shadow_mask"} <= spilled
+        assert (tmp_path / "spill" / "depth_map.npy").exists()
+    else:
+        assert spilled == set()
+
+
+def test_orchestrator_rejects_unknown_memory_mode(shadow_image_path):
+    with pytest.raises(ValueError, match="Unknown memory mode"):
+        ShadowPipelineOrchestrator(shadow_image_path, verbose=False, memory_mode="tiny")
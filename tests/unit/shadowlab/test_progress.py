@@ -0,0 +1,76 @@
+"""Tests for per-stage progress events."""
+
+import base64
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.shadowlab.dag import StageCancelledError
+from copy_that.shadowlab.orchestrator import ShadowPipelineOrchestrator
+from copy_that.shadowlab.progress import PREVIEW_LAYER_SIDE, encode_layer_preview
+from copy_that.shadowlab.tokens import analyze_image_for_shadows
+
+
+def _decode(preview):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(preview), np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+def test_layer_preview_is_downscaled_png():
+    depth = np.linspace(-3.0, 5.0, 600 * 800, dtype=np.float32).reshape(600, 800)
+
+    thumb = _decode(encode_layer_preview(depth))
+
+    assert thumb.shape == (120, PREVIEW_LAYER_SIDE)
+    assert thumb.min() == 0 and thumb.max() == 255
+    assert encode_layer_preview(np.zeros((4, 4, 2))) is None
+    assert encode_layer_preview((0.1, 0.2)) is None
+
+
+@pytest.fixture
+def shadow_image():
+    image = np.full((96, 128, 3), 210, dtype=np.uint8)
+    image[30:70, 20:60] = 50
+    return image
+
+
+def test_orchestrator_emits_event_per_stage(shadow_image, tmp_path):
+    path = tmp_path / "shadow.png"
+    Image.fromarray(shadow_image).save(path)
+    events = []
+
+    ShadowPipelineOrchestrator(
+        str(path), output_dir=tmp_path / "out", verbose=False, on_stage=events.append
+    ).run()
+
+    assert len(events) == 8
+    assert {e.stage for e in events} == {
+        "input",
+        "illumination",
+        "candidates",
+        "ml_mask",
+        "intrinsic",
+        "geometry",
+        "lighting",
+        "tokens",
+    }
+    by_stage = {e.stage: e for e in events}
+    assert set(by_stage["tokens"].previews) == {"final_shadow_mask", "shadow_overlay"}
+    assert "final_coverage" in by_stage["tokens"].metrics
+    assert all(e.duration_ms >= 0 for e in events)
+
+
+def test_analysis_stops_after_cancelled_step(shadow_image):
+    cancel_event = threading.Event()
+    seen = []
+
+    def on_stage(event):
+        seen.append(event.stage)
+        cancel_event.set()
+
+    with pytest.raises(StageCancelledError):
+        analyze_image_for_shadows(shadow_image, on_stage=on_stage, cancel_event=cancel_event)
+
+    assert seen == ["classical"]
@@ -0,0 +1,134 @@
+"""Tests for the encode-once SAM refiner using a numpy stand-in for SamModel."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from copy_that.shadowlab import pipeline
+from copy_that.shadowlab.models.sam_refiner import EmbeddingCache, SAMRefiner
+
+
+class StubImageProcessor:
+    def post_process_masks(self, pred_masks, original_sizes, reshaped_input_sizes):
+        return [pred_masks[0] > 0.5]
+
+
+class StubProcessor:
+    """Mimics SamProcessor: image tensors plus pass-through point prompts."""
+
+    def __init__(self):
+        self.image_processor = StubImageProcessor()
+
+    def __call__(self, images, input_points=None, return_tensors="pt"):
+        h, w = images.shape[:2]
+        inputs = {
+            "pixel_values": images.astype(np.float32)[None] / 255.0,
+            "original_sizes": np.array([[h, w]]),
+            "reshaped_input_sizes": np.array([[h, w]]),
+        }
+        if input_points is not None:
+            inputs["input_points"] = np.asarray(input_points, dtype=np.float32)
+        return inputs
+
+
+class StubSamModel:
+    """Encoder returns the image; decoder paints a disk around each point prompt."""
+
+    def __init__(self, radius: int = 6):
+        self.radius = radius
+        self.encoder_calls = 0
+        self.decoder_calls = 0
+
+    def get_image_embeddings(self, pixel_values):
+        self.encoder_calls += 1
+        return pixel_values.copy()
+
+    def __call__(self, image_embeddings, input_points, **kwargs):
+        self.decoder_calls += 1
+        h, w = image_embeddings.shape[1:3]
+        yy, xx = np.mgrid[:h, :w]
+        n_prompts = input_points.shape[1]
+        masks = np.zeros((1, n_prompts, 3, h, w), dtype=np.float32)
+        for i, (x, y) in enumerate(input_points[0, :, 0]):
+            masks[0, i, :] = ((xx - x) ** 2 + (yy - y) ** 2) <= self.radius**2
+        return SimpleNamespace(pred_masks=masks)
+
+
+@pytest.fixture
+def image() -> np.ndarray:
+    rgb = np.full((64, 64, 3), 200, dtype=np.uint8)
+    rgb[10:30, 10:30] = 40
+    rgb[40:60, 35:55] = 40
+    return rgb
+
+
+def test_all_prompts_share_one_encode(image):
+    model = StubSamModel()
+    refiner = SAMRefiner(model, StubProcessor())
+
+    masks = refiner.predict_masks(image, [(20, 20), (45, 50), (5, 60)])
+
+    assert masks.shape == (3, 64, 64)
+    assert masks.dtype == np.float32
+    assert masks[0, 20, 20] == 1.0 and masks[1, 50, 45] == 1.0
+    assert model.encoder_calls == 1
+    assert model.decoder_calls == 1
+
+
+def test_embeddings_are_cached_by_image_content(image):
+    model = StubSamModel()
+    refiner = SAMRefiner(model, StubProcessor())
+
+    refiner.predict_masks(image, [(20, 20)])
+    refiner.predict_masks(image.copy(), [(45, 50)])
+    assert model.encoder_calls == 1
+    assert refiner.cache.hits == 1
+
+    other = image.copy()
+    other[0, 0] = 0
+    refiner.predict_masks(other, [(20, 20)])
+    assert model.encoder_calls == 2
+
+
+def test_embedding_cache_evicts_by_bytes():
+    cache = EmbeddingCache(max_bytes=250)
+    cache.put("a", np.zeros(100, dtype=np.uint8))
+    cache.put("b", np.zeros(100, dtype=np.uint8))
+    assert cache.get("a") is not None  # refresh "a"
+    cache.put("c", np.zeros(100, dtype=np.uint8))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size == 200
+
+    cache.put("huge", np.zeros(1000, dtype=np.uint8))
+    assert cache.get("huge") is None
+
+
+def test_pipeline_refinement_uses_single_encode(monkeypatch):
+    model = StubSamModel(radius=4)
+    refiner = SAMRefiner(model, StubProcessor())
+    monkeypatch.setattr(pipeline, "_get_sam_refiner", lambda: refiner)
+
+    rgb = np.full((64, 64, 3), 0.8, dtype=np.float32)
+    shadow = np.zeros((64, 64), dtype=np.float32)
+    for y, x in [(8, 8), (8, 50), (30, 30), (50, 10), (50, 50), (30, 5)]:
+        shadow[y - 3 : y + 3, x - 3 : x + 3] = 0.9
+
+    refined = pipeline._refine_shadow_boundaries_sam(rgb, shadow)
+
+    assert refined.shape == shadow.shape
+    assert model.encoder_calls == 1
+    assert model.decoder_calls == 1
+    # Regions whose centroid was prompted keep (or raise) their probability
+    assert refined[30, 30] >= 0.9
+    # Background outside any SAM mask is attenuated as before
+    assert refined[0, 32] == 0.0
+
+
+def test_pipeline_returns_input_without_sam(monkeypatch):
+    monkeypatch.setattr(pipeline, "_get_sam_refiner", lambda: None)
+    shadow = np.random.default_rng(0).random((16, 16)).astype(np.float32)
+
+    assert pipeline._refine_shadow_boundaries_sam(np.zeros((16, 16, 3)), shadow) is shadow
@@ -0,0 +1,123 @@
+"""Tests for tiled and preview execution of the shadow pipeline."""
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from copy_that.shadowlab.classical import ShadowClassicalConfig, detect_shadows_classical
+from copy_that.shadowlab.pipeline import (
+    classical_shadow_candidates,
+    depth_to_normals,
+    illumination_invariant_v,
+)
+from copy_that.shadowlab.stages_v2 import run_pipeline_v2
+from copy_that.shadowlab.tiling import (
+    iter_tiles,
+    map_tiles,
+    preview_size,
+    pyramid_gaussian_blur,
+    refine_uncertain_tiles,
+    tile_size_for,
+    uint8_percentiles,
+)
+
+
+@pytest.fixture
+def scene_rgb():
+    rng = np.random.default_rng(0)
+    image = np.full((300, 420, 3), 0.8, dtype=np.float32)
+    image[60:200, 80:260] = 0.25
+    image[220:280, 300:400] = 0.4
+    image += rng.normal(0, 0.02, image.shape).astype(np.float32)
+    return np.clip(image, 0, 1)
+
+
+def test_iter_tiles_cover_frame_exactly_once():
+    coverage = np.zeros((130, 250), dtype=int)
+    for tile in iter_tiles(130, 250, 64, halo=5):
+        coverage[tile.core] += 1
+        assert tile.py0 <= tile.y0 and tile.py1 >= tile.y1
+    assert np.all(coverage == 1)
+
+
+def test_map_tiles_with_halo_matches_whole_frame():
+    image = np.random.default_rng(1).random((150, 210), dtype=np.float32)
+
+    def blur(x):
+        return cv2.blur(x, (9, 9), borderType=cv2.BORDER_REFLECT)
+
+    # A halo of at least the kernel radius gives every tile core full context
+    tiled = map_tiles(blur, (image,), tile_size=64, halo=4)
+    assert np.allclose(tiled, blur(image), atol=1e-6)
+
+
+def test_uint8_percentiles_match_numpy():
+    values = np.random.default_rng(2).integers(0, 256, (97, 53), dtype=np.uint8)
+    q = [0, 2, 20, 50, 98, 100]
+    np.testing.assert_allclose(uint8_percentiles(values, q), np.percentile(values, q))
+
+
+def test_pyramid_blur_approximates_wide_gaussian(scene_rgb):
+    exact = cv2.GaussianBlur(scene_rgb, (0, 0), 40)
+    approx = pyramid_gaussian_blur(scene_rgb, 241, 40)
+    assert approx.shape == scene_rgb.shape
+    assert np.abs(approx - exact).mean() < 0.01
+
+
+def test_tiled_quality_reproduces_full_quality(scene_rgb):
+    tile = 128
+
+    v_full = illumination_invariant_v(scene_rgb)
+    np.testing.assert_array_equal(illumination_invariant_v(scene_rgb, tile_size=tile), v_full)
+
+    np.testing.assert_allclose(
+        classical_shadow_candidates(v_full, 20.0, 100, tile_size=tile),
+        classical_shadow_candidates(v_full, 20.0, 100),
+        atol=1e-6,
+    )
+
+    depth = cv2.GaussianBlur(scene_rgb[:, :, 0], (0, 0), 5)
+    normals_tiled, _ = depth_to_normals(depth, tile_size=tile)
+    normals_full, _ = depth_to_normals(depth)
+    np.testing.assert_allclose(normals_tiled, normals_full, atol=1e-6)
+
+    bgr = (scene_rgb[:, :, ::-1] * 255).astype(np.uint8)
+    tiled = detect_shadows_classical(bgr, ShadowClassicalConfig(tile_size=tile))
+    full = detect_shadows_classical(bgr)
+    np.testing.assert_allclose(tiled["shadow_soft"], full["shadow_soft"], atol=1e-6)
+
+
+def test_unknown_quality_is_rejected():
+    with pytest.raises(ValueError, match="Unknown quality"):
+        tile_size_for("ultra")
+
+
+def test_refine_only_touches_tiles_with_mask_edges():
+    mask = np.zeros((256, 256), dtype=np.float32)
+    mask[:, 100:] = 1.0
+    guide = np.where(np.arange(256) >= 96, 0.2, 0.9).astype(np.float32)[None].repeat(256, 0)
+
+    refined, fraction = refine_uncertain_tiles(mask, guide, tile_size=64)
+
+    assert fraction == pytest.approx(4 / 16)
+    np.testing.assert_array_equal(refined[:, :64], mask[:, :64])
+    np.testing.assert_array_equal(refined[:, 128:], mask[:, 128:])
+    # Edge pulled from the mask's column 100 towards the guide's column 96
+    assert refined[128, 98] > 0.5
+
+
+def test_preview_quality_returns_full_resolution_mask(scene_rgb, tmp_path, monkeypatch):
+    monkeypatch.setattr("copy_that.shadowlab.stages_v2.preview_size", lambda h, w: (h // 2, w // 2))
+    path = tmp_path / "scene.png"
+    Image.fromarray((scene_rgb * 255).astype(np.uint8)).save(path)
+
+    result = run_pipeline_v2(str(path), high_quality=False, quality="preview")
+
+    assert result["quality"] == "preview"
+    assert result["artifacts"]["final_shadow_mask"].shape == (300, 420)
+    assert result["artifacts"]["shadow_overlay"].shape == (300, 420, 3)
+    assert result["artifacts"]["illumination_map"].shape == preview_size(300, 420, 210)
+    assert 0.0 <= result["refined_fraction"] <= 1.0
+    assert "preview_refine" in result["stage_timings"]
+    assert 0.0 <= result["shadow_tokens"].coverage <= 1.0
@@ -1,5 +1,6 @@
 """Tests for batch color extraction service"""
 
+import asyncio
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -36,7 +37,7 @@ def batch_extractor(mock_extractor):
 @pytest.mark.asyncio
 async def test_extract_batch_single_image(batch_extractor, sample_color_tokens):
     """Test extracting colors from a single image"""
-    batch_extractor.extractor.extract_colors_from_image_url = MagicMock(
+    batch_extractor.extractor.extract_colors_from_image_url = AsyncMock(
         return_value=sample_color_tokens
     )
 
@@ -55,7 +56,7 @@ async def test_extract_batch_single_image(batch_extractor, sample_color_tokens):
 @pytest.mark.asyncio
 async def test_extract_batch_multiple_images(batch_extractor, sample_color_tokens):
     """Test extracting colors from multiple images"""
-    batch_extractor.extractor.extract_colors_from_image_url = MagicMock(
+    batch_extractor.extractor.extract_colors_from_image_url = AsyncMock(
         return_value=sample_color_tokens
     )
 
@@ -85,7 +86,7 @@ async def test_extract_batch_with_error_handling(batch_extractor):
         Exception("Network error"),
         [ExtractedColorToken(hex="#0000FF", rgb="rgb(0, 0, 255)", name="Blue", confidence=0.90)],
     ]
-    batch_extractor.extractor.extract_colors_from_image_url = MagicMock(side_effect=side_effects)
+    batch_extractor.extractor.extract_colors_from_image_url = AsyncMock(side_effect=side_effects)
 
     tokens, stats = await batch_extractor.extract_batch(
         image_urls=[
@@ -109,9 +110,9 @@ async def test_extract_batch_respects_concurrency_limit(batch_extractor, sample_
 
     call_times = []
 
-    def tracked_extract(*args, **kwargs):
+    async def tracked_extract(*args, **kwargs):
         call_times.append(time.monotonic())
-        time.sleep(0.01)  # Simulate work
+        await asyncio.sleep(0.01)  # Simulate work
         return sample_color_tokens
 
     batch_extractor.extractor.extract_colors_from_image_url = tracked_extract
@@ -133,7 +134,7 @@ async def test_extract_batch_respects_concurrency_limit(batch_extractor, sample_
 @pytest.mark.asyncio
 async def test_extract_batch_with_custom_delta_e_threshold(batch_extractor, sample_color_tokens):
     """Test that custom delta_e_threshold is passed to aggregator"""
-    batch_extractor.extractor.extract_colors_from_image_url = MagicMock(
+    batch_extractor.extractor.extract_colors_from_image_url = AsyncMock(
         return_value=sample_color_tokens
     )
 
@@ -150,7 +151,7 @@ async def test_extract_batch_with_custom_delta_e_threshold(batch_extractor, samp
 async def test_persist_aggregated_library(batch_extractor):
     """Test persisting aggregated tokens to database"""
     mock_db = AsyncMock()
-    mock_db.execute = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=MagicMock())
     mock_db.commit = AsyncMock()
 
     tokens = [
@@ -184,12 +185,12 @@ async def test_persist_aggregated_library(batch_extractor):
 
 @pytest.mark.asyncio
 async def test_persist_aggregated_library_batch_insert(batch_extractor):
-    """Test that large token sets are inserted in batches"""
+    """Test that large token sets are inserted with a single multi-row statement"""
     mock_db = AsyncMock()
-    mock_db.execute = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=MagicMock())
     mock_db.commit = AsyncMock()
 
-    # Create 250 tokens (should be split into 3 batches with batch_size=100)
+    # Create 250 tokens
     tokens = [
         Token(
             id=f"token/color/{i:03d}",
@@ -215,6 +216,6 @@ async def test_persist_aggregated_library_batch_insert(batch_extractor):
     )
 
     assert token_count == 250
-    # Should be called 3 times (batch insert) + 1 final commit
-    assert mock_db.execute.call_count == 3
+    # One round-trip for all rows + 1 final commit
+    assert mock_db.execute.call_count == 1
     assert mock_db.commit.call_count == 1
@@ -0,0 +1,72 @@
+import random
+
+from copy_that.application.color_extractor import ExtractedColorToken
+from copy_that.application.color_utils import calculate_delta_e
+from copy_that.tokens.color.aggregator import AggregatedColorToken, ColorAggregator
+
+
+def _batch(images: int, per_image: int, seed: int = 1) -> list[list[ExtractedColorToken]]:
+    rng = random.Random(seed)
+    bases = [[rng.randint(0, 255) for _ in range(3)] for _ in range(40)]
+    batch = []
+    for _ in range(images):
+        colors = []
+        for _ in range(per_image):
+            rgb = [max(0, min(255, c + rng.randint(-4, 4))) for c in rng.choice(bases)]
+            hx = "#{:02X}{:02X}{:02X}".format(*rgb)
+            colors.append(
+                ExtractedColorToken(
+                    hex=hx,
+                    rgb=f"rgb({rgb[0]}, {rgb[1]}, {rgb[2]})",
+                    name=hx,
+                    confidence=round(rng.uniform(0.3, 1.0), 3),
+                )
+            )
+        batch.append(colors)
+    return batch
+
+
+def _legacy_aggregate(colors_batch, threshold):
+    tokens: list[AggregatedColorToken] = []
+    for image_index, image_colors in enumerate(colors_batch):
+        image_id = f"image_{image_index}"
+        for source in image_colors:
+            match = next(
+                (t for t in tokens if calculate_delta_e(source.hex, t.hex) < threshold), None
+            )
+            if match:
+                match.update_from_source(source, image_id)
+            else:
+                token = AggregatedColorToken(
+                    hex=source.hex, rgb=source.rgb, name=source.name, confidence=source.confidence
+                )
+                token.add_provenance(image_id, source.confidence)
+                tokens.append(token)
+    return tokens
+
+
+def test_aggregate_batch_matches_linear_greedy_scan():
+    batch = _batch(images=12, per_image=15)
+    library = ColorAggregator.aggregate_batch(batch, delta_e_threshold=2.3)
+    expected = _legacy_aggregate(batch, 2.3)
+
+    assert [(t.hex, t.confidence, t.provenance) for t in library.tokens] == [
+        (t.hex, t.confidence, t.provenance) for t in expected
+    ]
+
+
+def test_deduplicate_merges_within_threshold_in_order():
+    tokens = [
+        AggregatedColorToken(
+            hex="#FF0000", rgb="", name="red", confidence=0.5, provenance={"a": 0.5}
+        ),
+        AggregatedColorToken(hex="#0000FF", rgb="", name="blue", confidence=0.9),
+        AggregatedColorToken(
+            hex="#FE0000", rgb="", name="red2", confidence=0.8, provenance={"b": 0.8}
+        ),
+        AggregatedColorToken(hex="#FD0101", rgb="", name="red3", confidence=0.6),
+    ]
+    deduped = ColorAggregator(delta_e_threshold=2.3).deduplicate(tokens)
+
+    assert [t.hex for t in deduped] == ["#FE0000", "#0000FF"]
+    assert deduped[0].provenance == {"a": 0.5, "b": 0.8}
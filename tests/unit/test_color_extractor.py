@@ -1,12 +1,18 @@
 """Unit tests for AIColorExtractor service"""
 
+import base64
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
+from anthropic.types import RawContentBlockDeltaEvent, RawMessageStopEvent, TextDelta
 
 from copy_that.application.color_extractor import (
     AIColorExtractor,
     ColorExtractionResult,
     ExtractedColorToken,
 )
+from copy_that.infrastructure.http import FetchedImage, UnsafeImageURLError
 
 
 class TestExtractedColorToken:
@@ -255,6 +261,80 @@ class TestAIColorExtractor:
         unique_hex = set(color.hex for color in result.colors)
         assert len(unique_hex) <= 2  # Should have at most 2 unique colors
 
+    @pytest.mark.asyncio
+    async def test_image_url_is_downloaded_through_image_fetcher(self, extractor):
+        """URL images use the shared fetcher and reach the model as base64"""
+        fetcher = MagicMock()
+        fetcher.fetch = AsyncMock(
+            return_value=FetchedImage(
+                url="https://example.com/a.webp",
+                data=b"image-bytes",
+                content_type="image/webp",
+                sha256="0" * 64,
+            )
+        )
+        with (
+            patch("copy_that.application.color_extractor.get_image_fetcher", return_value=fetcher),
+            patch.object(extractor, "extract_colors_from_base64", AsyncMock()) as extract,
+        ):
+            await extractor.extract_colors_from_image_url("https://example.com/a.webp", 4)
+
+        fetcher.fetch.assert_awaited_once_with("https://example.com/a.webp")
+        extract.assert_awaited_once_with(
+            base64.b64encode(b"image-bytes").decode(), "image/webp", 4, on_token=None
+        )
+
+    @pytest.mark.asyncio
+    async def test_image_url_refused_by_fetcher_is_raised(self, extractor):
+        """Unsafe URLs are never downloaded by the extractor itself"""
+        fetcher = MagicMock()
+        fetcher.fetch = AsyncMock(side_effect=UnsafeImageURLError("Image URL host is not allowed"))
+        with (
+            patch("copy_that.application.color_extractor.get_image_fetcher", return_value=fetcher),
+            pytest.raises(UnsafeImageURLError),
+        ):
+            await extractor.extract_colors_from_image_url("http://127.0.0.1/a.png")
+
+    @pytest.mark.asyncio
+    async def test_streamed_answer_hands_out_each_color_as_its_line_completes(self, extractor):
+        """on_token gets each new color once; the result matches the full parse"""
+        answer = (
+            "Palette:\n"
+            "1. #1E3C8C - Navy (primary), confidence: 0.9\n"
+            "2. #C85A28 - Rust (accent)\n"
+            "Dominant: #1E3C8C, #C85A28\n"
+            "3. #F5F5F5 - Mist (background)"
+        )
+        read: list[int] = []
+
+        async def events():
+            for i in range(0, len(answer), 10):
+                read.append(i + 10)
+                yield RawContentBlockDeltaEvent(
+                    type="content_block_delta",
+                    index=0,
+                    delta=TextDelta(type="text_delta", text=answer[i : i + 10]),
+                )
+            yield RawMessageStopEvent(type="message_stop")
+
+        create = AsyncMock(return_value=events())
+        extractor.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        streamed = []
+
+        with patch(
+            "copy_that.application.color_extractor.prepare_vision_image",
+            AsyncMock(return_value=("aGVsbG8=", "image/png")),
+        ):
+            result = await extractor.extract_colors_from_base64(
+                "aGVsbG8=", "image/png", 5, on_token=lambda c: streamed.append((c, read[-1]))
+            )
+
+        assert [c.hex for c, _ in streamed] == ["#1E3C8C", "#C85A28", "#F5F5F5"]
+        assert streamed[0][1] < len(answer) / 2
+        assert streamed[0][0].confidence == 0.9
+        assert [c.hex for c in result.colors] == [c.hex for c, _ in streamed]
+        assert create.await_args.kwargs["stream"] is True
+
 
 class TestExtractedColorTokenIntegration:
     """Integration tests for color token workflow"""
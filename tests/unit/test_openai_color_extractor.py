@@ -1,6 +1,7 @@
 """Tests for OpenAI color extractor module"""
 
-from unittest.mock import MagicMock, patch
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -152,21 +153,22 @@ class TestOpenAIColorExtractor:
 
     def test_extractor_initialization(self):
         """Test extractor initialization with API key"""
-        with patch("copy_that.application.openai_color_extractor.OpenAI"):
+        with patch("copy_that.application.openai_color_extractor.get_ai_client_pool"):
             extractor = OpenAIColorExtractor(api_key="test-key")
             assert extractor.model == "gpt-4o"
 
     def test_extractor_initialization_env_var(self):
         """Test extractor initialization with environment variable"""
         with (
-            patch("copy_that.application.openai_color_extractor.OpenAI"),
+            patch("copy_that.application.openai_color_extractor.get_ai_client_pool"),
             patch.dict("os.environ", {"OPENAI_API_KEY": "env-key"}),
         ):
             extractor = OpenAIColorExtractor()
             assert extractor.model == "gpt-4o"
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_from_image_url(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_from_image_url(self, mock_get_pool):
         """Test extracting colors from image URL"""
         # Mock OpenAI response
         mock_response = MagicMock()
@@ -192,11 +194,11 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url(
+        result = await extractor.extract_colors_from_image_url(
             "http://example.com/image.jpg", max_colors=5
         )
 
@@ -206,8 +208,9 @@ class TestOpenAIColorExtractor:
         assert result.colors[0].name == "Coral"
         assert result.dominant_colors == ["#FF5733"]
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_from_base64(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_from_base64(self, mock_get_pool):
         """Test extracting colors from base64 image"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -229,19 +232,20 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_base64(
+        result = await extractor.extract_colors_from_base64(
             "base64encodeddata", media_type="image/png", max_colors=3
         )
 
         assert isinstance(result, ColorExtractionResult)
         assert result.colors[0].hex == "#0000FF"
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_enrichment(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_enrichment(self, mock_get_pool):
         """Test that extracted colors are enriched with calculated properties"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -263,11 +267,11 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         color = result.colors[0]
         # Check enriched properties
@@ -282,8 +286,9 @@ class TestOpenAIColorExtractor:
         assert color.extraction_metadata is not None
         assert color.extraction_metadata["extractor"] == "openai_gpt4v"
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_multiple(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_multiple(self, mock_get_pool):
         """Test extracting multiple colors"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -303,19 +308,20 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         assert len(result.colors) == 3
         assert result.colors[0].hex == "#FF0000"
         assert result.colors[1].hex == "#00FF00"
         assert result.colors[2].hex == "#0000FF"
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_invalid_json_error(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_invalid_json_error(self, mock_get_pool):
         """Test error handling when invalid JSON in response"""
         import json
 
@@ -323,29 +329,31 @@ class TestOpenAIColorExtractor:
         mock_response.choices = [MagicMock(message=MagicMock(content="This is not JSON"))]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
 
         # With JSON mode, invalid JSON raises JSONDecodeError
         with pytest.raises(json.JSONDecodeError):
-            extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+            await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_api_error(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_api_error(self, mock_get_pool):
         """Test error handling for API errors"""
         mock_client = MagicMock()
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
 
         with pytest.raises(Exception, match="API Error"):
-            extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+            await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_default_values(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_default_values(self, mock_get_pool):
         """Test default values when response is missing fields"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -363,11 +371,11 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         color = result.colors[0]
         assert color.hex == "#808080"
@@ -375,8 +383,9 @@ class TestOpenAIColorExtractor:
         assert color.confidence == 0.8
         assert color.usage == []
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_with_usage(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_with_usage(self, mock_get_pool):
         """Test colors with usage array"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -399,16 +408,17 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         assert result.colors[0].usage == ["buttons", "links", "icons"]
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_accessibility_calculation(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_accessibility_calculation(self, mock_get_pool):
         """Test WCAG compliance calculations"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -426,11 +436,11 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         color = result.colors[0]
         # Black on white should have high contrast
@@ -440,8 +450,9 @@ class TestOpenAIColorExtractor:
         # Black should pass AAA on white
         assert color.wcag_aaa_compliant_normal is True
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_extract_colors_response_format_used(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_response_format_used(self, mock_get_pool):
         """Test that response_format is passed to OpenAI API"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -457,22 +468,65 @@ class TestOpenAIColorExtractor:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         # Verify response_format was passed for JSON mode
         call_kwargs = mock_client.chat.completions.create.call_args[1]
         assert call_kwargs["response_format"] == {"type": "json_object"}
 
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_extract_colors_streams_each_color_to_on_token(self, mock_get_pool):
+        """Test that each color is handed out as soon as its JSON object closes"""
+        content = json.dumps(
+            {
+                "colors": [
+                    {"hex": "#FF5733", "name": "Coral {warm}", "confidence": 0.9},
+                    {"hex": "#0000FF", "name": "Blue", "confidence": 0.8},
+                ],
+                "dominant_colors": ["#FF5733", "#0000FF"],
+                "color_palette": "Warm and cool",
+            }
+        )
+        read: list[int] = []
+
+        async def chunks():
+            for i in range(0, len(content), 10):
+                read.append(i + 10)
+                yield MagicMock(choices=[MagicMock(delta=MagicMock(content=content[i : i + 10]))])
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=chunks())
+        mock_get_pool.return_value.openai.return_value = mock_client
+
+        extractor = OpenAIColorExtractor(api_key="test-key")
+        streamed = []
+        result = await extractor.extract_colors_from_image_url(
+            "http://example.com/image.jpg",
+            on_token=lambda color: streamed.append((color, read[-1])),
+        )
+
+        assert [c.hex for c, _ in streamed] == [c.hex for c in result.colors]
+        assert streamed[0][0].name == "Coral {warm}"
+        assert streamed[0][0].semantic_names
+        # The first color arrived before the rest of the answer had been read
+        assert streamed[0][1] < content.index('"dominant_colors"')
+        assert result.color_palette == "Warm and cool"
+        kwargs = mock_client.chat.completions.create.call_args[1]
+        assert kwargs["stream"] is True
+        assert kwargs["stream_options"] == {"include_usage": True}
+
 
 class TestColorVariants:
     """Test color variant calculations in extractor"""
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_tint_shade_tone_calculated(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_tint_shade_tone_calculated(self, mock_get_pool):
         """Test that tint, shade, and tone are calculated"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -488,11 +542,11 @@ class TestColorVariants:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         color = result.colors[0]
         # Tint should be lighter (more white)
@@ -509,8 +563,9 @@ class TestColorVariants:
 class TestSemanticNames:
     """Test semantic name enrichment"""
 
-    @patch("copy_that.application.openai_color_extractor.OpenAI")
-    def test_semantic_names_added(self, mock_openai_class):
+    @pytest.mark.asyncio
+    @patch("copy_that.application.openai_color_extractor.get_ai_client_pool")
+    async def test_semantic_names_added(self, mock_get_pool):
         """Test that semantic names are added to colors"""
         mock_response = MagicMock()
         mock_response.choices = [
@@ -526,11 +581,11 @@ class TestSemanticNames:
         ]
 
         mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_get_pool.return_value.openai.return_value = mock_client
 
         extractor = OpenAIColorExtractor(api_key="test-key")
-        result = extractor.extract_colors_from_image_url("http://example.com/image.jpg")
+        result = await extractor.extract_colors_from_image_url("http://example.com/image.jpg")
 
         color = result.colors[0]
         assert color.semantic_names is not None
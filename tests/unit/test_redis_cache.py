@@ -2,6 +2,7 @@
 Unit tests for Redis cache module
 """
 
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -14,6 +15,7 @@ from copy_that.infrastructure.cache.redis_cache import (
     get_redis,
     is_redis_available,
 )
+from copy_that.infrastructure.event_loops import LoopLocal
 
 
 class TestGetRedis:
@@ -24,7 +26,7 @@ class TestGetRedis:
         """Test that None is returned when REDIS_URL is not set"""
         with (
             patch.dict("os.environ", {}, clear=True),
-            patch("copy_that.infrastructure.cache.redis_cache._redis_client", None),
+            patch("copy_that.infrastructure.cache.redis_cache._redis_clients", LoopLocal()),
             patch("copy_that.infrastructure.cache.redis_cache._redis_available", True),
         ):
             result = await get_redis()
@@ -34,16 +36,35 @@ class TestGetRedis:
     async def test_returns_existing_client_if_available(self):
         """Test that existing client is returned if already initialized"""
         mock_client = MagicMock()
-        with patch("copy_that.infrastructure.cache.redis_cache._redis_client", mock_client):
+        clients: LoopLocal[MagicMock] = LoopLocal()
+        clients.set(mock_client)
+        with patch("copy_that.infrastructure.cache.redis_cache._redis_clients", clients):
             result = await get_redis()
             assert result == mock_client
 
+    def test_each_event_loop_gets_its_own_client(self):
+        """Test clients are not shared across loops (Celery tasks run their own)"""
+
+        async def connect():
+            return await get_redis()
+
+        with (
+            patch.dict("os.environ", {"REDIS_URL": "redis://localhost:6379"}),
+            patch("copy_that.infrastructure.cache.redis_cache.Redis") as mock_redis,
+        ):
+            mock_redis.from_url.side_effect = lambda *args, **kwargs: AsyncMock()
+            first, second = asyncio.run(connect()), asyncio.run(connect())
+
+        assert first is not second
+        first.aclose.assert_awaited_once()
+        second.aclose.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_connection_error_returns_none(self):
         """Test that connection errors return None"""
         with (
             patch.dict("os.environ", {"REDIS_URL": "redis://localhost:6379"}),
-            patch("copy_that.infrastructure.cache.redis_cache._redis_client", None),
+            patch("copy_that.infrastructure.cache.redis_cache._redis_clients", LoopLocal()),
             patch("copy_that.infrastructure.cache.redis_cache.Redis") as mock_redis,
         ):
             mock_instance = AsyncMock()
@@ -171,6 +192,17 @@ class TestRedisCache:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_get_and_set_handle_closed_event_loop(self):
+        """Test a client bound to a closed loop degrades to a cache miss"""
+        mock_redis = AsyncMock()
+        mock_redis.get.side_effect = RuntimeError("Event loop is closed")
+        mock_redis.setex.side_effect = RuntimeError("Event loop is closed")
+
+        cache = RedisCache(mock_redis)
+        assert await cache.get("test", "123") is None
+        await cache.set("test", "123", {"key": "value"})
+
     @pytest.mark.asyncio
     async def test_get_handles_json_decode_error(self):
         """Test get handles invalid JSON gracefully"""
@@ -0,0 +1,148 @@
+"""Tests for bulk token persistence"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select
+
+from copy_that.domain.models import (
+    ColorToken,
+    ExtractionJob,
+    ProjectSnapshot,
+    ShadowToken,
+    SpacingToken,
+)
+from copy_that.services.token_persistence_service import (
+    TokenGroup,
+    bulk_insert,
+    color_token_row,
+    persist_tokens,
+    shadow_token_row,
+    spacing_token_row,
+)
+
+
+def _color(i):
+    return SimpleNamespace(
+        hex=f"#0000{i % 256:02x}",
+        rgb=f"rgb(0, 0, {i % 256})",
+        name=f"Blue {i}",
+        design_intent=None,
+        semantic_names={"simple": "blue"} if i == 0 else None,
+        extraction_metadata=None,
+        confidence=0.9,
+        harmony=None,
+        usage=None,
+    )
+
+
+def _job(extraction_type):
+    return {"source_url": "test", "extraction_type": extraction_type, "status": "completed"}
+
+
+@pytest.fixture
+def inserts(test_db):
+    """Table names of the INSERT statements sent to the database"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO"):
+            statements.append(statement.split()[2])
+
+    engine = test_db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_session_of_500_tokens_is_one_insert_per_table(test_db, inserts):
+    groups = [
+        TokenGroup(
+            ColorToken,
+            [color_token_row(_color(i)) for i in range(250)],
+            job=_job("color"),
+        ),
+        TokenGroup(
+            ColorToken,
+            [color_token_row(_color(i)) for i in range(250, 450)],
+            job=_job("color"),
+        ),
+        TokenGroup(
+            SpacingToken,
+            [
+                spacing_token_row(
+                    SimpleNamespace(
+                        value_px=4 * i,
+                        name=f"space-{i}",
+                        semantic_role=None,
+                        spacing_type=SimpleNamespace(value="padding"),
+                        category=None,
+                        confidence=0.8,
+                        usage=["card"],
+                    )
+                )
+                for i in range(1, 51)
+            ],
+            job=_job("spacing"),
+        ),
+    ]
+
+    persisted = await persist_tokens(test_db, 1, groups, snapshot={"meta": {"source": "test"}})
+
+    assert inserts == ["extraction_jobs", "color_tokens", "spacing_tokens", "project_snapshots"]
+    assert len(set(persisted.job_ids)) == 3
+    assert [len(ids) for ids in persisted.token_ids] == [250, 200, 50]
+
+    colors = (await test_db.execute(select(ColorToken).order_by(ColorToken.id))).scalars().all()
+    assert [c.id for c in colors] == persisted.token_ids[0] + persisted.token_ids[1]
+    assert {c.extraction_job_id for c in colors[:250]} == {persisted.job_ids[0]}
+    assert {c.extraction_job_id for c in colors[250:]} == {persisted.job_ids[1]}
+    assert json.loads(colors[0].semantic_names) == {"simple": "blue"}
+    assert colors[0].created_at is not None
+
+    spacing = (await test_db.execute(select(SpacingToken))).scalars().all()
+    assert {s.spacing_type for s in spacing} == {"padding"}
+    assert json.loads(spacing[0].usage) == ["card"]
+
+    snapshot = await test_db.get(ProjectSnapshot, persisted.snapshot_id)
+    assert json.loads(snapshot.data) == {"meta": {"source": "test"}}
+
+
+@pytest.mark.asyncio
+async def test_tokens_can_join_an_existing_job_without_committing(test_db):
+    job = ExtractionJob(project_id=1, source_url="test", extraction_type="shadow")
+    test_db.add(job)
+    await test_db.commit()
+    job_id = job.id
+    shadow = SimpleNamespace(
+        x_offset=0,
+        y_offset=4,
+        blur_radius=8,
+        spread_radius=0,
+        color_hex="#000000",
+        opacity=0.3,
+        semantic_name="shadow.md",
+        shadow_type="drop",
+        is_inset=False,
+        affects_text=False,
+        confidence=0.7,
+    )
+
+    persisted = await persist_tokens(
+        test_db,
+        1,
+        [TokenGroup(ShadowToken, [shadow_token_row(shadow)], job_id=job_id)],
+        commit=False,
+    )
+    await test_db.rollback()
+
+    assert persisted.job_ids == [job_id]
+    assert (await test_db.execute(select(ShadowToken))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_without_rows_is_a_no_op(test_db, inserts):
+    assert await bulk_insert(test_db, ColorToken, []) == []
+    assert inserts == []